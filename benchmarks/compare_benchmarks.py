@@ -0,0 +1,83 @@
+"""Compare two results files of run_benchmarks.py and report the benchmarks that got slower or bigger.
+
+Usage::
+
+    python benchmarks/compare_benchmarks.py benchmarks/results/<baseline>.json benchmarks/results/<current>.json
+
+Repetitions of a benchmark are reduced to their minimum (the least noisy estimate of its cost). Exits with 1 when
+a metric grew by more than ``--threshold`` (relative), or a benchmark passing in the baseline fails now.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = ("wall_seconds", "peak_rss_bytes", "output_bytes")
+
+
+def _load_benchmarks(results_path: Path) -> tuple[str | None, dict]:
+    """Return the commit of a results file and (scale, case, name) -> {metric: minimum over repetitions or None}."""
+    report = json.loads(Path(results_path).read_text())
+    benchmarks = {}
+    for result in report["results"]:
+        key = (result["scale"], result["case"], result["name"])
+        if result["status"] != "ok":
+            # A benchmark failing in any repetition counts as failing
+            benchmarks[key] = None
+            continue
+        metrics = benchmarks.setdefault(key, {})
+        if metrics is None:
+            continue
+        for metric in METRICS:
+            metrics[metric] = min(metrics.get(metric, result[metric]), result[metric])
+    return report.get("commit"), benchmarks
+
+
+def _format(metric: str, value: float) -> str:
+    if metric == "wall_seconds":
+        return f"{value:.2f} s"
+    return f"{value / 1024**2:.1f} MB"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Relative increase reported as a regression (default: 0.10)."
+    )
+    arguments = parser.parse_args(argv)
+
+    baseline_commit, baseline = _load_benchmarks(arguments.baseline)
+    current_commit, current = _load_benchmarks(arguments.current)
+    print(f"Baseline {baseline_commit}, current {current_commit}, threshold {arguments.threshold:.0%}")
+
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        label = "/".join(key)
+        baseline_metrics, current_metrics = baseline[key], current[key]
+        if current_metrics is None:
+            if baseline_metrics is not None:
+                regressions += 1
+                print(f"REGRESSION {label}: fails (passed in the baseline)")
+            continue
+        if baseline_metrics is None:
+            print(f"fixed      {label}: passes (failed in the baseline)")
+            continue
+        for metric in METRICS:
+            before, after = baseline_metrics[metric], current_metrics[metric]
+            change = (after - before) / before if before else 0.0
+            status = "REGRESSION" if change > arguments.threshold else "ok        "
+            regressions += change > arguments.threshold
+            print(f"{status} {label} {metric}: {_format(metric, before)} -> {_format(metric, after)} ({change:+.1%})")
+
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"only in {'baseline' if key in baseline else 'current'}: {'/'.join(key)}")
+
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""Measure the compression ratio and read latency of the datasets of an NWB file under several chunkings and filters.
+
+Usage::
+
+    python benchmarks/compression_benchmark.py path/to/file.nwb --max-mb 256 --windows 20
+
+Each dataset matched by a rule of ``ibl_to_nwb.utils.dataset_policy.DEFAULT_DATASET_POLICY`` (or by
+``--pattern``) is read from the file (its first ``--max-mb`` MB), then rewritten in a scratch HDF5 file for every
+chunk layout (``file``: as in the input file, ``policy``: as the rule sets it) and filter. For each combination the
+benchmark reports the compression ratio, the write time, the time to read the whole dataset, and the median time to
+read a window (one row for rules chunking by row, e.g. a unit of waveform_mean, otherwise ``--window-seconds`` of
+the series) with the chunk cache disabled.
+
+Local reads do not show the cost of streaming from DANDI, where each chunk touched is an HTTP range request. The
+benchmark also counts the chunks and stored bytes a window reads and estimates its streaming time from
+``--latency-ms`` per request and ``--bandwidth-mbps``.
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from ibl_to_nwb.utils.dataset_policy import DEFAULT_DATASET_POLICY, DatasetPolicyRule, is_plugin_compression_available
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+
+
+def _filters() -> dict[str, dict]:
+    """Return filter name -> h5py ``create_dataset`` keywords; the hdf5plugin ones when it is installed."""
+    filters = {
+        "none": {},
+        "gzip": dict(compression="gzip", compression_opts=4),
+        "shuffle-gzip": dict(compression="gzip", compression_opts=4, shuffle=True),
+        "lzf": dict(compression="lzf"),
+        "shuffle-lzf": dict(compression="lzf", shuffle=True),
+    }
+    if is_plugin_compression_available():
+        import hdf5plugin
+
+        filters.update(
+            {
+                "blosc-zstd-shuffle": dict(hdf5plugin.Blosc(cname="zstd", clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE)),
+                "blosc-lz4-shuffle": dict(hdf5plugin.Blosc(cname="lz4", clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE)),
+                "zstd": dict(hdf5plugin.Zstd(clevel=5)),
+            }
+        )
+    return filters
+
+
+def _read_rate(dataset: h5py.Dataset) -> float | None:
+    """Return the sampling rate of the time series holding a dataset, from its starting_time or timestamps."""
+    series = dataset.parent
+    if "starting_time" in series:
+        rate = series["starting_time"].attrs.get("rate")
+        return float(rate) if rate else None
+    timestamps = series.get("timestamps")
+    if not isinstance(timestamps, h5py.Dataset) or timestamps.shape[0] < 2:
+        return None
+    duration = float(timestamps[-1]) - float(timestamps[0])
+    return (timestamps.shape[0] - 1) / duration if duration > 0 else None
+
+
+def _find_datasets(nwbfile: h5py.File, policy: tuple[DatasetPolicyRule, ...]) -> list[tuple[str, DatasetPolicyRule]]:
+    """Return (location, first matching rule) of the numeric datasets of a file matched by a rule of `policy`."""
+    matches = []
+
+    def visit(name: str, h5_object) -> None:
+        if not isinstance(h5_object, h5py.Dataset) or h5_object.dtype.kind not in "iuf" or h5_object.ndim == 0:
+            return
+        rule = next((rule for rule in policy if rule.matches(name)), None)
+        if rule is not None:
+            matches.append((name, rule))
+
+    nwbfile.visititems(visit)
+    return matches
+
+
+def _window_chunks(dataset: h5py.Dataset, start: int, stop: int) -> tuple[int, int]:
+    """Return the number of chunks, and their stored bytes, that reading rows [start, stop) of a dataset fetches."""
+    if dataset.chunks is None:
+        row_bytes = dataset.dtype.itemsize * int(np.prod(dataset.shape[1:], dtype=np.int64))
+        return 1, (stop - start) * row_bytes
+    chunk_length = dataset.chunks[0]
+    trailing_offsets = [range(0, length, chunk) for length, chunk in zip(dataset.shape[1:], dataset.chunks[1:])]
+    number_of_chunks, stored_bytes = 0, 0
+    for first_row in range((start // chunk_length) * chunk_length, stop, chunk_length):
+        for offsets in np.ndindex(*[len(axis_offsets) for axis_offsets in trailing_offsets]):
+            coordinates = (first_row, *(axis[index] for axis, index in zip(trailing_offsets, offsets)))
+            stored_bytes += dataset.id.get_chunk_info_by_coord(coordinates).size
+            number_of_chunks += 1
+    return number_of_chunks, stored_bytes
+
+
+def _benchmark_layout(
+    data: np.ndarray,
+    chunk_shape: tuple[int, ...] | None,
+    filter_keywords: dict,
+    scratch_path: Path,
+    window_starts: list[int],
+    window_length: int,
+    latency_seconds: float,
+    bandwidth_bytes_per_second: float,
+) -> dict:
+    """Write `data` with a chunk shape and filter, then time its reads."""
+    if chunk_shape is None and filter_keywords:
+        # Filters need chunks: let h5py choose them
+        chunk_shape = True
+    start = time.perf_counter()
+    with h5py.File(scratch_path, "w") as scratch_file:
+        scratch_file.create_dataset("data", data=data, chunks=chunk_shape, **filter_keywords)
+    write_seconds = time.perf_counter() - start
+
+    # No chunk cache: every read decompresses the chunks it touches, as a fresh reader would
+    with h5py.File(scratch_path, "r", rdcc_nbytes=0) as scratch_file:
+        dataset = scratch_file["data"]
+        stored_bytes = dataset.id.get_storage_size()
+        start = time.perf_counter()
+        dataset[()]
+        full_read_seconds = time.perf_counter() - start
+
+        window_seconds, window_requests, window_bytes = [], [], []
+        for window_start in window_starts:
+            window_stop = min(window_start + window_length, data.shape[0])
+            start = time.perf_counter()
+            dataset[window_start:window_stop]
+            window_seconds.append(time.perf_counter() - start)
+            number_of_chunks, chunk_bytes = _window_chunks(dataset, window_start, window_stop)
+            window_requests.append(number_of_chunks)
+            window_bytes.append(chunk_bytes)
+        chunks = list(dataset.chunks) if dataset.chunks is not None else None
+    scratch_path.unlink()
+
+    mean_requests, mean_bytes = statistics.fmean(window_requests), statistics.fmean(window_bytes)
+    return {
+        "chunk_shape": chunks,
+        "stored_bytes": stored_bytes,
+        "compression_ratio": data.nbytes / stored_bytes if stored_bytes else None,
+        "write_seconds": write_seconds,
+        "full_read_seconds": full_read_seconds,
+        "window_read_seconds": statistics.median(window_seconds),
+        "window_requests": mean_requests,
+        "window_stored_bytes": mean_bytes,
+        "window_streaming_seconds": mean_requests * latency_seconds + mean_bytes / bandwidth_bytes_per_second,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("nwbfile", type=Path)
+    parser.add_argument(
+        "--pattern",
+        action="append",
+        default=[],
+        help="Also benchmark the datasets whose location matches this regular expression (repeatable).",
+    )
+    parser.add_argument("--max-mb", type=float, default=256.0, help="Rows of each dataset read, in MB.")
+    parser.add_argument("--windows", type=int, default=20, help="Random windows read per combination.")
+    parser.add_argument("--window-seconds", type=float, default=1.0, help="Duration of a window of a time series.")
+    parser.add_argument(
+        "--window-rows", type=int, default=1000, help="Rows of a window when the rate of the series is unknown."
+    )
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Round trip of a request to DANDI.")
+    parser.add_argument("--bandwidth-mbps", type=float, default=100.0, help="Streaming bandwidth, in megabits/s.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=BENCHMARKS_FOLDER / "results" / "compression.json",
+        help="Results file (default: results/compression.json).",
+    )
+    arguments = parser.parse_args(argv)
+    if not arguments.nwbfile.is_file():
+        parser.error(f"NWB file not found: {arguments.nwbfile}")
+
+    try:
+        policy = DEFAULT_DATASET_POLICY + tuple(
+            DatasetPolicyRule(name=f"pattern:{pattern}", location_pattern=pattern) for pattern in arguments.pattern
+        )
+    except re.error as exception:
+        parser.error(f"Invalid --pattern: {exception}")
+    filters = _filters()
+    random_generator = np.random.default_rng(arguments.seed)
+    latency_seconds = arguments.latency_ms / 1e3
+    bandwidth_bytes_per_second = arguments.bandwidth_mbps * 1e6 / 8
+
+    results = []
+    with h5py.File(arguments.nwbfile, "r") as nwbfile, tempfile.TemporaryDirectory() as scratch_folder:
+        for location, rule in _find_datasets(nwbfile, policy):
+            dataset = nwbfile[location]
+            row_bytes = dataset.dtype.itemsize * int(np.prod(dataset.shape[1:], dtype=np.int64))
+            number_of_rows = min(dataset.shape[0], max(1, int(arguments.max_mb * 1024**2 // max(1, row_bytes))))
+            data = dataset[:number_of_rows]
+            rate = _read_rate(dataset)
+
+            if rule.chunk_rows is not None:
+                window_length = rule.chunk_rows
+            elif rate:
+                window_length = max(1, int(round(arguments.window_seconds * rate)))
+            else:
+                window_length = arguments.window_rows
+            window_length = min(window_length, number_of_rows)
+            window_starts = random_generator.integers(
+                0, number_of_rows - window_length + 1, size=arguments.windows
+            ).tolist()
+
+            layouts = {"file": dataset.chunks}
+            policy_chunk_shape = rule.get_chunk_shape(data.shape, data.dtype, rate=rate)
+            if policy_chunk_shape is not None:
+                layouts["policy"] = policy_chunk_shape
+            for layout, chunk_shape in layouts.items():
+                if chunk_shape is not None:
+                    # The input chunks may be larger than the rows read
+                    chunk_shape = tuple(min(chunk, length) for chunk, length in zip(chunk_shape, data.shape))
+                for filter_name, filter_keywords in filters.items():
+                    result = _benchmark_layout(
+                        data=data,
+                        chunk_shape=chunk_shape,
+                        filter_keywords=filter_keywords,
+                        scratch_path=Path(scratch_folder) / "dataset.h5",
+                        window_starts=window_starts,
+                        window_length=window_length,
+                        latency_seconds=latency_seconds,
+                        bandwidth_bytes_per_second=bandwidth_bytes_per_second,
+                    )
+                    result.update(
+                        location=location,
+                        rule=rule.name,
+                        shape=list(data.shape),
+                        dtype=str(data.dtype),
+                        uncompressed_bytes=data.nbytes,
+                        window_rows=window_length,
+                        layout=layout,
+                        filter=filter_name,
+                    )
+                    results.append(result)
+                    print(
+                        f"{location} [{layout} {result['chunk_shape']}, {filter_name}]: "
+                        f"ratio {result['compression_ratio'] or 0:.2f}, "
+                        f"full read {result['full_read_seconds'] * 1e3:.1f} ms, "
+                        f"window read {result['window_read_seconds'] * 1e3:.2f} ms, "
+                        f"streamed ~{result['window_streaming_seconds'] * 1e3:.0f} ms "
+                        f"({result['window_requests']:.1f} requests)",
+                        flush=True,
+                    )
+
+    arguments.output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "nwbfile": str(arguments.nwbfile),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "max_mb": arguments.max_mb,
+        "latency_ms": arguments.latency_ms,
+        "bandwidth_mbps": arguments.bandwidth_mbps,
+        "hdf5plugin": is_plugin_compression_available(),
+        "results": results,
+    }
+    arguments.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {arguments.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Benchmark the conversion on synthetic sessions, offline, and store wall time, peak RSS and output size as JSON.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --scales small medium --cases interfaces processed raw
+
+Each scale is generated once under ``--work-dir`` (reused by later runs), then every benchmark case runs in a
+fresh forked process, so that the peak RSS of a case is not inflated by the ones before it. Results go to
+``benchmarks/results/<commit>.json`` by default; compare two of them with ``compare_benchmarks.py``.
+
+Cases:
+
+- ``interfaces``: the ``add_to_nwbfile`` of each processed interface on its own NWBFile, written to disk.
+- ``processed``: ``convert_processed_session``.
+- ``raw``: ``decompress_ephys_cbins`` then ``convert_raw_session`` (SpikeGLX and anatomical localization;
+  the synthetic sessions have no videos, NIDQ or passive data).
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import asdict
+from pathlib import Path
+from unittest import mock
+
+from synthetic_session import SCALES, generate_synthetic_session
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+CASES = ("interfaces", "processed", "raw")
+CAMERA_NAMES = ("leftCamera", "rightCamera", "bodyCamera")
+
+
+def _processed_interface_factories() -> dict:
+    """Return interface name -> function(one, eid) building it, for the `interfaces` case."""
+    from ibl_to_nwb.datainterfaces import (
+        BrainwideMapTrialsInterface,
+        IblAnatomicalLocalizationInterface,
+        IblPoseEstimationInterface,
+        IblSortingInterface,
+        LickInterface,
+        PupilTrackingInterface,
+        RoiMotionEnergyInterface,
+        WheelKinematicsInterface,
+        WheelMovementsInterface,
+        WheelPositionInterface,
+    )
+
+    factories = {
+        "IblSortingInterface": lambda one, eid: IblSortingInterface(one=one, session=eid),
+        "IblAnatomicalLocalizationInterface": lambda one, eid: IblAnatomicalLocalizationInterface(one=one, eid=eid),
+        "BrainwideMapTrialsInterface": lambda one, eid: BrainwideMapTrialsInterface(one=one, session=eid),
+        "WheelPositionInterface": lambda one, eid: WheelPositionInterface(one=one, session=eid),
+        "WheelMovementsInterface": lambda one, eid: WheelMovementsInterface(one=one, session=eid),
+        "WheelKinematicsInterface": lambda one, eid: WheelKinematicsInterface(one=one, session=eid),
+        "LickInterface": lambda one, eid: LickInterface(one=one, session=eid),
+    }
+    for camera_name in CAMERA_NAMES:
+        factories[f"IblPoseEstimationInterface.{camera_name}"] = (
+            lambda one, eid, camera_name=camera_name: IblPoseEstimationInterface(
+                one=one, session=eid, camera_name=camera_name, tracker="lightningPose"
+            )
+        )
+        factories[f"RoiMotionEnergyInterface.{camera_name}"] = (
+            lambda one, eid, camera_name=camera_name: RoiMotionEnergyInterface(
+                one=one, session=eid, camera_name=camera_name
+            )
+        )
+        if camera_name != "bodyCamera":
+            factories[f"PupilTrackingInterface.{camera_name}"] = (
+                lambda one, eid, camera_name=camera_name: PupilTrackingInterface(
+                    one=one, session=eid, camera_name=camera_name
+                )
+            )
+    return factories
+
+
+# Interfaces writing into the electrodes table, which must be filled first as in convert_processed_session
+INTERFACES_NEEDING_ELECTRODES = ("IblSortingInterface", "IblAnatomicalLocalizationInterface")
+
+
+def _run_interface(one, eid: str, interface_name: str, output_folder: Path) -> dict:
+    from ndx_ibl import IblMetadata, IblSubject
+    from neuroconv.tools import configure_and_write_nwbfile
+    from pynwb import NWBFile
+
+    from ibl_to_nwb.converters import BrainwideMapConverter
+    from ibl_to_nwb.fixtures import get_probe_name_to_probe_id_dict
+    from ibl_to_nwb.utils import add_probe_electrodes_with_localization
+
+    data_interface = _processed_interface_factories()[interface_name](one, eid)
+    metadata = BrainwideMapConverter(
+        one=one, session=eid, data_interfaces=[data_interface], verbose=False
+    ).get_metadata()
+    nwbfile = NWBFile(**metadata["NWBFile"])
+    nwbfile.subject = IblSubject(**metadata.pop("Subject"))
+    nwbfile.add_lab_meta_data(lab_meta_data=IblMetadata(revision="2025-05-06"))
+    if interface_name in INTERFACES_NEEDING_ELECTRODES:
+        for probe_name, pid in get_probe_name_to_probe_id_dict(eid).items():
+            add_probe_electrodes_with_localization(nwbfile=nwbfile, one=one, eid=eid, probe_name=probe_name, pid=pid)
+
+    start = time.perf_counter()
+    data_interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata)
+    add_to_nwbfile_seconds = time.perf_counter() - start
+
+    nwbfile_path = output_folder / f"{interface_name}.nwb"
+    start = time.perf_counter()
+    configure_and_write_nwbfile(nwbfile=nwbfile, nwbfile_path=nwbfile_path, backend="hdf5")
+    return {
+        "add_to_nwbfile_seconds": add_to_nwbfile_seconds,
+        "write_seconds": time.perf_counter() - start,
+        "output_bytes": nwbfile_path.stat().st_size,
+    }
+
+
+def _run_processed(one, eid: str, output_folder: Path) -> dict:
+    from ibl_to_nwb.conversion import convert_processed_session
+
+    result = convert_processed_session(
+        eid=eid, one=one, base_path=output_folder, overwrite=True, display_progress_bar=False, profile_memory=True
+    )
+    return {
+        "write_seconds": result["write_time"],
+        "output_bytes": result["nwb_size_bytes"],
+        "steps": {name: step["peak_rss_bytes"] for name, step in result["memory_profile"]["steps"].items()},
+    }
+
+
+def _run_raw(one, eid: str, output_folder: Path) -> dict:
+    from ibl_to_nwb.conversion import convert_raw_session
+    from ibl_to_nwb.utils import decompress_ephys_cbins, setup_paths
+
+    paths = setup_paths(one, eid, base_path=output_folder)
+    start = time.perf_counter()
+    decompress_ephys_cbins(
+        source_folder=paths["session_folder"], target_folder=paths["session_decompressed_ephys_folder"]
+    )
+    decompress_seconds = time.perf_counter() - start
+
+    result = convert_raw_session(
+        eid=eid, one=one, base_path=output_folder, overwrite=True, display_progress_bar=False, profile_memory=True
+    )
+    return {
+        "decompress_seconds": decompress_seconds,
+        "write_seconds": result["write_time"],
+        "output_bytes": result["nwb_size_bytes"],
+        "steps": {name: step["peak_rss_bytes"] for name, step in result["memory_profile"]["steps"].items()},
+    }
+
+
+def _run_benchmark(session_root: str, eid: str, case: str, name: str) -> dict:
+    """Run one benchmark in the current (fresh) process; never raises, failures are recorded in the result."""
+    from ibl_to_nwb.utils import MemoryProfiler, OfflineONE
+
+    logging.getLogger().setLevel(logging.WARNING)
+    memory_profiler = MemoryProfiler()
+    result = {"case": case, "name": name}
+    output_folder = Path(tempfile.mkdtemp(prefix=f"ibl-benchmark-{case}-", dir=Path(session_root).parent))
+    try:
+        one = OfflineONE(cache_dir=session_root, alyx_snapshot=Path(session_root) / "alyx_snapshot.json")
+        start = time.perf_counter()
+        with memory_profiler.measure(name):
+            if case == "interfaces":
+                measurements = _run_interface(one=one, eid=eid, interface_name=name, output_folder=output_folder)
+            elif case == "processed":
+                measurements = _run_processed(one=one, eid=eid, output_folder=output_folder)
+            else:
+                measurements = _run_raw(one=one, eid=eid, output_folder=output_folder)
+        result.update(status="ok", wall_seconds=time.perf_counter() - start, **measurements)
+        result["peak_rss_bytes"] = memory_profiler.report()["peak_rss_bytes"]
+    except Exception as exception:
+        result.update(
+            status="error", error=f"{type(exception).__name__}: {exception}", traceback=traceback.format_exc()
+        )
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+    return result
+
+
+def _prepare_session(work_dir: Path, scale_name: str, seed: int, include_raw_ephys: bool) -> tuple[Path, dict]:
+    """Generate the session of a scale (or reuse it); returns its folder and description."""
+    session_root = work_dir / scale_name
+    description_path = session_root / "synthetic_session.json"
+    description = json.loads(description_path.read_text()) if description_path.exists() else None
+    has_raw_ephys = session_root.exists() and next(session_root.rglob("*.cbin"), None) is not None
+    if description is None or description["seed"] != seed or (include_raw_ephys and not has_raw_ephys):
+        shutil.rmtree(session_root, ignore_errors=True)
+        print(f"Generating the '{scale_name}' session in {session_root}...", flush=True)
+        generate_synthetic_session(root=session_root, scale=scale_name, seed=seed, include_raw_ephys=include_raw_ephys)
+        description = json.loads(description_path.read_text())
+    return session_root, description
+
+
+@contextlib.contextmanager
+def _session_fixtures(eid: str, probes: dict[str, str]):
+    """
+    Add a synthetic session, absent from the BWM tables, to the memoized fixture indices for the duration of a block.
+
+    Its probes get a histology QC row (probe name -> pid) with "alf" histology and its videos pass QC, so that
+    the interfaces and converters find them. The indices are restored on exit: the session never reaches the
+    fixture files, nor the pickle written by ``save_fixture_cache``.
+    """
+    from ibl_to_nwb.fixtures import get_camera_qc_dict, get_probe_histology_qc_dict, load_fixtures
+
+    # Build the memoized indices before patching them
+    get_probe_histology_qc_dict(eid)
+    get_camera_qc_dict(eid)
+    probe_histology_qc = {
+        probe_name: dict(eid=eid, pid=pid, probe_name=probe_name, histology_quality="alf", has_histology_files=True)
+        for probe_name, pid in probes.items()
+    }
+    with (
+        mock.patch.dict(load_fixtures._fixture_cache["eid_to_probe_histology_qc"], {eid: probe_histology_qc}),
+        mock.patch.dict(
+            load_fixtures._fixture_cache["eid_to_camera_qc"],
+            {eid: {"videoLeft": "PASS", "videoRight": "PASS", "videoBody": "PASS"}},
+        ),
+    ):
+        yield
+
+
+def _git_commit() -> str | None:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_FOLDER, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BENCHMARKS_FOLDER,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if status.strip() else commit
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=["small"])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "ibl_to_nwb_benchmarks",
+        help="Folder of the generated sessions, reused between runs.",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: results/<commit>.json).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of each benchmark.")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args(argv)
+    if arguments.repeat < 1:
+        parser.error("--repeat must be at least 1.")
+
+    commit = _git_commit()
+    output_path = arguments.output or BENCHMARKS_FOLDER / "results" / f"{commit or 'unknown'}.json"
+    interface_names = list(_processed_interface_factories()) if "interfaces" in arguments.cases else []
+
+    results = []
+    for scale_name in arguments.scales:
+        session_root, description = _prepare_session(
+            work_dir=arguments.work_dir,
+            scale_name=scale_name,
+            seed=arguments.seed,
+            include_raw_ephys="raw" in arguments.cases,
+        )
+        eid = description["eid"]
+        benchmarks = [("interfaces", name) for name in interface_names]
+        benchmarks += [(case, case) for case in arguments.cases if case != "interfaces"]
+        for case, name in benchmarks:
+            for repetition in range(arguments.repeat):
+                # A new process per benchmark: forked with the session in the fixtures, nothing else carried over
+                with (
+                    _session_fixtures(eid=eid, probes=description["probes"]),
+                    multiprocessing.get_context("fork").Pool(processes=1, maxtasksperchild=1) as pool,
+                ):
+                    result = pool.apply(_run_benchmark, (str(session_root), eid, case, name))
+                result.update(scale=scale_name, repetition=repetition)
+                results.append(result)
+                if result["status"] == "ok":
+                    print(
+                        f"[{scale_name}] {name}: {result['wall_seconds']:.2f} s, "
+                        f"peak RSS {result['peak_rss_bytes'] / 1024**2:.0f} MB, "
+                        f"output {result['output_bytes'] / 1024**2:.1f} MB",
+                        flush=True,
+                    )
+                else:
+                    print(f"[{scale_name}] {name}: FAILED ({result['error']})", flush=True)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "seed": arguments.seed,
+        "scales": {scale_name: asdict(SCALES[scale_name]) for scale_name in arguments.scales},
+        "results": results,
+    }
+    output_path.write_text(json.dumps(report, indent=2, default=str))
+    print(f"Results written to {output_path}")
+    return 1 if any(result["status"] != "ok" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,464 @@
+"""Generate synthetic IBL sessions in ALF layout, at configurable scales, for offline benchmarks.
+
+A synthetic session is a folder ``{root}/{lab}/Subjects/{subject}/{date}/001`` holding the datasets read by the
+processed conversion (spike sorting per probe, trials, wheel, licks, camera times, pose, pupil and ROI motion
+energy) under the Brain-Wide Map revision and SpikeGLX ``.meta``/``.ch``/``.cbin`` files of a few seconds per
+probe, plus ``alyx_snapshot.json``, the Alyx records (session, lab, subject, insertions, trajectories) the
+conversion queries. ``ibl_to_nwb.utils.OfflineONE(cache_dir=root, alyx_snapshot=...)`` serves both.
+
+The data is random but has the shapes, dtypes and rates of real sessions, so that the conversion does the same
+amount of work; it is not meant to be scientifically meaningful.
+"""
+
+import hashlib
+import json
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BWM_REVISION = "2025-05-06"
+SPIKE_SORTER = "iblsorter"
+NUMBER_OF_CHANNELS = 384
+AP_SAMPLING_RATE = 30_000.0
+LF_SAMPLING_RATE = 2_500.0
+WHEEL_SAMPLING_RATE = 1_000.0
+WAVEFORM_CHANNELS = 32
+WAVEFORM_SAMPLES = 128
+POSE_KEYPOINTS = ("nose_tip", "paw_l", "paw_r", "pupil_top_r", "tongue_end_l", "tongue_end_r", "tube_top")
+# Allen CCF 2017 ids present in every atlas release (root, isocortex, hippocampal formation, thalamus)
+BRAIN_LOCATION_IDS = np.array([997, 315, 1089, 549])
+
+LAB = "synthetic_lab"
+SESSION_DATE = "2024-01-01"
+SESSION_NUMBER = "001"
+
+
+@dataclass(frozen=True)
+class SessionScale:
+    """Size of a synthetic session."""
+
+    name: str
+    duration_seconds: float
+    number_of_probes: int
+    units_per_probe: int
+    mean_firing_rate_hz: float
+    number_of_trials: int
+    raw_ephys_seconds: float
+    camera_rates_hz: dict = field(default_factory=lambda: {"left": 60.0, "right": 150.0, "body": 30.0})
+
+
+SCALES = {
+    "small": SessionScale(
+        name="small",
+        duration_seconds=600.0,
+        number_of_probes=1,
+        units_per_probe=50,
+        mean_firing_rate_hz=5.0,
+        number_of_trials=100,
+        raw_ephys_seconds=1.0,
+    ),
+    "medium": SessionScale(
+        name="medium",
+        duration_seconds=3_600.0,
+        number_of_probes=2,
+        units_per_probe=400,
+        mean_firing_rate_hz=5.0,
+        number_of_trials=600,
+        raw_ephys_seconds=5.0,
+    ),
+    "large": SessionScale(
+        name="large",
+        duration_seconds=5_400.0,
+        number_of_probes=2,
+        units_per_probe=1_000,
+        mean_firing_rate_hz=8.0,
+        number_of_trials=900,
+        raw_ephys_seconds=10.0,
+    ),
+}
+
+
+@dataclass
+class SyntheticSession:
+    """A generated session: where it is and how ONE and Alyx identify it."""
+
+    root: Path
+    session_path: Path
+    eid: str
+    scale: SessionScale
+    alyx_snapshot: dict
+    probe_name_to_probe_id: dict
+
+    @property
+    def alyx_snapshot_path(self) -> Path:
+        return self.root / "alyx_snapshot.json"
+
+
+def _stable_uuid(name: str) -> str:
+    """Return a version 4 UUID derived from `name` (ONE only accepts version 4 eids)."""
+    return str(uuid.UUID(bytes=hashlib.md5(name.encode()).digest(), version=4))
+
+
+def _save(session_path: Path, relative_path: str, value) -> None:
+    file_path = session_path / relative_path
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(value, pd.DataFrame):
+        value.to_parquet(file_path)
+    elif file_path.suffix == ".csv":
+        pd.DataFrame(value).to_csv(file_path, index=False)
+    else:
+        np.save(file_path, value)
+
+
+def _write_spike_sorting(session_path: Path, probe_name: str, scale: SessionScale, rng: np.random.Generator) -> None:
+    collection = f"alf/{probe_name}/{SPIKE_SORTER}/#{BWM_REVISION}#"
+    number_of_units = scale.units_per_probe
+
+    firing_rates = rng.lognormal(mean=np.log(scale.mean_firing_rate_hz), sigma=1.0, size=number_of_units)
+    spike_counts = rng.poisson(firing_rates * scale.duration_seconds)
+    spike_clusters = np.repeat(np.arange(number_of_units), spike_counts)
+    spike_times = rng.uniform(0.0, scale.duration_seconds, size=spike_clusters.size)
+    spike_order = np.argsort(spike_times, kind="stable")
+    spike_times = spike_times[spike_order]
+    spike_clusters = spike_clusters[spike_order]
+
+    cluster_channels = rng.integers(0, NUMBER_OF_CHANNELS, size=number_of_units)
+    cluster_depths = (cluster_channels // 2) * 20.0
+    _save(session_path, f"{collection}/spikes.times.npy", spike_times)
+    _save(session_path, f"{collection}/spikes.clusters.npy", spike_clusters.astype(np.int64))
+    _save(session_path, f"{collection}/spikes.amps.npy", rng.gamma(4.0, 2.5e-5, size=spike_times.size))
+    _save(
+        session_path,
+        f"{collection}/spikes.depths.npy",
+        cluster_depths[spike_clusters] + rng.normal(0, 10, spike_times.size),
+    )
+
+    _save(session_path, f"{collection}/clusters.channels.npy", cluster_channels)
+    _save(session_path, f"{collection}/clusters.depths.npy", cluster_depths)
+    _save(session_path, f"{collection}/clusters.peakToTrough.npy", rng.uniform(0.2, 1.2, size=number_of_units))
+    _save(
+        session_path,
+        f"{collection}/clusters.metrics.pqt",
+        pd.DataFrame(
+            {
+                "cluster_id": np.arange(number_of_units),
+                "amp_median": rng.gamma(4.0, 2.5e-5, size=number_of_units),
+                "firing_rate": spike_counts / scale.duration_seconds,
+                "presence_ratio": rng.uniform(0.5, 1.0, size=number_of_units),
+                "contamination": rng.uniform(0.0, 0.5, size=number_of_units),
+                "label": rng.choice([0.0, 1 / 3, 2 / 3, 1.0], size=number_of_units),
+            }
+        ),
+    )
+    _save(
+        session_path,
+        f"{collection}/clusters.uuids.csv",
+        {"uuids": [str(uuid.UUID(bytes=rng.bytes(16), version=4)) for _ in range(number_of_units)]},
+    )
+    waveform_channels = np.clip(
+        cluster_channels[:, np.newaxis] + np.arange(-WAVEFORM_CHANNELS // 2, WAVEFORM_CHANNELS // 2),
+        0,
+        NUMBER_OF_CHANNELS - 1,
+    )
+    _save(session_path, f"{collection}/clusters.waveformsChannels.npy", waveform_channels)
+    _save(
+        session_path,
+        f"{collection}/waveforms.templates.npy",
+        rng.normal(0, 1e-5, size=(number_of_units, WAVEFORM_CHANNELS, WAVEFORM_SAMPLES)).astype(np.float32),
+    )
+
+    # Channel locations, as histology-aligned "alf" channels and electrode sites
+    local_coordinates = np.column_stack(
+        [np.tile([43.0, 11.0, 59.0, 27.0], NUMBER_OF_CHANNELS // 4), np.arange(NUMBER_OF_CHANNELS) // 2 * 20.0]
+    )
+    mlapdv = np.column_stack(
+        [
+            np.full(NUMBER_OF_CHANNELS, -2_000),
+            np.full(NUMBER_OF_CHANNELS, -1_500),
+            -4_000 + local_coordinates[:, 1].astype(int),
+        ]
+    )
+    brain_location_ids = BRAIN_LOCATION_IDS[
+        np.arange(NUMBER_OF_CHANNELS) * len(BRAIN_LOCATION_IDS) // NUMBER_OF_CHANNELS
+    ]
+    for location_collection in (collection, f"alf/{probe_name}"):
+        object_name = "channels" if location_collection == collection else "electrodeSites"
+        _save(session_path, f"{location_collection}/{object_name}.localCoordinates.npy", local_coordinates)
+        _save(session_path, f"{location_collection}/{object_name}.mlapdv.npy", mlapdv)
+        _save(session_path, f"{location_collection}/{object_name}.brainLocationIds_ccf_2017.npy", brain_location_ids)
+    _save(session_path, f"{collection}/channels.rawInd.npy", np.arange(NUMBER_OF_CHANNELS))
+
+
+def _write_trials(session_path: Path, scale: SessionScale, rng: np.random.Generator) -> None:
+    number_of_trials = scale.number_of_trials
+    trial_starts = np.sort(rng.uniform(0.0, scale.duration_seconds * 0.8, size=number_of_trials))
+    stim_on_times = trial_starts + rng.uniform(0.4, 0.7, number_of_trials)
+    first_movement_times = stim_on_times + rng.uniform(0.1, 1.0, number_of_trials)
+    response_times = first_movement_times + rng.uniform(0.05, 0.3, number_of_trials)
+    contrasts = rng.choice([0.0, 0.0625, 0.125, 0.25, 1.0], size=number_of_trials)
+    stimulus_on_left = rng.random(number_of_trials) < 0.5
+    feedback_type = rng.choice([-1.0, 1.0], size=number_of_trials, p=[0.2, 0.8])
+    trials = pd.DataFrame(
+        {
+            "intervals_0": trial_starts,
+            "intervals_1": response_times + 1.5,
+            "quiescencePeriod": rng.uniform(0.4, 0.7, number_of_trials),
+            "stimOn_times": stim_on_times,
+            "goCue_times": stim_on_times + 1e-3,
+            "firstMovement_times": first_movement_times,
+            "response_times": response_times,
+            "feedback_times": response_times + 1e-3,
+            "stimOff_times": response_times + 1.0,
+            "contrastLeft": np.where(stimulus_on_left, contrasts, np.nan),
+            "contrastRight": np.where(stimulus_on_left, np.nan, contrasts),
+            "choice": rng.choice([-1.0, 0.0, 1.0], size=number_of_trials),
+            "feedbackType": feedback_type,
+            "rewardVolume": np.where(feedback_type > 0, 1.5, 0.0),
+            "probabilityLeft": np.repeat([0.5, 0.8, 0.2], -(-number_of_trials // 3))[:number_of_trials],
+        }
+    )
+    _save(session_path, f"alf/#{BWM_REVISION}#/_ibl_trials.table.pqt", trials)
+
+
+def _write_behavior(session_path: Path, scale: SessionScale, rng: np.random.Generator) -> None:
+    collection = f"alf/#{BWM_REVISION}#"
+
+    wheel_timestamps = np.arange(0.0, scale.duration_seconds, 1 / WHEEL_SAMPLING_RATE)
+    _save(session_path, f"{collection}/_ibl_wheel.timestamps.npy", wheel_timestamps)
+    _save(session_path, f"{collection}/_ibl_wheel.position.npy", np.cumsum(rng.normal(0, 1e-3, wheel_timestamps.size)))
+    number_of_moves = int(scale.duration_seconds / 2)
+    move_starts = np.sort(rng.uniform(0.0, scale.duration_seconds - 1, size=number_of_moves))
+    _save(
+        session_path,
+        f"{collection}/_ibl_wheelMoves.intervals.npy",
+        np.column_stack([move_starts, move_starts + rng.uniform(0.05, 0.5, number_of_moves)]),
+    )
+    _save(session_path, f"{collection}/_ibl_wheelMoves.peakAmplitude.npy", rng.normal(0, 0.5, number_of_moves))
+
+    number_of_licks = int(scale.duration_seconds * 2)
+    _save(
+        session_path, f"{collection}/licks.times.npy", np.sort(rng.uniform(0, scale.duration_seconds, number_of_licks))
+    )
+
+    for camera_view, frame_rate in scale.camera_rates_hz.items():
+        camera_name = f"{camera_view}Camera"
+        number_of_frames = int(scale.duration_seconds * frame_rate)
+        _save(session_path, f"{collection}/_ibl_{camera_name}.times.npy", np.arange(number_of_frames) / frame_rate)
+
+        pose = {}
+        for keypoint in POSE_KEYPOINTS:
+            pose[f"{keypoint}_x"] = rng.uniform(0, 640, number_of_frames)
+            pose[f"{keypoint}_y"] = rng.uniform(0, 512, number_of_frames)
+            pose[f"{keypoint}_likelihood"] = rng.uniform(0, 1, number_of_frames)
+        _save(session_path, f"{collection}/_ibl_{camera_name}.lightningPose.pqt", pd.DataFrame(pose))
+
+        _save(session_path, f"{collection}/{camera_name}.ROIMotionEnergy.npy", rng.gamma(2.0, 1.0, number_of_frames))
+        _save(session_path, f"{collection}/{camera_view}ROIMotionEnergy.position.npy", np.array([100, 100, 50, 50]))
+
+        if camera_view in ("left", "right"):
+            pupil_diameter = rng.normal(30, 3, number_of_frames)
+            _save(
+                session_path,
+                f"{collection}/_ibl_{camera_name}.features.pqt",
+                pd.DataFrame({"pupilDiameter_raw": pupil_diameter, "pupilDiameter_smooth": pupil_diameter}),
+            )
+
+
+def _spikeglx_meta(band: str, probe_index: int, number_of_samples: int) -> str:
+    """Return the content of a Neuropixels 1.0 SpikeGLX .meta file."""
+    sampling_rate = AP_SAMPLING_RATE if band == "ap" else LF_SAMPLING_RATE
+    number_of_saved_channels = NUMBER_OF_CHANNELS + 1
+    ap_lf_sync = f"{NUMBER_OF_CHANNELS},0,1" if band == "ap" else f"0,{NUMBER_OF_CHANNELS},1"
+    channel_prefix = "AP" if band == "ap" else "LF"
+    imro_table = "".join(f"({channel} 0 0 500 250 1)" for channel in range(NUMBER_OF_CHANNELS))
+    channel_map = "".join(f"({channel_prefix}{channel};{channel}:{channel})" for channel in range(NUMBER_OF_CHANNELS))
+    shank_map = "".join(f"(0:{channel % 2}:{channel // 2}:1)" for channel in range(NUMBER_OF_CHANNELS))
+    fields = {
+        "acqApLfSy": f"{NUMBER_OF_CHANNELS},{NUMBER_OF_CHANNELS},1",
+        "appVersion": "20190327",
+        "fileCreateTime": f"{SESSION_DATE}T12:00:00",
+        "fileSizeBytes": number_of_samples * number_of_saved_channels * 2,
+        "fileTimeSecs": number_of_samples / sampling_rate,
+        "firstSample": 0,
+        "imAiRangeMax": 0.6,
+        "imAiRangeMin": -0.6,
+        "imDatPrb_port": probe_index + 1,
+        "imDatPrb_slot": 2,
+        "imDatPrb_sn": 18_000_000_000 + probe_index,
+        "imDatPrb_type": 0,
+        "imMaxInt": 512,
+        "imSampRate": sampling_rate,
+        "nSavedChans": number_of_saved_channels,
+        "snsApLfSy": ap_lf_sync,
+        "snsSaveChanSubset": "all",
+        "typeImEnabled": 1,
+        "typeNiEnabled": 0,
+        "typeThis": "imec",
+        "~imroTbl": f"(0,{NUMBER_OF_CHANNELS}){imro_table}",
+        "~snsChanMap": (
+            f"({NUMBER_OF_CHANNELS},0,1){channel_map}(SY0;{NUMBER_OF_CHANNELS}:{NUMBER_OF_CHANNELS})"
+            if band == "ap"
+            else f"(0,{NUMBER_OF_CHANNELS},1){channel_map}(SY0;{NUMBER_OF_CHANNELS}:{NUMBER_OF_CHANNELS})"
+        ),
+        "~snsShankMap": f"(1,2,{NUMBER_OF_CHANNELS // 2}){shank_map}",
+    }
+    return "".join(f"{key}={value}\n" for key, value in fields.items())
+
+
+def _write_probe_sync(session_path: Path, probe_name: str, probe_index: int, scale: SessionScale, rng) -> None:
+    """Write the probe-to-session clock model (sample, seconds pairs) and the sync pulses of a probe."""
+    collection = f"raw_ephys_data/{probe_name}"
+    stem = f"_spikeglx_ephysData_g0_t0.imec{probe_index}"
+    # A drift of a few parts per million, as between a real probe and the session clock
+    breakpoint_seconds = np.linspace(0.0, scale.duration_seconds, 11)
+    breakpoint_samples = breakpoint_seconds * AP_SAMPLING_RATE * (1 + rng.normal(0, 5e-6, breakpoint_seconds.size))
+    _save(
+        session_path, f"{collection}/{stem}.timestamps.npy", np.column_stack([breakpoint_samples, breakpoint_seconds])
+    )
+    _save(
+        session_path, f"{collection}/{stem}.sync.npy", np.column_stack([breakpoint_seconds, np.ones(11), np.ones(11)])
+    )
+
+
+def _write_raw_ephys(session_path: Path, probe_name: str, probe_index: int, scale: SessionScale, rng) -> None:
+    import mtscomp  # Installed with ibllib
+
+    collection = session_path / "raw_ephys_data" / probe_name
+    collection.mkdir(parents=True, exist_ok=True)
+    for band, sampling_rate in (("ap", AP_SAMPLING_RATE), ("lf", LF_SAMPLING_RATE)):
+        stem = collection / f"_spikeglx_ephysData_g0_t0.imec{probe_index}.{band}"
+        number_of_samples = int(scale.raw_ephys_seconds * sampling_rate)
+        samples = rng.normal(0, 30, size=(number_of_samples, NUMBER_OF_CHANNELS + 1)).astype(np.int16)
+        bin_path = stem.with_suffix(".bin")
+        samples.tofile(bin_path)
+        mtscomp.compress(
+            bin_path,
+            stem.with_suffix(".cbin"),
+            stem.with_suffix(".ch"),
+            sample_rate=sampling_rate,
+            n_channels=NUMBER_OF_CHANNELS + 1,
+            dtype=np.int16,
+        )
+        bin_path.unlink()
+        stem.with_suffix(".meta").write_text(_spikeglx_meta(band, probe_index, number_of_samples))
+
+
+def _make_alyx_snapshot(eid: str, subject: str, probe_name_to_probe_id: dict) -> dict:
+    insertions = [
+        {"id": pid, "name": probe_name, "session": eid, "model": "3B2", "serial": f"{18_000_000_000 + index}"}
+        for index, (probe_name, pid) in enumerate(probe_name_to_probe_id.items())
+    ]
+    trajectories = [
+        {
+            "id": _stable_uuid(f"{pid}/{provenance}"),
+            "probe_insertion": pid,
+            "probe_name": insertion["name"],
+            "session": {"id": eid, "subject": subject},
+            "provenance": provenance,
+            "x": -2_000.0,
+            "y": -1_500.0,
+            "z": 0.0,
+            "depth": 4_000.0,
+            "theta": 15.0,
+            "phi": 180.0,
+            "roll": 0.0,
+        }
+        for insertion in insertions
+        for pid in [insertion["id"]]
+        for provenance in ("Planned", "Micro-manipulator", "Ephys aligned histology track")
+    ]
+    return {
+        "sessions": [
+            {
+                "id": eid,
+                "subject": subject,
+                "lab": LAB,
+                "start_time": f"{SESSION_DATE}T12:00:00",
+                "number": int(SESSION_NUMBER),
+                "task_protocol": "_iblrig_tasks_ephysChoiceWorld6.6.2",
+                "projects": ["ibl_neuropixel_brainwide_01"],
+            }
+        ],
+        "labs": [{"name": LAB, "timezone": "Europe/London", "institution": "Synthetic Institute"}],
+        "subjects": [
+            {
+                "id": _stable_uuid(subject),
+                "nickname": subject,
+                "sex": "M",
+                "birth_date": "2023-09-01",
+                "reference_weight": 25.0,
+                "lab": LAB,
+            }
+        ],
+        "insertions": insertions,
+        "trajectories": trajectories,
+    }
+
+
+def generate_synthetic_session(
+    root: Path, scale: SessionScale | str, seed: int = 0, include_raw_ephys: bool = True
+) -> SyntheticSession:
+    """
+    Write a synthetic session of the given scale under `root`, with the Alyx snapshot of `OfflineONE`.
+
+    Parameters
+    ----------
+    root : Path
+        Empty (or previously generated) folder; becomes the cache directory of `OfflineONE`.
+    scale : SessionScale or str
+        Session size, or the name of one of `SCALES`.
+    seed : int, default: 0
+        Seed of the random data; the same seed and scale give the same files.
+    include_raw_ephys : bool, default: True
+        Also write compressed SpikeGLX files (needs mtscomp).
+
+    Returns
+    -------
+    SyntheticSession
+    """
+    if isinstance(scale, str):
+        if scale not in SCALES:
+            raise ValueError(f"Unknown scale '{scale}'; use one of {sorted(SCALES)} or a SessionScale.")
+        scale = SCALES[scale]
+    root = Path(root)
+    rng = np.random.default_rng(seed)
+
+    subject = f"SYN_{scale.name}"
+    session_path = root / LAB / "Subjects" / subject / SESSION_DATE / SESSION_NUMBER
+    session_path.mkdir(parents=True, exist_ok=True)
+    # Derived from the session path, so that regenerating a session keeps its eid
+    eid = _stable_uuid(session_path.relative_to(root).as_posix())
+
+    probe_names = [f"probe{index:02d}" for index in range(scale.number_of_probes)]
+    for probe_index, probe_name in enumerate(probe_names):
+        _write_spike_sorting(session_path, probe_name, scale, rng)
+        _write_probe_sync(session_path, probe_name, probe_index, scale, rng)
+        if include_raw_ephys:
+            _write_raw_ephys(session_path, probe_name, probe_index, scale, rng)
+        else:
+            # The AP sampling rate of the sync model is read from the .meta file
+            meta_path = (
+                session_path / "raw_ephys_data" / probe_name / f"_spikeglx_ephysData_g0_t0.imec{probe_index}.ap.meta"
+            )
+            meta_path.write_text(_spikeglx_meta("ap", probe_index, int(scale.raw_ephys_seconds * AP_SAMPLING_RATE)))
+    _write_trials(session_path, scale, rng)
+    _write_behavior(session_path, scale, rng)
+
+    probe_name_to_probe_id = {probe_name: _stable_uuid(f"{eid}/{probe_name}") for probe_name in probe_names}
+    alyx_snapshot = _make_alyx_snapshot(eid=eid, subject=subject, probe_name_to_probe_id=probe_name_to_probe_id)
+    synthetic_session = SyntheticSession(
+        root=root,
+        session_path=session_path,
+        eid=eid,
+        scale=scale,
+        alyx_snapshot=alyx_snapshot,
+        probe_name_to_probe_id=probe_name_to_probe_id,
+    )
+    synthetic_session.alyx_snapshot_path.write_text(json.dumps(alyx_snapshot, indent=2))
+    (root / "synthetic_session.json").write_text(
+        json.dumps({"eid": eid, "scale": asdict(scale), "seed": seed, "probes": probe_name_to_probe_id}, indent=2)
+    )
+    return synthetic_session
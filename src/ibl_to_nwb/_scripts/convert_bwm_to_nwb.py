@@ -4,15 +4,14 @@ from __future__ import annotations
 
 import logging
 import platform
-import random
 import sys
 import time
 from pathlib import Path
 
 from one.api import ONE
 
+from ibl_to_nwb.conversion.batch import run_batch_conversion
 from ibl_to_nwb.conversion.one_patches import apply_one_patches
-from ibl_to_nwb.conversion.session import convert_session
 from ibl_to_nwb.fixtures import load_fixtures
 from ibl_to_nwb.testing._consistency_checks import check_nwbfile_for_consistency
 
@@ -50,6 +49,78 @@ def setup_logger(log_file_path: Path) -> logging.Logger:
     return logger
 
 
+def report_session_results(
+    one: ONE,
+    results: dict,
+    convert_raw: bool,
+    convert_processed: bool,
+    run_consistency_checks: bool,
+    logger: logging.Logger,
+) -> None:
+    """Run the optional consistency checks and log the compression summary of a converted session."""
+    if convert_raw and results.get("raw_converted"):
+        raw_nwb_path = Path(results["raw_nwb_path"])
+
+        # Run consistency checks if enabled
+        if run_consistency_checks:
+            try:
+                check_start = time.time()
+                check_nwbfile_for_consistency(one=one, nwbfile_path=raw_nwb_path)
+                check_time = time.time() - check_start
+                logger.info(f"RAW validation passed ({check_time:.1f}s)")
+            except AssertionError as e:
+                logger.error(f"RAW validation FAILED: {e}")
+            except Exception as e:
+                logger.error(f"RAW validation error: {e}")
+
+    if convert_processed and results.get("processed_converted"):
+        processed_nwb_path = Path(results["processed_nwb_path"])
+
+        # Run consistency checks if enabled
+        if run_consistency_checks:
+            try:
+                check_start = time.time()
+                check_nwbfile_for_consistency(one=one, nwbfile_path=processed_nwb_path)
+                check_time = time.time() - check_start
+                logger.info(f"PROCESSED validation passed ({check_time:.1f}s)")
+            except AssertionError as e:
+                logger.error(f"PROCESSED validation FAILED: {e}")
+            except Exception as e:
+                logger.error(f"PROCESSED validation error: {e}")
+
+    # Compression summary
+    source_size_gb = results.get("download_size_gb", 0)
+    logger.info("\n" + "=" * 80)
+    logger.info("COMPRESSION SUMMARY")
+    logger.info("=" * 80)
+    logger.info(f"Source data size: {source_size_gb:.2f} GB")
+
+    if results.get("raw_converted"):
+        raw_size_gb = results.get("raw_size_gb", 0)
+        raw_size_bytes = results.get("raw_size_bytes", 0)
+        ratio = source_size_gb / raw_size_gb if raw_size_gb > 0 else 0
+        logger.info(f"RAW NWB size: {raw_size_gb:.2f} GB ({raw_size_bytes:,} bytes)")
+        logger.info(f"RAW compression ratio: {ratio:.2f}x (source/output)")
+    elif results.get("raw_skipped"):
+        logger.info("RAW conversion skipped (existing NWB).")
+
+    if results.get("processed_converted"):
+        processed_size_gb = results.get("processed_size_gb", 0)
+        processed_size_bytes = results.get("processed_size_bytes", 0)
+        ratio = source_size_gb / processed_size_gb if processed_size_gb > 0 else 0
+        logger.info(f"PROCESSED NWB size: {processed_size_gb:.2f} GB ({processed_size_bytes:,} bytes)")
+        logger.info(f"PROCESSED compression ratio: {ratio:.2f}x (source/output)")
+    elif results.get("processed_skipped"):
+        logger.info("Processed conversion skipped (existing NWB).")
+
+    if results.get("raw_converted") and results.get("processed_converted"):
+        total_nwb_size_gb = results["raw_size_gb"] + results["processed_size_gb"]
+        total_nwb_size_bytes = results["raw_size_bytes"] + results["processed_size_bytes"]
+        overall_compression = source_size_gb / total_nwb_size_gb if total_nwb_size_gb > 0 else 0
+        logger.info(f"Total NWB output: {total_nwb_size_gb:.2f} GB ({total_nwb_size_bytes:,} bytes)")
+        logger.info(f"Overall compression ratio: {overall_compression:.2f}x (source/combined output)")
+
+
 if __name__ == "__main__":
     # ========================================================================
     # MAIN CONFIGURATION
@@ -61,7 +132,12 @@ if __name__ == "__main__":
     OVERWRITE = True  # Regenerate NWBs even if existing files validate
     RUN_CONSISTENCY_CHECKS = False  # Validate NWB files against ONE data (slow but thorough)
     VERBOSE = False  # Enable verbose output from neuroconv interfaces
-    DISPLAY_PROGRESS_BAR = True  # Show progress bars (local runs)
+    DISPLAY_PROGRESS_BAR = False  # Progress bars of concurrent sessions would interleave
+    MAX_WORKERS = 4  # Download and conversion processes running at once
+    NETWORK_BUDGET_GB = 50  # Estimated size of the downloads running at once
+    RSS_BUDGET_GB = 64  # Estimated peak memory of the conversions running at once
+    DISK_BUDGET_GB = 1000  # Estimated disk footprint of the sessions converted by the batch
+    KEEP_SESSION_DATA = True  # Keep the downloaded data of converted sessions (the consistency checks read it)
 
     if platform.system() == "Darwin":  # macOS
         base_folder = Path("/Volumes/Expansion")
@@ -88,103 +164,54 @@ if __name__ == "__main__":
     bwm_df = load_fixtures.load_bwm_df()
     unique_sessions = bwm_df.drop_duplicates("eid").reset_index(drop=True)
     all_eids = unique_sessions["eid"].tolist()
-    random.shuffle(all_eids)
 
     print(f"Total sessions to process: {len(all_eids)}")
 
-    for session_index, eid in enumerate(all_eids, start=1):
-        print(f"\nProcessing session {session_index}/{len(all_eids)}: {eid}")
-
-        script_start_time = time.time()
+    # Sessions run concurrently in worker processes, admitted against the budgets above and ordered so that
+    # downloads overlap conversions; the state file records each session, so re-running the script resumes
+    # where a crash or interruption left off
+    logger = setup_logger(logs_path / "batch_summary.log")
+    batch_start_time = time.time()
+    state = run_batch_conversion(
+        all_eids,
+        one=one,
+        base_folder=base_path,
+        logs_folder=logs_path,
+        stub_test=STUB_TEST,
+        convert_raw=CONVERT_RAW,
+        convert_processed=CONVERT_PROCESSED,
+        max_workers=MAX_WORKERS,
+        network_budget_gb=NETWORK_BUDGET_GB,
+        rss_budget_gb=RSS_BUDGET_GB,
+        disk_budget_gb=DISK_BUDGET_GB,
+        keep_session_data=KEEP_SESSION_DATA,
+        convert_session_kwargs=dict(
+            overwrite=OVERWRITE,
+            verbose=VERBOSE,
+            display_progress_bar=DISPLAY_PROGRESS_BAR,
+        ),
+        logger=logger,
+    )
 
-        # Run conversion through shared pipeline (same code path as AWS)
-        results = convert_session(
-            eid,
+    # Post-processing: consistency checks (local-only, not needed in the AWS pipeline)
+    for eid in all_eids:
+        entry = state.sessions[eid]
+        if entry["status"] != "done":
+            logger.error(f"Session {eid} not converted ({entry['status']}): {entry.get('error')}")
+            continue
+        logger.info(f"Session {eid}")
+        report_session_results(
             one=one,
-            base_folder=base_path,
-            logs_folder=logs_path,
-            stub_test=STUB_TEST,
+            results=entry["results"],
             convert_raw=CONVERT_RAW,
             convert_processed=CONVERT_PROCESSED,
-            overwrite=OVERWRITE,
-            verbose=VERBOSE,
-            display_progress_bar=DISPLAY_PROGRESS_BAR,
+            run_consistency_checks=RUN_CONSISTENCY_CHECKS,
+            logger=logger,
         )
 
-        # Post-processing: consistency checks (local-only, not needed in the AWS pipeline)
-
-        logger = logging.getLogger("IBL_Conversion")
-
-        if CONVERT_RAW and results.get("raw_converted"):
-            raw_nwb_path = Path(results["raw_nwb_path"])
-
-            # Run consistency checks if enabled
-            if RUN_CONSISTENCY_CHECKS:
-                try:
-                    check_start = time.time()
-                    check_nwbfile_for_consistency(one=one, nwbfile_path=raw_nwb_path)
-                    check_time = time.time() - check_start
-                    logger.info(f"RAW validation passed ({check_time:.1f}s)")
-                except AssertionError as e:
-                    logger.error(f"RAW validation FAILED: {e}")
-                except Exception as e:
-                    logger.error(f"RAW validation error: {e}")
-
-        if CONVERT_PROCESSED and results.get("processed_converted"):
-            processed_nwb_path = Path(results["processed_nwb_path"])
-
-            # Run consistency checks if enabled
-            if RUN_CONSISTENCY_CHECKS:
-                try:
-                    check_start = time.time()
-                    check_nwbfile_for_consistency(one=one, nwbfile_path=processed_nwb_path)
-                    check_time = time.time() - check_start
-                    logger.info(f"PROCESSED validation passed ({check_time:.1f}s)")
-                except AssertionError as e:
-                    logger.error(f"PROCESSED validation FAILED: {e}")
-                except Exception as e:
-                    logger.error(f"PROCESSED validation error: {e}")
-
-        # Compression summary
-        download_info = results.get("download_info", {})
-        logger.info("\n" + "=" * 80)
-        logger.info("COMPRESSION SUMMARY")
-        logger.info("=" * 80)
-        if download_info:
-            logger.info(
-                f"Source data size: {download_info.get('total_size_gb', 0):.2f} GB "
-                f"({download_info.get('total_size_bytes', 0):,} bytes)"
-            )
-
-        if results.get("raw_converted"):
-            raw_size_gb = results.get("raw_size_gb", 0)
-            raw_size_bytes = results.get("raw_size_bytes", 0)
-            ratio = download_info.get("total_size_gb", 0) / raw_size_gb if raw_size_gb > 0 else 0
-            logger.info(f"RAW NWB size: {raw_size_gb:.2f} GB ({raw_size_bytes:,} bytes)")
-            logger.info(f"RAW compression ratio: {ratio:.2f}x (source/output)")
-        elif results.get("raw_skipped"):
-            logger.info("RAW conversion skipped (existing NWB).")
-
-        if results.get("processed_converted"):
-            processed_size_gb = results.get("processed_size_gb", 0)
-            processed_size_bytes = results.get("processed_size_bytes", 0)
-            ratio = download_info.get("total_size_gb", 0) / processed_size_gb if processed_size_gb > 0 else 0
-            logger.info(f"PROCESSED NWB size: {processed_size_gb:.2f} GB ({processed_size_bytes:,} bytes)")
-            logger.info(f"PROCESSED compression ratio: {ratio:.2f}x (source/output)")
-        elif results.get("processed_skipped"):
-            logger.info("Processed conversion skipped (existing NWB).")
-
-        if results.get("raw_converted") and results.get("processed_converted"):
-            total_nwb_size_gb = results["raw_size_gb"] + results["processed_size_gb"]
-            total_nwb_size_bytes = results["raw_size_bytes"] + results["processed_size_bytes"]
-            overall_compression = (
-                download_info.get("total_size_gb", 0) / total_nwb_size_gb if total_nwb_size_gb > 0 else 0
-            )
-            logger.info(f"Total NWB output: {total_nwb_size_gb:.2f} GB ({total_nwb_size_bytes:,} bytes)")
-            logger.info(f"Overall compression ratio: {overall_compression:.2f}x (source/combined output)")
-
-        script_total_time = time.time() - script_start_time
-        logger.info("\n" + "=" * 80)
-        logger.info("CONVERSION COMPLETED")
-        logger.info(f"Total script execution time: {script_total_time:.2f}s ({script_total_time/60:.2f} minutes)")
-        logger.info("=" * 80)
+    batch_total_time = time.time() - batch_start_time
+    logger.info("\n" + "=" * 80)
+    logger.info("BATCH COMPLETED")
+    logger.info(f"Sessions: {state.count_by_status()}")
+    logger.info(f"Total batch execution time: {batch_total_time:.2f}s ({batch_total_time/3600:.2f} hours)")
+    logger.info("=" * 80)
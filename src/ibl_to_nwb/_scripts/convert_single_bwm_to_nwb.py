@@ -13,6 +13,7 @@ from one.api import ONE
 from ibl_to_nwb.conversion.one_patches import apply_one_patches
 from ibl_to_nwb.conversion.session import convert_session
 from ibl_to_nwb.testing._consistency_checks import check_nwbfile_for_consistency
+from ibl_to_nwb.utils import OfflineONE
 
 
 def setup_logger(log_file_path: Path) -> logging.Logger:
@@ -62,6 +63,8 @@ if __name__ == "__main__":
     RUN_CONSISTENCY_CHECKS = False  # Validate NWB files against ONE data (slow but thorough)
     VERBOSE = False  # Enable verbose output from neuroconv interfaces
     DISPLAY_PROGRESS_BAR = True  # Show progress bars (local runs)
+    # Replay offline from the cached files: path to a snapshot written by utils.save_alyx_snapshot, or None (online)
+    ALYX_SNAPSHOT = None
 
     if platform.system() == "Darwin":  # macOS
         base_folder = Path("/Volumes/Expansion")
@@ -101,12 +104,15 @@ if __name__ == "__main__":
     if target_eid == "INSERT_EID_HERE":
         raise SystemExit("Please provide an EID either by editing TARGET_EID or passing it as a command-line argument.")
 
-    one = ONE(
-        base_url="https://openalyx.internationalbrainlab.org",
-        cache_dir=cache_dir,
-        password="international",
-        silent=True,
-    )
+    if ALYX_SNAPSHOT is not None:
+        one = OfflineONE(cache_dir=cache_dir, alyx_snapshot=ALYX_SNAPSHOT)
+    else:
+        one = ONE(
+            base_url="https://openalyx.internationalbrainlab.org",
+            cache_dir=cache_dir,
+            password="international",
+            silent=True,
+        )
 
     # Logs are derived from base_path
     logs_path = base_path / "conversion_logs"
@@ -0,0 +1,497 @@
+"""Local scheduler converting many sessions concurrently on one machine.
+
+Each session goes through two stages, each run in its own forked process:
+  1. download: download_session_data() (network bound)
+  2. convert: convert_session() on the cached data, without downloading again (CPU, memory and disk bound)
+
+Stages are admitted against explicit budgets: the bytes being downloaded (network), the estimated peak RSS of
+the running conversions (memory) and the estimated disk footprint of the sessions of the batch (disk). The costs
+are estimated up front from the dataset sizes of the ONE cache table (see `estimate_session_cost`), and the
+sessions are ordered with Johnson's rule so that the downloads of upcoming sessions overlap the conversions of
+the current ones.
+
+The state of every session is persisted to a JSON file after each transition; a crashed or interrupted batch
+resumes from it (sessions caught mid-download are downloaded again, mid-conversion are converted again).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from one.api import ONE
+
+from .download import download_session_data
+from .session import _LaneProcess, convert_session
+from ..utils import SessionDatasetIndex, setup_paths
+
+_logger = logging.getLogger(__name__)
+
+# Rough sizing ratios; tune them from the sizes reported in the state file of completed sessions
+# Decompressed .bin size / .cbin size (mtscomp)
+CBIN_DECOMPRESSION_RATIO = 3.0
+# Raw NWB size / .cbin size (the NWB file is compressed again)
+RAW_NWB_TO_CBIN_RATIO = 1.0
+# Peak RSS of a processed conversion: a baseline plus this multiple of the spike sorting data
+# (loaded, grouped by cluster and buffered for writing)
+PROCESSED_BASELINE_RSS_BYTES = 2 * 1024**3
+SPIKE_SORTING_RSS_FACTOR = 3.0
+# Peak RSS of a raw conversion: write buffers (1 GB per stream) and the session interfaces
+RAW_CONVERSION_RSS_BYTES = 4 * 1024**3
+# Throughputs used to order the sessions (only their ratio matters)
+DOWNLOAD_BYTES_PER_SECOND = 50e6
+CONVERSION_BYTES_PER_SECOND = 20e6
+
+# Session states persisted in the state file
+PENDING = "pending"
+DOWNLOADING = "downloading"
+DOWNLOADED = "downloaded"
+CONVERTING = "converting"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class SessionCost:
+    """Estimated resources of converting one session."""
+
+    eid: str
+    network_bytes: int  # bytes to download (datasets not already in the local cache)
+    disk_bytes: int  # bytes added on disk: downloads, decompressed ephys and NWB outputs
+    rss_bytes: int  # peak resident memory of the conversion
+    conversion_bytes: int  # bytes read by the conversion, a proxy of its duration
+    output_bytes: int = 0  # bytes of the NWB outputs, left on disk once the session data is removed
+
+    @property
+    def download_seconds(self) -> float:
+        return self.network_bytes / DOWNLOAD_BYTES_PER_SECOND
+
+    @property
+    def conversion_seconds(self) -> float:
+        return self.conversion_bytes / CONVERSION_BYTES_PER_SECOND
+
+
+def estimate_session_cost(
+    one: ONE,
+    eid: str,
+    convert_raw: bool,
+    convert_processed: bool,
+    stub_test: bool = False,
+    stream_raw_ephys: bool = False,
+    pipelined: bool = False,
+    dataset_index: SessionDatasetIndex | None = None,
+) -> SessionCost:
+    """
+    Estimate the download, disk and memory cost of a session from the dataset sizes listed by ONE.
+
+    Parameters
+    ----------
+    one : ONE
+        ONE API client; in local mode the sizes come from its cache table without any request.
+    eid : str
+        Session ID.
+    convert_raw : bool
+        Whether the raw ephys and videos are downloaded and converted.
+    convert_processed : bool
+        Whether the processed NWB file is written.
+    stub_test : bool, default: False
+        Stub conversions download and write almost nothing but the processed datasets.
+    stream_raw_ephys : bool, default: False
+        Whether the raw ephys is streamed from the .cbin files (no decompressed copy on disk).
+    pipelined : bool, default: False
+        Whether the raw and processed conversions run concurrently (their memory adds up).
+    dataset_index : SessionDatasetIndex, optional
+        Index of the session datasets, built with `SessionDatasetIndex.from_one` if not given.
+
+    Returns
+    -------
+    SessionCost
+        The estimated cost.
+    """
+    if dataset_index is None:
+        dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+    session_path = one.eid2path(eid)
+
+    downloaded_bytes = 0
+    network_bytes = 0
+    cbin_bytes = 0
+    spike_sorting_bytes = 0
+    for dataset, file_size in dataset_index.file_sizes.items():
+        collection, _, filename = dataset_index.parse_dataset_path(dataset)
+        is_raw = collection.startswith(("raw_ephys_data", "raw_video_data"))
+        if is_raw and (not convert_raw or stub_test):
+            continue
+        downloaded_bytes += file_size
+        if session_path is None or not (Path(session_path) / dataset).exists():
+            network_bytes += file_size
+        if filename.endswith(".cbin"):
+            cbin_bytes += file_size
+        if collection.startswith("alf/probe") and filename.split(".")[0].endswith(("spikes", "clusters")):
+            spike_sorting_bytes += file_size
+
+    processed_bytes = downloaded_bytes - cbin_bytes
+    disk_bytes = network_bytes
+    output_bytes = 0
+    raw_rss_bytes = 0
+    processed_rss_bytes = 0
+    if convert_raw and not stub_test:
+        if not stream_raw_ephys:
+            disk_bytes += int(cbin_bytes * CBIN_DECOMPRESSION_RATIO)
+        output_bytes += int(cbin_bytes * RAW_NWB_TO_CBIN_RATIO)
+        raw_rss_bytes = RAW_CONVERSION_RSS_BYTES
+    if convert_processed:
+        # Spike data dominates the processed file, which is at most about the size of its sources
+        output_bytes += processed_bytes
+        processed_rss_bytes = PROCESSED_BASELINE_RSS_BYTES + int(spike_sorting_bytes * SPIKE_SORTING_RSS_FACTOR)
+    if pipelined:
+        rss_bytes = raw_rss_bytes + processed_rss_bytes
+    else:
+        rss_bytes = max(raw_rss_bytes, processed_rss_bytes)
+
+    return SessionCost(
+        eid=eid,
+        network_bytes=network_bytes,
+        disk_bytes=disk_bytes + output_bytes,
+        rss_bytes=rss_bytes,
+        conversion_bytes=downloaded_bytes,
+        output_bytes=output_bytes,
+    )
+
+
+def order_sessions_for_overlap(costs: list[SessionCost]) -> list[SessionCost]:
+    """
+    Order sessions so that downloads overlap conversions as much as possible (Johnson's rule).
+
+    The batch is a two-stage flow shop (download, then convert). Johnson's rule minimizes its makespan:
+    sessions downloading faster than they convert go first, by increasing download time, so that the
+    converter starts early and always has downloaded work queued; the others go last, by decreasing
+    conversion time, so that the last download is followed by a short conversion.
+
+    Parameters
+    ----------
+    costs : list of SessionCost
+        Estimated costs of the sessions.
+
+    Returns
+    -------
+    list of SessionCost
+        The same costs, in scheduling order.
+    """
+    short_downloads = [cost for cost in costs if cost.download_seconds < cost.conversion_seconds]
+    long_downloads = [cost for cost in costs if cost.download_seconds >= cost.conversion_seconds]
+    short_downloads.sort(key=lambda cost: cost.download_seconds)
+    long_downloads.sort(key=lambda cost: cost.conversion_seconds, reverse=True)
+    return short_downloads + long_downloads
+
+
+class BatchState:
+    """
+    Per-session state of a batch, persisted as JSON after every change.
+
+    Each session entry holds its status (pending, downloading, downloaded, converting, done or failed),
+    number of failed attempts, last error, estimated cost and, once done, a summary of its results.
+    """
+
+    def __init__(self, path: Path, sessions: dict[str, dict]) -> None:
+        self.path = Path(path)
+        self.sessions = sessions
+
+    @classmethod
+    def load(cls, path: Path, eids: list[str], retry_failed: bool = False) -> "BatchState":
+        """
+        Load the state file (or start a new one) and prepare it for a new run.
+
+        Sessions interrupted by a crash restart their stage: downloading -> pending, converting -> downloaded.
+        New eids are added as pending; failed sessions are reset to pending if `retry_failed`.
+        """
+        path = Path(path)
+        sessions = json.loads(path.read_text())["sessions"] if path.exists() else {}
+        for eid in eids:
+            sessions.setdefault(eid, {"status": PENDING, "attempts": 0})
+        for entry in sessions.values():
+            if entry["status"] == DOWNLOADING:
+                entry["status"] = PENDING
+            elif entry["status"] == CONVERTING:
+                entry["status"] = DOWNLOADED
+            elif entry["status"] == FAILED and retry_failed:
+                entry["status"] = PENDING
+                entry["attempts"] = 0
+        state = cls(path=path, sessions=sessions)
+        state.save()
+        return state
+
+    def update(self, eid: str, **fields) -> None:
+        """Update the entry of a session and save the state."""
+        self.sessions[eid].update(fields, updated=datetime.now(timezone.utc).isoformat())
+        self.save()
+
+    def save(self) -> None:
+        """Write the state atomically (a crash never leaves a truncated file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(f"{self.path.name}.tmp")
+        temporary_path.write_text(json.dumps({"sessions": self.sessions}, indent=2, default=str))
+        os.replace(temporary_path, self.path)
+
+    def eids_with_status(self, status: str) -> list[str]:
+        return [eid for eid, entry in self.sessions.items() if entry["status"] == status]
+
+    def count_by_status(self) -> dict[str, int]:
+        counts = {}
+        for entry in self.sessions.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+def _download_stage(eid: str, one: ONE, base_folder: Path, stub_test: bool, convert_raw: bool) -> dict:
+    download_info = download_session_data(
+        eid=eid, one=one, stub_test=stub_test, download_raw=convert_raw, base_path=base_folder
+    )
+    return {"download_size_gb": download_info["total_size_gb"], "download_time": download_info["download_time"]}
+
+
+def _convert_stage(eid: str, keep_session_data: bool, **convert_session_kwargs) -> dict:
+    results = convert_session(eid, **convert_session_kwargs)
+    # The per-interface download details are not needed to resume, keep the state file small
+    results.pop("download_info", None)
+    if not keep_session_data:
+        results["removed_session_data_bytes"] = _remove_session_data(
+            eid, one=convert_session_kwargs["one"], base_folder=convert_session_kwargs["base_folder"]
+        )
+    return json.loads(json.dumps(results, default=str))
+
+
+def _remove_session_data(eid: str, one: ONE, base_folder: Path) -> int:
+    """Delete the downloaded and decompressed data of a converted session (not its NWB files); returns the bytes."""
+    paths = setup_paths(one, eid, base_path=Path(base_folder))
+    removed_bytes = 0
+    for folder in (paths["session_folder"], paths["session_decompressed_ephys_folder"]):
+        if not folder.exists():
+            continue
+        removed_bytes += sum(file_path.stat().st_size for file_path in folder.rglob("*") if file_path.is_file())
+        shutil.rmtree(folder)
+    return removed_bytes
+
+
+def _fits_budget(used_bytes: int, needed_bytes: int, budget_gb: float | None, idle: bool) -> bool:
+    # A stage is always admitted when nothing of its kind runs, so that a session larger than a budget
+    # still runs (alone) instead of blocking the batch
+    return budget_gb is None or idle or used_bytes + needed_bytes <= budget_gb * 1024**3
+
+
+def run_batch_conversion(
+    eids: list[str],
+    *,
+    one: ONE,
+    base_folder: Path,
+    logs_folder: Path,
+    stub_test: bool,
+    convert_raw: bool,
+    convert_processed: bool,
+    max_workers: int = 4,
+    network_budget_gb: float | None = None,
+    rss_budget_gb: float | None = None,
+    disk_budget_gb: float | None = None,
+    state_path: Path | None = None,
+    keep_session_data: bool = True,
+    max_attempts: int = 2,
+    retry_failed: bool = False,
+    poll_interval: float = 5.0,
+    convert_session_kwargs: dict | None = None,
+    logger: logging.Logger | None = None,
+) -> BatchState:
+    """
+    Convert many sessions concurrently, resuming from the state file of a previous run.
+
+    Parameters
+    ----------
+    eids : list of str
+        Sessions to convert (sessions of the state file not listed here are left untouched).
+    one : ONE
+        ONE API client, inherited by the forked stage processes.
+    base_folder : Path
+        Root folder for all data (cache, NWB output, etc.), as in convert_session().
+    logs_folder : Path
+        Folder for per-session log files.
+    stub_test : bool
+        If True, use lightweight stub data.
+    convert_raw : bool
+        Whether to convert raw ephys data.
+    convert_processed : bool
+        Whether to convert processed/behavior data.
+    max_workers : int, default: 4
+        Maximum number of stage processes (downloads and conversions) running at once.
+    network_budget_gb : float, optional
+        Maximum estimated bytes of the downloads running at once. None for no limit.
+    rss_budget_gb : float, optional
+        Maximum estimated peak memory of the conversions running at once. None for no limit.
+    disk_budget_gb : float, optional
+        Maximum estimated disk footprint of the sessions converted by this run: those in flight (downloading,
+        waiting for their conversion or converting) and those done, which keep their NWB files and, with
+        `keep_session_data`, their downloaded data. Sessions are also only started while the free space of
+        `base_folder` covers their estimate. Once the done sessions fill the budget, no more session starts
+        and the others stay pending. None for no limit.
+    state_path : Path, optional
+        JSON state file. Defaults to base_folder / "batch_state.json".
+    keep_session_data : bool, default: True
+        If False, the downloaded data of a session (its folder in the ONE cache) and its decompressed ephys
+        are deleted once it is converted, so that only its NWB files count against `disk_budget_gb`.
+        Incompatible with the "symlink" video placement, whose links point into the ONE cache.
+    max_attempts : int, default: 2
+        Number of times a failing stage is tried before the session is marked as failed.
+    retry_failed : bool, default: False
+        If True, sessions marked as failed by a previous run are tried again.
+    poll_interval : float, default: 5.0
+        Seconds between two checks of the running stages.
+    convert_session_kwargs : dict, optional
+        Other convert_session() arguments (overwrite, stream_raw_ephys, pipelined, phase_timeouts...). The
+        conversions never download: the download stage does, within the network budget.
+    logger : logging.Logger, optional
+        Logger for the scheduling decisions (each session also logs to its own file). Defaults to the logger
+        of this module.
+
+    Returns
+    -------
+    BatchState
+        The final state; `count_by_status()` summarizes the batch and the entries of converted sessions
+        hold their convert_session() results.
+    """
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}.")
+    convert_session_kwargs = dict(convert_session_kwargs or {})
+    if not keep_session_data and convert_session_kwargs.get("video_placement") == "symlink":
+        raise ValueError(
+            "keep_session_data=False deletes the ONE cache of converted sessions, which the symlinked videos "
+            "point to; use another video_placement or keep the session data."
+        )
+    convert_session_kwargs.update(
+        one=one,
+        base_folder=base_folder,
+        logs_folder=logs_folder,
+        stub_test=stub_test,
+        convert_raw=convert_raw,
+        convert_processed=convert_processed,
+        # The download stage already fetched the data, within the network budget
+        skip_download=True,
+    )
+    log = (logger or _logger).info
+
+    state = BatchState.load(
+        path=state_path or Path(base_folder) / "batch_state.json", eids=list(eids), retry_failed=retry_failed
+    )
+
+    costs = {}
+    for eid in eids:
+        entry = state.sessions[eid]
+        if entry["status"] in (DONE, FAILED):
+            continue
+        if "cost" not in entry:
+            cost = estimate_session_cost(
+                one=one,
+                eid=eid,
+                convert_raw=convert_raw,
+                convert_processed=convert_processed,
+                stub_test=stub_test,
+                stream_raw_ephys=convert_session_kwargs.get("stream_raw_ephys", False),
+                pipelined=convert_session_kwargs.get("pipelined", False),
+            )
+            state.sessions[eid]["cost"] = asdict(cost)
+        costs[eid] = SessionCost(**state.sessions[eid]["cost"])
+    state.save()
+
+    download_queue = [cost.eid for cost in order_sessions_for_overlap(list(costs.values()))]
+    log(f"Batch of {len(eids)} session(s): {state.count_by_status()}")
+
+    # eid -> (stage, process)
+    running = {}
+    while True:
+        # Collect the finished stages
+        for eid, (stage, process) in list(running.items()):
+            if not process.done():
+                continue
+            del running[eid]
+            entry = state.sessions[eid]
+            try:
+                stage_results = process.result()
+            except RuntimeError as exception:
+                attempts = entry["attempts"] + 1
+                retry_status = PENDING if stage == DOWNLOADING else DOWNLOADED
+                status = retry_status if attempts < max_attempts else FAILED
+                state.update(eid, status=status, attempts=attempts, error=str(exception).splitlines()[0])
+                log(f"Session {eid}: {stage} failed (attempt {attempts}/{max_attempts}) -> {status}")
+                continue
+            if stage == DOWNLOADING:
+                state.update(eid, status=DOWNLOADED, download=stage_results)
+            else:
+                state.update(eid, status=DONE, results=stage_results, error=None)
+            log(f"Session {eid}: {stage} finished -> {state.sessions[eid]['status']}")
+
+        # Admit new stages: conversions first (they let downloaded sessions finish), then downloads
+        running_downloads = [eid for eid, (stage, _) in running.items() if stage == DOWNLOADING]
+        running_conversions = [eid for eid, (stage, _) in running.items() if stage == CONVERTING]
+        # Disk held by the sessions of this run: all of their estimate while downloading, waiting for their
+        # conversion or converting; once done, their NWB files and, unless removed, their downloaded data
+        in_flight = {eid for eid in costs if eid in running or state.sessions[eid]["status"] == DOWNLOADED}
+        done = [eid for eid in costs if state.sessions[eid]["status"] == DONE]
+        disk_in_use = sum(costs[eid].disk_bytes for eid in in_flight)
+        disk_in_use += sum(costs[eid].disk_bytes if keep_session_data else costs[eid].output_bytes for eid in done)
+        for eid in [eid for eid in download_queue if state.sessions[eid]["status"] == DOWNLOADED]:
+            if len(running) >= max_workers:
+                break
+            rss_in_use = sum(costs[other].rss_bytes for other in running_conversions)
+            if not _fits_budget(rss_in_use, costs[eid].rss_bytes, rss_budget_gb, idle=not running_conversions):
+                break
+            running[eid] = (
+                CONVERTING,
+                _LaneProcess(
+                    name=f"conversion of {eid}",
+                    lane_function=_convert_stage,
+                    lane_kwargs=dict(eid=eid, keep_session_data=keep_session_data, **convert_session_kwargs),
+                ),
+            )
+            running_conversions.append(eid)
+            state.update(eid, status=CONVERTING)
+            log(f"Session {eid}: converting ({len(running)} stage(s) running)")
+
+        for eid in [eid for eid in download_queue if state.sessions[eid]["status"] == PENDING]:
+            if len(running) >= max_workers:
+                break
+            network_in_use = sum(costs[other].network_bytes for other in running_downloads)
+            if not _fits_budget(
+                network_in_use, costs[eid].network_bytes, network_budget_gb, idle=not running_downloads
+            ):
+                break
+            if not _fits_budget(disk_in_use, costs[eid].disk_bytes, disk_budget_gb, idle=not disk_in_use):
+                break
+            if in_flight and shutil.disk_usage(base_folder).free < costs[eid].disk_bytes:
+                break
+            running[eid] = (
+                DOWNLOADING,
+                _LaneProcess(
+                    name=f"download of {eid}",
+                    lane_function=_download_stage,
+                    lane_kwargs=dict(
+                        eid=eid, one=one, base_folder=base_folder, stub_test=stub_test, convert_raw=convert_raw
+                    ),
+                ),
+            )
+            running_downloads.append(eid)
+            in_flight.add(eid)
+            disk_in_use += costs[eid].disk_bytes
+            state.update(eid, status=DOWNLOADING)
+            log(f"Session {eid}: downloading ({len(running)} stage(s) running)")
+
+        if not running:
+            pending = [eid for eid in download_queue if state.sessions[eid]["status"] == PENDING]
+            if pending:
+                log(f"Disk budget filled by the converted sessions, {len(pending)} session(s) left pending")
+            break
+        time.sleep(poll_interval)
+
+    log(f"Batch finished: {state.count_by_status()}")
+    return state
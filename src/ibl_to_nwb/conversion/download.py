@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from one.api import ONE
@@ -24,7 +26,8 @@ from ..datainterfaces import (
     WheelMovementsInterface,
     WheelPositionInterface,
 )
-from ..utils import setup_paths
+from ..utils import SessionDatasetIndex, setup_paths
+from ..utils.telemetry import span
 
 
 def download_session_data(
@@ -36,6 +39,9 @@ def download_session_data(
     download_processed: bool = True,
     base_path: Path | None = None,
     logger: logging.Logger | None = None,
+    max_workers: int = 1,
+    max_concurrent_large_downloads: int = 2,
+    large_download_threshold_gb: float = 1.0,
 ) -> dict:
     """Download all datasets for a session using interface-specific download methods.
 
@@ -60,11 +66,20 @@ def download_session_data(
         Base path for data storage.
     logger : logging.Logger, optional
         Logger instance for output.
+    max_workers : int, default 1
+        Maximum number of interfaces downloading concurrently. Downloads are started smallest first.
+        The workers share `one`, whose cache tables are not thread-safe: values above 1 are opt-in.
+    max_concurrent_large_downloads : int, default 2
+        Maximum number of concurrent downloads larger than `large_download_threshold_gb`
+        (e.g. raw .cbin files), which bounds the bandwidth taken by large transfers.
+    large_download_threshold_gb : float, default 1.0
+        Estimated interface download size above which a download counts as large.
 
     Returns
     -------
     dict
-        Download statistics including time, number of datasets, and total size.
+        Download statistics including time, number of datasets, total size, and per-interface
+        and per-file durations and throughput ("interface_downloads").
     """
     if logger:
         logger.info("Downloading session data from ONE...")
@@ -82,6 +97,9 @@ def download_session_data(
         shutil.rmtree(paths["session_folder"])
         paths["session_folder"].mkdir(parents=True, exist_ok=True)
 
+    # Single list_datasets query shared by every availability check below
+    dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+
     # Define all interfaces to download (for both RAW and PROCESSED conversions)
     interfaces_to_download = []
 
@@ -96,17 +114,17 @@ def download_session_data(
     )
 
     # Licks are optional - not all sessions have lick detection data
-    if LickInterface.check_availability(one, eid)["available"]:
+    if LickInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
         interfaces_to_download.append(("Licks", LickInterface, {}))
 
     # Passive period interfaces (check availability first - each is optional)
-    if PassiveIntervalsInterface.check_availability(one, eid)["available"]:
-        interfaces_to_download.append(("PassiveIntervals", PassiveIntervalsInterface, {}))
+    if PassiveIntervalsInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
+        interfaces_to_download.append(("PassiveIntervals", PassiveIntervalsInterface, {"dataset_index": dataset_index}))
 
-    if PassiveReplayStimInterface.check_availability(one, eid)["available"]:
-        interfaces_to_download.append(("PassiveReplay", PassiveReplayStimInterface, {}))
+    if PassiveReplayStimInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
+        interfaces_to_download.append(("PassiveReplay", PassiveReplayStimInterface, {"dataset_index": dataset_index}))
 
-    if PassiveRFMInterface.check_availability(one, eid)["available"]:
+    if PassiveRFMInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
         interfaces_to_download.append(("PassiveRFM", PassiveRFMInterface, {}))
 
     # Spike sorting and anatomical localization
@@ -125,7 +143,7 @@ def download_session_data(
         interfaces_to_download.append(("RawSpikeGLX", IblSpikeGlxConverter, {}))
 
         # NIDQ data (behavioral sync signals) - optional
-        if IblNIDQInterface.check_availability(one, eid)["available"]:
+        if IblNIDQInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
             interfaces_to_download.append(("NIDQ", IblNIDQInterface, {}))
 
     # Camera-based interfaces (videos, pose, pupil, motion energy)
@@ -136,42 +154,60 @@ def download_session_data(
 
         # Check and add each camera interface if available
         # Raw videos are only needed for raw conversion, skip if download_raw=False
-        if download_raw and RawVideoInterface.check_availability(one, eid, camera_name=camera_view)["available"]:
+        if (
+            download_raw
+            and RawVideoInterface.check_availability(one, eid, camera_name=camera_view, dataset_index=dataset_index)[
+                "available"
+            ]
+        ):
             interfaces_to_download.append((f"RawVideo_{camera_view}", RawVideoInterface, {"camera_name": camera_view}))
 
-        if IblPoseEstimationInterface.check_availability(one, eid, camera_name=camera_name)["available"]:
+        if IblPoseEstimationInterface.check_availability(
+            one, eid, camera_name=camera_name, dataset_index=dataset_index
+        )["available"]:
             interfaces_to_download.append(
                 (f"PoseEstimation_{camera_view}", IblPoseEstimationInterface, {"camera_name": camera_name})
             )
 
         # Pupil tracking - only for left/right cameras (body camera doesn't capture eyes)
         if camera_view in ["left", "right"]:
-            if PupilTrackingInterface.check_availability(one, eid, camera_name=camera_name)["available"]:
+            if PupilTrackingInterface.check_availability(
+                one, eid, camera_name=camera_name, dataset_index=dataset_index
+            )["available"]:
                 interfaces_to_download.append(
                     (f"PupilTracking_{camera_view}", PupilTrackingInterface, {"camera_name": camera_name})
                 )
 
-        if RoiMotionEnergyInterface.check_availability(one, eid, camera_name=camera_name)["available"]:
+        if RoiMotionEnergyInterface.check_availability(one, eid, camera_name=camera_name, dataset_index=dataset_index)[
+            "available"
+        ]:
             interfaces_to_download.append(
                 (f"RoiMotionEnergy_{camera_view}", RoiMotionEnergyInterface, {"camera_name": camera_name})
             )
 
+    # Skip heavy data in stub test mode
+    # For spike sorting, stub mode is handled within the interface
+    if stub_test:
+        for interface_name, _, _ in interfaces_to_download:
+            if "RawVideo" in interface_name and logger:
+                logger.info(f"  [{interface_name}] Skipped (stub mode)")
+        interfaces_to_download = [entry for entry in interfaces_to_download if "RawVideo" not in entry[0]]
+
     if logger:
         logger.info(f"Downloading data for {len(interfaces_to_download)} interface(s)...")
 
-    # Download data for each interface
     # No try-except - let failures propagate (fail-fast principle)
-    for interface_name, interface_class, kwargs in interfaces_to_download:
-        # Skip heavy data in stub test mode
-        if stub_test:
-            # Skip raw ephys and raw videos in stub mode
-            if "RawVideo" in interface_name:
-                if logger:
-                    logger.info(f"  [{interface_name}] Skipped (stub mode)")
-                continue
-            # For spike sorting, stub mode is handled within the interface
-
-        interface_class.download_data(one=one, eid=eid, logger=logger, **kwargs)
+    interface_downloads = _run_scheduled_downloads(
+        one=one,
+        eid=eid,
+        interfaces_to_download=interfaces_to_download,
+        dataset_index=dataset_index,
+        session_folder=paths["session_folder"],
+        max_workers=max_workers,
+        max_concurrent_large_downloads=max_concurrent_large_downloads,
+        large_download_threshold_bytes=int(large_download_threshold_gb * 1024**3),
+        logger=logger,
+    )
 
     download_time = time.time() - download_start
 
@@ -193,4 +229,213 @@ def download_session_data(
         "num_datasets": len(interfaces_to_download),
         "total_size_bytes": total_size_bytes,
         "total_size_gb": total_size_gb,
+        "interface_downloads": interface_downloads,
     }
+
+
+def _select_download_option(exact_files_options: dict[str, list[str]], dataset_index: SessionDatasetIndex) -> list:
+    """Return the files of the option `download_data()` will fetch: the first one complete in the session."""
+    for option_files in exact_files_options.values():
+        if all(dataset_index.contains(required_file) for required_file in option_files):
+            return list(option_files)
+    # No complete option: download_data() tries them all and fails, the first one is as good an estimate as any
+    return list(next(iter(exact_files_options.values()), []))
+
+
+def _stat_local_datasets(session_folder: Path, datasets: list[str]) -> dict[str, tuple[int, float]]:
+    """Return the (size, modification time) of the datasets present in the local session folder."""
+    local_datasets = {}
+    for dataset in datasets:
+        local_path = session_folder / dataset
+        if local_path.is_file():
+            file_stat = local_path.stat()
+            local_datasets[dataset] = (file_stat.st_size, file_stat.st_mtime)
+    return local_datasets
+
+
+def _group_overlapping_downloads(scheduled: list[dict], dataset_index: SessionDatasetIndex) -> list[list[dict]]:
+    """Group the downloads sharing datasets (e.g. the wheel interfaces), keeping their order within each group."""
+    groups = []
+    for entry in scheduled:
+        datasets = {
+            dataset
+            for required_file in entry["files"]
+            for dataset in (dataset_index.find(required_file) or [required_file])
+        }
+        overlapping_groups = [group for group in groups if group["datasets"] & datasets]
+        merged_group = {"entries": [], "datasets": datasets}
+        for group in overlapping_groups:
+            merged_group["entries"].extend(group["entries"])
+            merged_group["datasets"] |= group["datasets"]
+            groups.remove(group)
+        merged_group["entries"].append(entry)
+        groups.append(merged_group)
+    return [group["entries"] for group in groups]
+
+
+def _run_scheduled_downloads(
+    one: ONE,
+    eid: str,
+    interfaces_to_download: list[tuple[str, type, dict]],
+    dataset_index: SessionDatasetIndex,
+    session_folder: Path,
+    max_workers: int,
+    max_concurrent_large_downloads: int,
+    large_download_threshold_bytes: int,
+    logger: logging.Logger | None = None,
+) -> list[dict]:
+    """Run the interface downloads on a bounded thread pool, smallest first.
+
+    Every interface's expected bytes are estimated up front from the files of the `get_data_requirements()`
+    option it will download (the first one complete in the session) and the dataset sizes of the session index.
+    Interfaces sharing datasets (the wheel interfaces share the wheel object, the sorting and anatomical
+    localization the spike sorting channels) are grouped and downloaded one after the other by the same
+    worker, so that no file is downloaded twice at the same time into the same cache path; the later ones
+    find it cached. Groups are submitted in ascending size order so the long tail of small `alf/` files is
+    not queued behind multi-GB `.cbin` transfers. Groups above `large_download_threshold_bytes`
+    additionally share a semaphore of `max_concurrent_large_downloads` slots, which acts as the bandwidth
+    budget for large transfers.
+
+    The workers share `one`, and ONE is not thread-safe: every download updates its cache tables without
+    locking. `ThreadSafeONE` cannot help here, as it would hold its lock for the whole transfer and serialize
+    the downloads again. max_workers > 1 is therefore opt-in; with the default of 1, the groups are still
+    downloaded smallest first.
+
+    Throughput is measured on the bytes actually fetched: the datasets of an interface that were not in the
+    local session folder before its download (or were replaced by it). Each fetched file is reported with
+    the time from the start of its interface download to its completion (its modification time); files
+    already cached count as 0 bytes.
+
+    Fail-fast: the first exception cancels every download that has not started yet and is re-raised
+    once the running downloads return.
+
+    Parameters
+    ----------
+    one : ONE
+        ONE API client instance.
+    eid : str
+        Session EID.
+    interfaces_to_download : list of (name, interface class, kwargs) tuples
+        Downloads to run; kwargs are forwarded to `get_data_requirements()` and `download_data()`.
+    dataset_index : SessionDatasetIndex
+        Index of the session datasets, used for size estimates and to find shared datasets.
+    session_folder : Path
+        Local folder of the session in the ONE cache, where the datasets are downloaded.
+    max_workers : int
+        Maximum number of concurrent downloads. 1 downloads sequentially.
+    max_concurrent_large_downloads : int
+        Maximum number of concurrent downloads above `large_download_threshold_bytes`.
+    large_download_threshold_bytes : int
+        Estimated size above which a download counts as large.
+    logger : logging.Logger, optional
+        Logger instance for output.
+
+    Returns
+    -------
+    list of dict
+        One entry per interface, in completion order, with name, files, estimated and fetched bytes, duration,
+        throughput and the fetched files ("file_downloads", each with dataset, bytes, seconds and throughput).
+    """
+    scheduled = []
+    for interface_name, interface_class, kwargs in interfaces_to_download:
+        requirements = interface_class.get_data_requirements(**kwargs)
+        required_files = _select_download_option(requirements.get("exact_files_options", {}), dataset_index)
+        scheduled.append(
+            {
+                "estimated_bytes": dataset_index.get_size_bytes(required_files),
+                "interface_name": interface_name,
+                "interface_class": interface_class,
+                "kwargs": kwargs,
+                "files": required_files,
+            }
+        )
+    download_groups = [
+        (dataset_index.get_size_bytes([required_file for entry in group for required_file in entry["files"]]), group)
+        for group in _group_overlapping_downloads(scheduled, dataset_index)
+    ]
+    download_groups.sort(key=lambda download_group: download_group[0])
+
+    large_download_slots = threading.Semaphore(max_concurrent_large_downloads)
+
+    def download(entry: dict) -> dict:
+        interface_name, estimated_bytes, files = entry["interface_name"], entry["estimated_bytes"], entry["files"]
+        datasets = sorted({dataset for required_file in files for dataset in dataset_index.find(required_file)})
+        cached_datasets = _stat_local_datasets(session_folder, datasets)
+        start_time = time.time()
+        with span(
+            "download_data",
+            category="interface",
+            interface=interface_name,
+            estimated_bytes=estimated_bytes,
+            items=len(files),
+        ):
+            entry["interface_class"].download_data(one=one, eid=eid, logger=logger, **entry["kwargs"])
+        duration = time.time() - start_time
+
+        file_downloads = []
+        for dataset, (file_size, modification_time) in _stat_local_datasets(session_folder, datasets).items():
+            if cached_datasets.get(dataset) == (file_size, modification_time):
+                continue
+            seconds = min(max(modification_time - start_time, 0.0), duration)
+            file_downloads.append(
+                {
+                    "dataset": dataset,
+                    "bytes": file_size,
+                    "seconds": seconds,
+                    "throughput_mb_per_s": file_size / 1e6 / seconds if seconds > 0 else 0.0,
+                }
+            )
+        fetched_bytes = sum(file_download["bytes"] for file_download in file_downloads)
+
+        throughput_mb_per_s = fetched_bytes / 1e6 / duration if duration > 0 else 0.0
+        if logger:
+            logger.info(
+                f"  [{interface_name}] {len(file_downloads)}/{len(datasets)} file(s) fetched, "
+                f"{fetched_bytes / 1e6:.1f} MB in {duration:.2f}s ({throughput_mb_per_s:.1f} MB/s)"
+            )
+            for file_download in file_downloads:
+                logger.info(
+                    f"    {file_download['dataset']}: {file_download['bytes'] / 1e6:.1f} MB "
+                    f"in {file_download['seconds']:.2f}s ({file_download['throughput_mb_per_s']:.1f} MB/s)"
+                )
+        return {
+            "interface_name": interface_name,
+            "files": files,
+            "estimated_bytes": estimated_bytes,
+            "fetched_bytes": fetched_bytes,
+            "duration_seconds": duration,
+            "throughput_mb_per_s": throughput_mb_per_s,
+            "file_downloads": file_downloads,
+        }
+
+    def download_group(group_bytes: int, group: list[dict]) -> list[dict]:
+        is_large = group_bytes > large_download_threshold_bytes
+        if is_large:
+            large_download_slots.acquire()
+        try:
+            return [download(entry) for entry in group]
+        finally:
+            if is_large:
+                large_download_slots.release()
+
+    wall_start = time.time()
+    interface_downloads = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(download_group, *download_group_entry) for download_group_entry in download_groups]
+        try:
+            for future in as_completed(futures):
+                interface_downloads.extend(future.result())
+        except BaseException:
+            for pending_future in futures:
+                pending_future.cancel()
+            raise
+
+    if logger:
+        fetched_bytes = sum(interface_download["fetched_bytes"] for interface_download in interface_downloads)
+        wall_time = time.time() - wall_start
+        logger.info(
+            f"Downloaded {len(interface_downloads)} interface(s), {fetched_bytes / 1e9:.2f} GB fetched, "
+            f"in {wall_time:.2f}s wall time with {max_workers} worker(s)"
+        )
+
+    return interface_downloads
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
@@ -10,9 +11,10 @@ from zoneinfo import ZoneInfo
 from ndx_ibl import IblMetadata, IblSubject
 from neuroconv import ConverterPipe
 from neuroconv.tools import configure_and_write_nwbfile
+from neuroconv.tools.nwb_helpers import get_default_backend_configuration
 from one import alf
 from one.api import ONE
-from pynwb import NWBFile, read_nwb
+from pynwb import NWBFile
 
 from ..datainterfaces import (
     BrainwideMapTrialsInterface,
@@ -32,11 +34,34 @@ from ..datainterfaces import (
     WheelPositionInterface,
 )
 from ..utils import (
+    SessionDataCache,
+    SessionDatasetIndex,
     add_probe_electrodes_with_localization,
+    finalize_nwbfile,
     get_ibl_subject_metadata,
     sanitize_subject_id_for_dandi,
     setup_paths,
+    validate_nwbfile_integrity,
 )
+from ..utils.dataset_policy import apply_dataset_policy, is_plugin_compression_available
+from ..utils.incremental_update import (
+    describe_added_containers,
+    discard_nwbfile_update,
+    get_container_ids,
+    get_interface_provenance,
+    plan_incremental_update,
+    read_nwbfile_for_update,
+    write_interface_provenance,
+    write_updated_nwbfile,
+)
+from ..utils.memory_profiling import MemoryProfiler, measure_memory
+from ..utils.telemetry import span, summarize_dataset_configurations
+from ..utils.thread_safe_one import ThreadSafeONE
+
+# Number of threads loading interface data (prepare phase) while earlier interfaces are committed. The
+# ThreadSafeONE shared by the threads serializes the ONE loads, which include reading and parsing the files,
+# so more threads barely overlap anything: the prepare/commit split runs with concurrency disabled.
+DEFAULT_PREPARE_WORKERS = 1
 
 
 def _valid_existing_nwb(nwb_path: Path, overwrite: bool, logger: logging.Logger | None = None) -> bool:
@@ -44,7 +69,7 @@ def _valid_existing_nwb(nwb_path: Path, overwrite: bool, logger: logging.Logger
         return False
 
     try:
-        read_nwb(str(nwb_path))
+        validate_nwbfile_integrity(nwb_path)
     except Exception as exc:
         if logger:
             logger.warning(
@@ -55,7 +80,7 @@ def _valid_existing_nwb(nwb_path: Path, overwrite: bool, logger: logging.Logger
         return False
 
     if logger:
-        logger.info("Skipping conversion because %s already exists and is readable.", nwb_path)
+        logger.info("Skipping conversion because %s already exists and is complete.", nwb_path)
     return True
 
 
@@ -66,8 +91,13 @@ def convert_processed_session(
     base_path: Path | None = None,
     logger: logging.Logger | None = None,
     overwrite: bool = False,
+    incremental: bool = False,
+    compression_plugins: bool = False,
     verbose: bool = False,
     display_progress_bar: bool = True,
+    max_prepare_workers: int = DEFAULT_PREPARE_WORKERS,
+    profile_memory: bool = False,
+    trace_memory_allocations: bool = False,
 ) -> dict:
     """Convert IBL processed session to NWB.
 
@@ -86,17 +116,55 @@ def convert_processed_session(
     logger : logging.Logger, optional
         Logger instance for conversion progress
     overwrite : bool, optional
-        If True, overwrite existing NWB files
+        If True, overwrite existing NWB files. Otherwise an existing file is kept when it passes
+        `ibl_to_nwb.utils.validate_nwbfile_integrity` (complete write, unchanged since), and regenerated if not
+    incremental : bool, optional
+        If True, update an existing NWB file instead of skipping it, through a copy that replaces it once
+        written: only the interfaces missing from the file, or whose input datasets or options changed since it
+        was written (e.g. a new pose revision), are loaded and written, the containers of the latter replacing
+        the old ones. Files that cannot be updated this way (incomplete, written before incremental updates, or a
+        changed interface modifying containers of others) are converted in full. See `ibl_to_nwb.utils.incremental_update` (default: False)
+    compression_plugins : bool, optional
+        If True, compress the spike times with Blosc (zstd, byte shuffle) instead of gzip, which requires
+        hdf5plugin to write and to read the file. The chunk shapes of `ibl_to_nwb.utils.dataset_policy` apply
+        either way (default: False)
     verbose : bool, optional
         If True, enable verbose output from neuroconv interfaces
     display_progress_bar : bool, optional
         If True, display progress bars during data conversion (default: True for local runs)
+    max_prepare_workers : int, optional
+        Number of threads loading and transforming the data of the interfaces (their prepare phase)
+        while the NWBFile is assembled. The data is attached to the NWBFile on the main thread, in the
+        same order as with a single worker, so the output does not depend on this value. At most this
+        many interfaces are prepared ahead of their commit, their data waiting in memory until its turn,
+        so more workers trade peak memory for speed. The workers share `one` through a ThreadSafeONE, which
+        holds its lock for the whole of each ONE call: loading, downloading and parsing the files run one at a
+        time, and only the transformations outside ONE calls overlap, so values above 1 gain little.
+        Use 1 to prepare and commit the interfaces one after the other (default: 1)
+    profile_memory : bool, optional
+        If True, sample the RSS while each interface is added and while the file is written, and return
+        the peak and per-interface figures under "memory_profile" (see MemoryProfiler). The interfaces are
+        then prepared one after the other, so that the memory of each is measured on its own (default: False)
+    trace_memory_allocations : bool, optional
+        If True (with profile_memory), also report the top allocation sites of each interface with
+        tracemalloc; slows the conversion down (default: False)
 
     Returns
     -------
     dict
-        Conversion result information including NWB file path and timing
+        Conversion result information including NWB file path and timing, and the memory profile
+        ("memory_profile", None unless profile_memory). Incremental updates also list the interfaces written
+        ("updated_interfaces")
     """
+    if overwrite and incremental:
+        raise ValueError("overwrite and incremental are mutually exclusive.")
+    if compression_plugins and not is_plugin_compression_available():
+        raise ValueError("compression_plugins requires hdf5plugin; install it with `pip install hdf5plugin`.")
+    if max_prepare_workers < 1:
+        raise ValueError(f"max_prepare_workers must be at least 1, got {max_prepare_workers}.")
+    if profile_memory:
+        # Concurrent preparations would mix the memory of several interfaces in each measurement
+        max_prepare_workers = 1
 
     # ========================================================================
     # SUPPRESS HARMLESS WARNINGS
@@ -133,7 +201,7 @@ def convert_processed_session(
         output_dir / f"sub-{subject_id_for_filenames}_ses-{eid}_desc-processed_behavior+ecephys.nwb"
     )
 
-    if _valid_existing_nwb(provisional_nwbfile_path, overwrite=overwrite, logger=logger):
+    if not incremental and _valid_existing_nwb(provisional_nwbfile_path, overwrite=overwrite, logger=logger):
         size_bytes = provisional_nwbfile_path.stat().st_size
         size_gb = size_bytes / (1024**3)
         return {
@@ -152,10 +220,19 @@ def convert_processed_session(
     interface_creation_start = time.time()
 
     data_interfaces = []
+    if max_prepare_workers > 1:
+        # The interfaces call ONE from the prepare threads: one call at a time
+        one = ThreadSafeONE(one)
     interface_kwargs = dict(one=one, session=eid)
 
+    # Single list_datasets query shared by every availability check below
+    dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+    # Objects loaded by several interfaces (spike sorting, wheel, camera objects) are parsed once
+    data_cache = SessionDataCache(one=one, eid=eid)
+
     # Spike sorting
     sorting_interface = IblSortingInterface(**interface_kwargs)
+    sorting_interface.set_data_cache(data_cache)
     data_interfaces.append(sorting_interface)
 
     # Anatomical localization (loads probe info and histology QC internally)
@@ -170,22 +247,22 @@ def convert_processed_session(
     data_interfaces.append(WheelKinematicsInterface(**interface_kwargs))
 
     # Session epochs (high-level task vs passive phases)
-    if SessionEpochsInterface.check_availability(one, eid)["available"]:
-        data_interfaces.append(SessionEpochsInterface(**interface_kwargs))
+    if SessionEpochsInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
+        data_interfaces.append(SessionEpochsInterface(**interface_kwargs, dataset_index=dataset_index))
 
     # Passive period data - add each interface if its data is available
-    if PassiveIntervalsInterface.check_availability(one, eid)["available"]:
-        data_interfaces.append(PassiveIntervalsInterface(**interface_kwargs))
+    if PassiveIntervalsInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
+        data_interfaces.append(PassiveIntervalsInterface(**interface_kwargs, dataset_index=dataset_index))
 
     # NOTE: PassiveRFMInterface is temporarily disabled due to data quality issues - waiting for upstream fix
     # if PassiveRFMInterface.check_availability(one, eid)["available"]:
     #     data_interfaces.append(PassiveRFMInterface(**interface_kwargs))
 
-    if PassiveReplayStimInterface.check_availability(one, eid)["available"]:
-        data_interfaces.append(PassiveReplayStimInterface(**interface_kwargs))
+    if PassiveReplayStimInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
+        data_interfaces.append(PassiveReplayStimInterface(**interface_kwargs, dataset_index=dataset_index))
 
     # Licks - optional interface
-    if LickInterface.check_availability(one, eid)["available"]:
+    if LickInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
         data_interfaces.append(LickInterface(**interface_kwargs))
 
     # Camera-based interfaces (pose estimation, pupil tracking, ROI motion energy)
@@ -194,7 +271,9 @@ def convert_processed_session(
         camera_name = f"{camera_view}Camera"
 
         # Pose estimation - check_availability handles Lightning Pose → DLC fallback
-        pose_availability = IblPoseEstimationInterface.check_availability(one, eid, camera_name=camera_name)
+        pose_availability = IblPoseEstimationInterface.check_availability(
+            one, eid, camera_name=camera_name, dataset_index=dataset_index
+        )
         if pose_availability["available"]:
             # Determine tracker from which alternative was found
             alternative = pose_availability.get("alternative_used", "lightning_pose")
@@ -205,13 +284,22 @@ def convert_processed_session(
 
         # Pupil tracking - only for left/right cameras (body camera doesn't capture eyes)
         if camera_view in ["left", "right"]:
-            if PupilTrackingInterface.check_availability(one, eid, camera_name=camera_name)["available"]:
+            if PupilTrackingInterface.check_availability(
+                one, eid, camera_name=camera_name, dataset_index=dataset_index
+            )["available"]:
                 data_interfaces.append(PupilTrackingInterface(camera_name=camera_name, **interface_kwargs))
 
         # ROI motion energy
-        if RoiMotionEnergyInterface.check_availability(one, eid, camera_name=camera_name)["available"]:
+        if RoiMotionEnergyInterface.check_availability(one, eid, camera_name=camera_name, dataset_index=dataset_index)[
+            "available"
+        ]:
             data_interfaces.append(RoiMotionEnergyInterface(camera_name=camera_name, **interface_kwargs))
 
+    # Register every remaining consumer before the first add_to_nwbfile loads shared data
+    for data_interface in data_interfaces:
+        if data_interface.data_cache is None:
+            data_interface.set_data_cache(data_cache)
+
     interface_creation_time = time.time() - interface_creation_start
     if logger:
         logger.info(f"Data interfaces created in {interface_creation_time:.2f}s")
@@ -275,6 +363,57 @@ def convert_processed_session(
         "stub_test": stub_test,
     }
 
+    # Provenance of each interface, recorded in the file to allow incremental updates
+    data_interface_items = list(converter.data_interface_objects.items())
+    interface_provenance = {
+        interface_name: get_interface_provenance(
+            data_interface, dataset_index=dataset_index, conversion_options=conversion_options.get(interface_name)
+        )
+        for interface_name, data_interface in data_interface_items
+    }
+    update_plan = None
+    if incremental and provisional_nwbfile_path.exists():
+        try:
+            update_plan = plan_incremental_update(
+                provisional_nwbfile_path, interface_fingerprints=dict(interface_provenance.values())
+            )
+        except ValueError as exc:
+            if logger:
+                logger.warning(
+                    "Cannot update %s incrementally (reason: %s); converting the whole session.",
+                    provisional_nwbfile_path,
+                    exc,
+                )
+
+    if update_plan is not None:
+        if logger:
+            logger.info(
+                "Incremental update: %d up to date, writing missing %s and stale %s",
+                len(update_plan.up_to_date),
+                update_plan.missing,
+                update_plan.stale,
+            )
+            if update_plan.obsolete:
+                logger.warning("Interfaces no longer converted, left in the file: %s", update_plan.obsolete)
+        if not update_plan.interfaces_to_write:
+            size_bytes = provisional_nwbfile_path.stat().st_size
+            return {
+                "nwbfile_path": provisional_nwbfile_path,
+                "nwb_size_bytes": size_bytes,
+                "nwb_size_gb": size_bytes / (1024**3),
+                "write_time": 0.0,
+                "skipped": True,
+                "updated_interfaces": [],
+            }
+        skipped_items = [
+            (interface_name, data_interface)
+            for interface_name, data_interface in data_interface_items
+            if interface_provenance[interface_name][0] not in update_plan.interfaces_to_write
+        ]
+        for _, data_interface in skipped_items:
+            data_interface.release_data_cache()
+        data_interface_items = [item for item in data_interface_items if item not in skipped_items]
+
     # ========================================================================
     # STEP 5: Create NWBFile and add data
     # ========================================================================
@@ -282,39 +421,96 @@ def convert_processed_session(
         logger.info("Creating NWBFile and adding data (converting)...")
     conversion_start = time.time()
 
-    subject_metadata_for_ndx = metadata.pop("Subject")
-    ibl_subject = IblSubject(**subject_metadata_for_ndx)
-
-    nwbfile = NWBFile(**metadata["NWBFile"])
-    nwbfile.subject = ibl_subject
-    nwbfile.add_lab_meta_data(lab_meta_data=IblMetadata(revision="2025-05-06"))
-
-    for probe_name, pid in anat_interface.probe_name_to_probe_id_dict.items():
-        add_probe_electrodes_with_localization(
-            nwbfile=nwbfile,
-            one=one,
-            eid=eid,
-            probe_name=probe_name,
-            pid=pid,
-        )
+    memory_profiler = None
+    if profile_memory:
+        memory_profiler = MemoryProfiler(trace_allocations=trace_memory_allocations)
+
+    # Two-phase conversion: interfaces load their data in worker threads (prepare), overlapping with the
+    # NWBFile setup below, and attach it to the NWBFile on this thread, in converter order (commit).
+    # At most max_prepare_workers interfaces are prepared ahead of the commits (running or waiting with their
+    # data in memory): the next one is submitted as each is committed.
+    prepare_executor = None
+    prepare_futures = {}
+    pending_preparations = iter(data_interface_items)
+
+    def submit_next_preparation() -> None:
+        for interface_name, data_interface in pending_preparations:
+            prepare_futures[interface_name] = prepare_executor.submit(
+                data_interface.prepare, metadata=metadata, **conversion_options.get(interface_name, {})
+            )
+            return
 
-    # Add probe trajectory table (insertion geometry: angles, depth, coordinates)
-    if anat_interface.probe_name_to_probe_id_dict:
-        trajectory_interface = ProbeTrajectoryInterface(
-            one=one,
-            eid=eid,
-            probe_name_to_probe_id_dict=anat_interface.probe_name_to_probe_id_dict,
-        )
-        trajectory_interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata)
+    if max_prepare_workers > 1:
+        prepare_executor = ThreadPoolExecutor(max_workers=max_prepare_workers, thread_name_prefix="ibl-prepare")
+        for _ in range(max_prepare_workers):
+            submit_next_preparation()
 
-    # Add data from all interfaces
-    for interface_name, data_interface in converter.data_interface_objects.items():
-        interface_conversion_options = conversion_options.get(interface_name, {})
-        data_interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata, **interface_conversion_options)
+    # Provenance record entries: those of the interfaces kept from the existing file, then the ones written now
+    interface_records = dict(update_plan.interface_records) if update_plan is not None else {}
+    nwbfile = None
+    try:
+        if update_plan is None:
+            subject_metadata_for_ndx = metadata.pop("Subject")
+            ibl_subject = IblSubject(**subject_metadata_for_ndx)
+
+            nwbfile = NWBFile(**metadata["NWBFile"])
+            nwbfile.subject = ibl_subject
+            nwbfile.add_lab_meta_data(lab_meta_data=IblMetadata(revision="2025-05-06"))
+
+            for probe_name, pid in anat_interface.probe_name_to_probe_id_dict.items():
+                add_probe_electrodes_with_localization(
+                    nwbfile=nwbfile,
+                    one=one,
+                    eid=eid,
+                    probe_name=probe_name,
+                    pid=pid,
+                )
+
+            # Add probe trajectory table (insertion geometry: angles, depth, coordinates)
+            if anat_interface.probe_name_to_probe_id_dict:
+                trajectory_interface = ProbeTrajectoryInterface(
+                    one=one,
+                    eid=eid,
+                    probe_name_to_probe_id_dict=anat_interface.probe_name_to_probe_id_dict,
+                )
+                trajectory_interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata)
+        else:
+            # Subject, electrodes and trajectories are already in the file
+            nwbfile = read_nwbfile_for_update(update_plan)
+
+        # Add data from all interfaces, freeing shared data once its last consumer is done
+        for interface_name, data_interface in data_interface_items:
+            interface_conversion_options = conversion_options.get(interface_name, {})
+            if interface_name in prepare_futures:
+                # Re-raises the exception of a failed preparation
+                prepare_futures.pop(interface_name).result()
+                submit_next_preparation()
+            container_ids_before = get_container_ids(nwbfile)
+            with (
+                span("add_to_nwbfile", category="interface", interface=interface_name),
+                measure_memory(memory_profiler, interface_name),
+            ):
+                data_interface.commit(nwbfile=nwbfile, metadata=metadata, **interface_conversion_options)
+            data_interface.release_data_cache()
+            provenance_key, fingerprint = interface_provenance[interface_name]
+            interface_records[provenance_key] = {
+                "fingerprint": fingerprint,
+                **describe_added_containers(nwbfile, container_ids_before),
+            }
+    except BaseException:
+        if update_plan is not None:
+            # The file is left as it was
+            discard_nwbfile_update(update_plan, nwbfile)
+        raise
+    finally:
+        if prepare_executor is not None:
+            # Pending preparations are only left after an error: skip them and wait for the running ones
+            prepare_executor.shutdown(wait=True, cancel_futures=True)
 
     conversion_time = time.time() - conversion_start
     if logger:
         logger.info(f"In-memory NWBFile built in {conversion_time:.2f}s")
+        logger.info(f"Session data cache: {data_cache.hits} hits, {data_cache.misses} loads")
 
     # ========================================================================
     # STEP 6: Write NWB file
@@ -327,11 +523,42 @@ def convert_processed_session(
     subject_id_for_filename = sanitize_subject_id_for_dandi(nwbfile.subject.subject_id)
     nwbfile_path = output_dir / f"sub-{subject_id_for_filename}_ses-{eid}_desc-processed_behavior+ecephys.nwb"
 
-    configure_and_write_nwbfile(
-        nwbfile=nwbfile,
-        nwbfile_path=nwbfile_path,
-        backend="hdf5",
-    )
+    try:
+        with (
+            span("write_nwbfile", category="write", nwb_type="processed") as write_span,
+            measure_memory(memory_profiler, "write_nwbfile"),
+        ):
+            # In append mode, only the datasets added by the updated interfaces are configured
+            backend_configuration = get_default_backend_configuration(nwbfile=nwbfile, backend="hdf5")
+            applied_rules = apply_dataset_policy(
+                backend_configuration=backend_configuration, nwbfile=nwbfile, plugin_filters=compression_plugins
+            )
+            write_span.record(
+                **summarize_dataset_configurations(backend_configuration),
+                dataset_policy=applied_rules,
+                incremental=update_plan is not None,
+            )
+            if update_plan is None:
+                configure_and_write_nwbfile(
+                    nwbfile=nwbfile,
+                    nwbfile_path=nwbfile_path,
+                    backend_configuration=backend_configuration,
+                )
+                write_interface_provenance(nwbfile_path, interface_records=interface_records)
+            else:
+                write_updated_nwbfile(
+                    nwbfile=nwbfile,
+                    backend_configuration=backend_configuration,
+                    update_plan=update_plan,
+                    interface_records=interface_records,
+                )
+            finalize_nwbfile(nwbfile_path)
+            write_span.record(nwb_size_bytes=nwbfile_path.stat().st_size)
+    except BaseException:
+        if update_plan is not None:
+            # Until write_updated_nwbfile replaces the file, the update only changed its copy
+            discard_nwbfile_update(update_plan, nwbfile)
+        raise
 
     write_time = time.time() - write_start
 
@@ -349,10 +576,14 @@ def convert_processed_session(
         logger.info(f"PROCESSED conversion total time: {total_time_hours:.2f} hours")
         logger.info(f"PROCESSED conversion completed: {nwbfile_path}")
         logger.info(f"PROCESSED NWB saved to: {nwbfile_path}")
+        if memory_profiler is not None:
+            memory_profiler.log_summary(logger)
 
     return {
         "nwbfile_path": nwbfile_path,
         "nwb_size_bytes": nwb_size_bytes,
         "nwb_size_gb": nwb_size_gb,
         "write_time": write_time,
+        "memory_profile": memory_profiler.report() if memory_profiler is not None else None,
+        "updated_interfaces": update_plan.interfaces_to_write if update_plan is not None else None,
     }
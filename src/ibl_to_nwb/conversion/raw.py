@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import math
 import time
 import warnings
 from datetime import datetime
@@ -10,11 +11,10 @@ from zoneinfo import ZoneInfo
 from ndx_ibl import IblMetadata, IblSubject
 from neuroconv import ConverterPipe
 from neuroconv.tools import configure_and_write_nwbfile
-from neuroconv.tools.hdmf import GenericDataChunkIterator
 from neuroconv.tools.nwb_helpers import get_default_backend_configuration
 from one import alf
 from one.api import ONE
-from pynwb import NWBFile, read_nwb
+from pynwb import NWBFile
 
 from ..converters import BrainwideMapConverter, IblSpikeGlxConverter
 from ..datainterfaces import (
@@ -25,11 +25,28 @@ from ..datainterfaces import (
 )
 from ..fixtures import load_fixtures
 from ..utils import (
+    SessionDatasetIndex,
     add_probe_electrodes_with_localization,
+    finalize_nwbfile,
     get_ibl_subject_metadata,
     sanitize_subject_id_for_dandi,
     setup_paths,
+    validate_nwbfile_integrity,
 )
+from ..utils.dataset_policy import apply_dataset_policy, is_plugin_compression_available
+from ..utils.file_placement import PlacementStrategy
+from ..utils.incremental_update import (
+    describe_added_containers,
+    discard_nwbfile_update,
+    get_container_ids,
+    get_interface_provenance,
+    plan_incremental_update,
+    read_nwbfile_for_update,
+    write_interface_provenance,
+    write_updated_nwbfile,
+)
+from ..utils.memory_profiling import MemoryProfiler, measure_memory
+from ..utils.telemetry import span, summarize_dataset_configurations
 
 
 def _valid_existing_nwb(nwb_path: Path, overwrite: bool, logger: logging.Logger | None = None) -> bool:
@@ -37,7 +54,7 @@ def _valid_existing_nwb(nwb_path: Path, overwrite: bool, logger: logging.Logger
         return False
 
     try:
-        read_nwb(str(nwb_path))
+        validate_nwbfile_integrity(nwb_path)
     except Exception as exc:
         if logger:
             logger.warning(
@@ -48,7 +65,7 @@ def _valid_existing_nwb(nwb_path: Path, overwrite: bool, logger: logging.Logger
         return False
 
     if logger:
-        logger.info("Skipping conversion because %s already exists and is readable.", nwb_path)
+        logger.info("Skipping conversion because %s already exists and is complete.", nwb_path)
     return True
 
 
@@ -59,8 +76,13 @@ def convert_raw_session(
     base_path: Path | None = None,
     logger: logging.Logger | None = None,
     overwrite: bool = False,
+    incremental: bool = False,
+    compression_plugins: bool = False,
     verbose: bool = False,
     display_progress_bar: bool = True,
+    video_placement: PlacementStrategy = "hardlink",
+    profile_memory: bool = False,
+    trace_memory_allocations: bool = False,
 ) -> dict:
     """Convert IBL raw session to NWB.
 
@@ -86,23 +108,53 @@ def convert_raw_session(
     logger : logging.Logger, optional
         Logger instance for conversion progress
     overwrite : bool, optional
-        If True, overwrite existing NWB files
+        If True, overwrite existing NWB files. Otherwise an existing file is kept when it passes
+        `ibl_to_nwb.utils.validate_nwbfile_integrity` (complete write, unchanged since), and regenerated if not
+    incremental : bool, optional
+        If True, update an existing NWB file instead of skipping it: only the interfaces missing from the file
+        (e.g. a video published since), or whose input datasets or options changed since it was written, are
+        written, the containers of the latter replacing the old ones. The update goes through a copy-on-write
+        clone replacing the file once written; on filesystems that cannot clone (e.g. ext4), the raw file is
+        not copied but updated in place, marked incomplete until written, so that a failed update is converted
+        in full by the next run. Files that cannot be updated this way are converted in full. See
+        `ibl_to_nwb.utils.incremental_update` (default: False)
+    compression_plugins : bool, optional
+        If True, compress the raw ephys with Blosc (zstd, byte shuffle) instead of gzip, which requires
+        hdf5plugin to write and to read the file. The chunk shapes of `ibl_to_nwb.utils.dataset_policy` apply
+        either way (default: False)
     verbose : bool, optional
         If True, enable verbose output from neuroconv interfaces
     display_progress_bar : bool, optional
         If True, display progress bars during data conversion (default: True for local runs)
+    video_placement : {"hardlink", "reflink", "symlink", "move", "copy"}, optional
+        How raw videos are placed from the ONE cache into the DANDI folder (default: "hardlink",
+        falling back to a copy across filesystems). See `ibl_to_nwb.utils.file_placement.place_file`.
+    profile_memory : bool, optional
+        If True, sample the RSS while each interface is added and while the file is written, and return
+        the peak and per-interface figures under "memory_profile" (see MemoryProfiler) (default: False)
+    trace_memory_allocations : bool, optional
+        If True (with profile_memory), also report the top allocation sites of each interface with
+        tracemalloc; slows the conversion down (default: False)
 
     Returns
     -------
     dict
-        Conversion result information including NWB file path and timing
+        Conversion result information including NWB file path, timing and the bytes of video data
+        copied ("video_bytes_copied"), and the memory profile ("memory_profile", None unless profile_memory).
+        Incremental updates also list the interfaces written ("updated_interfaces")
 
     Raises
     ------
     FileNotFoundError
         If decompressed .bin files are not found and stub_test=False.
         Decompression must be performed externally before calling this function.
+    ValueError
+        If both overwrite and incremental are True, or compression_plugins is True without hdf5plugin.
     """
+    if overwrite and incremental:
+        raise ValueError("overwrite and incremental are mutually exclusive.")
+    if compression_plugins and not is_plugin_compression_available():
+        raise ValueError("compression_plugins requires hdf5plugin; install it with `pip install hdf5plugin`.")
 
     # ========================================================================
     # SUPPRESS HARMLESS WARNINGS
@@ -144,7 +196,7 @@ def convert_raw_session(
     output_dir.mkdir(parents=True, exist_ok=True)
     provisional_nwbfile_path = output_dir / f"sub-{subject_id_for_filenames}_ses-{eid}_desc-raw_ecephys.nwb"
 
-    if _valid_existing_nwb(provisional_nwbfile_path, overwrite=overwrite, logger=logger):
+    if not incremental and _valid_existing_nwb(provisional_nwbfile_path, overwrite=overwrite, logger=logger):
         size_bytes = provisional_nwbfile_path.stat().st_size
         size_gb = size_bytes / (1024**3)
         return {
@@ -221,6 +273,9 @@ def convert_raw_session(
 
     data_interfaces = []
 
+    # Single list_datasets query shared by every availability check below
+    dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+
     spikeglx_converter = None
     if include_ecephys:
         # Clean up macOS hidden files before Neo scans directory
@@ -247,7 +302,7 @@ def convert_raw_session(
 
         # Add NIDQ interface if available (behavioral sync signals)
         # NIDQ is stored at session level (raw_ephys_data folder)
-        if IblNIDQInterface.check_availability(one, eid)["available"]:
+        if IblNIDQInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
             nidq_interface = IblNIDQInterface(
                 folder_path=str(paths["spikeglx_source_folder"]),
                 one=one,
@@ -274,8 +329,8 @@ def convert_raw_session(
             logger.info("Stub mode active: using metadata-only electrodes for anatomical localization")
 
     # Session epochs (high-level task vs passive phases)
-    if SessionEpochsInterface.check_availability(one, eid)["available"]:
-        session_epochs_interface = SessionEpochsInterface(one=one, session=eid)
+    if SessionEpochsInterface.check_availability(one, eid, dataset_index=dataset_index)["available"]:
+        session_epochs_interface = SessionEpochsInterface(one=one, session=eid, dataset_index=dataset_index)
         data_interfaces.append(session_epochs_interface)
         if logger:
             logger.info("✓ Session epochs interface added (task and passive phases)")
@@ -300,12 +355,12 @@ def convert_raw_session(
         video_filename = f"raw_video_data/_iblrig_{camera_view}Camera.raw.mp4"
 
         # Check if camera has timestamps (required for video interface)
-        has_timestamps = bool(one.list_datasets(eid=eid, filename=camera_times_pattern))
+        has_timestamps = dataset_index.contains(camera_times_pattern)
         if not has_timestamps:
             continue
 
         # Check if video dataset exists
-        has_video = bool(one.list_datasets(eid=eid, filename=video_filename))
+        has_video = dataset_index.contains(video_filename)
         if not has_video:
             if logger:
                 logger.debug(f"No video file found for {camera_view}Camera - skipping")
@@ -342,6 +397,7 @@ def convert_raw_session(
             one=one,
             session=eid,
             camera_name=camera_view,
+            video_placement=video_placement,
         )
         data_interfaces.append(video_interface)
 
@@ -350,8 +406,7 @@ def convert_raw_session(
         logger.info(f"Data interfaces created in {interface_creation_time:.2f}s")
 
         # Log data availability summary
-        datasets = one.list_datasets(eid)
-        dataset_strs = [str(d) for d in datasets]
+        dataset_strs = dataset_index.datasets
 
         # Check key data sources
         has_lightning_left = any("leftCamera.lightningPose" in ds for ds in dataset_strs)
@@ -427,6 +482,54 @@ def convert_raw_session(
             }
         conversion_options["IblSpikeGlxConverter"] = spikeglx_options
 
+    # Provenance of each interface, recorded in the file to allow incremental updates
+    data_interface_items = list(converter.data_interface_objects.items())
+    interface_provenance = {
+        interface_name: get_interface_provenance(
+            data_interface, dataset_index=dataset_index, conversion_options=conversion_options.get(interface_name)
+        )
+        for interface_name, data_interface in data_interface_items
+    }
+    update_plan = None
+    if incremental and provisional_nwbfile_path.exists():
+        try:
+            update_plan = plan_incremental_update(
+                provisional_nwbfile_path, interface_fingerprints=dict(interface_provenance.values())
+            )
+        except ValueError as exc:
+            if logger:
+                logger.warning(
+                    "Cannot update %s incrementally (reason: %s); converting the whole session.",
+                    provisional_nwbfile_path,
+                    exc,
+                )
+
+    if update_plan is not None:
+        if logger:
+            logger.info(
+                "Incremental update: %d up to date, writing missing %s and stale %s",
+                len(update_plan.up_to_date),
+                update_plan.missing,
+                update_plan.stale,
+            )
+            if update_plan.obsolete:
+                logger.warning("Interfaces no longer converted, left in the file: %s", update_plan.obsolete)
+        if not update_plan.interfaces_to_write:
+            size_bytes = provisional_nwbfile_path.stat().st_size
+            return {
+                "nwbfile_path": provisional_nwbfile_path,
+                "nwb_size_bytes": size_bytes,
+                "nwb_size_gb": size_bytes / (1024**3),
+                "write_time": 0.0,
+                "skipped": True,
+                "updated_interfaces": [],
+            }
+        data_interface_items = [
+            (interface_name, data_interface)
+            for interface_name, data_interface in data_interface_items
+            if interface_provenance[interface_name][0] in update_plan.interfaces_to_write
+        ]
+
     # ========================================================================
     # STEP 6: Create NWBFile and add data
     # ========================================================================
@@ -434,14 +537,24 @@ def convert_raw_session(
         logger.info("Creating NWBFile and adding data...")
     conversion_start = time.time()
 
-    subject_metadata_for_ndx = metadata.pop("Subject")
-    ibl_subject = IblSubject(**subject_metadata_for_ndx)
+    if update_plan is None:
+        subject_metadata_for_ndx = metadata.pop("Subject")
+        ibl_subject = IblSubject(**subject_metadata_for_ndx)
 
-    nwbfile = NWBFile(**metadata["NWBFile"])
-    nwbfile.subject = ibl_subject
-    nwbfile.add_lab_meta_data(lab_meta_data=IblMetadata(revision="2025-05-06"))
+        nwbfile = NWBFile(**metadata["NWBFile"])
+        nwbfile.subject = ibl_subject
+        nwbfile.add_lab_meta_data(lab_meta_data=IblMetadata(revision="2025-05-06"))
+    else:
+        # Subject and electrodes are already in the file. Never fall back on copying a raw file of tens of GB
+        nwbfile = read_nwbfile_for_update(update_plan, copy_if_no_clone=False)
+        if update_plan.in_place and logger:
+            logger.warning(
+                "%s cannot be cloned on this filesystem: updating it in place; a failed update will leave it "
+                "incomplete, to be converted again in full.",
+                update_plan.nwbfile_path.name,
+            )
 
-    if probe_name_to_probe_id_dict:
+    if probe_name_to_probe_id_dict and update_plan is None:
         if logger:
             if include_ecephys:
                 logger.info("Pre-populating electrode table from anatomical localization before SpikeGLX data.")
@@ -468,13 +581,39 @@ def convert_raw_session(
             )
 
     # Add data from all interfaces
-    for interface_name, data_interface in converter.data_interface_objects.items():
-        interface_conversion_options = conversion_options.get(interface_name, {})
-        data_interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata, **interface_conversion_options)
+    memory_profiler = MemoryProfiler(trace_allocations=trace_memory_allocations) if profile_memory else None
+    # Provenance record entries: those of the interfaces kept from the existing file, then the ones written now
+    interface_records = dict(update_plan.interface_records) if update_plan is not None else {}
+    try:
+        for interface_name, data_interface in data_interface_items:
+            interface_conversion_options = conversion_options.get(interface_name, {})
+            container_ids_before = get_container_ids(nwbfile)
+            with (
+                span("add_to_nwbfile", category="interface", interface=interface_name),
+                measure_memory(memory_profiler, interface_name),
+            ):
+                data_interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata, **interface_conversion_options)
+            provenance_key, fingerprint = interface_provenance[interface_name]
+            interface_records[provenance_key] = {
+                "fingerprint": fingerprint,
+                **describe_added_containers(nwbfile, container_ids_before),
+            }
+    except BaseException:
+        if update_plan is not None:
+            # The file is left as it was (or incomplete, when updated in place)
+            discard_nwbfile_update(update_plan, nwbfile)
+        raise
+
+    video_bytes_copied = sum(
+        data_interface.video_bytes_copied
+        for data_interface in data_interfaces
+        if isinstance(data_interface, RawVideoInterface)
+    )
 
     conversion_time = time.time() - conversion_start
     if logger:
         logger.info(f"Data added to NWBFile object in {conversion_time:.2f}s")
+        logger.info(f"Raw videos placed with '{video_placement}': {video_bytes_copied / 1024**3:.2f} GB copied")
 
     # ========================================================================
     # STEP 7: Write NWB file to disk
@@ -487,57 +626,54 @@ def convert_raw_session(
     subject_id_for_filename = sanitize_subject_id_for_dandi(nwbfile.subject.subject_id)
     nwbfile_path = output_dir / f"sub-{subject_id_for_filename}_ses-{eid}_desc-raw_ecephys.nwb"
 
-    # Get default backend configuration
-    backend_configuration = get_default_backend_configuration(nwbfile=nwbfile, backend="hdf5")
-
-    # Customize chunking for ElectricalSeries to not chunk across channels
-    # This ensures all channels are in each chunk, which is better for channel-wise access patterns
-    for location, dataset_config in backend_configuration.dataset_configurations.items():
-        # Check if this is an ElectricalSeries data dataset
-        if "ElectricalSeries" in location and location.endswith("/data"):
-            # Get the full shape (frames, channels)
-            full_shape = dataset_config.full_shape
-            number_of_frames = full_shape[0]
-            number_of_channels = full_shape[1]
-            dtype = dataset_config.dtype
-
-            # Calculate chunk size with ALL channels (no chunking across channels)
-            # Adapted from neuroconv's get_electrical_series_chunk_shape but with all channels
-            chunk_mb = 10.0
-            bytes_per_frame = number_of_channels * dtype.itemsize
-            chunk_frames = int((chunk_mb * 1e6) // bytes_per_frame)
-            chunk_frames = max(1, min(chunk_frames, number_of_frames))
-            chunk_shape = (chunk_frames, number_of_channels)
-
-            # Use neuroconv's buffer shape estimation to ensure compatibility
-            # This guarantees buffer_axis % chunk_axis == 0 (required by validation)
-            buffer_gb = 1.0  # Default buffer size
-            buffer_shape = GenericDataChunkIterator.estimate_default_buffer_shape(
-                buffer_gb=buffer_gb, chunk_shape=chunk_shape, maxshape=full_shape, dtype=dtype
-            )
-
-            # Update both chunk_shape and buffer_shape atomically using model_copy
-            # This avoids intermediate validation errors during assignment
-            updated_config = dataset_config.model_copy(
-                update={"chunk_shape": chunk_shape, "buffer_shape": buffer_shape}
-            )
-            # Replace the config in the backend_configuration dict
-            backend_configuration.dataset_configurations[location] = updated_config
-            dataset_config = updated_config  # Update local reference
+    try:
+        # Get default backend configuration (in append mode, of the datasets added by the updated interfaces only)
+        backend_configuration = get_default_backend_configuration(nwbfile=nwbfile, backend="hdf5")
 
-            if logger:
-                logger.info(f"  Custom chunking for {location}:")
-                logger.info(f"    Shape: {full_shape}")
-                logger.info(f"    Chunk: {dataset_config.chunk_shape}")
+        # Chunks of all channels for the ElectricalSeries (channel-wise access patterns), and their filters
+        applied_rules = apply_dataset_policy(
+            backend_configuration=backend_configuration, nwbfile=nwbfile, plugin_filters=compression_plugins
+        )
+        if logger:
+            for location, rule_name in applied_rules.items():
+                dataset_config = backend_configuration.dataset_configurations[location]
+                chunk_size_mb = math.prod(dataset_config.chunk_shape) * dataset_config.dtype.itemsize / 1e6
+                logger.info(f"  Dataset policy '{rule_name}' for {location}:")
+                logger.info(f"    Shape: {dataset_config.full_shape}")
+                logger.info(f"    Chunk: {dataset_config.chunk_shape} ({chunk_size_mb:.2f} MB)")
                 logger.info(f"    Buffer: {dataset_config.buffer_shape}")
-                chunk_size_mb = (chunk_frames * number_of_channels * dtype.itemsize) / 1e6
-                logger.info(f"    Chunk size: {chunk_size_mb:.2f} MB")
 
-    configure_and_write_nwbfile(
-        nwbfile=nwbfile,
-        nwbfile_path=nwbfile_path,
-        backend_configuration=backend_configuration,
-    )
+        with (
+            span("write_nwbfile", category="write", nwb_type="raw") as write_span,
+            measure_memory(memory_profiler, "write_nwbfile"),
+        ):
+            write_span.record(
+                **summarize_dataset_configurations(backend_configuration),
+                dataset_policy=applied_rules,
+                incremental=update_plan is not None,
+            )
+            if update_plan is None:
+                configure_and_write_nwbfile(
+                    nwbfile=nwbfile,
+                    nwbfile_path=nwbfile_path,
+                    backend_configuration=backend_configuration,
+                )
+                write_interface_provenance(nwbfile_path, interface_records=interface_records)
+            else:
+                write_updated_nwbfile(
+                    nwbfile=nwbfile,
+                    backend_configuration=backend_configuration,
+                    update_plan=update_plan,
+                    interface_records=interface_records,
+                )
+            finalize_nwbfile(nwbfile_path)
+            write_span.record(nwb_size_bytes=nwbfile_path.stat().st_size)
+    except BaseException:
+        if update_plan is not None:
+            # Until write_updated_nwbfile replaces the file, the update only changed its copy (or, in place, the
+            # file, then left incomplete)
+            discard_nwbfile_update(update_plan, nwbfile)
+        raise
 
     write_time = time.time() - write_start
 
@@ -555,10 +691,15 @@ def convert_raw_session(
         logger.info(f"RAW conversion total time: {total_time_hours:.2f} hours")
         logger.info(f"RAW conversion completed: {nwbfile_path}")
         logger.info(f"RAW NWB saved to: {nwbfile_path}")
+        if memory_profiler is not None:
+            memory_profiler.log_summary(logger)
 
     return {
         "nwbfile_path": nwbfile_path,
         "nwb_size_bytes": nwb_size_bytes,
         "nwb_size_gb": nwb_size_gb,
         "write_time": write_time,
+        "video_bytes_copied": video_bytes_copied,
+        "memory_profile": memory_profiler.report() if memory_profiler is not None else None,
+        "updated_interfaces": update_plan.interfaces_to_write if update_plan is not None else None,
     }
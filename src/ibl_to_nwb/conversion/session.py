@@ -9,6 +9,13 @@ The pipeline:
   3. Convert raw ephys to NWB
   4. Convert processed/behavior to NWB
 
+With pipelined=True, steps 2-3 (raw lane) and step 4 (processed lane) run in separate processes:
+the processed lane starts as soon as the processed datasets are downloaded, while the raw data is
+still being downloaded and decompressed.
+
+Each run also writes timing spans (phases, per-interface download/prepare/add, NWB writes) as JSON
+lines next to the session log, for finding where the time of a conversion goes.
+
 Phase timeouts are opt-in: pass phase_timeouts=PHASE_TIMEOUTS for AWS enforcement,
 or omit for local runs (no SIGALRM, runs until done or Ctrl+C).
 """
@@ -17,10 +24,12 @@ from __future__ import annotations
 
 import contextlib
 import logging
+import multiprocessing
 import signal
 import subprocess
 import sys
 import time
+import traceback
 from pathlib import Path
 
 from one.api import ONE
@@ -28,6 +37,7 @@ from one.api import ONE
 from ibl_to_nwb.conversion.download import download_session_data
 from ibl_to_nwb.conversion.processed import convert_processed_session
 from ibl_to_nwb.conversion.raw import convert_raw_session
+from ibl_to_nwb.utils.telemetry import SpanRecorder, set_span_recorder, span
 
 
 def _setup_session_logger(log_file_path: Path) -> logging.Logger:
@@ -91,11 +101,15 @@ class PhaseTimeout:
         raise TimeoutError(f"Phase '{self.phase_name}' exceeded {self.seconds}s timeout")
 
 
-def _phase_ctx(phase_key: str, phase_timeouts: dict | None):
-    """Return a PhaseTimeout context manager if timeouts are configured, else nullcontext."""
-    if phase_timeouts is not None and phase_key in phase_timeouts:
-        return PhaseTimeout(phase_timeouts[phase_key], phase_key)
-    return contextlib.nullcontext()
+@contextlib.contextmanager
+def _phase_ctx(phase_key: str, phase_timeouts: dict | None, span_name: str | None = None):
+    """Record the phase as a telemetry span, under a PhaseTimeout if timeouts are configured."""
+    with span(span_name or phase_key, category="phase"):
+        if phase_timeouts is not None and phase_key in phase_timeouts:
+            with PhaseTimeout(phase_timeouts[phase_key], phase_key):
+                yield
+        else:
+            yield
 
 
 def _log_disk_usage(label: str, base_folder: Path) -> None:
@@ -109,6 +123,357 @@ from ibl_to_nwb.conversion.spikeglx_first_sample_patch import inject_missing_fir
 from ibl_to_nwb.conversion.spikeglx_patches import fix_corrupted_spikeglx_meta_files  # noqa: E402
 
 
+def _convert_raw_lane(
+    eid: str,
+    *,
+    one: ONE,
+    base_folder: Path,
+    stub_test: bool,
+    overwrite: bool,
+    incremental: bool,
+    compression_plugins: bool,
+    delete_cbins_after_decompression: bool,
+    stream_raw_ephys: bool,
+    video_placement: str,
+    verbose: bool,
+    display_progress_bar: bool,
+    profile_memory: bool,
+    trace_memory_allocations: bool,
+    phase_timeouts: dict | None,
+    logger: logging.Logger,
+) -> dict:
+    """Decompress (or prepare streaming of) the raw ephys and write the raw NWB file.
+
+    Returns the raw entries of the convert_session() results, with the timing of each phase
+    in "phase_timings" (see _record_phase).
+    """
+    # Lazy imports to avoid triggering spikeglx -> mtscomp -> tqdm chain
+    # before disable_tqdm_globally() has a chance to patch tqdm
+    from ibl_to_nwb.utils.cbin_streaming import NIDQ_CBIN_PATTERN, prepare_cbin_streaming_folder
+    from ibl_to_nwb.utils.ephys_decompression import decompress_ephys_cbins
+    from ibl_to_nwb.utils.paths import setup_paths
+
+    results = {"raw_converted": False, "phase_timings": {}}
+
+    # Setup paths for decompression
+    paths = setup_paths(one, eid, base_path=base_folder)
+    scratch_ephys_folder = paths["session_decompressed_ephys_folder"] / "raw_ephys_data"
+    existing_bins = scratch_ephys_folder.exists() and next(scratch_ephys_folder.rglob("*.bin"), None) is not None
+
+    # In stub mode: skip decompression if no existing bins (they won't be downloaded)
+    # In full mode: always decompress if not already done
+    should_decompress = not stub_test and not existing_bins
+
+    if should_decompress and stream_raw_ephys:
+        # Placeholder .bin files plus links to the .cbin files; the converter decompresses chunks on demand
+        prepare_start = time.time()
+        with span("prepare_cbin_streaming", category="phase") as current_span:
+            placeholder_bins = prepare_cbin_streaming_folder(
+                source_folder=paths["session_folder"],
+                target_folder=paths["session_decompressed_ephys_folder"],
+            )
+            # The NIDQ interface reads its .bin directly: decompress it (a few channels, small)
+            decompress_ephys_cbins(
+                source_folder=paths["session_folder"],
+                target_folder=paths["session_decompressed_ephys_folder"],
+                pattern=NIDQ_CBIN_PATTERN,
+            )
+            current_span.record(items=len(placeholder_bins))
+        prepare_duration = time.time() - prepare_start
+        logger.info(f"Prepared {len(placeholder_bins)} raw ephys stream(s) for direct .cbin streaming")
+        logger.info(f"=== PHASE: prepare_cbin_streaming | duration_seconds={prepare_duration:.0f} ===")
+        results["prepare_cbin_streaming_duration_seconds"] = prepare_duration
+        _record_phase(results, "prepare_cbin_streaming", lane="raw", start=prepare_start, duration=prepare_duration)
+    elif should_decompress:
+        logger.info("\n" + "=" * 80)
+        logger.info("DECOMPRESSING RAW EPHYS")
+        if phase_timeouts and "decompress" in phase_timeouts:
+            logger.info(f"Timeout: {phase_timeouts['decompress']}s ({phase_timeouts['decompress']/3600:.1f} hours)")
+        logger.info("=" * 80)
+
+        decompress_start = time.time()
+
+        with _phase_ctx("decompress", phase_timeouts):
+            decompress_ephys_cbins(
+                source_folder=paths["session_folder"],
+                target_folder=paths["session_decompressed_ephys_folder"],
+            )
+
+        decompress_duration = time.time() - decompress_start
+        logger.info(f"=== PHASE: decompress | duration_seconds={decompress_duration:.0f} ===")
+        results["decompress_duration_seconds"] = decompress_duration
+        _record_phase(results, "decompress", lane="raw", start=decompress_start, duration=decompress_duration)
+
+        # Optionally delete compressed .cbin files after decompression to free disk space.
+        # Enabled on AWS (tight disk); disabled locally (avoids re-downloading).
+        if delete_cbins_after_decompression:
+            cbin_files = list(paths["session_folder"].rglob("*.cbin"))
+            if cbin_files:
+                cbin_size_bytes = sum(f.stat().st_size for f in cbin_files)
+                cbin_size_gb = cbin_size_bytes / (1024**3)
+                for cbin_file in cbin_files:
+                    cbin_file.unlink()
+                logger.info(f"Deleted {len(cbin_files)} .cbin files ({cbin_size_gb:.1f} GB) to free disk space")
+
+        _log_disk_usage("after_decompress", base_folder)
+
+    # Patch corrupted meta files in the decompressed ephys folder before neo reads them.
+    # The ONE cache copies are handled separately by add_probe_electrodes_with_localization()
+    # which patches on-the-fly after ONE resolves the file (since ONE re-downloads if we
+    # modify cached files, patching the cache directly doesn't work).
+    spikeglx_source = paths["spikeglx_source_folder"]
+    num_patched = fix_corrupted_spikeglx_meta_files(spikeglx_source, logger)
+    if num_patched:
+        logger.info("Patched %d corrupted SpikeGLX meta file(s)", num_patched)
+    num_first_sample = inject_missing_first_sample(spikeglx_source, logger)
+    if num_first_sample:
+        logger.info("Injected firstSample=0 into %d meta file(s) in decompressed folder", num_first_sample)
+
+    logger.info("\n" + "=" * 80)
+    logger.info("CONVERTING RAW EPHYS")
+    if phase_timeouts and "raw_conversion" in phase_timeouts:
+        logger.info(f"Timeout: {phase_timeouts['raw_conversion']}s ({phase_timeouts['raw_conversion']/3600:.1f} hours)")
+    logger.info("=" * 80)
+
+    raw_start = time.time()
+
+    with _phase_ctx("raw_conversion", phase_timeouts):
+        raw_info = convert_raw_session(
+            eid=eid,
+            one=one,
+            stub_test=stub_test,
+            base_path=base_folder,
+            logger=logger,
+            overwrite=overwrite,
+            incremental=incremental,
+            compression_plugins=compression_plugins,
+            verbose=verbose,
+            display_progress_bar=display_progress_bar,
+            video_placement=video_placement,
+            profile_memory=profile_memory,
+            trace_memory_allocations=trace_memory_allocations,
+        )
+
+    raw_duration = time.time() - raw_start
+    _record_phase(results, "raw_conversion", lane="raw", start=raw_start, duration=raw_duration)
+
+    if raw_info and not raw_info.get("skipped"):
+        raw_nwb_path = raw_info["nwbfile_path"]
+        results["raw_nwb_path"] = str(raw_nwb_path)
+        results["raw_size_gb"] = raw_info["nwb_size_gb"]
+        results["raw_size_bytes"] = raw_info["nwb_size_bytes"]
+        results["raw_duration_seconds"] = raw_duration
+        results["raw_video_bytes_copied"] = raw_info["video_bytes_copied"]
+        results["raw_memory_profile"] = raw_info["memory_profile"]
+        results["raw_converted"] = True
+        logger.info(f"RAW file written to: {raw_nwb_path}")
+        logger.info(
+            f"=== PHASE: raw_conversion | duration_seconds={raw_duration:.0f} | size_gb={raw_info['nwb_size_gb']:.2f} ==="
+        )
+        _log_disk_usage("after_raw_conversion", base_folder)
+    elif raw_info and raw_info.get("skipped"):
+        results["raw_skipped"] = True
+
+    return results
+
+
+def _convert_processed_lane(
+    eid: str,
+    *,
+    one: ONE,
+    base_folder: Path,
+    stub_test: bool,
+    overwrite: bool,
+    incremental: bool,
+    compression_plugins: bool,
+    verbose: bool,
+    display_progress_bar: bool,
+    profile_memory: bool,
+    trace_memory_allocations: bool,
+    phase_timeouts: dict | None,
+    logger: logging.Logger,
+) -> dict:
+    """Write the processed/behavior NWB file.
+
+    Returns the processed entries of the convert_session() results, with the timing of each phase
+    in "phase_timings" (see _record_phase).
+    """
+    results = {"processed_converted": False, "phase_timings": {}}
+
+    logger.info("\n" + "=" * 80)
+    logger.info("CONVERTING PROCESSED/BEHAVIOR")
+    if phase_timeouts and "processed_conversion" in phase_timeouts:
+        logger.info(
+            f"Timeout: {phase_timeouts['processed_conversion']}s ({phase_timeouts['processed_conversion']/60:.0f} minutes)"
+        )
+    logger.info("=" * 80)
+
+    processed_start = time.time()
+
+    with _phase_ctx("processed_conversion", phase_timeouts):
+        processed_info = convert_processed_session(
+            eid=eid,
+            one=one,
+            stub_test=stub_test,
+            base_path=base_folder,
+            logger=logger,
+            overwrite=overwrite,
+            incremental=incremental,
+            compression_plugins=compression_plugins,
+            verbose=verbose,
+            display_progress_bar=display_progress_bar,
+            profile_memory=profile_memory,
+            trace_memory_allocations=trace_memory_allocations,
+        )
+
+    processed_duration = time.time() - processed_start
+    _record_phase(results, "processed_conversion", lane="processed", start=processed_start, duration=processed_duration)
+
+    if processed_info and not processed_info.get("skipped"):
+        processed_nwb_path = processed_info["nwbfile_path"]
+        results["processed_nwb_path"] = str(processed_nwb_path)
+        results["processed_size_gb"] = processed_info["nwb_size_gb"]
+        results["processed_size_bytes"] = processed_info["nwb_size_bytes"]
+        results["processed_duration_seconds"] = processed_duration
+        results["processed_memory_profile"] = processed_info["memory_profile"]
+        results["processed_converted"] = True
+        logger.info(f"PROCESSED file written to: {processed_nwb_path}")
+        logger.info(
+            f"=== PHASE: processed_conversion | duration_seconds={processed_duration:.0f} | size_gb={processed_info['nwb_size_gb']:.2f} ==="
+        )
+        _log_disk_usage("after_processed_conversion", base_folder)
+    elif processed_info and processed_info.get("skipped"):
+        results["processed_skipped"] = True
+
+    return results
+
+
+def _record_phase(results: dict, phase: str, *, lane: str, start: float, duration: float) -> None:
+    """Record the wall-clock start (epoch seconds) and duration of a phase in results["phase_timings"]."""
+    results["phase_timings"][phase] = {"lane": lane, "start": start, "duration_seconds": duration}
+
+
+def _merge_lane_results(results: dict, lane_results: dict) -> None:
+    """Merge the results of a lane into the session results, combining their phase timings."""
+    lane_results = dict(lane_results)
+    results["phase_timings"].update(lane_results.pop("phase_timings", {}))
+    results.update(lane_results)
+
+
+def _run_lane_in_child(connection, lane_function, lane_kwargs: dict, memory_limit_gb: float | None) -> None:
+    """Entry point of a lane process: run the lane under its memory budget and send back its results."""
+    try:
+        if memory_limit_gb is not None:
+            import resource  # Unix only, like the forked lanes
+
+            # RLIMIT_DATA covers the heap and anonymous mappings (numpy arrays), not the read-only
+            # memory maps of the ephys binaries; exceeding it raises MemoryError in the lane
+            limit_bytes = int(memory_limit_gb * 1024**3)
+            resource.setrlimit(resource.RLIMIT_DATA, (limit_bytes, limit_bytes))
+        connection.send(("ok", lane_function(**lane_kwargs)))
+    except BaseException as exception:
+        connection.send(("error", f"{type(exception).__name__}: {exception}", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+class _LaneProcess:
+    """A conversion lane running in a forked process, under an optional memory budget.
+
+    Also used by the batch scheduler (see batch.py) to run the stages of several sessions concurrently.
+    """
+
+    def __init__(self, name: str, lane_function, lane_kwargs: dict, memory_limit_gb: float | None = None):
+        # fork: the lane inherits the ONE client and the session logger without pickling them
+        context = multiprocessing.get_context("fork")
+        self.name = name
+        self._connection, child_connection = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=_run_lane_in_child,
+            args=(child_connection, lane_function, lane_kwargs, memory_limit_gb),
+            name="ibl-" + name.replace(" ", "-"),
+        )
+        self._process.start()
+        child_connection.close()
+
+    def done(self) -> bool:
+        """Return True once the lane has sent its results or exited, i.e. when `result` no longer blocks."""
+        return self._connection.poll() or not self._process.is_alive()
+
+    def result(self) -> dict:
+        """Wait for the lane and return its results, raising RuntimeError if it failed."""
+        try:
+            message = self._connection.recv()
+        except EOFError:
+            # The process died without reporting (e.g. killed by the OOM killer)
+            message = None
+        self._process.join()
+        if message is None:
+            raise RuntimeError(f"The {self.name} exited with code {self._process.exitcode} without results.")
+        if message[0] == "error":
+            _, error, formatted_traceback = message
+            raise RuntimeError(f"The {self.name} failed with {error}\n{formatted_traceback}")
+        return message[1]
+
+    def terminate(self) -> None:
+        """Stop the lane if it is still running (used when the other lanes fail)."""
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
+
+
+def _download_phase(
+    eid: str,
+    *,
+    one: ONE,
+    base_folder: Path,
+    redownload_data: bool,
+    stub_test: bool,
+    download_raw: bool,
+    download_processed: bool,
+    phase_name: str,
+    phase_timeouts: dict | None,
+    logger: logging.Logger,
+    skip_download: bool = False,
+) -> tuple[dict, float]:
+    """Run download_session_data() as a (timed, optionally time-limited) phase; returns its info and duration."""
+    if skip_download:
+        logger.info(f"Skipping {phase_name}: the session data was downloaded beforehand")
+        return {
+            "download_time": 0.0,
+            "num_datasets": 0,
+            "total_size_bytes": 0,
+            "total_size_gb": 0.0,
+            "interface_downloads": [],
+        }, 0.0
+
+    logger.info("\n" + "=" * 80)
+    logger.info("DOWNLOADING SESSION DATA")
+    if phase_timeouts and "download" in phase_timeouts:
+        logger.info(f"Timeout: {phase_timeouts['download']}s ({phase_timeouts['download']/3600:.1f} hours)")
+    logger.info("=" * 80)
+    download_start = time.time()
+
+    with _phase_ctx("download", phase_timeouts, span_name=phase_name):
+        download_info = download_session_data(
+            eid=eid,
+            one=one,
+            redownload_data=redownload_data,
+            stub_test=stub_test,
+            download_raw=download_raw,
+            download_processed=download_processed,
+            base_path=base_folder,
+            logger=logger,
+        )
+
+    download_duration = time.time() - download_start
+    logger.info(
+        f"=== PHASE: {phase_name} | duration_seconds={download_duration:.0f} | size_gb={download_info['total_size_gb']:.2f} ==="
+    )
+    _log_disk_usage(f"after_{phase_name}", base_folder)
+    return download_info, download_duration
+
+
 def convert_session(
     eid: str,
     *,
@@ -119,11 +484,20 @@ def convert_session(
     convert_raw: bool,
     convert_processed: bool,
     overwrite: bool = False,
+    incremental: bool = False,
+    compression_plugins: bool = False,
     redownload_data: bool = False,
+    skip_download: bool = False,
     delete_cbins_after_decompression: bool = False,
+    stream_raw_ephys: bool = False,
+    video_placement: str = "hardlink",
     verbose: bool = False,
     display_progress_bar: bool = False,
     phase_timeouts: dict | None = None,
+    pipelined: bool = False,
+    lane_memory_limits_gb: dict | None = None,
+    profile_memory: bool = False,
+    trace_memory_allocations: bool = False,
 ) -> dict:
     """Convert one IBL session to NWB format.
 
@@ -148,6 +522,23 @@ def convert_session(
         Whether to convert processed/behavior data.
     overwrite : bool
         If True, overwrite existing NWB files. Default False.
+    incremental : bool
+        If True, update existing NWB files, writing only the interfaces that are missing from them or
+        whose inputs changed (see `convert_processed_session`). Default False.
+    compression_plugins : bool
+        If True, compress the raw ephys and spike times with Blosc (zstd) instead of gzip: smaller files, but
+        reading them requires hdf5plugin (see `ibl_to_nwb.utils.dataset_policy`). Default False.
+    skip_download : bool
+        If True, do not run the download phases: the session data must already be in the ONE cache (e.g.
+        downloaded by `download_session_data`, as the batch scheduler does). Default False.
+    stream_raw_ephys : bool
+        If True, skip decompression and stream the probe ephys (AP and LF) directly from the .cbin files while
+        writing the raw NWB file (no decompressed .bin copy on disk); only the small NIDQ .cbin is decompressed.
+        Default False.
+    video_placement : str
+        How raw videos are placed from the ONE cache into the output folder: "hardlink" (default),
+        "reflink", "symlink", "move" or "copy". Links and clones fall back to a copy across filesystems;
+        the bytes copied are reported as "raw_video_bytes_copied".
     verbose : bool
         Enable verbose output from neuroconv interfaces.
     display_progress_bar : bool
@@ -155,223 +546,226 @@ def convert_session(
     phase_timeouts : dict or None
         Optional dict mapping phase names to timeout seconds. When None (default),
         no timeouts are applied. Pass PHASE_TIMEOUTS for AWS enforcement.
+    pipelined : bool
+        If True and both conversions are requested, run the processed conversion in a separate
+        process as soon as the processed datasets are downloaded, while the raw data is downloaded,
+        decompressed and converted in another one. The processed conversion does not read the raw
+        ephys, so the session takes about the time of the raw lane alone. Unix only (the lanes are
+        forked). With redownload_data, the session folder is cleared before the processed download only:
+        the raw download then keeps the processed files the processed lane is reading.
+        The lanes use forked copies of `one`, so they share its cache directory: while the processed lane
+        runs, the raw download adds files to the cache and may save the cache tables, which the processed
+        lane can save too. The processed lane only reads files downloaded before it started, so this is
+        safe as long as nothing else deletes them; do not run another conversion of the same session on
+        the same cache directory at the same time. Default False (phases run one after the other in this
+        process).
+    lane_memory_limits_gb : dict or None
+        Optional memory budget of each lane in pipelined mode, e.g. {"raw": 16, "processed": 24}.
+        A lane exceeding its budget fails with MemoryError instead of pushing the worker out of memory.
+        Ignored when not pipelined.
+    profile_memory : bool
+        If True, sample the RSS during each interface and NWB write (see
+        `ibl_to_nwb.utils.memory_profiling.MemoryProfiler`), to size instances from measured peaks.
+        The profiles are returned under "raw_memory_profile" and "processed_memory_profile".
+    trace_memory_allocations : bool
+        If True (with profile_memory), also report the top allocation sites of each interface
+        with tracemalloc. Slows the conversion down.
 
     Returns
     -------
     dict
         Conversion statistics including paths, sizes, timings, and success flag.
+        "phase_timings" maps each phase to its lane, start offset from the session start and
+        duration in seconds, showing how the lanes overlapped. "spans_path" is the JSON lines file of
+        timing spans written next to the log: each phase, each interface's download_data, prepare and
+        add_to_nwbfile, and the NWB writes, with wall/CPU time, I/O bytes and item counts
+        (see `ibl_to_nwb.utils.telemetry`).
 
     Raises
     ------
     TimeoutError
         If any phase exceeds its timeout limit (only when phase_timeouts is set).
+    RuntimeError
+        If a lane process fails in pipelined mode (with the lane's traceback).
     """
 
     log_file = logs_folder / f"{time.strftime('%Y%m%d_%H%M%S')}_conversion_log_{eid}.log"
     logger = _setup_session_logger(log_file)
 
-    logger.info("=" * 80)
-    logger.info(f"Starting conversion for session: {eid}")
-    logger.info(f"Stub test mode: {stub_test}")
-    logger.info(f"Convert RAW: {convert_raw}")
-    logger.info(f"Convert PROCESSED: {convert_processed}")
-    logger.info(f"Overwrite: {overwrite}")
-    logger.info(f"Verbose: {verbose}")
-    logger.info(f"Display progress bar: {display_progress_bar}")
-    if phase_timeouts:
-        logger.info("Phase timeouts (seconds): %s", phase_timeouts)
-    else:
-        logger.info("Phase timeouts: disabled")
-    logger.info("=" * 80)
-
-    session_start = time.time()
-
-    # Download session data
-    # Skip raw ephys download if not converting raw (saves ~100 GB per session)
-    logger.info("\n" + "=" * 80)
-    logger.info("DOWNLOADING SESSION DATA")
-    if phase_timeouts and "download" in phase_timeouts:
-        logger.info(f"Timeout: {phase_timeouts['download']}s ({phase_timeouts['download']/3600:.1f} hours)")
-    logger.info("=" * 80)
-    download_start = time.time()
-
-    with _phase_ctx("download", phase_timeouts):
-        download_info = download_session_data(
-            eid=eid,
-            one=one,
-            redownload_data=redownload_data,
-            stub_test=stub_test,
-            download_raw=convert_raw,
-            download_processed=convert_processed,
-            base_path=base_folder,
-            logger=logger,
-        )
-
-    download_duration = time.time() - download_start
-    logger.info(
-        f"=== PHASE: download | duration_seconds={download_duration:.0f} | size_gb={download_info['total_size_gb']:.2f} ==="
-    )
-    _log_disk_usage("after_download", base_folder)
-
-    results = {
-        "eid": eid,
-        "download_size_gb": download_info["total_size_gb"],
-        "download_duration_seconds": download_duration,
-        "raw_converted": False,
-        "processed_converted": False,
-        "success": False,
-    }
-
-    # Convert RAW (with separate decompress and conversion phases)
-    if convert_raw:
-        # Lazy imports to avoid triggering spikeglx -> mtscomp -> tqdm chain
-        # before disable_tqdm_globally() has a chance to patch tqdm
-        from ibl_to_nwb.utils.ephys_decompression import decompress_ephys_cbins
-        from ibl_to_nwb.utils.paths import setup_paths
-
-        # Setup paths for decompression
-        paths = setup_paths(one, eid, base_path=base_folder)
-        scratch_ephys_folder = paths["session_decompressed_ephys_folder"] / "raw_ephys_data"
-        existing_bins = scratch_ephys_folder.exists() and next(scratch_ephys_folder.rglob("*.bin"), None) is not None
-
-        # In stub mode: skip decompression if no existing bins (they won't be downloaded)
-        # In full mode: always decompress if not already done
-        should_decompress = convert_raw and not stub_test and not existing_bins
-
-        if should_decompress:
-            logger.info("\n" + "=" * 80)
-            logger.info("DECOMPRESSING RAW EPHYS")
-            if phase_timeouts and "decompress" in phase_timeouts:
-                logger.info(f"Timeout: {phase_timeouts['decompress']}s ({phase_timeouts['decompress']/3600:.1f} hours)")
-            logger.info("=" * 80)
-
-            decompress_start = time.time()
-
-            with _phase_ctx("decompress", phase_timeouts):
-                decompress_ephys_cbins(
-                    source_folder=paths["session_folder"],
-                    target_folder=paths["session_decompressed_ephys_folder"],
+    # Timing spans of this session, next to its log (forked lanes inherit the recorder)
+    spans_path = log_file.with_suffix(".spans.jsonl")
+    previous_recorder = set_span_recorder(SpanRecorder(spans_path, eid=eid))
+    try:
+        with span("convert_session", category="session"):
+            lane_memory_limits_gb = lane_memory_limits_gb or {}
+            unknown_lanes = set(lane_memory_limits_gb) - {"raw", "processed"}
+            if unknown_lanes:
+                raise ValueError(
+                    f"Unknown lanes in lane_memory_limits_gb: {sorted(unknown_lanes)}; use 'raw' and 'processed'."
                 )
+            pipelined = pipelined and convert_raw and convert_processed
 
-            decompress_duration = time.time() - decompress_start
-            logger.info(f"=== PHASE: decompress | duration_seconds={decompress_duration:.0f} ===")
-            results["decompress_duration_seconds"] = decompress_duration
-
-            # Optionally delete compressed .cbin files after decompression to free disk space.
-            # Enabled on AWS (tight disk); disabled locally (avoids re-downloading).
-            if delete_cbins_after_decompression:
-                cbin_files = list(paths["session_folder"].rglob("*.cbin"))
-                if cbin_files:
-                    cbin_size_bytes = sum(f.stat().st_size for f in cbin_files)
-                    cbin_size_gb = cbin_size_bytes / (1024**3)
-                    for cbin_file in cbin_files:
-                        cbin_file.unlink()
-                    logger.info(f"Deleted {len(cbin_files)} .cbin files ({cbin_size_gb:.1f} GB) to free disk space")
-
-            _log_disk_usage("after_decompress", base_folder)
-
-        # Patch corrupted meta files in the decompressed ephys folder before neo reads them.
-        # The ONE cache copies are handled separately by add_probe_electrodes_with_localization()
-        # which patches on-the-fly after ONE resolves the file (since ONE re-downloads if we
-        # modify cached files, patching the cache directly doesn't work).
-        spikeglx_source = paths["spikeglx_source_folder"]
-        num_patched = fix_corrupted_spikeglx_meta_files(spikeglx_source, logger)
-        if num_patched:
-            logger.info("Patched %d corrupted SpikeGLX meta file(s)", num_patched)
-        num_first_sample = inject_missing_first_sample(spikeglx_source, logger)
-        if num_first_sample:
-            logger.info("Injected firstSample=0 into %d meta file(s) in decompressed folder", num_first_sample)
-
-        logger.info("\n" + "=" * 80)
-        logger.info("CONVERTING RAW EPHYS")
-        if phase_timeouts and "raw_conversion" in phase_timeouts:
-            logger.info(
-                f"Timeout: {phase_timeouts['raw_conversion']}s ({phase_timeouts['raw_conversion']/3600:.1f} hours)"
-            )
-        logger.info("=" * 80)
+            logger.info("=" * 80)
+            logger.info(f"Starting conversion for session: {eid}")
+            logger.info(f"Stub test mode: {stub_test}")
+            logger.info(f"Convert RAW: {convert_raw}")
+            logger.info(f"Convert PROCESSED: {convert_processed}")
+            logger.info(f"Overwrite: {overwrite}")
+            logger.info(f"Incremental: {incremental}")
+            logger.info(f"Skip download: {skip_download}")
+            logger.info(f"Compression plugins: {compression_plugins}")
+            logger.info(f"Verbose: {verbose}")
+            logger.info(f"Display progress bar: {display_progress_bar}")
+            logger.info(f"Pipelined raw/processed lanes: {pipelined}")
+            if phase_timeouts:
+                logger.info("Phase timeouts (seconds): %s", phase_timeouts)
+            else:
+                logger.info("Phase timeouts: disabled")
+            logger.info("=" * 80)
 
-        raw_start = time.time()
+            session_start = time.time()
 
-        with _phase_ctx("raw_conversion", phase_timeouts):
-            raw_info = convert_raw_session(
-                eid=eid,
+            shared_kwargs = dict(
                 one=one,
+                base_folder=base_folder,
                 stub_test=stub_test,
-                base_path=base_folder,
-                logger=logger,
                 overwrite=overwrite,
+                incremental=incremental,
+                compression_plugins=compression_plugins,
                 verbose=verbose,
                 display_progress_bar=display_progress_bar,
+                profile_memory=profile_memory,
+                trace_memory_allocations=trace_memory_allocations,
+                phase_timeouts=phase_timeouts,
+                logger=logger,
             )
-
-        raw_duration = time.time() - raw_start
-
-        if raw_info and not raw_info.get("skipped"):
-            raw_nwb_path = raw_info["nwbfile_path"]
-            results["raw_nwb_path"] = str(raw_nwb_path)
-            results["raw_size_gb"] = raw_info["nwb_size_gb"]
-            results["raw_size_bytes"] = raw_info["nwb_size_bytes"]
-            results["raw_duration_seconds"] = raw_duration
-            results["raw_converted"] = True
-            logger.info(f"RAW file written to: {raw_nwb_path}")
-            logger.info(
-                f"=== PHASE: raw_conversion | duration_seconds={raw_duration:.0f} | size_gb={raw_info['nwb_size_gb']:.2f} ==="
-            )
-            _log_disk_usage("after_raw_conversion", base_folder)
-        elif raw_info and raw_info.get("skipped"):
-            results["raw_skipped"] = True
-
-    # Convert PROCESSED
-    if convert_processed:
-        logger.info("\n" + "=" * 80)
-        logger.info("CONVERTING PROCESSED/BEHAVIOR")
-        if phase_timeouts and "processed_conversion" in phase_timeouts:
-            logger.info(
-                f"Timeout: {phase_timeouts['processed_conversion']}s ({phase_timeouts['processed_conversion']/60:.0f} minutes)"
-            )
-        logger.info("=" * 80)
-
-        processed_start = time.time()
-
-        with _phase_ctx("processed_conversion", phase_timeouts):
-            processed_info = convert_processed_session(
+            raw_lane_kwargs = dict(
                 eid=eid,
+                delete_cbins_after_decompression=delete_cbins_after_decompression,
+                stream_raw_ephys=stream_raw_ephys,
+                video_placement=video_placement,
+                **shared_kwargs,
+            )
+            processed_lane_kwargs = dict(eid=eid, **shared_kwargs)
+            download_kwargs = dict(
                 one=one,
+                base_folder=base_folder,
+                redownload_data=redownload_data,
                 stub_test=stub_test,
-                base_path=base_folder,
+                phase_timeouts=phase_timeouts,
                 logger=logger,
-                overwrite=overwrite,
-                verbose=verbose,
-                display_progress_bar=display_progress_bar,
+                skip_download=skip_download,
             )
 
-        processed_duration = time.time() - processed_start
-
-        if processed_info and not processed_info.get("skipped"):
-            processed_nwb_path = processed_info["nwbfile_path"]
-            results["processed_nwb_path"] = str(processed_nwb_path)
-            results["processed_size_gb"] = processed_info["nwb_size_gb"]
-            results["processed_size_bytes"] = processed_info["nwb_size_bytes"]
-            results["processed_duration_seconds"] = processed_duration
-            results["processed_converted"] = True
-            logger.info(f"PROCESSED file written to: {processed_nwb_path}")
-            logger.info(
-                f"=== PHASE: processed_conversion | duration_seconds={processed_duration:.0f} | size_gb={processed_info['nwb_size_gb']:.2f} ==="
-            )
-            _log_disk_usage("after_processed_conversion", base_folder)
-        elif processed_info and processed_info.get("skipped"):
-            results["processed_skipped"] = True
+            results = {
+                "eid": eid,
+                "raw_converted": False,
+                "processed_converted": False,
+                "success": False,
+                "pipelined": pipelined,
+                "phase_timings": {},
+            }
+
+            if not pipelined:
+                # Download session data
+                # Skip raw ephys download if not converting raw (saves ~100 GB per session)
+                download_start = time.time()
+                download_info, download_duration = _download_phase(
+                    eid,
+                    download_raw=convert_raw,
+                    download_processed=convert_processed,
+                    phase_name="download",
+                    **download_kwargs,
+                )
+                _record_phase(results, "download", lane="download", start=download_start, duration=download_duration)
+
+                # Convert RAW (with separate decompress and conversion phases)
+                if convert_raw:
+                    _merge_lane_results(results, _convert_raw_lane(**raw_lane_kwargs))
+
+                # Convert PROCESSED
+                if convert_processed:
+                    _merge_lane_results(results, _convert_processed_lane(**processed_lane_kwargs))
+            else:
+                # The processed lane starts once the processed datasets (without raw ephys and videos) are local;
+                # the second download then only fetches the raw data (the processed files are already cached)
+                processed_download_start = time.time()
+                processed_download_info, processed_download_duration = _download_phase(
+                    eid,
+                    download_raw=False,
+                    download_processed=True,
+                    phase_name="download_processed",
+                    **download_kwargs,
+                )
+                _record_phase(
+                    results,
+                    "download_processed",
+                    lane="download",
+                    start=processed_download_start,
+                    duration=processed_download_duration,
+                )
 
-    session_time = time.time() - session_start
-    results["total_time_seconds"] = session_time
-    results["download_info"] = download_info
-    results["success"] = True
+                processed_lane = _LaneProcess(
+                    name="processed lane",
+                    lane_function=_convert_processed_lane,
+                    lane_kwargs=processed_lane_kwargs,
+                    memory_limit_gb=lane_memory_limits_gb.get("processed"),
+                )
+                try:
+                    raw_download_start = time.time()
+                    # Never clear the session folder here: the processed lane is reading its processed files
+                    download_info, raw_download_duration = _download_phase(
+                        eid,
+                        download_raw=True,
+                        download_processed=True,
+                        phase_name="download_raw",
+                        **{**download_kwargs, "redownload_data": False},
+                    )
+                    _record_phase(
+                        results,
+                        "download_raw",
+                        lane="download",
+                        start=raw_download_start,
+                        duration=raw_download_duration,
+                    )
+                    download_duration = processed_download_duration + raw_download_duration
+
+                    raw_lane = _LaneProcess(
+                        name="raw lane",
+                        lane_function=_convert_raw_lane,
+                        lane_kwargs=raw_lane_kwargs,
+                        memory_limit_gb=lane_memory_limits_gb.get("raw"),
+                    )
+                    try:
+                        _merge_lane_results(results, raw_lane.result())
+                    finally:
+                        raw_lane.terminate()
+                    _merge_lane_results(results, processed_lane.result())
+                finally:
+                    processed_lane.terminate()
+
+            # Express the phase starts relative to the session start
+            for phase_timing in results["phase_timings"].values():
+                phase_timing["start_offset_seconds"] = phase_timing.pop("start") - session_start
+
+            session_time = time.time() - session_start
+            results["download_size_gb"] = download_info["total_size_gb"]
+            results["download_duration_seconds"] = download_duration
+            results["total_time_seconds"] = session_time
+            results["download_info"] = download_info
+            results["spans_path"] = str(spans_path)
+            results["success"] = True
 
-    logger.info("\n" + "=" * 80)
-    logger.info("SESSION COMPLETED")
-    logger.info(f"Total time: {session_time:.2f}s ({session_time/60:.2f} minutes)")
-    logger.info(f"RAW converted: {results['raw_converted']}")
-    logger.info(f"PROCESSED converted: {results['processed_converted']}")
-    logger.info("=" * 80)
+            logger.info("\n" + "=" * 80)
+            logger.info("SESSION COMPLETED")
+            logger.info(f"Total time: {session_time:.2f}s ({session_time/60:.2f} minutes)")
+            logger.info(f"RAW converted: {results['raw_converted']}")
+            logger.info(f"PROCESSED converted: {results['processed_converted']}")
+            if pipelined:
+                lane_seconds = sum(timing["duration_seconds"] for timing in results["phase_timings"].values())
+                logger.info(f"Phase time overlapped by pipelining: {max(lane_seconds - session_time, 0):.2f}s")
+            logger.info("=" * 80)
 
-    return results
+            return results
+    finally:
+        set_span_recorder(previous_recorder)
@@ -1,3 +1,4 @@
+import json
 import logging
 import time
 from pathlib import Path
@@ -7,13 +8,19 @@ import numpy as np
 from brainbox.io.one import SpikeSortingLoader
 from neuroconv.datainterfaces import SpikeGLXRecordingInterface, SpikeGLXSyncChannelInterface
 from neuroconv.nwbconverter import ConverterPipe
+from neuroconv.tools.nwb_helpers import get_module
 from one.api import ONE
 from pydantic import DirectoryPath
-from pynwb import NWBFile
+from pynwb import NWBFile, TimeSeries
 from spikeinterface.extractors.extractor_classes import SpikeGLXRecordingExtractor
 
 from ..fixtures import get_probe_name_to_probe_id_dict
+from ..utils.cbin_streaming import stream_recording_from_cbin
 from ..utils.probe_naming import get_ibl_probe_name
+from ..utils.sync_timestamps import SyncModelTimestampsIterator, fit_linear_sync_model, get_sync_breakpoints
+
+# Number of samples neuroconv keeps per recording segment when stub_test=True
+STUB_NUM_SAMPLES = 100
 
 
 class IblSpikeGlxConverter(ConverterPipe):
@@ -21,9 +28,33 @@ class IblSpikeGlxConverter(ConverterPipe):
     REVISION: str | None = "2025-05-06"
 
     def __init__(
-        self, folder_path: DirectoryPath, one: ONE, eid: str, probe_name_to_probe_id_dict: dict, streams=None
+        self,
+        folder_path: DirectoryPath,
+        one: ONE,
+        eid: str,
+        probe_name_to_probe_id_dict: dict,
+        streams=None,
+        linear_sync_tolerance_s: float | None = None,
     ) -> None:
+        """
+        Parameters
+        ----------
+        folder_path : DirectoryPath
+            The raw_ephys_data folder containing one subfolder per probe.
+        one : ONE
+            ONE API instance.
+        eid : str
+            Session ID.
+        probe_name_to_probe_id_dict : dict
+            Mapping from probe name (e.g. "probe00") to probe insertion ID.
+        linear_sync_tolerance_s : float, optional
+            If set, AP/LF ElectricalSeries whose probe sync model deviates from a straight line by at most
+            this many seconds are written with starting_time and rate instead of per-sample timestamps,
+            and the sync model breakpoints are stored in the "ecephys" processing module.
+            If None (default), timestamps are always written, generated lazily from the sync model.
+        """
         folder_path = Path(folder_path)
+        self.linear_sync_tolerance_s = linear_sync_tolerance_s
 
         # Create interfaces manually from probe subfolders
         # This avoids Neo's duplicate stream name bug when scanning parent folder
@@ -50,6 +81,7 @@ class IblSpikeGlxConverter(ConverterPipe):
                 # Create interface pointing to probe subfolder
                 # Neo will only see one probe's files, avoiding duplicate stream names
                 interface = SpikeGLXRecordingInterface(folder_path=str(probe_folder), stream_id=stream_id)
+                self._stream_from_cbin_if_prepared(interface=interface, probe_folder=probe_folder, stream_id=stream_id)
 
                 # Build device name mapping from original stream_id before normalization
                 # NeuroConv generates device names like "NeuropixelsImec0" from stream_id "imec0.ap"
@@ -140,12 +172,48 @@ class IblSpikeGlxConverter(ConverterPipe):
 
         for stream_id in sync_streams:
             interface = SpikeGLXSyncChannelInterface(folder_path=str(probe_folder), stream_id=stream_id, verbose=False)
+            self._stream_from_cbin_if_prepared(interface=interface, probe_folder=probe_folder, stream_id=stream_id)
 
             # Normalize: "imec0.ap-SYNC" -> "imec.sync"
             normalized_stream = stream_id.replace("imec0", "imec").replace("imec1", "imec").replace(".ap-SYNC", ".sync")
             key = f"{probe_name}.{normalized_stream}"  # e.g., "probe00.imec.sync"
             data_interfaces[key] = interface
 
+    @staticmethod
+    def _stream_from_cbin_if_prepared(interface, probe_folder: Path, stream_id: str) -> None:
+        """
+        Read the interface data from the original .cbin if the folder was laid out for streaming.
+
+        Folders prepared with `prepare_cbin_streaming_folder` hold a sparse placeholder .bin next to a link to
+        the .cbin: the recording extractor of the interface is then replaced by one streaming from the .cbin.
+        Folders produced by `decompress_ephys_cbins` hold no .cbin and are read as they are.
+
+        Decoded data is cached by the mtscomp reader in whole mtscomp chunks (1 s of all channels), not in chunks
+        aligned to the HDF5 chunk shape: the NWB iterator reads the recording sequentially, so each mtscomp chunk
+        is decoded once whatever the HDF5 chunking, and a cache keyed on HDF5 chunks would hold the same data.
+        """
+        # "imec0.ap" -> "*.imec0.ap.cbin", "imec0.ap-SYNC" -> "*.imec0.ap.cbin"
+        stream_file_suffix = stream_id.replace("-SYNC", "")
+        cbin_file_paths = sorted(probe_folder.glob(f"*.{stream_file_suffix}.cbin"))
+        if not cbin_file_paths:
+            return
+        if len(cbin_file_paths) > 1:
+            raise ValueError(f"Expected one .cbin for stream {stream_id} in {probe_folder}, found {cbin_file_paths}")
+
+        cbin_file_path = cbin_file_paths[0]
+        with open(cbin_file_path.with_suffix(".ch")) as file:
+            num_file_channels = json.load(file)["n_channels"]
+
+        # The sync channel is the last channel of the file; neural channels come first, in file order
+        recording_extractor = interface.recording_extractor
+        if "-SYNC" in stream_id:
+            file_channel_indices = np.array([num_file_channels - 1])
+        else:
+            file_channel_indices = np.arange(recording_extractor.get_num_channels())
+        interface.recording_extractor = stream_recording_from_cbin(
+            recording=recording_extractor, cbin_file_path=cbin_file_path, file_channel_indices=file_channel_indices
+        )
+
     @classmethod
     def get_data_requirements(cls, **kwargs) -> dict:
         """
@@ -312,15 +380,45 @@ class IblSpikeGlxConverter(ConverterPipe):
 
         return metadata
 
-    def temporally_align_data_interfaces(self) -> None:
-        """Align the raw data timestamps to the other data streams using the ONE API."""
+    def temporally_align_data_interfaces(self, metadata: Optional[dict] = None, stub_test: bool = False) -> dict:
+        """
+        Align the raw data timestamps to the other data streams using the probe sync model.
+
+        AP and LF streams never materialize a full per-sample timestamps array. Instead, the returned
+        metadata overrides their ElectricalSeries with either a `SyncModelTimestampsIterator` that evaluates
+        the sync model one buffer at a time during the write, or `starting_time` + `rate` when
+        `linear_sync_tolerance_s` is set and the sync model is linear within that tolerance. The sync
+        channel interfaces keep in-memory aligned times, as their TimeSeries are written through a
+        different code path.
+
+        Parameters
+        ----------
+        metadata : dict, optional
+            Conversion metadata. It is not modified; a copy with updated "Ecephys" entries is returned.
+        stub_test : bool, default: False
+            If True, only the timestamps of the stubbed samples are generated.
+
+        Returns
+        -------
+        dict
+            The metadata with ElectricalSeries timing overrides for every AP and LF stream.
+        """
+        metadata = dict(metadata or {})
+        ecephys_metadata = dict(metadata.get("Ecephys", {}))
+        metadata["Ecephys"] = ecephys_metadata
 
+        spike_sorting_loaders = {}
         for key, interface in self.data_interface_objects.items():
             # Parse new key format: "probe00.imec.ap" -> probe_name="probe00"
             parts = key.split(".")
             probe_name = parts[0]  # "probe00"
 
-            pid = self.probe_name_to_probe_id_dict[probe_name]
+            if probe_name not in spike_sorting_loaders:
+                pid = self.probe_name_to_probe_id_dict[probe_name]
+                spike_sorting_loaders[probe_name] = SpikeSortingLoader(
+                    pid=pid, eid=self.eid, pname=probe_name, one=self.one
+                )
+            spike_sorting_loader = spike_sorting_loaders[probe_name]
 
             # Get ns and fs directly from the recording interface instead of calling raw_electrophysiology()
             # This avoids instantiating spikeglx.Reader which triggers warnings about missing geometry
@@ -328,17 +426,67 @@ class IblSpikeGlxConverter(ConverterPipe):
             recording_extractor = interface.recording_extractor
             ns = recording_extractor.get_num_samples()
             fs = recording_extractor.get_sampling_frequency()
+            if stub_test:
+                ns = min(ns, STUB_NUM_SAMPLES)
 
-            spike_sorting_loader = SpikeSortingLoader(pid=pid, eid=self.eid, pname=probe_name, one=self.one)
-            aligned_timestamps = spike_sorting_loader.samples2times(np.arange(0, ns), direction="forward", fs=fs)
-
-            # Handle different interface types
-            if hasattr(interface, "set_aligned_timestamps"):
-                # Recording interfaces (AP/LF) have this method
-                interface.set_aligned_timestamps(aligned_timestamps=aligned_timestamps)
-            else:
-                # Sync interface doesn't have set_aligned_timestamps, use recording_extractor directly
+            if not hasattr(interface, "es_key"):
+                # Sync channel interface: small single-channel stream, set the aligned times on the extractor
+                aligned_timestamps = spike_sorting_loader.samples2times(np.arange(0, ns), direction="forward", fs=fs)
                 interface.recording_extractor.set_times(times=aligned_timestamps, with_warning=False)
+                continue
+
+            timing = None
+            if self.linear_sync_tolerance_s is not None:
+                linear_model = fit_linear_sync_model(
+                    spike_sorting_loader=spike_sorting_loader,
+                    num_samples=ns,
+                    sampling_frequency=fs,
+                    tolerance_seconds=self.linear_sync_tolerance_s,
+                )
+                if linear_model is not None:
+                    timing = dict(
+                        timestamps=None,
+                        starting_time=linear_model["starting_time"],
+                        rate=linear_model["rate"],
+                    )
+            if timing is None:
+                timing = dict(
+                    timestamps=SyncModelTimestampsIterator(
+                        spike_sorting_loader=spike_sorting_loader, num_samples=ns, sampling_frequency=fs
+                    ),
+                    starting_time=None,
+                    rate=None,
+                )
+
+            ecephys_metadata[interface.es_key] = {**ecephys_metadata.get(interface.es_key, {}), **timing}
+
+        return metadata
+
+    def _add_sync_breakpoints_to_nwbfile(self, nwbfile: NWBFile) -> None:
+        """Store the probe-to-session sync model breakpoints for the probes written with a regular rate."""
+        ecephys_module = get_module(nwbfile=nwbfile, name="ecephys", description="Processed electrophysiology data.")
+        for probe_name in sorted({key.split(".")[0] for key in self.data_interface_objects}):
+            series_name = f"TimeSyncBreakpoints{probe_name.capitalize()}"
+            if series_name in ecephys_module.data_interfaces:
+                continue
+
+            pid = self.probe_name_to_probe_id_dict[probe_name]
+            spike_sorting_loader = SpikeSortingLoader(pid=pid, eid=self.eid, pname=probe_name, one=self.one)
+            breakpoints = get_sync_breakpoints(spike_sorting_loader)
+            ecephys_module.add(
+                TimeSeries(
+                    name=series_name,
+                    description=(
+                        f"Breakpoints of the piecewise-linear model aligning the {probe_name} clock to the session "
+                        "clock. Data are AP-band sample indices and timestamps their aligned session times. Raw "
+                        f"{probe_name} ElectricalSeries are written with starting_time and rate because the model "
+                        f"deviates from a straight line by less than {self.linear_sync_tolerance_s} s."
+                    ),
+                    data=breakpoints[:, 0],
+                    timestamps=breakpoints[:, 1],
+                    unit="samples",
+                )
+            )
 
     def add_to_nwbfile(self, nwbfile: NWBFile, metadata, **conversion_options_kwargs) -> None:
         # Build conversion options from kwargs (which come from IblConverter unpacking)
@@ -347,11 +495,22 @@ class IblSpikeGlxConverter(ConverterPipe):
         interface_names = list(self.data_interface_objects.keys())
         non_nidq_interfaces = [name for name in interface_names if name != "nidq"]
         for interface_name in non_nidq_interfaces:
-            # Merge stub_test option with always_write_timestamps
             if interface_name not in conversion_options:
                 conversion_options[interface_name] = dict()
-            conversion_options[interface_name]["always_write_timestamps"] = True
+            # AP/LF timing comes from the metadata overrides below; writing timestamps from the extractor
+            # would materialize a full per-sample array
+            is_recording_interface = hasattr(self.data_interface_objects[interface_name], "es_key")
+            conversion_options[interface_name]["always_write_timestamps"] = not is_recording_interface
 
-        self.temporally_align_data_interfaces()
+        stub_test = any(options.get("stub_test", False) for options in conversion_options.values())
+        metadata = self.temporally_align_data_interfaces(metadata=metadata, stub_test=stub_test)
 
         super().add_to_nwbfile(nwbfile=nwbfile, metadata=metadata, conversion_options=conversion_options)
+
+        uses_regular_rate = any(
+            metadata["Ecephys"][interface.es_key]["rate"] is not None
+            for interface in self.data_interface_objects.values()
+            if hasattr(interface, "es_key")
+        )
+        if uses_regular_rate:
+            self._add_sync_breakpoints_to_nwbfile(nwbfile=nwbfile)
@@ -17,17 +17,29 @@ These methods provide a single source of truth for loading parameters, used by b
 download_data() and add_to_nwbfile(). This avoids duplicating collection names, object
 names, and other loading parameters in multiple places.
 
+Data shared by several interfaces of a session (wheel object, camera objects, spike sorting)
+is read through an optional SessionDataCache (see set_data_cache()), so that each file is
+parsed once per session and freed after its last consumer's add_to_nwbfile().
+
+Conversions can split add_to_nwbfile() in two phases: prepare() loads and transforms the data
+without an NWBFile (possibly in worker threads, whose ONE calls are serialized), and commit()
+attaches it to the NWBFile (sequentially, in a deterministic order).
+
 Philosophy: Fail-fast. Missing required data should raise exceptions, not be silently caught.
 This ensures data quality issues are caught early and conversion failures are explicit.
 """
 
 import logging
 from abc import abstractmethod
-from typing import Optional
+from typing import Any, Optional
 
 from neuroconv.basedatainterface import BaseDataInterface
 from one.api import ONE
 
+from ..utils.dataset_index import SessionDatasetIndex
+from ..utils.session_data_cache import SessionDataCache
+from ..utils.telemetry import span
+
 
 class BaseIBLDataInterface(BaseDataInterface):
     """
@@ -73,11 +85,143 @@ class BaseIBLDataInterface(BaseDataInterface):
     These are used by download_data() and add_to_nwbfile() to avoid duplicating
     loading parameters. The kwargs should NOT include id/eid, revision, or
     download_only - those are always added by the caller.
+
+    Shared Data Cache
+    -----------------
+    Interfaces load through _load_object() / _load_dataset(), which read from the
+    SessionDataCache given to set_data_cache() (or from ONE directly without one), and
+    declare the keys they read in get_data_cache_keys(). The conversion calls
+    release_data_cache() after add_to_nwbfile().
+
+    Two-Phase Conversion
+    --------------------
+    prepare(metadata, **conversion_options) runs _prepare_data(), which loads and transforms the
+    data, and keeps the result; it can run in a worker thread. commit(nwbfile, metadata,
+    **conversion_options) then calls add_to_nwbfile(), which picks the result up with
+    _get_prepared_data() (or prepares it on the spot when add_to_nwbfile() is called directly).
+    Interfaces without a _prepare_data() override do all their work in commit().
     """
 
     # Subclasses MUST override this to explicitly declare revision requirement
     REVISION: str | None = None
 
+    # Shared session cache, set with set_data_cache()
+    data_cache: SessionDataCache | None = None
+    _retained_cache_keys: tuple = ()
+
+    # Result of _prepare_data() kept by prepare() until add_to_nwbfile() takes it
+    _prepared_data: Any = None
+    _is_prepared: bool = False
+
+    def prepare(self, metadata: dict, **conversion_options) -> None:
+        """
+        Load and transform the data of this interface ahead of commit(), without an NWBFile.
+
+        Only touches the state of this interface (and the thread-safe data cache), so the prepare()
+        of different interfaces can run concurrently.
+
+        Parameters
+        ----------
+        metadata : dict
+            Metadata dictionary.
+        **conversion_options
+            The options later passed to commit() / add_to_nwbfile().
+        """
+        with span("prepare", category="interface", interface=type(self).__name__):
+            self._prepared_data = self._prepare_data(**conversion_options)
+        self._is_prepared = True
+
+    def commit(self, nwbfile, metadata: dict, **conversion_options) -> None:
+        """
+        Attach the prepared data to the NWBFile; must be called from a single thread.
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The NWBFile to add data to.
+        metadata : dict
+            Metadata dictionary.
+        **conversion_options
+            The options passed to prepare().
+        """
+        self.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata, **conversion_options)
+
+    def _prepare_data(self, **conversion_options) -> Any:
+        """
+        Load and transform the data added by add_to_nwbfile(); override to make prepare() useful.
+
+        Receives the add_to_nwbfile() options (overrides may ignore some with **kwargs).
+        """
+        return None
+
+    def _get_prepared_data(self, **conversion_options) -> Any:
+        """Return (and forget) the data kept by prepare(), or prepare it now if prepare() was not called."""
+        if not self._is_prepared:
+            return self._prepare_data(**conversion_options)
+        prepared_data = self._prepared_data
+        self._prepared_data = None
+        self._is_prepared = False
+        return prepared_data
+
+    def get_data_cache_keys(self, data_cache: SessionDataCache) -> list[tuple]:
+        """
+        Declare the cache keys this interface reads in add_to_nwbfile().
+
+        Override in interfaces loading data that other interfaces of the session also load.
+
+        Parameters
+        ----------
+        data_cache : SessionDataCache
+            The cache, used to build the keys (e.g. data_cache.object_key(obj="wheel", collection="alf")).
+
+        Returns
+        -------
+        list of tuple
+            Keys retained until release_data_cache() is called. Empty by default.
+        """
+        return []
+
+    def set_data_cache(self, data_cache: SessionDataCache) -> None:
+        """
+        Read shared session data through `data_cache` and register as a consumer of its keys.
+
+        Must be called for every consumer before add_to_nwbfile() of the first one, so that the data
+        stays cached until all consumers are done.
+
+        Parameters
+        ----------
+        data_cache : SessionDataCache
+            Cache shared by the interfaces of the session.
+        """
+        if self.data_cache is not None:
+            raise RuntimeError(f"{type(self).__name__} already reads through a data cache.")
+        self.data_cache = data_cache
+        self._retained_cache_keys = tuple(self.get_data_cache_keys(data_cache))
+        for key in self._retained_cache_keys:
+            data_cache.retain(key)
+
+    def release_data_cache(self) -> None:
+        """Release the cache keys registered by set_data_cache(); called once add_to_nwbfile() is done."""
+        for key in self._retained_cache_keys:
+            self.data_cache.release(key)
+        self._retained_cache_keys = ()
+
+    def _load_object(self, eid: str, revision: str | None = None, **load_kwargs):
+        """Load an ALF object through the data cache if set, else with one.load_object()."""
+        if self.data_cache is None:
+            return self.one.load_object(id=eid, revision=revision, **load_kwargs)
+        if eid != self.data_cache.eid:
+            raise ValueError(f"The data cache of {type(self).__name__} holds session {self.data_cache.eid}, not {eid}.")
+        return self.data_cache.load_object(revision=revision, **load_kwargs)
+
+    def _load_dataset(self, eid: str, revision: str | None = None, **load_kwargs):
+        """Load a dataset through the data cache if set, else with one.load_dataset()."""
+        if self.data_cache is None:
+            return self.one.load_dataset(eid, revision=revision, **load_kwargs)
+        if eid != self.data_cache.eid:
+            raise ValueError(f"The data cache of {type(self).__name__} holds session {self.data_cache.eid}, not {eid}.")
+        return self.data_cache.load_dataset(revision=revision, **load_kwargs)
+
     @classmethod
     @abstractmethod
     def get_data_requirements(cls, **kwargs) -> dict:
@@ -155,7 +299,14 @@ class BaseIBLDataInterface(BaseDataInterface):
         return None
 
     @classmethod
-    def check_availability(cls, one: ONE, eid: str, logger: Optional[logging.Logger] = None, **kwargs) -> dict:
+    def check_availability(
+        cls,
+        one: ONE,
+        eid: str,
+        logger: Optional[logging.Logger] = None,
+        dataset_index: Optional[SessionDatasetIndex] = None,
+        **kwargs,
+    ) -> dict:
         """
         Check if required data is available for a specific session.
 
@@ -179,6 +330,9 @@ class BaseIBLDataInterface(BaseDataInterface):
             Session ID (experiment ID)
         logger : logging.Logger, optional
             Logger for progress/warning messages
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets. If None, one is built with a single
+            one.list_datasets(eid) query. Pass a shared index when checking several interfaces.
         **kwargs : dict
             Interface-specific parameters
 
@@ -217,8 +371,11 @@ class BaseIBLDataInterface(BaseDataInterface):
         # Query without revision filtering to get latest version of ALL files
         # This includes both revision-tagged files (spike sorting) and untagged files (behavioral)
         # The unfiltered query returns the superset of what any revision-specific query would return
-        available_datasets = one.list_datasets(eid)
-        available_files = set(str(d) for d in available_datasets)
+        # Callers checking several interfaces for the same session should build the index once and pass it in
+        if dataset_index is None:
+            dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+        elif dataset_index.eid != eid:
+            raise ValueError(f"dataset_index was built for session {dataset_index.eid}, not {eid}")
 
         missing_required = []
         found_files = []
@@ -239,36 +396,9 @@ class BaseIBLDataInterface(BaseDataInterface):
             all_files_found = True
 
             for exact_file in option_files:
-                # Handle wildcards
-                if "*" in exact_file:
-                    import re
-
-                    pattern = re.escape(exact_file).replace(r"\*", ".*")
-                    found = any(re.search(pattern, avail) for avail in available_files)
-                else:
-                    # Check both with and without _ibl_ namespace prefix
-                    # Need to handle revision tags like: alf/#2025-06-18#/_ibl_leftCamera.features.pqt
-                    import re
-
-                    # Build pattern that matches with or without revision tags
-                    # e.g., "alf/leftCamera.features.pqt" should match "alf/#2025-06-18#/leftCamera.features.pqt"
-                    parts = exact_file.split("/")
-                    if len(parts) >= 2:
-                        collection = parts[0]
-                        filename = parts[-1]
-
-                        # Pattern 1: without _ibl_ prefix (with optional revision tag)
-                        pattern1 = re.escape(f"{collection}/") + r"(#[^#]+#/)?" + re.escape(filename)
-
-                        # Pattern 2: with _ibl_ prefix (with optional revision tag)
-                        pattern2 = re.escape(f"{collection}/") + r"(#[^#]+#/)?" + re.escape(f"_ibl_{filename}")
-
-                        found = any(
-                            re.search(pattern1, avail) or re.search(pattern2, avail) for avail in available_files
-                        )
-                    else:
-                        # Fallback for single-part paths
-                        found = any(exact_file in avail for avail in available_files)
+                # Handles wildcards, the _ibl_ namespace prefix and revision tags like
+                # alf/#2025-06-18#/_ibl_leftCamera.features.pqt (see SessionDatasetIndex.find)
+                found = dataset_index.contains(exact_file)
 
                 if not found:
                     all_files_found = False
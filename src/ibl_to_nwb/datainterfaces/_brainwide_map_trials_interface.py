@@ -209,6 +209,21 @@ class BrainwideMapTrialsInterface(BaseIBLDataInterface):
             "data": None,
         }
 
+    def _prepare_data(self, stub_test: bool = False, stub_trials: int = 10, **kwargs) -> pd.DataFrame:
+        """Load the trials table (first `stub_trials` trials if `stub_test`) and apply the tidy transformations."""
+        session_loader = SessionLoader(one=self.one, eid=self.session, revision=self.revision)
+        session_loader.load_trials()
+        trials = session_loader.trials
+
+        # Subset trials if stub_test
+        if stub_test:
+            trials = trials.iloc[:stub_trials]
+
+        # Apply tidy data transformations
+        trials = self._apply_tidy_transformations(trials)
+
+        return trials
+
     def add_to_nwbfile(self, nwbfile: NWBFile, metadata: dict, stub_test: bool = False, stub_trials: int = 10):
         """
         Add trial data to NWBFile.
@@ -224,16 +239,7 @@ class BrainwideMapTrialsInterface(BaseIBLDataInterface):
         stub_trials : int, default: 10
             Number of trials to include when stub_test=True.
         """
-        session_loader = SessionLoader(one=self.one, eid=self.session, revision=self.revision)
-        session_loader.load_trials()
-        trials = session_loader.trials
-
-        # Subset trials if stub_test
-        if stub_test:
-            trials = trials.iloc[:stub_trials]
-
-        # Apply tidy data transformations
-        trials = self._apply_tidy_transformations(trials)
+        trials = self._get_prepared_data(stub_test=stub_test, stub_trials=stub_trials)
 
         # Build columns using the master TRIALS_COLUMNS table
         columns = []
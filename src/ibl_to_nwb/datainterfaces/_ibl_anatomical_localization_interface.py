@@ -6,14 +6,13 @@ from typing import Optional
 
 import numpy as np
 from brainbox.io.one import SpikeSortingLoader
-from iblatlas.atlas import AllenAtlas
-from iblatlas.regions import BrainRegions
 from ndx_anatomical_localization import AllenCCFv3Space, AnatomicalCoordinatesTable, Localization, Space
 from one.api import ONE
 from pynwb import NWBFile
 
 from ._base_ibl_interface import BaseIBLDataInterface
-from ..fixtures.load_fixtures import get_probe_name_to_probe_id_dict, load_bwm_histology_qc
+from ..fixtures.load_fixtures import get_probe_histology_qc_dict, get_probe_name_to_probe_id_dict
+from ..utils.atlas import get_allen_atlas, get_brain_regions
 from ..utils.electrodes import _ensure_ibl_coordinates_um, convert_ibl_to_ccf3_coordinates
 from ..utils.probe_naming import get_ibl_probe_name
 
@@ -33,6 +32,8 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
 
     # Histology alignments use BWM standard revision
     REVISION: str | None = "2025-05-06"
+    # Spike sorter whose channels carry the histology, the default of SpikeSortingLoader.load_spike_sorting
+    SPIKE_SORTER: str = "iblsorter"
 
     def __init__(
         self,
@@ -56,13 +57,13 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
         self.one = one
         self.eid = eid
         self.revision = self.REVISION
-        self.atlas = AllenAtlas()
-        self.brain_regions = BrainRegions()
+        self.atlas = get_allen_atlas()
+        self.brain_regions = get_brain_regions()
 
         # Load histology QC table from fixtures (committed to git)
         # NO fallback - if fixture is missing, installation is broken
-        histology_qc_df = load_bwm_histology_qc()
-        probe_name_to_probe_id_dict = get_probe_name_to_probe_id_dict(eid, histology_qc_df)
+        probe_name_to_probe_id_dict = get_probe_name_to_probe_id_dict(eid)
+        probe_histology_qc_dict = get_probe_histology_qc_dict(eid)
 
         # Load histology data for all probes
         self.probe_data = {}
@@ -70,15 +71,14 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
 
         for pname, pid in probe_name_to_probe_id_dict.items():
             # Check histology quality from pre-computed table
-            probe_qc = histology_qc_df[(histology_qc_df["eid"] == eid) & (histology_qc_df["probe_name"] == pname)]
+            probe_qc_row = probe_histology_qc_dict.get(pname)
 
-            if probe_qc.empty:
+            if probe_qc_row is None:
                 raise ValueError(
                     f"Data integrity error: probe {pname} (pid={pid}) found in probe_name_to_probe_id_dict "
                     f"but not in histology QC table for session {eid}. This indicates corrupted fixture data."
                 )
 
-            probe_qc_row = probe_qc.iloc[0]
             histology_quality = probe_qc_row["histology_quality"]
             has_files = probe_qc_row["has_histology_files"]
 
@@ -88,9 +88,13 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
                     print(f"Skipping {pname}: quality '{histology_quality}', has_files={has_files}")
                 continue
 
-            # Load spike sorting data to get channels
+            # Only the channels (with their histology): not the spikes and clusters of the spike sorting.
+            # load_channels defaults to the pykilosort collection, unlike load_spike_sorting: pin the sorter
+            # that the sorting interface reads so that both describe the same channels.
+            # Not read through the SessionDataCache: this is the only consumer of the channels-only objects
+            # (the sorting extractor caches the full spike sorting under another key), so it would pass through.
             ssl = SpikeSortingLoader(pid=pid, eid=eid, pname=pname, one=one, atlas=self.atlas)
-            _, _, channels = ssl.load_spike_sorting(revision=self.revision)
+            channels = ssl.load_channels(spike_sorter=self.SPIKE_SORTER, revision=self.revision)
 
             required_fields = {"x", "y", "z", "acronym"}
             missing_fields = required_fields - set(channels.keys())
@@ -180,8 +184,8 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
         """
 
         # Load histology QC table from fixtures (committed to git)
-        histology_qc_df = load_bwm_histology_qc()
-        probe_name_to_probe_id_dict = get_probe_name_to_probe_id_dict(eid, histology_qc_df)
+        probe_name_to_probe_id_dict = get_probe_name_to_probe_id_dict(eid)
+        probe_histology_qc_dict = get_probe_histology_qc_dict(eid)
 
         available_probes = []
         unavailable_probes = []
@@ -189,15 +193,14 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
 
         for pname, pid in probe_name_to_probe_id_dict.items():
             # Check histology quality from pre-computed table
-            probe_qc = histology_qc_df[(histology_qc_df["eid"] == eid) & (histology_qc_df["probe_name"] == pname)]
+            probe_qc_row = probe_histology_qc_dict.get(pname)
 
-            if probe_qc.empty:
+            if probe_qc_row is None:
                 raise ValueError(
                     f"Data integrity error: probe {pname} (pid={pid}) found in probe_name_to_probe_id_dict "
                     f"but not in histology QC table for session {eid}. This indicates corrupted fixture data."
                 )
 
-            probe_qc_row = probe_qc.iloc[0]
             histology_quality = probe_qc_row["histology_quality"]
             has_files = probe_qc_row["has_histology_files"]
 
@@ -265,23 +268,22 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
 
         # Load histology QC table from fixtures (committed to git)
         # NO fallback - if fixture is missing, installation is broken
-        histology_qc_df = load_bwm_histology_qc()
-        probe_name_to_probe_id_dict = get_probe_name_to_probe_id_dict(eid, histology_qc_df)
+        probe_name_to_probe_id_dict = get_probe_name_to_probe_id_dict(eid)
+        probe_histology_qc_dict = get_probe_histology_qc_dict(eid)
 
         downloaded_probes = []
         skipped_probes = []
 
         for pname, pid in probe_name_to_probe_id_dict.items():
             # Check histology quality from pre-computed table
-            probe_qc = histology_qc_df[(histology_qc_df["eid"] == eid) & (histology_qc_df["probe_name"] == pname)]
+            probe_qc_row = probe_histology_qc_dict.get(pname)
 
-            if probe_qc.empty:
+            if probe_qc_row is None:
                 raise ValueError(
                     f"Data integrity error: probe {pname} (pid={pid}) found in probe_name_to_probe_id_dict "
                     f"but not in histology QC table for session {eid}. This indicates corrupted fixture data."
                 )
 
-            probe_qc_row = probe_qc.iloc[0]
             histology_quality = probe_qc_row["histology_quality"]
             has_files = probe_qc_row["has_histology_files"]
 
@@ -303,8 +305,7 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
             if logger:
                 logger.info(f"  Downloading histology for {pname} (quality: {histology_quality})")
 
-            atlas = AllenAtlas()
-            ssl = SpikeSortingLoader(pid=pid, eid=eid, pname=pname, one=one, atlas=atlas)
+            ssl = SpikeSortingLoader(pid=pid, eid=eid, pname=pname, one=one, atlas=get_allen_atlas())
             ssl.load_spike_sorting(revision=revision)
 
             # Download SpikeGLX .meta file for electrode geometry
@@ -422,7 +423,7 @@ class IblAnatomicalLocalizationInterface(BaseIBLDataInterface):
         if self.ccf_space.name not in localization.spaces:
             localization.add_spaces(spaces=[self.ccf_space])
 
-        brain_regions = BrainRegions()
+        brain_regions = get_brain_regions()
 
         # Create single merged IBL-Bregma table for all probes
         ibl_table = AnatomicalCoordinatesTable(
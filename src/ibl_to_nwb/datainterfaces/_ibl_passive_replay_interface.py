@@ -9,6 +9,7 @@ import logging
 import time
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 from hdmf.common import VectorData
 from neuroconv.tools.nwb_helpers import get_module
@@ -17,6 +18,8 @@ from pynwb import NWBFile
 from pynwb.epoch import TimeIntervals
 
 from ._base_ibl_interface import BaseIBLDataInterface
+from ..utils.dataset_index import SessionDatasetIndex
+from ..utils.intervals import find_overlapping_intervals
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +39,9 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
     """
 
     @staticmethod
-    def _resolve_revision(one: ONE, eid: str, candidates: list[str]) -> str | None:
+    def _resolve_revision(
+        one: ONE, eid: str, candidates: list[str], dataset_index: Optional[SessionDatasetIndex] = None
+    ) -> str | None:
         """
         Find the last available revision from candidates list.
 
@@ -51,27 +56,23 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
             Session ID
         candidates : list[str]
             List of revision candidates to check, in order
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to avoid another one.list_datasets(eid) query
 
         Returns
         -------
         str | None
             The last available revision, or None if none found
         """
-        datasets = one.list_datasets(eid)
-        dataset_strs = [str(d) for d in datasets]
-
-        found_revision = None
-        for revision in candidates:
-            revision_tag = f"#{revision}#"
-            if any(revision_tag in ds for ds in dataset_strs):
-                found_revision = revision
-
-        return found_revision
+        if dataset_index is None:
+            dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+        return dataset_index.get_last_available_revision(candidates)
 
     def __init__(
         self,
         one: ONE,
         session: str,
+        dataset_index: Optional[SessionDatasetIndex] = None,
     ):
         """
         Initialize the passive replay stimulation interface.
@@ -82,11 +83,13 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
             ONE API instance for data access
         session : str
             Session ID (eid)
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to resolve the revision without querying ONE
         """
         super().__init__()
         self.one = one
         self.session = session
-        self.revision = self._resolve_revision(one, session, self.REVISION_CANDIDATES)
+        self.revision = self._resolve_revision(one, session, self.REVISION_CANDIDATES, dataset_index=dataset_index)
 
         # Load replay stimulation data - will fail loudly if data missing
         self.taskreplay_events_df = one.load_dataset(
@@ -119,7 +122,13 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
 
     @classmethod
     def download_data(
-        cls, one: ONE, eid: str, download_only: bool = True, logger: Optional[logging.Logger] = None, **kwargs
+        cls,
+        one: ONE,
+        eid: str,
+        download_only: bool = True,
+        logger: Optional[logging.Logger] = None,
+        dataset_index: Optional[SessionDatasetIndex] = None,
+        **kwargs,
     ) -> dict:
         """
         Download passive replay stimulation data.
@@ -136,6 +145,8 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
             If True, download but don't load into memory
         logger : logging.Logger, optional
             Logger for progress tracking
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to resolve the revision without querying ONE
 
         Returns
         -------
@@ -145,7 +156,7 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
         requirements = cls.get_data_requirements()
 
         # Find the last available revision from candidates
-        revision = cls._resolve_revision(one, eid, cls.REVISION_CANDIDATES)
+        revision = cls._resolve_revision(one, eid, cls.REVISION_CANDIDATES, dataset_index=dataset_index)
 
         if logger:
             logger.info(f"Downloading passive replay stimuli (session {eid}, revision {revision})")
@@ -196,52 +207,37 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
         stop_times = gabor_df["stop"].values
         n_original = len(gabor_df)
 
-        # Detect temporal overlaps
-        indices_to_exclude = set()
+        # Detect temporal overlaps; only flag significant ones (>1ms to account for floating point precision)
+        overlapping_pairs, overlap_durations = find_overlapping_intervals(start_times, stop_times, min_overlap=0.001)
 
-        for i in range(n_original):
-            for j in range(i + 1, n_original):
-                # Check if time intervals overlap
-                if start_times[i] < stop_times[j] and start_times[j] < stop_times[i]:
-                    overlap_duration = min(stop_times[i], stop_times[j]) - max(start_times[i], start_times[j])
-
-                    # Only flag significant overlaps (>1ms to account for floating point precision)
-                    if overlap_duration > 0.001:
-                        overlap_ms = overlap_duration * 1000
-
-                        # Determine which row to exclude: check which one breaks chronological order
-                        # with its surrounding rows (not just the overlapping pair)
-
-                        # Check if row i is in correct order with its neighbors
-                        i_before_ok = (i == 0) or (start_times[i - 1] < start_times[i])
-                        i_after_ok = (i == n_original - 1) or (start_times[i] < start_times[i + 1])
-                        i_sequential = i_before_ok and i_after_ok
-
-                        # Check if row j is in correct order with its neighbors
-                        j_before_ok = (j == 0) or (start_times[j - 1] < start_times[j])
-                        j_after_ok = (j == n_original - 1) or (start_times[j] < start_times[j + 1])
-                        j_sequential = j_before_ok and j_after_ok
-
-                        # Exclude the row that's NOT in sequence with its neighbors
-                        if i_sequential and not j_sequential:
-                            excluded_index = j
-                            kept_index = i
-                        elif j_sequential and not i_sequential:
-                            excluded_index = i
-                            kept_index = j
-                        else:
-                            # Both or neither in sequence - exclude the earlier row in file
-                            excluded_index = i
-                            kept_index = j
-
-                        indices_to_exclude.add(excluded_index)
-
-                        logger.warning(
-                            f"Gabor stimulus overlap detected: excluding row {excluded_index} "
-                            f"({overlap_ms:.1f}ms overlap with row {kept_index}). "
-                            f"Stimulus timings - excluded: {start_times[excluded_index]:.3f}-{stop_times[excluded_index]:.3f}s, "
-                            f"kept: {start_times[kept_index]:.3f}-{stop_times[kept_index]:.3f}s"
-                        )
+        # A row is in sequence if it is in correct chronological order with both of its neighbors
+        # (not just the overlapping pair)
+        is_after_previous = np.ones(n_original, dtype=bool)
+        is_before_next = np.ones(n_original, dtype=bool)
+        if n_original > 1:
+            is_after_previous[1:] = start_times[:-1] < start_times[1:]
+            is_before_next[:-1] = start_times[:-1] < start_times[1:]
+        is_sequential = is_after_previous & is_before_next
+
+        indices_to_exclude = set()
+        for (i, j), overlap_duration in zip(overlapping_pairs.tolist(), overlap_durations):
+            # Exclude the row that's NOT in sequence with its neighbors
+            if is_sequential[i] and not is_sequential[j]:
+                excluded_index, kept_index = j, i
+            elif is_sequential[j] and not is_sequential[i]:
+                excluded_index, kept_index = i, j
+            else:
+                # Both or neither in sequence - exclude the earlier row in file
+                excluded_index, kept_index = i, j
+
+            indices_to_exclude.add(excluded_index)
+
+            logger.debug(
+                f"Gabor stimulus overlap detected: excluding row {excluded_index} "
+                f"({overlap_duration * 1000:.1f}ms overlap with row {kept_index}). "
+                f"Stimulus timings - excluded: {start_times[excluded_index]:.3f}-{stop_times[excluded_index]:.3f}s, "
+                f"kept: {start_times[kept_index]:.3f}-{stop_times[kept_index]:.3f}s"
+            )
 
         # Exclude identified rows
         if indices_to_exclude:
@@ -250,10 +246,12 @@ class PassiveReplayStimInterface(BaseIBLDataInterface):
             n_excluded = len(indices_to_exclude)
             n_retained = len(gabor_cleaned)
 
+            # One summary for the session; the rows and timings of each overlap are logged at debug level
             logger.warning(
                 f"Gabor data cleaning: excluded {n_excluded} overlapping stimulus entries "
-                f"(rows {sorted(indices_to_exclude)}). Retained {n_retained}/{n_original} stimuli."
+                f"({len(overlapping_pairs)} overlapping pairs). Retained {n_retained}/{n_original} stimuli."
             )
+            logger.debug(f"Gabor data cleaning: excluded rows {sorted(indices_to_exclude)}")
         else:
             gabor_cleaned = gabor_df.copy()
             logger.info(f"Gabor data validation: all {n_original} stimuli passed temporal overlap check")
@@ -15,6 +15,7 @@ from one.api import ONE
 from pynwb import NWBFile, TimeSeries
 
 from ._base_ibl_interface import BaseIBLDataInterface
+from ..utils.dataset_index import SessionDatasetIndex
 
 
 class PassiveRFMInterface(BaseIBLDataInterface):
@@ -30,7 +31,9 @@ class PassiveRFMInterface(BaseIBLDataInterface):
     REVISION_CANDIDATES: list[str] = ["2025-12-04", "2025-12-05"]
 
     @staticmethod
-    def _resolve_revision(one: ONE, eid: str, candidates: list[str]) -> str | None:
+    def _resolve_revision(
+        one: ONE, eid: str, candidates: list[str], dataset_index: Optional[SessionDatasetIndex] = None
+    ) -> str | None:
         """
         Find the last available revision from candidates list.
 
@@ -45,22 +48,17 @@ class PassiveRFMInterface(BaseIBLDataInterface):
             Session ID
         candidates : list[str]
             List of revision candidates to check, in order
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to avoid another one.list_datasets(eid) query
 
         Returns
         -------
         str | None
             The last available revision, or None if none found
         """
-        datasets = one.list_datasets(eid)
-        dataset_strs = [str(d) for d in datasets]
-
-        found_revision = None
-        for revision in candidates:
-            revision_tag = f"#{revision}#"
-            if any(revision_tag in ds for ds in dataset_strs):
-                found_revision = revision
-
-        return found_revision
+        if dataset_index is None:
+            dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+        return dataset_index.get_last_available_revision(candidates)
 
     def __init__(
         self,
@@ -6,12 +6,45 @@ from typing import Dict, Optional, Union
 import numpy as np
 import pandas as pd
 from brainbox.io.one import SpikeSortingLoader
-from iblatlas.atlas import AllenAtlas
-from iblatlas.regions import BrainRegions
 from neuroconv.utils import get_json_schema_from_method_signature
 from one.api import ONE
 from spikeinterface import BaseSorting, BaseSortingSegment
-from tqdm import tqdm
+
+from ..utils.atlas import get_allen_atlas, get_brain_regions
+from ..utils.session_data_cache import SessionDataCache
+
+
+def group_spikes_by_cluster(spike_clusters: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Group spikes by cluster with a single stable sort.
+
+    A stable sort keeps the original (chronological) spike order within each cluster, so slicing any
+    per-spike array reordered by ``spike_order`` between consecutive offsets yields exactly the same
+    values as ``array[np.where(spike_clusters == cluster_id)[0]]``, at O(N log N) instead of
+    O(N x clusters).
+
+    Parameters
+    ----------
+    spike_clusters : np.ndarray
+        Cluster ID of each spike (``spikes["clusters"]``).
+
+    Returns
+    -------
+    tuple of (np.ndarray, np.ndarray, np.ndarray)
+        - cluster_ids: Sorted unique cluster IDs (same as ``np.unique(spike_clusters)``)
+        - spike_order: Indices that sort the spikes by cluster
+        - spike_offsets: Array of length ``len(cluster_ids) + 1``; the spikes of ``cluster_ids[i]`` are
+          ``spike_order[spike_offsets[i]:spike_offsets[i + 1]]``
+    """
+    spike_clusters = np.asarray(spike_clusters)
+    spike_order = np.argsort(spike_clusters, kind="stable")
+    if spike_order.size == 0:
+        return spike_clusters[:0], spike_order, np.zeros(1, dtype=np.int64)
+
+    sorted_clusters = spike_clusters[spike_order]
+    boundaries = np.flatnonzero(sorted_clusters[1:] != sorted_clusters[:-1]) + 1
+    cluster_ids = sorted_clusters[np.concatenate([[0], boundaries])]
+    spike_offsets = np.concatenate([[0], boundaries, [sorted_clusters.size]]).astype(np.int64)
+    return cluster_ids, spike_order, spike_offsets
 
 
 class IblSortingExtractor(BaseSorting):
@@ -48,9 +81,9 @@ class IblSortingExtractor(BaseSorting):
         self.probe_names = set([filename.split("/")[1] for filename in raw_ephys_datasets])
 
         # Create sorting loaders but DON'T load data yet
-        atlas = AllenAtlas()
+        atlas = get_allen_atlas()
         self.atlas = atlas
-        self.brain_regions = BrainRegions()
+        self.brain_regions = get_brain_regions()
         self.sorting_loaders = dict()
         for probe_name in self.probe_names:
             sorting_loader = SpikeSortingLoader(eid=session, one=one, pname=probe_name, atlas=atlas)
@@ -68,11 +101,14 @@ class IblSortingExtractor(BaseSorting):
         stub_units: Optional[int] = None,
         skip_spike_amplitudes: bool = False,
         skip_spike_depths: bool = False,
+        data_cache: Optional[SessionDataCache] = None,
     ) -> dict:
         """Load IBL spike sorting data and return it with IBL property names.
 
-        This method separates spike data by cluster/unit using np.where to index spike arrays.
-        For full sessions with ~2000 units and ~60M spikes, this takes ~60-70 seconds.
+        Spikes are grouped by cluster with a single stable sort per probe (see `group_spikes_by_cluster`).
+        The per-spike arrays are reordered once and each unit's spike times are a view into the reordered
+        array. Per-spike amplitudes and depths are returned as the reordered per-probe arrays only, so that
+        they can be streamed into ragged columns without building per-unit arrays.
 
         Parameters
         ----------
@@ -84,15 +120,22 @@ class IblSortingExtractor(BaseSorting):
             If True, skip loading per-spike amplitudes (saves memory).
         skip_spike_depths : bool, default: False
             If True, skip loading per-spike depths (saves memory).
+        data_cache : SessionDataCache, optional
+            Session cache to read the spike sorting through.
+            If None, each probe is loaded with its SpikeSortingLoader.
 
         Returns
         -------
         dict
             Dictionary with IBL property names as keys:
             - "spike_times_by_id": dict mapping unit_id to spike times array
-            - "spike_amplitudes_by_id": dict mapping unit_id to spike amplitudes (or None if skipped)
-            - "spike_depths_by_id": dict mapping unit_id to spike depths (or None if skipped)
+            - "sorted_spike_amplitudes_by_probe": dict mapping probe name to its cluster-sorted spike
+              amplitudes in Volts (or None if skipped)
+            - "sorted_spike_depths_by_probe": dict mapping probe name to its cluster-sorted spike depths
+              (or None if skipped)
             - "cluster_ids": list of unit IDs
+            - "spike_offsets_by_probe": dict mapping probe name to the unit boundaries (length n_units + 1)
+              into that probe's cluster-sorted spike arrays, in the same unit order as "cluster_ids"
             - "unit_properties": dict with IBL property names as keys, lists of values
               Includes: probe_name, _max_amplitude_channel, cluster_depths, _waveform_channels,
               waveform_mean (82 samples x 32 channels), peak_to_trough_duration_ms, and all columns from clusters.metrics
@@ -101,38 +144,43 @@ class IblSortingExtractor(BaseSorting):
             stub_units = 10
 
         spike_times_by_id = defaultdict(list)
-        spike_amplitudes_by_id = defaultdict(list) if not skip_spike_amplitudes else None
-        spike_depths_by_id = defaultdict(list) if not skip_spike_depths else None
+        sorted_spike_amplitudes_by_probe = dict() if not skip_spike_amplitudes else None
+        sorted_spike_depths_by_probe = dict() if not skip_spike_depths else None
         unit_properties = defaultdict(list)
         cluster_ids = list()
+        spike_offsets_by_probe = dict()
 
         for probe_name in sorted(self.probe_names):
             # Load spike sorting data
             sorting_loader = self.sorting_loaders[probe_name]
-            spikes, clusters, channels = sorting_loader.load_spike_sorting(revision=self.revision)
+            if data_cache is not None:
+                spikes, clusters, channels = data_cache.load_spike_sorting(sorting_loader, revision=self.revision)
+            else:
+                spikes, clusters, channels = sorting_loader.load_spike_sorting(revision=self.revision)
 
-            # Determine which clusters to process
-            unique_clusters = np.unique(spikes["clusters"])
+            # Group spikes by cluster with one stable sort (replaces np.unique + per-cluster np.where)
+            unique_clusters, spike_order, spike_offsets = group_spikes_by_cluster(spikes["clusters"])
             if stub_test:
                 # Only process first N units for testing
                 unique_clusters = unique_clusters[:stub_units]
+                spike_offsets = spike_offsets[: len(unique_clusters) + 1]
+                spike_order = spike_order[: spike_offsets[-1]]
 
             number_of_units = len(unique_clusters)
             # Generate unit IDs with probe name prefix: probe00_0, probe00_1, probe01_0, etc.
             probe_cluster_ids = [f"{probe_name}_{i}" for i in range(number_of_units)]
             cluster_ids.extend(probe_cluster_ids)
-
-            # Separate spikes by cluster using np.where indexing
-            for cluster_index, spike_cluster in enumerate(
-                tqdm(unique_clusters, desc=f"Separating spikes by cluster ({probe_name})", unit="cluster")
-            ):
-                spike_indices = np.where(spikes["clusters"] == spike_cluster)[0]
-                unit_id = f"{probe_name}_{cluster_index}"
-                spike_times_by_id[unit_id] = spikes["times"][spike_indices]
-                if spike_amplitudes_by_id is not None:
-                    spike_amplitudes_by_id[unit_id] = spikes["amps"][spike_indices]
-                if spike_depths_by_id is not None:
-                    spike_depths_by_id[unit_id] = spikes["depths"][spike_indices]
+            spike_offsets_by_probe[probe_name] = spike_offsets
+
+            # Reorder each per-spike array once; every unit then gets a zero-copy slice of the spike times
+            sorted_spike_times = spikes["times"][spike_order]
+            for unit_id, start, stop in zip(probe_cluster_ids, spike_offsets[:-1], spike_offsets[1:]):
+                spike_times_by_id[unit_id] = sorted_spike_times[start:stop]
+            if sorted_spike_amplitudes_by_probe is not None:
+                sorted_spike_amplitudes_by_probe[probe_name] = spikes["amps"][spike_order]
+            if sorted_spike_depths_by_probe is not None:
+                sorted_spike_depths_by_probe[probe_name] = spikes["depths"][spike_order]
+            del spike_order
 
             # Unit properties with IBL names
             unit_properties["probe_name"].extend([probe_name] * number_of_units)
@@ -193,9 +241,10 @@ class IblSortingExtractor(BaseSorting):
 
         return {
             "spike_times_by_id": dict(spike_times_by_id),
-            "spike_amplitudes_by_id": dict(spike_amplitudes_by_id) if spike_amplitudes_by_id else None,
-            "spike_depths_by_id": dict(spike_depths_by_id) if spike_depths_by_id else None,
+            "sorted_spike_amplitudes_by_probe": sorted_spike_amplitudes_by_probe,
+            "sorted_spike_depths_by_probe": sorted_spike_depths_by_probe,
             "cluster_ids": cluster_ids,
+            "spike_offsets_by_probe": spike_offsets_by_probe,
             "unit_properties": dict(unit_properties),
         }
 
@@ -12,11 +12,13 @@ from neuroconv.tools.spikeinterface import add_sorting_to_nwbfile
 from neuroconv.utils import DeepDict
 from one.api import ONE
 from pynwb import NWBFile
+from pynwb.misc import Units
 
 from ._base_ibl_interface import BaseIBLDataInterface
 from ._ibl_sorting_extractor import IblSortingExtractor
 from ..fixtures import get_probe_name_to_probe_id_dict
 from ..utils.probe_naming import get_ibl_probe_name
+from ..utils.ragged_columns import add_ragged_column_from_sorted_arrays
 
 # Single source of truth for unit property metadata
 # Keys are NWB property names (dict order = property order in NWB file)
@@ -263,6 +265,26 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
             "data": None,
         }
 
+    def _get_probe_electrode_indices(self, nwbfile: NWBFile) -> dict[str, np.ndarray]:
+        """
+        Find the electrodes of each probe with a single read of the electrodes group_name column.
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The NWB file containing the electrodes table
+
+        Returns
+        -------
+        dict
+            {probe_name: sorted electrode table indices of the probe}
+        """
+        all_group_names = np.asarray(nwbfile.electrodes["group_name"][:])
+        return {
+            probe_name: np.flatnonzero(all_group_names == get_ibl_probe_name(probe_name))
+            for probe_name in self.sorting_extractor.probe_names
+        }
+
     def _create_electrodes_table_with_localization(self, nwbfile: NWBFile) -> dict:
         """
         Create electrodes table with anatomical localization for processed mode.
@@ -278,26 +300,16 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
         Returns
         -------
         dict
-            Channel-to-electrode mapping: {probe_name: {channel_idx: electrode_idx}}
+            Channel-to-electrode mapping: {probe_name: electrode indices indexed by channel}
         """
         if nwbfile.electrodes is None or len(nwbfile.electrodes) == 0:
             raise RuntimeError("Electrodes table must be populated before adding sorting data.")
 
-        channel_to_electrode_map = {}
-        for probe_name in self.sorting_extractor.probe_names:
-            group_name = get_ibl_probe_name(probe_name)
-            electrode_indices = [
-                index
-                for index in range(len(nwbfile.electrodes))
-                if nwbfile.electrodes["group_name"][index] == group_name
-            ]
-            if not electrode_indices:
+        channel_to_electrode_map = self._get_probe_electrode_indices(nwbfile)
+        for probe_name, electrode_indices in channel_to_electrode_map.items():
+            if len(electrode_indices) == 0:
                 raise RuntimeError(f"No electrodes found for probe '{probe_name}'.")
 
-            channel_to_electrode_map[probe_name] = {
-                channel_idx: electrode_index for channel_idx, electrode_index in enumerate(sorted(electrode_indices))
-            }
-
         return channel_to_electrode_map
 
     def _compute_waveform_channels_and_reorder(
@@ -334,12 +346,15 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
         all_rel_y = np.asarray(nwbfile.electrodes["rel_y"][:])
         all_group_names = np.asarray(nwbfile.electrodes["group_name"][:])
 
-        unit_probe_names = self._unit_probe_names
-        unit_max_channels = self._max_amplitude_channels
+        unit_probe_names = np.asarray(self._unit_probe_names)
+        unit_max_channels = np.asarray(self._max_amplitude_channels).astype(np.int64)
         nc = waveform_means.shape[2]  # Number of channels in templates
 
-        all_waveform_channels = []
-        reordered_waveforms = np.empty_like(waveform_means)
+        all_waveform_channels = [None] * len(unit_probe_names)
+        # make_channel_index already puts padding last, so most units keep their channel order: copy all
+        # templates in one pass and only gather the units whose order changes
+        reordered_waveforms = waveform_means.copy()
+        identity_order = np.arange(nc)
 
         # Process each probe separately (different electrode subsets)
         probe_channel_lookups = {}
@@ -364,23 +379,27 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
 
             probe_channel_lookups[probe_name] = (channel_lookup, pad_val)
 
-        # Compute channels for each unit and reorder
-        for unit_index, (probe_name, peak_channel) in enumerate(zip(unit_probe_names, unit_max_channels)):
+        # Compute channels and reorder all units of a probe at once
+        for probe_name in dict.fromkeys(unit_probe_names.tolist()):
             channel_lookup, pad_val = probe_channel_lookups[probe_name]
+            probe_units = np.flatnonzero(unit_probe_names == probe_name)
 
-            # Get channels within radius of peak channel
-            waveform_channels = channel_lookup[int(peak_channel)]
+            # Get channels within radius of each unit's peak channel: (n_probe_units, nc)
+            waveform_channels = channel_lookup[unit_max_channels[probe_units]]
 
-            # Reorder: real channels first, padding last
-            is_real = waveform_channels < pad_val
-            real_indices = np.where(is_real)[0]
-            padding_indices = np.where(~is_real)[0]
-            reorder_index = np.concatenate([real_indices, padding_indices])
+            # Reorder: real channels first, padding last (stable, so each group keeps its order)
+            reorder_index = np.argsort(waveform_channels >= pad_val, axis=1, kind="stable")
 
-            # Reorder waveform and channel IDs
-            reordered_waveforms[unit_index] = waveform_means[unit_index][:, reorder_index]
-            reordered_channels = waveform_channels[reorder_index]
-            all_waveform_channels.append(reordered_channels)
+            # Reorder waveforms (n_probe_units, n_samples, nc) along channels, and channel IDs
+            needs_reorder = np.any(reorder_index != identity_order, axis=1)
+            if needs_reorder.any():
+                units_to_reorder = probe_units[needs_reorder]
+                reordered_waveforms[units_to_reorder] = np.take_along_axis(
+                    waveform_means[units_to_reorder], reorder_index[needs_reorder, np.newaxis, :], axis=2
+                )
+            reordered_channels = np.take_along_axis(waveform_channels, reorder_index, axis=1)
+            for unit_index, unit_channels in zip(probe_units.tolist(), reordered_channels):
+                all_waveform_channels[unit_index] = unit_channels
 
         return reordered_waveforms, all_waveform_channels
 
@@ -412,58 +431,198 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
         # If no mapping provided, build it from electrodes table
         if channel_to_electrode_map is None:
             channel_to_electrode_map = {}
-            for probe_name in self.sorting_extractor.probe_names:
-                group_name = get_ibl_probe_name(probe_name)
-                channel_to_electrode_map[probe_name] = {}
-
-                electrode_idx = 0
-                for index in range(len(nwbfile.electrodes)):
-                    if nwbfile.electrodes["group_name"][index] == group_name:
-                        # Channel index is position within this probe's electrodes
-                        channel_idx = electrode_idx % 384  # Neuropixels has 384 channels
-                        channel_to_electrode_map[probe_name][channel_idx] = index
-                        electrode_idx += 1
-
-        # Map each unit to its electrodes (from waveformsChannels) and max electrode
-        unit_electrode_indices = []
-        max_electrodes = []
-
-        for probe_name, max_channel, waveform_channels in zip(
-            unit_probe_names, unit_max_channels, unit_waveform_channels
-        ):
+            for probe_name, electrode_indices in self._get_probe_electrode_indices(nwbfile).items():
+                # Channel index is position within this probe's electrodes, modulo the 384 Neuropixels
+                # channels; a channel maps to the last of its electrodes
+                num_channels = min(len(electrode_indices), 384)
+                channels = np.arange(num_channels)
+                last_positions = channels + 384 * ((len(electrode_indices) - 1 - channels) // 384)
+                channel_to_electrode_map[probe_name] = electrode_indices[last_positions]
+
+        # Map each unit to its electrodes (from waveformsChannels) and max electrode, one probe at a time
+        unit_probe_names = np.asarray(unit_probe_names)
+        unit_max_channels = np.asarray(unit_max_channels).astype(np.int64)
+        num_units = len(unit_probe_names)
+        max_electrodes = np.zeros(num_units, dtype=np.int64)
+        unit_electrode_indices = [[] for _ in range(num_units)]
+
+        for probe_name in dict.fromkeys(unit_probe_names.tolist()):
             if probe_name not in channel_to_electrode_map:
                 raise ValueError(f"Probe '{probe_name}' not found in electrode mapping")
 
-            channel_map = channel_to_electrode_map[probe_name]
+            channel_map = np.asarray(channel_to_electrode_map[probe_name])
+            probe_units = np.flatnonzero(unit_probe_names == probe_name)
 
-            # Map max amplitude channel to electrode index
-            max_channel_index = int(max_channel)
-            if max_channel_index not in channel_map:
+            # Map max amplitude channels to electrode indices
+            probe_max_channels = unit_max_channels[probe_units]
+            is_mapped = (probe_max_channels >= 0) & (probe_max_channels < len(channel_map))
+            if not is_mapped.all():
+                max_channel_index = int(probe_max_channels[~is_mapped][0])
                 raise ValueError(
                     f"Max channel {max_channel_index} not found for {probe_name}. "
-                    f"Available channels: {sorted(channel_map.keys())[:10]}{'...' if len(channel_map) > 10 else ''}"
+                    f"Available channels: {list(range(min(len(channel_map), 10)))}"
+                    f"{'...' if len(channel_map) > 10 else ''}"
                 )
-            max_electrodes.append(channel_map[max_channel_index])
+            max_electrodes[probe_units] = channel_map[probe_max_channels]
 
             # Map waveform channels to electrode indices
             # Note: Waveform channels are reordered with real channels first, padding last
             # Real channels (< 384) are mapped to electrodes; padding channels (384) are skipped
             # This ensures waveform_mean[:, i] corresponds to electrodes[i] for i < n_real_channels
-            if waveform_channels is not None and len(waveform_channels) > 0:
-                electrode_indices = []
-                for channel in waveform_channels:
-                    channel_index = int(channel)
-                    if channel_index in channel_map:
-                        # Real channel (0-383) - map to electrode
-                        electrode_indices.append(channel_map[channel_index])
-                    # Padding channel (384) is skipped - no electrode mapping needed
-                unit_electrode_indices.append(electrode_indices)
-            else:
-                # If waveformsChannels not available, use empty list
-                unit_electrode_indices.append([])
+            # If waveformsChannels are not available for a unit, its list stays empty
+            units_with_channels = [
+                unit_index
+                for unit_index in probe_units
+                if unit_waveform_channels[unit_index] is not None and len(unit_waveform_channels[unit_index]) > 0
+            ]
+            if not units_with_channels:
+                continue
+            unit_channels = [np.asarray(unit_waveform_channels[unit_index]) for unit_index in units_with_channels]
+            channels = np.concatenate(unit_channels).astype(np.int64)
+            is_real = (channels >= 0) & (channels < len(channel_map))
+            electrodes = channel_map[channels[is_real]]
+            num_real_per_unit = np.add.reduceat(
+                is_real.astype(np.int64), np.cumsum([0] + [len(c) for c in unit_channels[:-1]])
+            )
+            for unit_index, unit_electrodes in zip(
+                units_with_channels, np.split(electrodes, np.cumsum(num_real_per_unit)[:-1])
+            ):
+                unit_electrode_indices[unit_index] = unit_electrodes.tolist()
 
+        max_electrodes = max_electrodes.tolist()
         return unit_electrode_indices, max_electrodes
 
+    def _add_ragged_spike_columns(self, units_table: Units) -> None:
+        """
+        Stream the per-spike columns (spike amplitudes and depths) into the units table.
+
+        The cluster-sorted per-probe spike arrays are already the flat ``VectorData`` in unit order, so each
+        column is written from them buffer by buffer, with a ``VectorIndex`` built from the cluster offsets,
+        instead of going through object arrays of per-unit arrays.
+
+        Parameters
+        ----------
+        units_table : Units
+            The units table written by ``add_sorting_to_nwbfile``, with units in "cluster_ids" order.
+        """
+        # load_ibl_data iterates probes in sorted order; units (and their spikes) follow the same order
+        probe_names = sorted(self._spike_offsets_by_probe)
+        for name, sorted_arrays_by_probe, scale in self._ragged_spike_columns:
+            add_ragged_column_from_sorted_arrays(
+                table=units_table,
+                name=name,
+                description=UNITS_COLUMNS[name]["description"],
+                sorted_arrays=[sorted_arrays_by_probe[probe_name] for probe_name in probe_names],
+                offsets=[self._spike_offsets_by_probe[probe_name] for probe_name in probe_names],
+                scale=scale,
+            )
+
+    def _prepare_data(
+        self,
+        stub_test: bool = False,
+        stub_units: Optional[int] = None,
+        skip_properties: list[str] | None = None,
+        **kwargs,
+    ) -> None:
+        """
+        Load the IBL spike sorting data and set the unit properties on the sorting extractor.
+
+        Does not need the NWBFile: the electrodes table, the waveform reordering and the units table are
+        built by add_to_nwbfile(). The data is kept on the interface and the extractor, so nothing is returned.
+        """
+        if skip_properties is None:
+            skip_properties = []
+
+        # The data is only loaded once per interface
+        if self.sorting_extractor._data_loaded:
+            return
+
+        # Determine which per-spike properties to skip
+        # "spike_amplitudes_volts" is the former name of "spike_amplitudes_uV", still accepted
+        skip_spike_amplitudes = bool({"spike_amplitudes_uV", "spike_amplitudes_volts"} & set(skip_properties))
+        skip_spike_depths = "spike_distances_from_probe_tip_um" in skip_properties
+
+        # Load raw IBL data
+        ibl_data = self.sorting_extractor.load_ibl_data(
+            stub_test=stub_test,
+            stub_units=stub_units,
+            skip_spike_amplitudes=skip_spike_amplitudes,
+            skip_spike_depths=skip_spike_depths,
+            data_cache=self.data_cache,
+        )
+
+        # Initialize the sorting extractor with spike times
+        self.sorting_extractor.initialize_sorting(
+            spike_times_by_id=ibl_data["spike_times_by_id"],
+            cluster_ids=ibl_data["cluster_ids"],
+        )
+
+        # Set properties with NWB names (mapping from IBL names)
+        cluster_ids = ibl_data["cluster_ids"]
+        ibl_properties = ibl_data["unit_properties"]
+
+        # Properties that need Volts -> microvolts conversion (multiply by 1e6)
+        amplitude_properties = {"median_spike_amplitude_uV", "min_spike_amplitude_uV", "max_spike_amplitude_uV"}
+
+        # Map IBL property names to NWB names and set on extractor
+        for ibl_name, nwb_name in IBL_METRICS_TO_NWB.items():
+            if ibl_name in ibl_properties:
+                values = np.array(ibl_properties[ibl_name])
+                # Convert spike_count to int (IBL stores as float in parquet)
+                # Use -1 as sentinel for missing values (NaN)
+                if nwb_name == "spike_count":
+                    values = np.where(np.isnan(values), -1, values).astype(np.int64)
+                # Convert amplitude from Volts to microvolts
+                elif nwb_name in amplitude_properties:
+                    values = values * 1e6
+                self.sorting_extractor.set_property(
+                    key=nwb_name,
+                    values=values,
+                    ids=cluster_ids,
+                )
+
+        # Set properties that don't need renaming
+        # Convert probe_name to canonical format (Probe00, Probe01)
+        canonical_probe_names = np.array([get_ibl_probe_name(pn) for pn in ibl_properties["probe_name"]])
+        self.sorting_extractor.set_property(
+            key="probe_name",
+            values=canonical_probe_names,
+            ids=cluster_ids,
+        )
+        self.sorting_extractor.set_property(
+            key="distance_from_probe_tip_um",
+            values=ibl_properties["cluster_depths"],
+            ids=cluster_ids,
+        )
+
+        # Store max amplitude channel internally for electrode linking (not written to NWB)
+        self._max_amplitude_channels = ibl_properties["_max_amplitude_channel"]
+        self._unit_probe_names = ibl_properties["probe_name"]
+
+        # Store raw waveform templates (not yet reordered - that happens after electrodes table exists)
+        # Keep in Volts to comply with NWB schema (waveform_mean unit is fixed to 'volts')
+        self._raw_waveform_means = np.array(ibl_properties["waveform_mean"], dtype=np.float32)
+
+        # Set peak-to-trough duration
+        self.sorting_extractor.set_property(
+            key="peak_to_trough_duration_ms",
+            values=np.array(ibl_properties["peak_to_trough_duration_ms"]),
+            ids=cluster_ids,
+        )
+
+        # Ragged per-spike columns are not set as extractor properties: they are streamed from the
+        # cluster-sorted per-probe arrays once the units table exists (see _add_ragged_spike_columns)
+        # (name, per-probe sorted arrays, scale); amplitudes are converted from Volts to microvolts
+        self._ragged_spike_columns = [
+            (name, sorted_arrays_by_probe, scale)
+            for name, sorted_arrays_by_probe, scale in (
+                ("spike_amplitudes_uV", ibl_data["sorted_spike_amplitudes_by_probe"], 1e6),
+                ("spike_distances_from_probe_tip_um", ibl_data["sorted_spike_depths_by_probe"], 1.0),
+            )
+            if sorted_arrays_by_probe is not None
+        ]
+        self._spike_offsets_by_probe = ibl_data["spike_offsets_by_probe"]
+
     def add_to_nwbfile(
         self,
         nwbfile: NWBFile,
@@ -525,105 +684,15 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
         -----
         Memory optimization: Data is loaded only when this method is called,
         allowing for localized memory usage. The ragged properties "spike_amplitudes_uV"
-        and "spike_distances_from_probe_tip_um" contain spike-level data that can use significant
-        memory (~5 GB each for large sessions). Skipping these properties can
-        reduce peak memory usage from ~23 GB to ~10-12 GB while preserving:
+        and "spike_distances_from_probe_tip_um" contain spike-level data; they are kept as one
+        cluster-sorted array per probe and streamed into the units table buffer by buffer during
+        the write (no per-unit copies). Skipping them avoids loading that data altogether while preserving:
         - All spike times
         - All unit-level quality metrics
         - Brain region annotations
         - Mean spike amplitudes and depths (unit-level)
         """
-        if skip_properties is None:
-            skip_properties = []
-
-        # Load IBL data if not already loaded
-        if not self.sorting_extractor._data_loaded:
-            # Determine which per-spike properties to skip
-            skip_spike_amplitudes = "spike_amplitudes_volts" in skip_properties
-            skip_spike_depths = "spike_distances_from_probe_tip_um" in skip_properties
-
-            # Load raw IBL data
-            ibl_data = self.sorting_extractor.load_ibl_data(
-                stub_test=stub_test,
-                stub_units=stub_units,
-                skip_spike_amplitudes=skip_spike_amplitudes,
-                skip_spike_depths=skip_spike_depths,
-            )
-
-            # Initialize the sorting extractor with spike times
-            self.sorting_extractor.initialize_sorting(
-                spike_times_by_id=ibl_data["spike_times_by_id"],
-                cluster_ids=ibl_data["cluster_ids"],
-            )
-
-            # Set properties with NWB names (mapping from IBL names)
-            cluster_ids = ibl_data["cluster_ids"]
-            ibl_properties = ibl_data["unit_properties"]
-
-            # Properties that need Volts -> microvolts conversion (multiply by 1e6)
-            amplitude_properties = {"median_spike_amplitude_uV", "min_spike_amplitude_uV", "max_spike_amplitude_uV"}
-
-            # Map IBL property names to NWB names and set on extractor
-            for ibl_name, nwb_name in IBL_METRICS_TO_NWB.items():
-                if ibl_name in ibl_properties:
-                    values = np.array(ibl_properties[ibl_name])
-                    # Convert spike_count to int (IBL stores as float in parquet)
-                    # Use -1 as sentinel for missing values (NaN)
-                    if nwb_name == "spike_count":
-                        values = np.where(np.isnan(values), -1, values).astype(np.int64)
-                    # Convert amplitude from Volts to microvolts
-                    elif nwb_name in amplitude_properties:
-                        values = values * 1e6
-                    self.sorting_extractor.set_property(
-                        key=nwb_name,
-                        values=values,
-                        ids=cluster_ids,
-                    )
-
-            # Set properties that don't need renaming
-            # Convert probe_name to canonical format (Probe00, Probe01)
-            canonical_probe_names = np.array([get_ibl_probe_name(pn) for pn in ibl_properties["probe_name"]])
-            self.sorting_extractor.set_property(
-                key="probe_name",
-                values=canonical_probe_names,
-                ids=cluster_ids,
-            )
-            self.sorting_extractor.set_property(
-                key="distance_from_probe_tip_um",
-                values=ibl_properties["cluster_depths"],
-                ids=cluster_ids,
-            )
-
-            # Store max amplitude channel internally for electrode linking (not written to NWB)
-            self._max_amplitude_channels = ibl_properties["_max_amplitude_channel"]
-            self._unit_probe_names = ibl_properties["probe_name"]
-
-            # Store raw waveform templates (not yet reordered - that happens after electrodes table exists)
-            # Keep in Volts to comply with NWB schema (waveform_mean unit is fixed to 'volts')
-            self._raw_waveform_means = np.array(ibl_properties["waveform_mean"], dtype=np.float32)
-
-            # Set peak-to-trough duration
-            self.sorting_extractor.set_property(
-                key="peak_to_trough_duration_ms",
-                values=np.array(ibl_properties["peak_to_trough_duration_ms"]),
-                ids=cluster_ids,
-            )
-
-            # Set ragged array properties (per-spike data) if not skipped
-            if ibl_data["spike_amplitudes_by_id"] is not None:
-                # Convert from Volts to microvolts
-                spike_amps_uV = [arr * 1e6 for arr in ibl_data["spike_amplitudes_by_id"].values()]
-                self.sorting_extractor.set_property(
-                    key="spike_amplitudes_uV",
-                    values=np.array(spike_amps_uV, dtype=object),
-                    ids=cluster_ids,
-                )
-            if ibl_data["spike_depths_by_id"] is not None:
-                self.sorting_extractor.set_property(
-                    key="spike_distances_from_probe_tip_um",
-                    values=np.array(list(ibl_data["spike_depths_by_id"].values()), dtype=object),
-                    ids=cluster_ids,
-                )
+        self._get_prepared_data(stub_test=stub_test, stub_units=stub_units, skip_properties=skip_properties)
 
         # Automatically create electrodes table if it doesn't exist (processed mode)
         channel_to_electrode_map = None
@@ -680,5 +749,8 @@ class IblSortingInterface(BaseSortingExtractorInterface, BaseIBLDataInterface):
             waveform_data_dict=waveform_data_dict,
         )
 
+        units_table = nwbfile.units if write_as == "units" else nwbfile.processing["ecephys"][units_name]
+        self._add_ragged_spike_columns(units_table)
+
         # Note: Additional waveform metadata (description) is set directly on the HDF5 file in the
         # conversion pipeline (processed.py) to document data source and preprocessing
@@ -40,8 +40,12 @@ class LickInterface(BaseIBLDataInterface):
         """Return kwargs for one.load_dataset() call."""
         return {"dataset": "licks.times", "collection": "alf"}
 
+    def _prepare_data(self, **kwargs):
+        """Load the lick times."""
+        return self._load_dataset(self.session, revision=self.revision, **self.get_load_dataset_kwargs())
+
     def add_to_nwbfile(self, nwbfile: NWBFile, metadata: dict):
-        lick_timestamps = self.one.load_dataset(self.session, revision=self.revision, **self.get_load_dataset_kwargs())
+        lick_timestamps = self._get_prepared_data()
 
         # Use ndx-events Events type for point events (timestamps only)
         lick_events = Events(
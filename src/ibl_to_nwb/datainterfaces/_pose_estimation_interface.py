@@ -125,15 +125,15 @@ class IblPoseEstimationInterface(BaseIBLDataInterface):
         camera_name = kwargs.get("camera_name")
         camera_view = re.search(r"(left|right|body)", camera_name).group(1)
 
-        bwm_qc = load_fixtures.load_bwm_qc()
+        camera_qc = load_fixtures.get_camera_qc_dict(eid)
 
-        if eid not in bwm_qc:
+        if camera_qc is None:
             if logger:
                 logger.warning(f"Session {eid} not in QC database - allowing pose estimation")
             return {"qc_status": None}
 
         video_qc_key = f"video{camera_view.capitalize()}"
-        video_qc_status = bwm_qc[eid].get(video_qc_key, None)
+        video_qc_status = camera_qc.get(video_qc_key, None)
 
         if video_qc_status in ["CRITICAL", "FAIL"]:
             if logger:
@@ -237,14 +237,9 @@ class IblPoseEstimationInterface(BaseIBLDataInterface):
             f"Tried: {list(requirements['exact_files_options'].keys())}"
         )
 
-    def add_to_nwbfile(self, nwbfile: NWBFile, metadata: dict) -> None:
-        """
-        Add Lightning Pose estimation data to NWB file.
-
-        Data should already be downloaded via download_data().
-        """
+    def _prepare_data(self, **kwargs):
+        """Load the pose table of the camera with SessionLoader."""
         session_loader = SessionLoader(one=self.one, eid=self.session, revision=self.revision)
-        camera_view = re.search(r"(left|right|body)Camera*", self.camera_name).group(1)
 
         # Load pose data using kwargs from get_session_loader_kwargs
         session_loader_kwargs = self.get_session_loader_kwargs(camera_name=self.camera_name, tracker=self.tracker)
@@ -255,6 +250,17 @@ class IblPoseEstimationInterface(BaseIBLDataInterface):
 
         pose_data = session_loader.pose[self.camera_name]
 
+        return pose_data
+
+    def add_to_nwbfile(self, nwbfile: NWBFile, metadata: dict) -> None:
+        """
+        Add Lightning Pose estimation data to NWB file.
+
+        Data should already be downloaded via download_data().
+        """
+        camera_view = re.search(r"(left|right|body)Camera*", self.camera_name).group(1)
+        pose_data = self._get_prepared_data()
+
         if "times" not in pose_data or pose_data["times"].empty:
             raise RuntimeError(
                 f"Pose data for camera '{self.camera_name}' in session '{self.session}' contains no timestamps"
@@ -319,7 +325,8 @@ class IblPoseEstimationInterface(BaseIBLDataInterface):
                         f"Pose data for camera '{self.camera_name}' in session '{self.session}' is missing column '{column}'"
                     )
 
-            body_part_data = np.empty(shape=(number_of_frames, 2))
+            # float32 resolves positions to ~1e-4 px over the frame, half the size of float64
+            body_part_data = np.empty(shape=(number_of_frames, 2), dtype="float32")
             body_part_data[:, 0] = pose_data[f"{body_part}_x"]
             body_part_data[:, 1] = pose_data[f"{body_part}_y"]
 
@@ -330,7 +337,7 @@ class IblPoseEstimationInterface(BaseIBLDataInterface):
                 unit="px",
                 reference_frame="(0,0) corresponds to the upper left corner when using width by height convention.",
                 timestamps=reused_timestamps or timestamps,
-                confidence=np.array(pose_data[f"{body_part}_likelihood"]),
+                confidence=np.asarray(pose_data[f"{body_part}_likelihood"], dtype="float32"),
             )
             all_pose_estimation_series.append(pose_estimation_series)
 
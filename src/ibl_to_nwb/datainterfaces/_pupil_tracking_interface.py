@@ -11,6 +11,7 @@ from pynwb import TimeSeries
 
 from ._base_ibl_interface import BaseIBLDataInterface
 from ..fixtures import load_fixtures
+from ..utils.session_data_cache import SessionDataCache
 
 
 class PupilTrackingInterface(BaseIBLDataInterface):
@@ -59,15 +60,15 @@ class PupilTrackingInterface(BaseIBLDataInterface):
         camera_name = kwargs.get("camera_name")
         camera_view = re.search(r"(left|right|body)", camera_name).group(1)
 
-        bwm_qc = load_fixtures.load_bwm_qc()
+        camera_qc = load_fixtures.get_camera_qc_dict(eid)
 
-        if eid not in bwm_qc:
+        if camera_qc is None:
             if logger:
                 logger.warning(f"Session {eid} not in QC database - allowing pupil tracking")
             return {"qc_status": None}
 
         video_qc_key = f"video{camera_view.capitalize()}"
-        video_qc_status = bwm_qc[eid].get(video_qc_key, None)
+        video_qc_status = camera_qc.get(video_qc_key, None)
 
         if video_qc_status in ["CRITICAL", "FAIL"]:
             if logger:
@@ -85,10 +86,14 @@ class PupilTrackingInterface(BaseIBLDataInterface):
         """Return kwargs for one.load_object() call."""
         return {"obj": camera_name, "collection": "alf"}
 
-    def add_to_nwbfile(self, nwbfile, metadata: dict):
-        camera_view = re.search(r"(left|right|body)Camera*", self.camera_name).group(1)
-        camera_data = self.one.load_object(
-            id=self.session, revision=self.revision, **self.get_load_object_kwargs(self.camera_name)
+    def get_data_cache_keys(self, data_cache: SessionDataCache) -> list[tuple]:
+        """The camera object, shared with the ROI motion energy and raw video interfaces."""
+        return [data_cache.object_key(revision=self.revision, **self.get_load_object_kwargs(self.camera_name))]
+
+    def _prepare_data(self, **kwargs) -> dict:
+        """Load the camera object and check that the pupil features match the timestamps."""
+        camera_data = self._load_object(
+            self.session, revision=self.revision, **self.get_load_object_kwargs(self.camera_name)
         )
 
         if "features" not in camera_data:
@@ -131,6 +136,12 @@ class PupilTrackingInterface(BaseIBLDataInterface):
                 )
                 camera_data["times"] = camera_data["times"][:features_len]
 
+        return camera_data
+
+    def add_to_nwbfile(self, nwbfile, metadata: dict):
+        camera_view = re.search(r"(left|right|body)Camera*", self.camera_name).group(1)
+        camera_data = self._get_prepared_data()
+
         # Add pupil data to dedicated pupil module
         pupil_module = get_module(
             nwbfile=nwbfile,
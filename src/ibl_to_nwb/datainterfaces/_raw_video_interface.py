@@ -1,6 +1,5 @@
 import logging
 import time
-from shutil import copyfile
 from typing import Literal, Optional
 
 from one.api import ONE
@@ -10,6 +9,8 @@ from pynwb.image import ImageSeries
 
 from ._base_ibl_interface import BaseIBLDataInterface
 from ..fixtures import load_fixtures
+from ..utils.file_placement import PlacementStrategy, place_file
+from ..utils.session_data_cache import SessionDataCache
 
 
 class RawVideoInterface(BaseIBLDataInterface):
@@ -26,6 +27,7 @@ class RawVideoInterface(BaseIBLDataInterface):
         one: ONE,
         session: str,
         camera_name: Literal["left", "right", "body"],
+        video_placement: PlacementStrategy = "hardlink",
     ) -> None:
         """
         Interface for the raw video data from the IBL Brainwide Map release.
@@ -45,6 +47,9 @@ class RawVideoInterface(BaseIBLDataInterface):
             The session ID (EID in ONE).
         camera_name : "left", "right", or "body"
             The name of the camera to load the raw video data for.
+        video_placement : {"hardlink", "reflink", "symlink", "move", "copy"}, default: "hardlink"
+            How the .mp4 is placed from the ONE cache into the DANDI folder (see `place_file`). Hardlinks and
+            reflinks fall back to a copy when the cache and the output folder are on different filesystems.
         """
         self.nwbfiles_folder_path = nwbfiles_folder_path
         self.subject_id = subject_id
@@ -52,6 +57,9 @@ class RawVideoInterface(BaseIBLDataInterface):
         self.session = session
         self.camera_name = camera_name
         self.revision = self.REVISION
+        self.video_placement = video_placement
+        # Bytes of video data copied by the last add_to_nwbfile (0 when linked, cloned or moved)
+        self.video_bytes_copied = 0
 
     @classmethod
     def get_data_requirements(cls, camera_name: Literal["left", "right", "body"]) -> dict:
@@ -87,15 +95,15 @@ class RawVideoInterface(BaseIBLDataInterface):
         """
         camera_name = kwargs.get("camera_name")
 
-        bwm_qc = load_fixtures.load_bwm_qc()
+        camera_qc = load_fixtures.get_camera_qc_dict(eid)
 
-        if eid not in bwm_qc:
+        if camera_qc is None:
             if logger:
                 logger.warning(f"Session {eid} not in QC database - allowing raw video")
             return {"qc_status": None}
 
         video_qc_key = f"video{camera_name.capitalize()}"
-        video_qc_status = bwm_qc[eid].get(video_qc_key, None)
+        video_qc_status = camera_qc.get(video_qc_key, None)
 
         if video_qc_status in ["CRITICAL", "FAIL"]:
             if logger:
@@ -189,12 +197,16 @@ class RawVideoInterface(BaseIBLDataInterface):
             "data": None,
         }
 
+    def get_data_cache_keys(self, data_cache: SessionDataCache) -> list[tuple]:
+        """The camera object, shared with the pupil tracking and ROI motion energy interfaces."""
+        return [data_cache.object_key(obj=f"{self.camera_name}Camera", collection="alf", revision=self.revision)]
+
     def add_to_nwbfile(self, nwbfile: NWBFile, metadata: dict) -> None:
         # Convert camera_name ("left", "right", "body") to ONE object name ("leftCamera", etc.)
         camera_object_name = f"{self.camera_name}Camera"
 
-        camera_data = self.one.load_object(
-            id=self.session,
+        camera_data = self._load_object(
+            self.session,
             obj=camera_object_name,
             collection="alf",
             revision=self.revision,
@@ -221,8 +233,11 @@ class RawVideoInterface(BaseIBLDataInterface):
             nwb_video_name = f"Video{self.camera_name.capitalize()}Camera"
             dandi_video_file_path = dandi_video_folder_path / f"{dandi_sub_ses_stem}_{nwb_video_name}.mp4"
 
-            # A little bit of data duplication to copy, but easier for re-running since original file stays in cache
-            copyfile(src=original_video_file_path, dst=dandi_video_file_path)
+            # Linked (or cloned) rather than copied when possible; except with "move", the cache file stays in
+            # place for re-runs
+            self.video_bytes_copied = place_file(
+                source=original_video_file_path, destination=dandi_video_file_path, strategy=self.video_placement
+            )
 
             image_series = ImageSeries(
                 name=nwb_video_name,
@@ -10,6 +10,7 @@ from pynwb import TimeSeries
 
 from ._base_ibl_interface import BaseIBLDataInterface
 from ..fixtures import load_fixtures
+from ..utils.session_data_cache import SessionDataCache
 
 
 class RoiMotionEnergyInterface(BaseIBLDataInterface):
@@ -60,15 +61,15 @@ class RoiMotionEnergyInterface(BaseIBLDataInterface):
         camera_name = kwargs.get("camera_name")
         camera_view = re.search(r"(left|right|body)", camera_name).group(1)
 
-        bwm_qc = load_fixtures.load_bwm_qc()
+        camera_qc = load_fixtures.get_camera_qc_dict(eid)
 
-        if eid not in bwm_qc:
+        if camera_qc is None:
             if logger:
                 logger.warning(f"Session {eid} not in QC database - allowing ROI motion energy")
             return {"qc_status": None}
 
         video_qc_key = f"video{camera_view.capitalize()}"
-        video_qc_status = bwm_qc[eid].get(video_qc_key, None)
+        video_qc_status = camera_qc.get(video_qc_key, None)
 
         if video_qc_status in ["CRITICAL", "FAIL"]:
             if logger:
@@ -96,11 +97,16 @@ class RoiMotionEnergyInterface(BaseIBLDataInterface):
             {"obj": f"{camera_view}ROIMotionEnergy", "collection": "alf"},
         ]
 
-    def add_to_nwbfile(self, nwbfile, metadata: dict):
-        camera_view = re.search(r"(left|right|body)Camera*", self.camera_name).group(1)
+    def get_data_cache_keys(self, data_cache: SessionDataCache) -> list[tuple]:
+        """The camera object, shared with the pupil tracking and raw video interfaces."""
+        camera_load_kwargs = self.get_load_object_kwargs(self.camera_name)[0]
+        return [data_cache.object_key(revision=self.revision, **camera_load_kwargs)]
+
+    def _prepare_data(self, **kwargs) -> tuple[dict, dict]:
+        """Load the camera object (motion energy and times) and the ROI position of the camera."""
         load_kwargs_list = self.get_load_object_kwargs(self.camera_name)
 
-        camera_data = self.one.load_object(id=self.session, revision=self.revision, **load_kwargs_list[0])
+        camera_data = self._load_object(self.session, revision=self.revision, **load_kwargs_list[0])
 
         if "ROIMotionEnergy" not in camera_data or "times" not in camera_data:
             raise RuntimeError(
@@ -112,9 +118,7 @@ class RoiMotionEnergyInterface(BaseIBLDataInterface):
                 f"ROI motion energy timestamps for camera '{self.camera_name}' in session '{self.session}' are empty"
             )
 
-        motion_energy_video_region = self.one.load_object(
-            id=self.session, revision=self.revision, **load_kwargs_list[1]
-        )
+        motion_energy_video_region = self._load_object(self.session, revision=self.revision, **load_kwargs_list[1])
 
         # extra dirty hack to be removed
         # if self.session == "dc21e80d-97d7-44ca-a729-a8e3f9b14305" and camera_view == 'right': # the broken session
@@ -125,6 +129,12 @@ class RoiMotionEnergyInterface(BaseIBLDataInterface):
                 f"ROI motion energy metadata missing position for camera '{self.camera_name}' in session '{self.session}'"
             )
 
+        return camera_data, motion_energy_video_region
+
+    def add_to_nwbfile(self, nwbfile, metadata: dict):
+        camera_view = re.search(r"(left|right|body)Camera*", self.camera_name).group(1)
+        camera_data, motion_energy_video_region = self._get_prepared_data()
+
         width, height, x, y = motion_energy_video_region["position"]
 
         description = (
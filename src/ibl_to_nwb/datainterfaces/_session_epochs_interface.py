@@ -14,6 +14,7 @@ from pynwb import NWBFile
 from pynwb.epoch import TimeIntervals
 
 from ._base_ibl_interface import BaseIBLDataInterface
+from ..utils.dataset_index import SessionDatasetIndex
 
 
 class SessionEpochsInterface(BaseIBLDataInterface):
@@ -29,7 +30,9 @@ class SessionEpochsInterface(BaseIBLDataInterface):
     REVISION_CANDIDATES: list[str] = ["2025-12-04", "2025-12-05"]
 
     @staticmethod
-    def _resolve_revision(one: ONE, eid: str, candidates: list[str]) -> str | None:
+    def _resolve_revision(
+        one: ONE, eid: str, candidates: list[str], dataset_index: Optional[SessionDatasetIndex] = None
+    ) -> str | None:
         """
         Find the last available revision from candidates list.
 
@@ -44,27 +47,23 @@ class SessionEpochsInterface(BaseIBLDataInterface):
             Session ID
         candidates : list[str]
             List of revision candidates to check, in order
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to avoid another one.list_datasets(eid) query
 
         Returns
         -------
         str | None
             The last available revision, or None if none found
         """
-        datasets = one.list_datasets(eid)
-        dataset_strs = [str(d) for d in datasets]
-
-        found_revision = None
-        for revision in candidates:
-            revision_tag = f"#{revision}#"
-            if any(revision_tag in ds for ds in dataset_strs):
-                found_revision = revision
-
-        return found_revision
+        if dataset_index is None:
+            dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+        return dataset_index.get_last_available_revision(candidates)
 
     def __init__(
         self,
         one: ONE,
         session: str,
+        dataset_index: Optional[SessionDatasetIndex] = None,
     ):
         """
         Initialize the session epochs interface.
@@ -75,11 +74,13 @@ class SessionEpochsInterface(BaseIBLDataInterface):
             ONE API instance for data access
         session : str
             Session ID (eid)
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to resolve the revision without querying ONE
         """
         super().__init__()
         self.one = one
         self.session = session
-        self.revision = self._resolve_revision(one, session, self.REVISION_CANDIDATES)
+        self.revision = self._resolve_revision(one, session, self.REVISION_CANDIDATES, dataset_index=dataset_index)
 
         # Load the intervals table - will fail loudly if data missing
         self.passive_intervals_df = one.load_dataset(
@@ -109,7 +110,13 @@ class SessionEpochsInterface(BaseIBLDataInterface):
 
     @classmethod
     def download_data(
-        cls, one: ONE, eid: str, download_only: bool = True, logger: Optional[logging.Logger] = None, **kwargs
+        cls,
+        one: ONE,
+        eid: str,
+        download_only: bool = True,
+        logger: Optional[logging.Logger] = None,
+        dataset_index: Optional[SessionDatasetIndex] = None,
+        **kwargs,
     ) -> dict:
         """
         Download session epochs data.
@@ -126,6 +133,8 @@ class SessionEpochsInterface(BaseIBLDataInterface):
             If True, download but don't load into memory
         logger : logging.Logger, optional
             Logger for progress tracking
+        dataset_index : SessionDatasetIndex, optional
+            Pre-built index of the session datasets, to resolve the revision without querying ONE
 
         Returns
         -------
@@ -135,7 +144,7 @@ class SessionEpochsInterface(BaseIBLDataInterface):
         requirements = cls.get_data_requirements()
 
         # Find the last available revision from candidates
-        revision = cls._resolve_revision(one, eid, cls.REVISION_CANDIDATES)
+        revision = cls._resolve_revision(one, eid, cls.REVISION_CANDIDATES, dataset_index=dataset_index)
 
         if logger:
             logger.info(f"Downloading session epochs data (session {eid}, revision {revision})")
@@ -8,6 +8,7 @@ from pynwb import TimeSeries
 from pynwb.behavior import SpatialSeries
 
 from ._base_ibl_interface import BaseIBLDataInterface
+from ..utils.session_data_cache import SessionDataCache
 
 
 class WheelKinematicsInterface(BaseIBLDataInterface):
@@ -47,28 +48,13 @@ class WheelKinematicsInterface(BaseIBLDataInterface):
         """Return kwargs for one.load_object() call."""
         return {"obj": "wheel", "collection": "alf"}
 
-    def add_to_nwbfile(self, nwbfile, metadata: dict, stub_test: bool = False, stub_duration: float = 10.0):
-        """
-        Add derived wheel kinematics to NWBFile.
+    def get_data_cache_keys(self, data_cache: SessionDataCache) -> list[tuple]:
+        """The wheel object, shared with the other wheel interfaces."""
+        return [data_cache.object_key(revision=self.revision, **self.get_load_object_kwargs())]
 
-        Processing pipeline (hardcoded IBL defaults):
-        1. Interpolate position to 1000 Hz (linear)
-        2. Apply 8th order Butterworth lowpass filter (20 Hz corner, zero-phase)
-        3. Compute velocity as derivative of filtered position
-        4. Compute acceleration as derivative of velocity
-
-        Parameters
-        ----------
-        nwbfile : NWBFile
-            The NWBFile to add data to.
-        metadata : dict
-            Metadata dictionary.
-        stub_test : bool, default: False
-            If True, only add the first stub_duration seconds of data for testing.
-        stub_duration : float, default: 10.0
-            Duration in seconds to include when stub_test=True.
-        """
-        wheel = self.one.load_object(id=self.session, revision=self.revision, **self.get_load_object_kwargs())
+    def _prepare_data(self, stub_test: bool = False, stub_duration: float = 10.0, **kwargs) -> dict:
+        """Load the wheel object and derive the smoothed position, velocity and acceleration at 1000 Hz."""
+        wheel = self._load_object(self.session, revision=self.revision, **self.get_load_object_kwargs())
 
         # Subset data if stub_test
         if stub_test:
@@ -98,6 +84,39 @@ class WheelKinematicsInterface(BaseIBLDataInterface):
         )
         velocity, acceleration = wheel_methods.velocity_filtered(pos=interpolated_position, fs=interpolation_frequency)
 
+        return {
+            "interpolated_position": interpolated_position,
+            "interpolated_timestamps": interpolated_timestamps,
+            "velocity": velocity,
+            "acceleration": acceleration,
+        }
+
+    def add_to_nwbfile(self, nwbfile, metadata: dict, stub_test: bool = False, stub_duration: float = 10.0):
+        """
+        Add derived wheel kinematics to NWBFile.
+
+        Processing pipeline (hardcoded IBL defaults):
+        1. Interpolate position to 1000 Hz (linear)
+        2. Apply 8th order Butterworth lowpass filter (20 Hz corner, zero-phase)
+        3. Compute velocity as derivative of filtered position
+        4. Compute acceleration as derivative of velocity
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The NWBFile to add data to.
+        metadata : dict
+            Metadata dictionary.
+        stub_test : bool, default: False
+            If True, only add the first stub_duration seconds of data for testing.
+        stub_duration : float, default: 10.0
+            Duration in seconds to include when stub_test=True.
+        """
+        kinematics = self._get_prepared_data(stub_test=stub_test, stub_duration=stub_duration)
+        interpolated_position = kinematics["interpolated_position"]
+        interpolated_timestamps = kinematics["interpolated_timestamps"]
+        velocity, acceleration = kinematics["velocity"], kinematics["acceleration"]
+
         # Regular sampling parameters
         interpolated_starting_time = interpolated_timestamps[0]
         interpolated_rate = 1 / (interpolated_timestamps[1] - interpolated_timestamps[0])
@@ -43,6 +43,25 @@ class WheelMovementsInterface(BaseIBLDataInterface):
         """Return kwargs for one.load_object() call."""
         return {"obj": "wheelMoves", "collection": "alf"}
 
+    def _prepare_data(self, stub_test: bool = False, stub_duration: float = 10.0, **kwargs) -> dict:
+        """Load the wheelMoves object, subset to the movements starting in the first `stub_duration` seconds."""
+        wheel_moves = self._load_object(self.session, revision=self.revision, **self.get_load_object_kwargs())
+
+        # Subset data if stub_test
+        if stub_test:
+            # Use first movement start as reference time
+            if len(wheel_moves["intervals"]) > 0:
+                first_time = wheel_moves["intervals"][0, 0]
+                stub_limit = first_time + stub_duration
+                interval_mask = wheel_moves["intervals"][:, 0] <= stub_limit
+                if not interval_mask.any():
+                    interval_mask = np.zeros(len(wheel_moves["intervals"]), dtype=bool)
+                    interval_mask[: min(100, len(interval_mask))] = True
+                wheel_moves["intervals"] = wheel_moves["intervals"][interval_mask]
+                wheel_moves["peakAmplitude"] = wheel_moves["peakAmplitude"][interval_mask]
+
+        return wheel_moves
+
     def add_to_nwbfile(self, nwbfile, metadata: dict, stub_test: bool = False, stub_duration: float = 10.0):
         """
         Add wheel movement epochs to NWBFile.
@@ -58,20 +77,7 @@ class WheelMovementsInterface(BaseIBLDataInterface):
         stub_duration : float, default: 10.0
             Duration in seconds to include when stub_test=True.
         """
-        wheel_moves = self.one.load_object(id=self.session, revision=self.revision, **self.get_load_object_kwargs())
-
-        # Subset data if stub_test
-        if stub_test:
-            # Use first movement start as reference time
-            if len(wheel_moves["intervals"]) > 0:
-                first_time = wheel_moves["intervals"][0, 0]
-                stub_limit = first_time + stub_duration
-                interval_mask = wheel_moves["intervals"][:, 0] <= stub_limit
-                if not interval_mask.any():
-                    interval_mask = np.zeros(len(wheel_moves["intervals"]), dtype=bool)
-                    interval_mask[: min(100, len(interval_mask))] = True
-                wheel_moves["intervals"] = wheel_moves["intervals"][interval_mask]
-                wheel_moves["peakAmplitude"] = wheel_moves["peakAmplitude"][interval_mask]
+        wheel_moves = self._get_prepared_data(stub_test=stub_test, stub_duration=stub_duration)
 
         # Wheel movement intervals
         wheel_movement_intervals = TimeIntervals(
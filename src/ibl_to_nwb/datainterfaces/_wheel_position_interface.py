@@ -6,6 +6,7 @@ from one.api import ONE
 from pynwb.behavior import SpatialSeries
 
 from ._base_ibl_interface import BaseIBLDataInterface
+from ..utils.session_data_cache import SessionDataCache
 
 
 class WheelPositionInterface(BaseIBLDataInterface):
@@ -43,22 +44,13 @@ class WheelPositionInterface(BaseIBLDataInterface):
         """Return kwargs for one.load_object() call."""
         return {"obj": "wheel", "collection": "alf"}
 
-    def add_to_nwbfile(self, nwbfile, metadata: dict, stub_test: bool = False, stub_duration: float = 10.0):
-        """
-        Add raw wheel position data to NWBFile.
+    def get_data_cache_keys(self, data_cache: SessionDataCache) -> list[tuple]:
+        """The wheel object, shared with the other wheel interfaces."""
+        return [data_cache.object_key(revision=self.revision, **self.get_load_object_kwargs())]
 
-        Parameters
-        ----------
-        nwbfile : NWBFile
-            The NWBFile to add data to.
-        metadata : dict
-            Metadata dictionary.
-        stub_test : bool, default: False
-            If True, only add the first stub_duration seconds of data for testing.
-        stub_duration : float, default: 10.0
-            Duration in seconds to include when stub_test=True.
-        """
-        wheel = self.one.load_object(id=self.session, revision=self.revision, **self.get_load_object_kwargs())
+    def _prepare_data(self, stub_test: bool = False, stub_duration: float = 10.0, **kwargs) -> dict:
+        """Load the wheel object, subset to the first `stub_duration` seconds if `stub_test`."""
+        wheel = self._load_object(self.session, revision=self.revision, **self.get_load_object_kwargs())
 
         # Subset data if stub_test
         if stub_test:
@@ -81,6 +73,25 @@ class WheelPositionInterface(BaseIBLDataInterface):
         if wheel["timestamps"].size < 2:
             raise ValueError("Wheel timestamps must contain at least two samples.")
 
+        return wheel
+
+    def add_to_nwbfile(self, nwbfile, metadata: dict, stub_test: bool = False, stub_duration: float = 10.0):
+        """
+        Add raw wheel position data to NWBFile.
+
+        Parameters
+        ----------
+        nwbfile : NWBFile
+            The NWBFile to add data to.
+        metadata : dict
+            Metadata dictionary.
+        stub_test : bool, default: False
+            If True, only add the first stub_duration seconds of data for testing.
+        stub_duration : float, default: 10.0
+            Duration in seconds to include when stub_test=True.
+        """
+        wheel = self._get_prepared_data(stub_test=stub_test, stub_duration=stub_duration)
+
         # Raw wheel position with irregular timestamps from encoder
         wheel_position_series = SpatialSeries(
             name="WheelPosition",
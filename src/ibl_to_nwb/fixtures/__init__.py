@@ -9,6 +9,10 @@ from .load_fixtures import (
     load_bwm_histology_qc,
     load_bwm_units_df,
     get_probe_name_to_probe_id_dict,
+    get_probe_histology_qc_dict,
+    get_camera_qc_dict,
+    save_fixture_cache,
+    load_fixture_cache,
 )
 
 __all__ = [
@@ -16,4 +20,8 @@ __all__ = [
     "load_bwm_histology_qc",
     "load_bwm_units_df",
     "get_probe_name_to_probe_id_dict",
+    "get_probe_histology_qc_dict",
+    "get_camera_qc_dict",
+    "save_fixture_cache",
+    "load_fixture_cache",
 ]
@@ -1,23 +1,71 @@
+"""Loaders for the pre-computed BWM fixture tables.
+
+Every table is read from disk once per process and memoized without eviction (the tables are small and
+immutable), together with the per-session indices derived from them (eid -> probes, eid -> camera QC).
+Availability checks, interfaces and consistency checks can therefore call these functions freely.
+
+For a faster cold start (e.g. many short-lived worker processes), ``save_fixture_cache`` serializes the
+parsed tables and indices to a single pickle file that ``load_fixture_cache`` restores in one read.
+"""
+
 import json
+import pickle
+import threading
 from pathlib import Path
+from typing import Any, Callable
 
 import pandas as pd
 
+FIXTURES_FOLDER = Path(__file__).parent
+CAMERA_QC_KEYS = ("videoLeft", "videoRight", "videoBody")
+
+_fixture_cache: dict[str, Any] = {}
+# Re-entrant: derived indices are built from memoized tables while the lock is held
+_fixture_cache_lock = threading.RLock()
+
+
+def _get_cached(key: str, loader: Callable[[], Any]) -> Any:
+    """Return the memoized value for `key`, calling `loader` the first time it is requested."""
+    if key not in _fixture_cache:
+        with _fixture_cache_lock:
+            if key not in _fixture_cache:
+                _fixture_cache[key] = loader()
+    return _fixture_cache[key]
+
+
+def _read_bwm_qc() -> dict:
+    with open(FIXTURES_FOLDER / "bwm_qc.json", "r") as fH:
+        return json.load(fH)
+
+
+def _build_eid_to_probe_histology_qc_dict() -> dict[str, dict[str, dict]]:
+    histology_qc_df = _get_cached("bwm_histology_qc", lambda: pd.read_csv(FIXTURES_FOLDER / "bwm_histology_qc.csv"))
+    eid_to_probes = {}
+    for probe_qc_row in histology_qc_df.to_dict("records"):
+        # Last row wins, as with dict(zip(probe_names, pids)) in get_probe_name_to_probe_id_dict
+        eid_to_probes.setdefault(probe_qc_row["eid"], {})[probe_qc_row["probe_name"]] = probe_qc_row
+    return eid_to_probes
+
+
+def _build_eid_to_camera_qc_dict() -> dict[str, dict[str, str | None]]:
+    bwm_qc = _get_cached("bwm_qc", _read_bwm_qc)
+    return {eid: {key: session_qc.get(key, None) for key in CAMERA_QC_KEYS} for eid, session_qc in bwm_qc.items()}
+
 
 def load_bwm_df():
-    path = Path(__file__).parent / "bwm_df.pqt"
-    return pd.read_parquet(path)
+    return _get_cached("bwm_df", lambda: pd.read_parquet(FIXTURES_FOLDER / "bwm_df.pqt")).copy()
 
 
 def load_bwm_units_df():
-    path = Path(__file__).parent / "bwm_units_df.pqt"
-    return pd.read_parquet(path)
+    return _get_cached("bwm_units_df", lambda: pd.read_parquet(FIXTURES_FOLDER / "bwm_units_df.pqt")).copy()
 
 
 def load_bwm_qc():
-    path = Path(__file__).parent / "bwm_qc.json"
-    with open(path, "r") as fH:
-        return json.load(fH)
+    """Load the BWM session QC dictionary (eid -> QC key -> status).
+
+    The dictionary is shared by all callers and must not be modified.
+    """
+    return _get_cached("bwm_qc", _read_bwm_qc)
 
 
 def load_bwm_histology_qc():
@@ -36,8 +84,7 @@ def load_bwm_histology_qc():
         - alignment_resolved: boolean
         - alignment_count: int
     """
-    path = Path(__file__).parent / "bwm_histology_qc.csv"
-    return pd.read_csv(path)
+    return _get_cached("bwm_histology_qc", lambda: pd.read_csv(FIXTURES_FOLDER / "bwm_histology_qc.csv")).copy()
 
 
 def get_probe_name_to_probe_id_dict(eid: str, histology_qc_df: pd.DataFrame = None) -> dict:
@@ -51,7 +98,8 @@ def get_probe_name_to_probe_id_dict(eid: str, histology_qc_df: pd.DataFrame = No
     eid : str
         Session ID
     histology_qc_df : pd.DataFrame, optional
-        Pre-loaded histology QC DataFrame. If None, will load automatically.
+        Pre-loaded histology QC DataFrame. If None, the memoized eid -> probes index
+        built from the fixture table is used.
 
     Returns
     -------
@@ -61,15 +109,15 @@ def get_probe_name_to_probe_id_dict(eid: str, histology_qc_df: pd.DataFrame = No
 
     Examples
     --------
-    >>> # Fast lookup from pre-loaded table
+    >>> # Fast lookup from the memoized index
+    >>> probe_dict = get_probe_name_to_probe_id_dict(eid)
+
+    >>> # Lookup in a custom (e.g. filtered) table
     >>> histology_qc_df = load_bwm_histology_qc()
     >>> probe_dict = get_probe_name_to_probe_id_dict(eid, histology_qc_df)
-
-    >>> # Auto-load if needed
-    >>> probe_dict = get_probe_name_to_probe_id_dict(eid)
     """
     if histology_qc_df is None:
-        histology_qc_df = load_bwm_histology_qc()
+        return {probe_name: probe_qc["pid"] for probe_name, probe_qc in get_probe_histology_qc_dict(eid).items()}
 
     # Filter to this session's probes
     session_probes = histology_qc_df[histology_qc_df["eid"] == eid]
@@ -78,3 +126,86 @@ def get_probe_name_to_probe_id_dict(eid: str, histology_qc_df: pd.DataFrame = No
     probe_name_to_probe_id_dict = dict(zip(session_probes["probe_name"], session_probes["pid"]))
 
     return probe_name_to_probe_id_dict
+
+
+def get_probe_histology_qc_dict(eid: str) -> dict[str, dict]:
+    """Return the histology QC rows of a session's probes from the memoized eid -> probes index.
+
+    Parameters
+    ----------
+    eid : str
+        Session ID
+
+    Returns
+    -------
+    dict
+        Mapping from probe name to its row of the histology QC table (see ``load_bwm_histology_qc``
+        for the keys). Empty if the session has no probes in the table. The rows are shared and
+        must not be modified.
+    """
+    eid_to_probes = _get_cached("eid_to_probe_histology_qc", _build_eid_to_probe_histology_qc_dict)
+    return dict(eid_to_probes.get(eid, {}))
+
+
+def get_camera_qc_dict(eid: str) -> dict[str, str | None] | None:
+    """Return the video QC statuses of a session from the memoized eid -> camera QC index.
+
+    Parameters
+    ----------
+    eid : str
+        Session ID
+
+    Returns
+    -------
+    dict or None
+        Mapping of "videoLeft", "videoRight" and "videoBody" to their QC status (e.g. 'PASS',
+        'FAIL', or None if not set), or None if the session is not in the QC database.
+    """
+    eid_to_camera_qc = _get_cached("eid_to_camera_qc", _build_eid_to_camera_qc_dict)
+    return eid_to_camera_qc.get(eid, None)
+
+
+def save_fixture_cache(file_path: Path) -> Path:
+    """Serialize all fixture tables and derived indices to a single pickle file.
+
+    Parameters
+    ----------
+    file_path : Path
+        Destination file.
+
+    Returns
+    -------
+    Path
+        The written file.
+    """
+    load_bwm_df()
+    load_bwm_histology_qc()
+    get_probe_histology_qc_dict(eid="")
+    get_camera_qc_dict(eid="")
+    if (FIXTURES_FOLDER / "bwm_units_df.pqt").exists():
+        load_bwm_units_df()
+
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with _fixture_cache_lock:
+        with open(file_path, "wb") as file:
+            pickle.dump(dict(_fixture_cache), file, protocol=pickle.HIGHEST_PROTOCOL)
+    return file_path
+
+
+def load_fixture_cache(file_path: Path) -> None:
+    """Populate the in-process fixture store from a file written by ``save_fixture_cache``.
+
+    Parameters
+    ----------
+    file_path : Path
+        File written by ``save_fixture_cache``.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Fixture cache not found: {file_path}")
+    with open(file_path, "rb") as file:
+        cached_fixtures = pickle.load(file)
+    with _fixture_cache_lock:
+        for key, value in cached_fixtures.items():
+            _fixture_cache.setdefault(key, value)
@@ -1 +1,2 @@
 from ._consistency_checks import check_nwbfile_for_consistency
+from ._interval_checks import check_find_overlapping_intervals
@@ -0,0 +1,68 @@
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+from ibl_to_nwb.utils.intervals import find_overlapping_intervals
+
+
+def _find_overlapping_intervals_pairwise(
+    start_times: np.ndarray, stop_times: np.ndarray, min_overlap: float = 0.0
+) -> tuple[np.ndarray, np.ndarray]:
+    # reference implementation: compare every pair of intervals
+    pairs = []
+    overlap_durations = []
+    for i in range(len(start_times)):
+        for j in range(i + 1, len(start_times)):
+            if start_times[i] < stop_times[j] and start_times[j] < stop_times[i]:
+                overlap_duration = min(stop_times[i], stop_times[j]) - max(start_times[i], start_times[j])
+                if overlap_duration > min_overlap:
+                    pairs.append((i, j))
+                    overlap_durations.append(overlap_duration)
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2), np.array(overlap_durations, dtype=np.float64)
+
+
+def _random_intervals(rng: np.random.Generator, n_intervals: int) -> tuple[np.ndarray, np.ndarray]:
+    # starts on a coarse grid, so that intervals share start and stop times (ties)
+    start_times = rng.integers(0, n_intervals // 2 + 1, size=n_intervals).astype(np.float64)
+    durations = rng.integers(0, 6, size=n_intervals).astype(np.float64)
+    # some intervals with fractional bounds
+    fractional = rng.random(n_intervals) < 0.3
+    start_times[fractional] += rng.random(fractional.sum())
+    stop_times = start_times + durations
+
+    # nested intervals: long intervals containing several of the others
+    nesting = rng.random(n_intervals) < 0.1
+    start_times[nesting] -= 5
+    stop_times[nesting] += 10
+    # NaN bounds, start or stop, and inverted intervals (stop before start)
+    start_times[rng.random(n_intervals) < 0.05] = np.nan
+    stop_times[rng.random(n_intervals) < 0.05] = np.nan
+    inverted = rng.random(n_intervals) < 0.05
+    start_times[inverted], stop_times[inverted] = stop_times[inverted], start_times[inverted]
+    return start_times, stop_times
+
+
+def check_find_overlapping_intervals(n_repeats: int = 50, max_intervals: int = 60, seed: int = 0):
+    """Check that the sort-and-sweep of `find_overlapping_intervals` matches a pairwise comparison of the intervals.
+
+    Random interval sets cover ties, nested intervals, NaN bounds, empty and inverted intervals, and several
+    `min_overlap` values. Raises an AssertionError on the first mismatch.
+    """
+    rng = np.random.default_rng(seed)
+    edge_cases = [
+        (np.array([]), np.array([])),
+        (np.array([0.0]), np.array([1.0])),
+        # identical intervals, touching intervals (no overlap), nested intervals
+        (np.array([0.0, 0.0, 1.0, 0.5, 0.2]), np.array([1.0, 1.0, 2.0, 0.6, 0.8])),
+        # NaN bounds never overlap
+        (np.array([np.nan, 0.0, 0.5, np.nan]), np.array([1.0, np.nan, 1.5, np.nan])),
+    ]
+    random_cases = [_random_intervals(rng, int(rng.integers(2, max_intervals + 1))) for _ in range(n_repeats)]
+
+    for start_times, stop_times in edge_cases + random_cases:
+        for min_overlap in (0.0, 0.001, 0.5, 2.0):
+            pairs, overlap_durations = find_overlapping_intervals(start_times, stop_times, min_overlap=min_overlap)
+            expected_pairs, expected_durations = _find_overlapping_intervals_pairwise(
+                start_times, stop_times, min_overlap=min_overlap
+            )
+            assert_array_equal(pairs, expected_pairs)
+            assert_allclose(overlap_durations, expected_durations)
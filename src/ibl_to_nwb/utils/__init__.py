@@ -1,7 +1,11 @@
 from .atlas import (
     COSMOS_FULL_NAMES,
+    BrainRegionLookup,
+    get_allen_atlas,
     get_beryl_color,
     get_beryl_full_name,
+    get_brain_region_lookup,
+    get_brain_regions,
     get_brainglobe_slice_colors,
     get_ccf_acronym_at_level,
     get_ccf_color,
@@ -9,16 +13,45 @@ from .atlas import (
     get_cosmos_color,
     get_cosmos_full_name,
 )
+from .dataset_index import SessionDatasetIndex
+from .dataset_policy import DEFAULT_DATASET_POLICY, DatasetPolicyRule, apply_dataset_policy
 from .electrodes import add_probe_electrodes_with_localization
 from .ephys_decompression import decompress_ephys_cbins
+from .file_placement import place_file
+from .incremental_update import IncrementalUpdatePlan, plan_incremental_update, read_interface_provenance
+from .intervals import find_overlapping_intervals
+from .memory_profiling import MemoryProfiler
+from .nwb_integrity import finalize_nwbfile, validate_nwbfile_integrity
+from .offline_one import OfflineONE, save_alyx_snapshot
 from .paths import check_camera_health_by_qc, setup_paths, tree_copy
 from .probe_naming import get_ibl_probe_name, get_probe_suffix
+from .session_data_cache import SessionDataCache
 from .subject_handling import get_ibl_subject_metadata, sanitize_subject_id_for_dandi
+from .telemetry import SpanRecorder, set_span_recorder, span
+from .thread_safe_one import ThreadSafeONE
 
 __all__ = [
     "add_probe_electrodes_with_localization",
+    "apply_dataset_policy",
     "COSMOS_FULL_NAMES",
+    "DatasetPolicyRule",
     "decompress_ephys_cbins",
+    "DEFAULT_DATASET_POLICY",
+    "finalize_nwbfile",
+    "find_overlapping_intervals",
+    "IncrementalUpdatePlan",
+    "MemoryProfiler",
+    "OfflineONE",
+    "place_file",
+    "plan_incremental_update",
+    "read_interface_provenance",
+    "SessionDataCache",
+    "SessionDatasetIndex",
+    "SpanRecorder",
+    "BrainRegionLookup",
+    "get_allen_atlas",
+    "get_brain_region_lookup",
+    "get_brain_regions",
     "get_beryl_color",
     "get_beryl_full_name",
     "get_brainglobe_slice_colors",
@@ -31,7 +64,12 @@ __all__ = [
     "get_ibl_subject_metadata",
     "get_probe_suffix",
     "sanitize_subject_id_for_dandi",
+    "save_alyx_snapshot",
+    "set_span_recorder",
     "setup_paths",
+    "span",
+    "ThreadSafeONE",
     "tree_copy",
+    "validate_nwbfile_integrity",
     "check_camera_health_by_qc",
 ]
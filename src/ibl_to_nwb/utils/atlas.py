@@ -1,8 +1,198 @@
 """Utilities for working with Allen Brain Atlas and IBL atlas mappings."""
 
+import threading
+from pathlib import Path
+
 import numpy as np
+from iblatlas.atlas import AllenAtlas
 from iblatlas.regions import BrainRegions
 
+_shared_atlas_lock = threading.Lock()
+_shared_allen_atlases: dict[int, AllenAtlas] = {}
+_shared_brain_regions: BrainRegions | None = None
+_brain_region_lookups: dict[int, "BrainRegionLookup"] = {}
+
+
+class _MemoryMappedAllenAtlas(AllenAtlas):
+    """AllenAtlas whose image and label volumes are memory-mapped from uncompressed .npy copies.
+
+    The first load converts each volume (.nrrd image, compressed .npz label lookup) to a .npy file next to it;
+    later loads map those files instead of decompressing the volumes into memory, so the pages are shared
+    between processes through the OS page cache.
+    """
+
+    @staticmethod
+    def _read_volume(file_volume: Path):
+        file_volume = Path(file_volume)
+        file_npy = file_volume.with_name(f"{file_volume.stem}_mmap.npy")
+        if not file_npy.exists():
+            volume = AllenAtlas._read_volume(file_volume)
+            file_npy_temp = file_npy.with_name(f"{file_npy.stem}_temp.npy")
+            np.save(file_npy_temp, volume)
+            file_npy_temp.replace(file_npy)
+        return np.load(file_npy, mmap_mode="r")
+
+
+def get_brain_regions() -> BrainRegions:
+    """
+    Return the process-wide BrainRegions instance, creating it on first use.
+
+    Returns
+    -------
+    BrainRegions
+        Shared instance; treat it as read-only.
+    """
+    global _shared_brain_regions
+    if _shared_brain_regions is None:
+        with _shared_atlas_lock:
+            if _shared_brain_regions is None:
+                _shared_brain_regions = BrainRegions()
+    return _shared_brain_regions
+
+
+def get_allen_atlas(res_um: int = 25, memory_mapped: bool = False) -> AllenAtlas:
+    """
+    Return the process-wide AllenAtlas at the given resolution, loading it on first use.
+
+    Loading the atlas volumes costs hundreds of MB and several seconds, so every module shares the
+    instance returned here rather than constructing its own.
+
+    Parameters
+    ----------
+    res_um : int, default: 25
+        Atlas resolution in micrometres.
+    memory_mapped : bool, default: False
+        If True, the volumes are memory-mapped from uncompressed .npy copies kept next to the atlas files
+        (written on first use). Only applies to the call that loads the atlas; later calls return the
+        already loaded instance.
+
+    Returns
+    -------
+    AllenAtlas
+        Shared instance; treat it as read-only. Its ``regions`` is the instance of ``get_brain_regions``.
+    """
+    if res_um not in _shared_allen_atlases:
+        brain_regions = get_brain_regions()
+        with _shared_atlas_lock:
+            if res_um not in _shared_allen_atlases:
+                atlas_class = _MemoryMappedAllenAtlas if memory_mapped else AllenAtlas
+                atlas = atlas_class(res_um=res_um)
+                atlas.regions = brain_regions
+                _shared_allen_atlases[res_um] = atlas
+    return _shared_allen_atlases[res_um]
+
+
+class BrainRegionLookup:
+    """
+    Precomputed acronym/id -> region lookups over a BrainRegions structure tree.
+
+    Resolves whole arrays with one ``np.searchsorted`` over the sorted unique acronyms (or ids) instead of
+    one ``BrainRegions.acronym2index`` scan per string. The region index of an acronym is the one
+    ``brain_regions.acronym2index(acronym)[1][0][0]`` returns: the acronym is first remapped onto the
+    default mapping, then the first position holding the remapped acronym is used. Unknown values map to -1.
+    """
+
+    def __init__(self, brain_regions: BrainRegions):
+        """
+        Parameters
+        ----------
+        brain_regions : BrainRegions
+            Structure tree the lookups are built from.
+        """
+        self.brain_regions = brain_regions
+        self.names = np.asarray(brain_regions.name).astype(str)
+        self.acronyms = np.asarray(brain_regions.acronym).astype(str)
+        self.levels = np.asarray(brain_regions.level)
+        self.parents = np.asarray(brain_regions.parent)
+        self.rgb = np.asarray(brain_regions.rgb)
+
+        self._sorted_acronyms, self._acronym_region_index = self._build_remapped_index(
+            values=self.acronyms, mapping=brain_regions.mappings[brain_regions.default_mapping]
+        )
+        self._sorted_ids, self._id_region_index = self._build_remapped_index(
+            values=np.asarray(brain_regions.id), mapping=brain_regions.mappings["Allen"]
+        )
+
+    @staticmethod
+    def _build_remapped_index(values: np.ndarray, mapping: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # First occurrence of each value (as `ismember`), remapped, then first position of the remapped value
+        sorted_values, first_position = np.unique(values, return_index=True)
+        mapped_values = values[mapping]
+        sorted_mapped_values, first_mapped_position = np.unique(mapped_values, return_index=True)
+        remapped_values = mapped_values[first_position]
+        region_index = first_mapped_position[np.searchsorted(sorted_mapped_values, remapped_values)]
+        return sorted_values, region_index
+
+    @staticmethod
+    def _lookup(sorted_values: np.ndarray, region_index: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        positions = np.clip(np.searchsorted(sorted_values, queries), 0, len(sorted_values) - 1)
+        found = sorted_values[positions] == queries
+        return np.where(found, region_index[positions], -1)
+
+    def acronym_to_index(self, acronyms) -> np.ndarray:
+        """Return the region index of each acronym (-1 if unknown)."""
+        acronyms = np.atleast_1d(np.asarray(acronyms)).astype(str)
+        return self._lookup(self._sorted_acronyms, self._acronym_region_index, acronyms)
+
+    def id_to_index(self, atlas_ids) -> np.ndarray:
+        """Return the region index of each atlas id in the Allen mapping (-1 if unknown)."""
+        atlas_ids = np.atleast_1d(np.asarray(atlas_ids)).astype(self._sorted_ids.dtype)
+        return self._lookup(self._sorted_ids, self._id_region_index, atlas_ids)
+
+    def acronym_to_name(self, acronyms) -> np.ndarray:
+        """Return the full name of each acronym; unknown acronyms are returned unchanged."""
+        acronyms = np.atleast_1d(np.asarray(acronyms)).astype(str)
+        indices = self.acronym_to_index(acronyms)
+        return np.where(indices >= 0, self.names[indices], acronyms)
+
+    def acronym_to_rgb(self, acronyms) -> np.ndarray:
+        """Return the (n, 3) RGB colors in [0, 1] of the acronyms; unknown acronyms are gray."""
+        indices = self.acronym_to_index(acronyms)
+        rgb = self.rgb[indices] / 255
+        rgb[indices < 0] = 0.5
+        return rgb
+
+    def id_to_acronym(self, atlas_ids) -> np.ndarray:
+        """Return the acronym of each atlas id (empty string if unknown)."""
+        indices = self.id_to_index(atlas_ids)
+        return np.where(indices >= 0, self.acronyms[indices], "")
+
+    def id_to_name(self, atlas_ids) -> np.ndarray:
+        """Return the full name of each atlas id (empty string if unknown)."""
+        indices = self.id_to_index(atlas_ids)
+        return np.where(indices >= 0, self.names[indices], "")
+
+    def id_to_level(self, atlas_ids) -> np.ndarray:
+        """Return the hierarchy level of each atlas id (-1 if unknown)."""
+        indices = self.id_to_index(atlas_ids)
+        return np.where(indices >= 0, self.levels[indices], -1)
+
+
+def get_brain_region_lookup(brain_regions: BrainRegions | None = None) -> BrainRegionLookup:
+    """
+    Return the lookup tables for a BrainRegions instance.
+
+    Parameters
+    ----------
+    brain_regions : BrainRegions, optional
+        Structure tree to look up. Defaults to the shared instance of ``get_brain_regions``.
+        The lookup of each instance is built on first use and reused afterwards.
+
+    Returns
+    -------
+    BrainRegionLookup
+        Lookup over the structure tree.
+    """
+    if brain_regions is None:
+        brain_regions = get_brain_regions()
+    # Keyed by id(): each lookup keeps a reference to its BrainRegions, so the id cannot be reused
+    lookup = _brain_region_lookups.get(id(brain_regions))
+    if lookup is None:
+        with _shared_atlas_lock:
+            lookup = _brain_region_lookups.setdefault(id(brain_regions), BrainRegionLookup(brain_regions))
+    return lookup
+
+
 # Cosmos acronym to full name mapping
 # These are the 10 major brain divisions used in the IBL Brain-Wide Map project
 # Plus 'root' which captures fiber tracts, ventricles, and other non-gray matter structures
@@ -31,25 +221,15 @@ def get_cosmos_color(cosmos_acronym: str, brain_regions: BrainRegions | None = N
     cosmos_acronym : str
         The Cosmos region acronym (e.g., 'Isocortex', 'TH', 'root').
     brain_regions : BrainRegions, optional
-        BrainRegions instance. If None, a new one will be created.
+        BrainRegions instance. If None, the shared instance is used.
 
     Returns
     -------
     tuple
         RGB color as (r, g, b) with values in [0, 1].
     """
-    if brain_regions is None:
-        brain_regions = BrainRegions()
-
-    try:
-        index = brain_regions.acronym2index(cosmos_acronym)[1][0]
-        # index may be an array if multiple matches, take first
-        if hasattr(index, "__len__"):
-            index = index[0]
-        rgb = brain_regions.rgb[index]
-        return (rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
-    except (IndexError, KeyError):
-        return (0.5, 0.5, 0.5)  # Gray for unknown
+    rgb = get_brain_region_lookup(brain_regions).acronym_to_rgb(cosmos_acronym)[0]
+    return (rgb[0], rgb[1], rgb[2])  # Gray for unknown
 
 
 def get_cosmos_full_name(cosmos_acronym: str) -> str:
@@ -78,24 +258,15 @@ def get_beryl_color(beryl_acronym: str, brain_regions: BrainRegions | None = Non
     beryl_acronym : str
         The Beryl region acronym (e.g., 'VISp', 'CA1', 'CP').
     brain_regions : BrainRegions, optional
-        BrainRegions instance. If None, a new one will be created.
+        BrainRegions instance. If None, the shared instance is used.
 
     Returns
     -------
     tuple
         RGB color as (r, g, b) with values in [0, 1].
     """
-    if brain_regions is None:
-        brain_regions = BrainRegions()
-
-    try:
-        index = brain_regions.acronym2index(beryl_acronym)[1][0]
-        if hasattr(index, "__len__"):
-            index = index[0]
-        rgb = brain_regions.rgb[index]
-        return (rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
-    except (IndexError, KeyError):
-        return (0.5, 0.5, 0.5)
+    rgb = get_brain_region_lookup(brain_regions).acronym_to_rgb(beryl_acronym)[0]
+    return (rgb[0], rgb[1], rgb[2])
 
 
 def get_beryl_full_name(beryl_acronym: str, brain_regions: BrainRegions | None = None) -> str:
@@ -107,7 +278,7 @@ def get_beryl_full_name(beryl_acronym: str, brain_regions: BrainRegions | None =
     beryl_acronym : str
         The Beryl region acronym (e.g., 'VISp', 'CA1', 'CP').
     brain_regions : BrainRegions, optional
-        BrainRegions instance. If None, a new one will be created.
+        BrainRegions instance. If None, the shared instance is used.
 
     Returns
     -------
@@ -120,17 +291,7 @@ def get_beryl_full_name(beryl_acronym: str, brain_regions: BrainRegions | None =
     if beryl_acronym == "void":
         return "Outside brain"
 
-    if brain_regions is None:
-        brain_regions = BrainRegions()
-
-    try:
-        index = brain_regions.acronym2index(beryl_acronym)[1][0]
-        if hasattr(index, "__len__"):
-            index = index[0]
-        name = brain_regions.name[index]
-        return str(name)
-    except (IndexError, KeyError):
-        return beryl_acronym
+    return str(get_brain_region_lookup(brain_regions).acronym_to_name(beryl_acronym)[0])
 
 
 def get_ccf_acronym_at_level(acronym: str, target_level: int, brain_regions: BrainRegions | None = None) -> str:
@@ -153,7 +314,7 @@ def get_ccf_acronym_at_level(acronym: str, target_level: int, brain_regions: Bra
         The target hierarchy level (0-10). If the region is already at or
         above this level, returns the region itself.
     brain_regions : BrainRegions, optional
-        BrainRegions instance. If None, a new one will be created.
+        BrainRegions instance. If None, the shared instance is used.
 
     Returns
     -------
@@ -164,40 +325,32 @@ def get_ccf_acronym_at_level(acronym: str, target_level: int, brain_regions: Bra
     if acronym in ("root", "void"):
         return acronym
 
-    if brain_regions is None:
-        brain_regions = BrainRegions()
+    lookup = get_brain_region_lookup(brain_regions)
+    index = lookup.acronym_to_index(acronym)[0]
+    if index < 0:
+        return acronym
 
-    try:
-        index = brain_regions.acronym2index(acronym)[1][0]
-        if hasattr(index, "__len__"):
-            index = index[0]
+    # If already at or above target level, return as is
+    if lookup.levels[index] <= target_level:
+        return acronym
 
-        current_level = brain_regions.level[index]
+    # Walk up the hierarchy until we reach target level
+    current_idx = index
+    for _ in range(20):  # Safety limit
+        parent_id = lookup.parents[current_idx]
+        if parent_id == 0 or parent_id == 997:  # root
+            return "root"
 
-        # If already at or above target level, return as is
-        if current_level <= target_level:
+        parent_idx = lookup.id_to_index(parent_id)[0]
+        if parent_idx < 0:
             return acronym
 
-        # Walk up the hierarchy until we reach target level
-        current_idx = index
-        for _ in range(20):  # Safety limit
-            parent_id = brain_regions.parent[current_idx]
-            if parent_id == 0 or parent_id == 997:  # root
-                return "root"
+        if lookup.levels[parent_idx] <= target_level:
+            return str(lookup.acronyms[parent_idx])
 
-            parent_idx = brain_regions.id2index(int(parent_id))[1][0]
-            if hasattr(parent_idx, "__len__"):
-                parent_idx = parent_idx[0]
+        current_idx = parent_idx
 
-            parent_level = brain_regions.level[parent_idx]
-            if parent_level <= target_level:
-                return str(brain_regions.acronym[parent_idx])
-
-            current_idx = parent_idx
-
-        return acronym  # Fallback
-    except (IndexError, KeyError):
-        return acronym
+    return acronym  # Fallback
 
 
 def get_ccf_color(acronym: str, brain_regions: BrainRegions | None = None) -> tuple:
@@ -209,24 +362,15 @@ def get_ccf_color(acronym: str, brain_regions: BrainRegions | None = None) -> tu
     acronym : str
         The brain region acronym (e.g., 'VISp', 'CA1', 'CP').
     brain_regions : BrainRegions, optional
-        BrainRegions instance. If None, a new one will be created.
+        BrainRegions instance. If None, the shared instance is used.
 
     Returns
     -------
     tuple
         RGB color as (r, g, b) with values in [0, 1].
     """
-    if brain_regions is None:
-        brain_regions = BrainRegions()
-
-    try:
-        index = brain_regions.acronym2index(acronym)[1][0]
-        if hasattr(index, "__len__"):
-            index = index[0]
-        rgb = brain_regions.rgb[index]
-        return (rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
-    except (IndexError, KeyError):
-        return (0.5, 0.5, 0.5)
+    rgb = get_brain_region_lookup(brain_regions).acronym_to_rgb(acronym)[0]
+    return (rgb[0], rgb[1], rgb[2])
 
 
 def get_ccf_full_name(acronym: str, brain_regions: BrainRegions | None = None) -> str:
@@ -238,7 +382,7 @@ def get_ccf_full_name(acronym: str, brain_regions: BrainRegions | None = None) -
     acronym : str
         The brain region acronym (e.g., 'VISp', 'CA1', 'CP').
     brain_regions : BrainRegions, optional
-        BrainRegions instance. If None, a new one will be created.
+        BrainRegions instance. If None, the shared instance is used.
 
     Returns
     -------
@@ -251,17 +395,7 @@ def get_ccf_full_name(acronym: str, brain_regions: BrainRegions | None = None) -
     if acronym == "void":
         return "Outside brain"
 
-    if brain_regions is None:
-        brain_regions = BrainRegions()
-
-    try:
-        index = brain_regions.acronym2index(acronym)[1][0]
-        if hasattr(index, "__len__"):
-            index = index[0]
-        name = brain_regions.name[index]
-        return str(name)
-    except (IndexError, KeyError):
-        return acronym
+    return str(get_brain_region_lookup(brain_regions).acronym_to_name(acronym)[0])
 
 
 def get_brainglobe_slice_colors(annotation_slice: np.ndarray, atlas) -> np.ndarray:
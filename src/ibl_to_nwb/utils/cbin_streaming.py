@@ -0,0 +1,270 @@
+"""Stream SpikeGLX data directly from IBL compressed .cbin files.
+
+The default raw pipeline decompresses every .cbin to a full .bin copy (``decompress_ephys_cbins``) and then reads
+those copies back while writing the NWB file. The helpers here avoid that copy:
+
+1. ``prepare_cbin_streaming_folder`` lays out the decompressed-ephys folder with, per probe stream (AP and LF), a
+   copy of the .meta file, a *sparse* placeholder .bin of the right size (no blocks allocated on disk) and links to the original
+   .cbin/.ch files. Neo and NeuroConv parse the headers, probe geometry and channel names exactly as for a
+   decompressed folder.
+2. ``stream_recording_from_cbin`` builds, from such an extractor, a ``CompressedBinaryRecording`` with the same
+   channels, properties, probe and annotations, whose traces are decompressed from the .cbin on demand while the
+   NWB data iterator requests them. Each mtscomp chunk is read and decompressed once: the iterator requests
+   consecutive frame ranges and the cache of decoded chunks of the mtscomp reader keeps the chunk straddling two
+   requests. That cache holds whole mtscomp chunks (1 s of all channels), not the chunks of the HDF5 file.
+
+The NIDQ stream is not streamed: its interface reads the .bin directly, so the NIDQ .cbin (a few channels, small)
+is decompressed as usual (``decompress_ephys_cbins(..., pattern=NIDQ_CBIN_PATTERN)``).
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import mtscomp
+import numpy as np
+from spikeinterface.core import BaseRecording, BaseRecordingSegment
+
+from .ephys_decompression import remove_uuid_from_filepath
+
+# Probe streams (AP and LF) read through CompressedBinaryRecording; the NIDQ .cbin is decompressed instead
+STREAMED_CBIN_PATTERN = "*.imec*.cbin"
+NIDQ_CBIN_PATTERN = "*.nidq*.cbin"
+
+# Decoded mtscomp chunks (1 s each) kept in memory per stream by the mtscomp reader; 2 suffice for sequential
+# reads, a few more absorb the overlap when the HDF5 buffer is not a multiple of the mtscomp chunk length
+DEFAULT_CHUNK_CACHE_SIZE = 4
+
+
+class CompressedBinaryRecordingSegment(BaseRecordingSegment):
+    """Recording segment reading traces from an mtscomp-compressed .cbin file."""
+
+    def __init__(
+        self,
+        cbin_file_path: Path,
+        file_channel_indices: np.ndarray,
+        sampling_frequency: float,
+        t_start: float | None = None,
+        chunk_cache_size: int = DEFAULT_CHUNK_CACHE_SIZE,
+    ):
+        """
+        Parameters
+        ----------
+        cbin_file_path : Path
+            Path to the .cbin file; the mtscomp header is read from the .ch file next to it.
+        file_channel_indices : np.ndarray
+            Indices, in the compressed file, of the channels exposed by this segment (e.g. all neural channels
+            for an AP/LF recording, or only the last channel for the sync recording).
+        sampling_frequency : float
+            Sampling frequency of the stream in Hz.
+        t_start : float, optional
+            Start time of the segment, copied from the segment being replaced.
+        chunk_cache_size : int, default: 4
+            Number of decoded mtscomp chunks kept in the cache of the mtscomp reader.
+        """
+        BaseRecordingSegment.__init__(self, sampling_frequency=sampling_frequency, t_start=t_start)
+        self.cbin_file_path = Path(cbin_file_path)
+        self._reader = mtscomp.Reader(cache_size=chunk_cache_size, quiet=True)
+        self._reader.open(self.cbin_file_path, self.cbin_file_path.with_suffix(".ch"))
+
+        self.file_channel_indices = np.asarray(file_channel_indices, dtype=np.int64)
+        # Contiguous channel ranges (the common case) are selected with a slice to avoid a fancy-index copy
+        is_contiguous = len(self.file_channel_indices) > 0 and np.all(np.diff(self.file_channel_indices) == 1)
+        self._file_channel_selection = (
+            slice(int(self.file_channel_indices[0]), int(self.file_channel_indices[-1]) + 1)
+            if is_contiguous
+            else self.file_channel_indices
+        )
+
+    def get_num_samples(self) -> int:
+        return self._reader.n_samples
+
+    def get_traces(self, start_frame: int | None = None, end_frame: int | None = None, channel_indices=None):
+        traces = self._reader[start_frame:end_frame][:, self._file_channel_selection]
+        if channel_indices is not None:
+            traces = traces[:, channel_indices]
+        return traces
+
+
+class CompressedBinaryRecording(BaseRecording):
+    """Single-segment recording reading its traces from an mtscomp-compressed .cbin file."""
+
+    def __init__(
+        self,
+        cbin_file_path: Path,
+        file_channel_indices: np.ndarray,
+        sampling_frequency: float,
+        channel_ids: list | np.ndarray,
+        t_start: float | None = None,
+        chunk_cache_size: int = DEFAULT_CHUNK_CACHE_SIZE,
+    ):
+        """
+        Parameters
+        ----------
+        cbin_file_path : Path
+            Path to the .cbin file; the mtscomp header is read from the .ch file next to it.
+        file_channel_indices : np.ndarray
+            Indices, in the compressed file, of the recording channels (in `channel_ids` order).
+        sampling_frequency : float
+            Sampling frequency of the stream in Hz.
+        channel_ids : list or np.ndarray
+            Channel IDs of the recording.
+        t_start : float, optional
+            Start time of the recording.
+        chunk_cache_size : int, default: 4
+            Number of decoded mtscomp chunks kept in the cache of the mtscomp reader.
+        """
+        if len(file_channel_indices) != len(channel_ids):
+            raise ValueError(f"{len(file_channel_indices)} file channel indices given for {len(channel_ids)} channels.")
+        segment = CompressedBinaryRecordingSegment(
+            cbin_file_path=cbin_file_path,
+            file_channel_indices=file_channel_indices,
+            sampling_frequency=sampling_frequency,
+            t_start=t_start,
+            chunk_cache_size=chunk_cache_size,
+        )
+        BaseRecording.__init__(
+            self, sampling_frequency=sampling_frequency, channel_ids=channel_ids, dtype=segment._reader.dtype
+        )
+        self.add_recording_segment(segment)
+        self._kwargs = dict(
+            cbin_file_path=str(Path(cbin_file_path).absolute()),
+            file_channel_indices=np.asarray(file_channel_indices).tolist(),
+            sampling_frequency=sampling_frequency,
+            channel_ids=list(channel_ids),
+            t_start=t_start,
+            chunk_cache_size=chunk_cache_size,
+        )
+
+
+def prepare_cbin_streaming_folder(source_folder: Path, target_folder: Path, remove_uuid: bool = True) -> list[Path]:
+    """
+    Lay out a SpikeGLX folder that reads from the original .cbin files instead of decompressed copies.
+
+    Mirrors the layout produced by ``decompress_ephys_cbins(source_folder, target_folder)`` but, for every
+    probe .cbin (``STREAMED_CBIN_PATTERN``), writes a sparse placeholder .bin (only its size is used, to parse the header) together with a copy
+    of the .meta file and symbolic links to the .cbin and .ch files. ``IblSpikeGlxConverter`` detects the
+    .cbin links and streams the data through ``stream_recording_from_cbin``. Other .cbin files (the NIDQ stream)
+    are left out: decompress them with ``decompress_ephys_cbins``.
+
+    Parameters
+    ----------
+    source_folder : Path
+        Root folder containing .cbin files (searched recursively), typically the ONE session folder.
+    target_folder : Path
+        Destination folder, typically the session decompressed-ephys folder.
+    remove_uuid : bool, default=True
+        If True, removes UUID strings from output filenames (as ``decompress_ephys_cbins`` does).
+
+    Returns
+    -------
+    list of Path
+        The placeholder .bin files.
+    """
+    placeholder_bins = []
+    for file_cbin in sorted(Path(source_folder).rglob(STREAMED_CBIN_PATTERN)):
+        if file_cbin.name.startswith("._"):
+            continue  # macOS AppleDouble files
+
+        cbin_path_no_uuid = remove_uuid_from_filepath(file_cbin)
+        file_meta = cbin_path_no_uuid.with_suffix(".meta")
+        file_ch = cbin_path_no_uuid.with_suffix(".ch")
+        if not file_meta.exists():
+            raise RuntimeError(
+                f"Required .meta file not found: {file_meta}\nExpected to find metadata file alongside {file_cbin}"
+            )
+        if not file_ch.exists():
+            raise RuntimeError(
+                f"Required .ch file not found: {file_ch}\nExpected to find channel file alongside {file_cbin}"
+            )
+
+        target_cbin = target_folder / file_cbin.relative_to(source_folder)
+        if remove_uuid:
+            target_cbin = remove_uuid_from_filepath(target_cbin)
+        target_cbin.parent.mkdir(parents=True, exist_ok=True)
+        target_bin = target_cbin.with_suffix(".bin")
+        if target_bin.exists() and not target_cbin.exists():
+            raise FileExistsError(f"{target_bin} is a decompressed copy; remove it before preparing streaming.")
+
+        for link_path, original_path in ((target_cbin, file_cbin), (target_cbin.with_suffix(".ch"), file_ch)):
+            if link_path.is_symlink() or link_path.exists():
+                link_path.unlink()
+            link_path.symlink_to(original_path.resolve())
+
+        # Copy (not link) the meta file: spikeglx_patches may rewrite it in place
+        shutil.copyfile(file_meta, target_cbin.with_suffix(".meta"))
+
+        # Sparse file of the decompressed size: truncate() allocates no blocks and nothing ever reads it
+        with open(file_ch) as file:
+            compression_header = json.load(file)
+        num_bytes = (
+            compression_header["chunk_bounds"][-1]
+            * compression_header["n_channels"]
+            * np.dtype(compression_header["dtype"]).itemsize
+        )
+        with open(target_bin, "wb") as file:
+            file.truncate(num_bytes)
+        placeholder_bins.append(target_bin)
+
+    return placeholder_bins
+
+
+def stream_recording_from_cbin(
+    recording: BaseRecording,
+    cbin_file_path: Path,
+    file_channel_indices: np.ndarray,
+    chunk_cache_size: int = DEFAULT_CHUNK_CACHE_SIZE,
+) -> CompressedBinaryRecording:
+    """
+    Return a recording with the channels and metadata of a single-segment extractor, reading from a .cbin file.
+
+    The properties (gains, offsets, channel names, probe contacts...), the annotations and the start time or
+    timestamps of `recording` are copied to a ``CompressedBinaryRecording`` over the same samples, which replaces
+    it (e.g. as the ``recording_extractor`` of a neuroconv interface).
+
+    Parameters
+    ----------
+    recording : BaseRecording
+        Extractor created from a folder prepared with ``prepare_cbin_streaming_folder``.
+    cbin_file_path : Path
+        The .cbin file holding the recording data.
+    file_channel_indices : np.ndarray
+        Indices, in the compressed file, of the extractor channels (in extractor channel order).
+    chunk_cache_size : int, default: 4
+        Number of decoded mtscomp chunks kept in the cache of the mtscomp reader.
+
+    Returns
+    -------
+    CompressedBinaryRecording
+        The recording streaming from the .cbin file.
+    """
+    if recording.get_num_segments() != 1:
+        raise ValueError(f"Expected a single-segment recording, got {recording.get_num_segments()} segments.")
+    if len(file_channel_indices) != recording.get_num_channels():
+        raise ValueError(
+            f"{len(file_channel_indices)} file channel indices given for {recording.get_num_channels()} channels."
+        )
+
+    has_time_vector = recording.has_time_vector(segment_index=0)
+    compressed_recording = CompressedBinaryRecording(
+        cbin_file_path=cbin_file_path,
+        file_channel_indices=file_channel_indices,
+        sampling_frequency=recording.get_sampling_frequency(),
+        channel_ids=recording.get_channel_ids(),
+        t_start=None if has_time_vector else recording.get_start_time(segment_index=0),
+        chunk_cache_size=chunk_cache_size,
+    )
+    if compressed_recording.get_num_samples() != recording.get_num_samples():
+        raise ValueError(
+            f"{cbin_file_path} holds {compressed_recording.get_num_samples()} samples, "
+            f"the recording expects {recording.get_num_samples()}."
+        )
+    if compressed_recording.get_dtype() != recording.get_dtype():
+        raise ValueError(
+            f"{cbin_file_path} holds {compressed_recording.get_dtype()} samples, "
+            f"the recording expects {recording.get_dtype()}."
+        )
+    recording.copy_metadata(compressed_recording)
+    if has_time_vector:
+        compressed_recording.set_times(recording.get_times(segment_index=0), segment_index=0, with_warning=False)
+    return compressed_recording
@@ -0,0 +1,191 @@
+"""Session-scoped index of the datasets listed by ONE for one session."""
+
+import re
+from functools import lru_cache
+from typing import Iterable
+
+import pandas as pd
+from one.api import ONE
+
+_REVISION_PATTERN = re.compile(r"^#([^#]+)#$")
+_IBL_NAMESPACE_PREFIX = "_ibl_"
+
+
+@lru_cache(maxsize=None)
+def _compile_wildcard_requirement(required_file: str) -> re.Pattern:
+    """Compile a requirement such as "alf/probe*/spikes.times.npy" (revision folders are allowed anywhere)."""
+    return re.compile(re.escape(required_file).replace(r"\*", ".*"))
+
+
+class SessionDatasetIndex:
+    """
+    Index of the datasets of one session, built once and shared by all availability checks.
+
+    `one.list_datasets(eid)` is called once; each dataset path (e.g. "alf/probe00/#2025-05-06#/_ibl_spikes.times.npy")
+    is parsed into collection, revision, namespace and filename, and stored in hash maps so that exact requirements
+    are answered with a dictionary lookup and wildcard requirements only scan the datasets sharing the same
+    filename or top-level collection.
+
+    Examples
+    --------
+    >>> dataset_index = SessionDatasetIndex.from_one(one=one, eid=eid)
+    >>> WheelPositionInterface.check_availability(one, eid, dataset_index=dataset_index)
+    """
+
+    def __init__(self, eid: str, datasets: Iterable[str], file_sizes: dict[str, int] | None = None) -> None:
+        """
+        Parameters
+        ----------
+        eid : str
+            Session ID the datasets belong to.
+        datasets : iterable of str
+            Relative dataset paths as returned by `one.list_datasets(eid)`.
+        file_sizes : dict, optional
+            Mapping from dataset path to its size in bytes, when known.
+        """
+        self.eid = eid
+        self.datasets = [str(dataset) for dataset in datasets]
+        self.file_sizes = file_sizes or {}
+        self.revisions = set()
+
+        # (collection, filename) -> dataset paths, for exact requirements
+        self._by_collection_and_filename = {}
+        # filename -> dataset paths, for wildcard requirements with a literal filename
+        self._by_filename = {}
+        # top-level collection -> dataset paths, for wildcard requirements with a wildcard filename
+        self._by_root_collection = {}
+        self._query_cache = {}
+
+        for dataset in self.datasets:
+            collection, revision, filename = self.parse_dataset_path(dataset)
+            if revision is not None:
+                self.revisions.add(revision)
+            self._by_collection_and_filename.setdefault((collection, filename), []).append(dataset)
+            self._by_filename.setdefault(filename, []).append(dataset)
+            self._by_root_collection.setdefault(collection.split("/")[0], []).append(dataset)
+
+    @classmethod
+    def from_one(cls, one: ONE, eid: str) -> "SessionDatasetIndex":
+        """Build the index, including file sizes, from a single unfiltered `one.list_datasets(eid)` query."""
+        datasets_table = one.list_datasets(eid, details=True)
+        if len(datasets_table) == 0:
+            return cls(eid=eid, datasets=[])
+
+        datasets = datasets_table["rel_path"].astype(str).tolist()
+        file_sizes = {
+            dataset: int(file_size)
+            for dataset, file_size in zip(datasets, datasets_table["file_size"])
+            if not pd.isna(file_size)
+        }
+        return cls(eid=eid, datasets=sorted(datasets), file_sizes=file_sizes)
+
+    @staticmethod
+    def parse_dataset_path(dataset: str) -> tuple[str, str | None, str]:
+        """
+        Split a dataset path into collection, revision and filename.
+
+        Parameters
+        ----------
+        dataset : str
+            Relative dataset path, e.g. "alf/probe00/#2025-05-06#/_ibl_spikes.times.npy".
+
+        Returns
+        -------
+        tuple of (str, str or None, str)
+            Collection ("alf/probe00"), revision ("2025-05-06", or None if untagged), and filename.
+        """
+        *folders, filename = dataset.split("/")
+        revision = None
+        collection_parts = []
+        for folder in folders:
+            match = _REVISION_PATTERN.match(folder)
+            if match:
+                revision = match.group(1)
+            else:
+                collection_parts.append(folder)
+        return "/".join(collection_parts), revision, filename
+
+    def find(self, required_file: str) -> list[str]:
+        """
+        Return the datasets satisfying a requirement from `get_data_requirements()`.
+
+        Exact requirements match any revision, with or without the _ibl_ namespace: "alf/wheel.position.npy"
+        matches both "alf/wheel.position.npy" and "alf/#2025-05-06#/_ibl_wheel.position.npy". Requirements
+        containing "*" are matched as wildcard patterns against the full dataset paths.
+
+        Parameters
+        ----------
+        required_file : str
+            Required file, e.g. "alf/_ibl_trials.table.pqt" or "alf/probe*/spikes.times.npy".
+
+        Returns
+        -------
+        list of str
+            The matching dataset paths (empty if the requirement is not satisfied).
+        """
+        if required_file in self._query_cache:
+            return self._query_cache[required_file]
+
+        collection, _, filename = required_file.rpartition("/")
+        if "*" not in required_file:
+            matches = self._by_collection_and_filename.get((collection, filename), []) + (
+                self._by_collection_and_filename.get((collection, f"{_IBL_NAMESPACE_PREFIX}{filename}"), [])
+            )
+        else:
+            root_collection = required_file.split("/")[0]
+            if "*" not in filename:
+                candidates = self._by_filename.get(filename, [])
+            elif "*" not in root_collection:
+                candidates = self._by_root_collection.get(root_collection, [])
+            else:
+                candidates = self.datasets
+            pattern = _compile_wildcard_requirement(required_file)
+            matches = [dataset for dataset in candidates if pattern.search(dataset)]
+
+        self._query_cache[required_file] = matches
+        return matches
+
+    def contains(self, required_file: str) -> bool:
+        """Return True if at least one dataset satisfies the requirement (see `find`)."""
+        return bool(self.find(required_file))
+
+    def get_size_bytes(self, required_files: Iterable[str]) -> int:
+        """
+        Return the total size of the datasets satisfying any of the requirements.
+
+        Parameters
+        ----------
+        required_files : iterable of str
+            Requirements as accepted by `find`.
+
+        Returns
+        -------
+        int
+            Total size in bytes; datasets of unknown size count as 0.
+        """
+        matched_datasets = {dataset for required_file in required_files for dataset in self.find(required_file)}
+        return sum(self.file_sizes.get(dataset, 0) for dataset in matched_datasets)
+
+    def has_revision(self, revision: str) -> bool:
+        """Return True if any dataset of the session is tagged with this revision."""
+        return revision in self.revisions
+
+    def get_last_available_revision(self, candidates: list[str]) -> str | None:
+        """
+        Return the last revision of `candidates` that tags at least one dataset.
+
+        Parameters
+        ----------
+        candidates : list of str
+            Revision candidates, in order of preference (last wins).
+
+        Returns
+        -------
+        str | None
+            The last available revision, or None if none found.
+        """
+        found_revision = None
+        for revision in candidates:
+            if revision in self.revisions:
+                found_revision = revision
+        return found_revision
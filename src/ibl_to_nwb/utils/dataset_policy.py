@@ -0,0 +1,242 @@
+"""Chunking and compression of the datasets of an NWB file, chosen per kind of dataset.
+
+neuroconv configures every dataset alike: chunks of about 10 MB split across all axes, gzip level 4. This suits
+none of the largest datasets of the IBL files, each read in its own way: raw ephys by time windows across all
+channels, spike times by unit (through the ragged index), mean waveforms by unit, pose and wheel series by time
+window. A `DatasetPolicyRule` matches datasets by their location in the file and sets their chunk shape and
+filters; `apply_dataset_policy` applies the first matching rule of a policy to each dataset of a neuroconv
+backend configuration, before the write.
+
+Chunks always span every axis but the first, and are sized along it by a number of rows, a duration (from the
+rate or the timestamps of the series) or a number of bytes. Compression uses the hdf5plugin filters of a rule
+(e.g. Blosc with zstd and byte shuffle) only when asked to: reading them requires hdf5plugin on the reader side
+(``import hdf5plugin`` before opening the file), which most NWB readers do not do by default. Otherwise rules
+use gzip, preceded by the shuffle filter when they ask for it and neuroconv supports it.
+
+``benchmarks/compression_benchmark.py`` measures the compression ratio and read latency of these settings.
+"""
+
+import importlib.util
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from neuroconv.tools.hdmf import GenericDataChunkIterator
+
+# Size of the buffers in which iterators write the datasets whose chunk shape a rule changed
+BUFFER_GB = 1.0
+# Blosc (hdf5plugin) with zstd, level 5 and byte shuffle: numbers varying slowly from one element to the next
+# (sorted spike times, raw voltages) compress several times better once their bytes are grouped by significance
+BLOSC_ZSTD_SHUFFLE = ("Blosc", {"cname": "zstd", "clevel": 5, "shuffle": 1})
+
+
+@dataclass(frozen=True)
+class DatasetPolicyRule:
+    """
+    Chunk shape and filters of the datasets whose location matches a pattern.
+
+    The length of the chunks along the first axis is taken from the first of `chunk_rows`, `chunk_seconds`
+    (when the rate of the series is known) and `chunk_bytes` that is set; the other axes are never split.
+    A rule without any of them keeps the chunk shape of neuroconv.
+
+    Parameters
+    ----------
+    name : str
+        Name of the rule, reported for each dataset it applies to.
+    location_pattern : str
+        Regular expression searched in the location of the dataset in the file (e.g. "units/spike_times").
+    chunk_rows : int, optional
+        Number of rows per chunk, e.g. 1 for one unit per chunk.
+    chunk_seconds : float, optional
+        Duration covered by a chunk, for time series with a rate or timestamps.
+    chunk_bytes : int, optional
+        Uncompressed size of a chunk.
+    plugin_compressor : tuple of (str, dict), optional
+        hdf5plugin filter (name, options) used when plugin filters are enabled.
+    shuffle : bool, default: False
+        Shuffle the bytes before gzip, when plugin filters are not used.
+    """
+
+    name: str
+    location_pattern: str
+    chunk_rows: int | None = None
+    chunk_seconds: float | None = None
+    chunk_bytes: int | None = None
+    plugin_compressor: tuple[str, dict[str, Any]] | None = None
+    shuffle: bool = False
+    _compiled_pattern: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_compiled_pattern", re.compile(self.location_pattern))
+
+    def matches(self, location: str) -> bool:
+        """Return whether the rule applies to the dataset at `location`."""
+        return self._compiled_pattern.search(location) is not None
+
+    def get_chunk_shape(
+        self, full_shape: tuple[int, ...], dtype: np.dtype, rate: float | None = None
+    ) -> tuple[int, ...] | None:
+        """
+        Return the chunk shape of a dataset, or None to keep the default one.
+
+        Parameters
+        ----------
+        full_shape : tuple of int
+            Shape of the dataset.
+        dtype : numpy.dtype
+            Type of its elements.
+        rate : float, optional
+            Sampling rate of the series, in Hz, for `chunk_seconds`.
+        """
+        if len(full_shape) == 0 or full_shape[0] == 0:
+            return None
+        row_bytes = int(np.prod(full_shape[1:], dtype=np.int64)) * np.dtype(dtype).itemsize
+        if self.chunk_rows is not None:
+            chunk_length = self.chunk_rows
+        elif self.chunk_seconds is not None and rate:
+            chunk_length = int(round(self.chunk_seconds * rate))
+        elif self.chunk_bytes is not None:
+            chunk_length = self.chunk_bytes // max(1, row_bytes)
+        else:
+            return None
+        chunk_length = max(1, min(chunk_length, full_shape[0]))
+        return (chunk_length, *full_shape[1:])
+
+
+# Rules of the IBL files, the first matching one applies
+DEFAULT_DATASET_POLICY = (
+    # Raw ephys: windows of all channels (10 MB), the access of spike sorters and viewers
+    DatasetPolicyRule(
+        name="raw_ephys",
+        location_pattern=r"ElectricalSeries[^/]*/data$",
+        chunk_bytes=10_000_000,
+        plugin_compressor=BLOSC_ZSTD_SHUFFLE,
+        shuffle=True,
+    ),
+    # Spike times of all units concatenated, read one unit (a contiguous range) at a time
+    DatasetPolicyRule(
+        name="spike_times",
+        location_pattern=r"^units/spike_times$",
+        chunk_bytes=1024**2,
+        plugin_compressor=BLOSC_ZSTD_SHUFFLE,
+        shuffle=True,
+    ),
+    # Mean waveforms (units x samples x channels), read one unit at a time
+    DatasetPolicyRule(name="unit_waveforms", location_pattern=r"^units/waveform_(mean|sd)$", chunk_rows=1),
+    # Pose series (frames x 2, float32) and their confidence and timestamps, read by time window
+    DatasetPolicyRule(
+        name="pose_estimation",
+        location_pattern=r"^processing/pose_estimation/.+/(data|confidence|timestamps)$",
+        chunk_bytes=1024**2,
+        shuffle=True,
+    ),
+    # Wheel position and kinematics (1 kHz when resampled), read around trial events
+    DatasetPolicyRule(
+        name="wheel",
+        location_pattern=r"^processing/wheel/.+/(data|timestamps)$",
+        chunk_seconds=1.0,
+        shuffle=True,
+    ),
+)
+
+
+def is_plugin_compression_available() -> bool:
+    """Return whether hdf5plugin, which provides the Blosc and Zstd filters, is installed."""
+    return importlib.util.find_spec("hdf5plugin") is not None
+
+
+def _estimate_rate(neurodata_object: Any) -> float | None:
+    """Return the sampling rate of a time series: its rate, or the mean rate of its timestamps."""
+    rate = getattr(neurodata_object, "rate", None)
+    if rate:
+        return float(rate)
+    timestamps = getattr(neurodata_object, "timestamps", None)
+    # Series sharing the timestamps of another one hold that series
+    timestamps = getattr(timestamps, "timestamps", timestamps)
+    if timestamps is None or len(timestamps) < 2:
+        return None
+    duration = float(timestamps[-1]) - float(timestamps[0])
+    return (len(timestamps) - 1) / duration if duration > 0 else None
+
+
+def _compression_update(dataset_configuration: Any, method: str, options: dict | None, shuffle: bool) -> dict:
+    """Return the fields setting the filters of a dataset configuration, in the form of the neuroconv version."""
+    if "compressors" in type(dataset_configuration).model_fields:
+        return {
+            "compressors": ["shuffle", method] if shuffle else [method],
+            "compressor_options": [None, options] if shuffle else [options],
+        }
+    # Older neuroconv: a single compression method, without the shuffle filter
+    return {"compression_method": method, "compression_options": options}
+
+
+def apply_dataset_policy(
+    backend_configuration: Any,
+    nwbfile: Any,
+    policy: tuple[DatasetPolicyRule, ...] = DEFAULT_DATASET_POLICY,
+    plugin_filters: bool = False,
+) -> dict[str, str]:
+    """
+    Set the chunk shape and filters of the datasets of a backend configuration from a policy, in place.
+
+    Parameters
+    ----------
+    backend_configuration : HDF5BackendConfiguration
+        neuroconv backend configuration of `nwbfile` (``dataset_configurations`` by location).
+    nwbfile : NWBFile
+        The file about to be written, for the rate of the time series.
+    policy : tuple of DatasetPolicyRule, default: DEFAULT_DATASET_POLICY
+        Rules, the first matching one applies to each dataset; datasets matching none keep their configuration.
+    plugin_filters : bool, default: False
+        Use the hdf5plugin filters of the rules (requires hdf5plugin to write, and to read the file).
+
+    Returns
+    -------
+    dict
+        Location -> name of the rule applied, for the datasets matching a rule.
+
+    Raises
+    ------
+    ValueError
+        If plugin_filters is True and hdf5plugin is not installed.
+    """
+    if plugin_filters and not is_plugin_compression_available():
+        raise ValueError("plugin_filters requires hdf5plugin; install it with `pip install hdf5plugin`.")
+
+    applied_rules = {}
+    dataset_configurations = backend_configuration.dataset_configurations
+    for location, dataset_configuration in list(dataset_configurations.items()):
+        rule = next((rule for rule in policy if rule.matches(location)), None)
+        if rule is None:
+            continue
+
+        update = {}
+        rate = None
+        if rule.chunk_seconds is not None:
+            neurodata_object = nwbfile.objects.get(dataset_configuration.object_id)
+            rate = _estimate_rate(neurodata_object) if neurodata_object is not None else None
+        chunk_shape = rule.get_chunk_shape(dataset_configuration.full_shape, dataset_configuration.dtype, rate=rate)
+        if chunk_shape is not None:
+            # The buffer must hold whole chunks
+            buffer_shape = GenericDataChunkIterator.estimate_default_buffer_shape(
+                buffer_gb=BUFFER_GB,
+                chunk_shape=chunk_shape,
+                maxshape=dataset_configuration.full_shape,
+                dtype=dataset_configuration.dtype,
+            )
+            update.update(chunk_shape=chunk_shape, buffer_shape=buffer_shape)
+
+        if plugin_filters and rule.plugin_compressor is not None:
+            method, options = rule.plugin_compressor
+            # Blosc shuffles internally, the HDF5 shuffle filter would shuffle twice
+            update.update(_compression_update(dataset_configuration, method, dict(options), shuffle=False))
+        elif rule.shuffle and "compressors" in type(dataset_configuration).model_fields:
+            update.update(_compression_update(dataset_configuration, "gzip", None, shuffle=True))
+
+        if update:
+            # Chunk and buffer shapes are validated together, so they are replaced at once
+            dataset_configurations[location] = dataset_configuration.model_copy(update=update)
+        applied_rules[location] = rule.name
+
+    return applied_rules
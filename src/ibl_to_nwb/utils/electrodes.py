@@ -15,6 +15,7 @@ from probeinterface import Probe
 from probeinterface.neuropixels_tools import read_spikeglx
 from pynwb import NWBFile
 
+from .atlas import get_allen_atlas, get_brain_region_lookup
 from .probe_naming import get_ibl_probe_name
 
 
@@ -200,6 +201,9 @@ def _ensure_ibl_coordinates_um(
     return coords_um, coords_m
 
 
+_UNNAMED_ACRONYMS = ("out-of-atlas", "void", "root")
+
+
 def acronym_to_name(acronym: str, brain_regions: BrainRegions) -> str:
     """Convert a brain region acronym to its full name.
 
@@ -216,20 +220,28 @@ def acronym_to_name(acronym: str, brain_regions: BrainRegions) -> str:
         Full name of the brain region (e.g., "Primary visual area").
         Returns the acronym unchanged if not found in the atlas.
     """
-    if acronym in ("out-of-atlas", "void", "root"):
-        return acronym
-
-    try:
-        result = brain_regions.acronym2index(acronym)
-        idx = result[1]
-        if hasattr(idx, "__len__") and len(idx) > 0:
-            idx = idx[0]  # Take first match (non-lateralized)
-        name = brain_regions.name[idx]
-        if hasattr(name, "__len__") and not isinstance(name, str):
-            name = name[0]  # Take first name (non-lateralized)
-        return str(name)
-    except (IndexError, KeyError):
-        return acronym
+    return str(acronyms_to_names([acronym], brain_regions)[0])
+
+
+def acronyms_to_names(acronyms, brain_regions: BrainRegions | None = None) -> np.ndarray:
+    """Convert an array of brain region acronyms to their full names in one vectorized lookup.
+
+    Parameters
+    ----------
+    acronyms : array-like of str
+        Brain region acronyms (e.g., ["VISp", "CA1", "TH"]).
+    brain_regions : BrainRegions, optional
+        BrainRegions instance for lookups. Defaults to the shared instance.
+
+    Returns
+    -------
+    np.ndarray
+        Full names of the brain regions. "out-of-atlas", "void", "root" and acronyms
+        not found in the atlas are returned unchanged.
+    """
+    acronyms = np.asarray(acronyms, dtype=str)
+    names = get_brain_region_lookup(brain_regions).acronym_to_name(acronyms)
+    return np.where(np.isin(acronyms, _UNNAMED_ACRONYMS), acronyms, names)
 
 
 def convert_ibl_to_ccf3_coordinates(
@@ -320,8 +332,7 @@ def convert_ibl_to_ccf3_coordinates(
     ccf_acronyms[outside_mask] = "out-of-atlas"
 
     # Convert acronyms to full Allen CCFv3 names
-    brain_regions = BrainRegions()
-    ccf_region_names = np.array([acronym_to_name(acr, brain_regions) for acr in acronyms], dtype=str)
+    ccf_region_names = np.array(acronyms_to_names(acronyms), dtype=str)
     ccf_region_names[outside_mask] = "out-of-atlas"
 
     return {
@@ -594,7 +605,7 @@ def add_probe_electrodes_with_localization(
     pid : str
         Probe insertion UUID.
     atlas : AllenAtlas, optional
-        Atlas instance used to convert IBL coordinates to CCF. Created if not provided.
+        Atlas instance used to convert IBL coordinates to CCF. Defaults to the shared ``get_allen_atlas()``.
     meta_path : Path, optional
         Optional explicit path to the `.meta` file. When omitted the file is downloaded via ONE.
 
@@ -607,7 +618,7 @@ def add_probe_electrodes_with_localization(
     device_name = get_ibl_probe_name(probe_name)
     group_name = device_name
 
-    atlas = atlas or AllenAtlas()
+    atlas = atlas or get_allen_atlas()
 
     meta_path = _resolve_meta_path(one=one, eid=eid, probe_name=probe_name, meta_path=meta_path)
 
@@ -690,7 +701,7 @@ def add_probe_electrodes_with_localization(
 
     # Fetch histology channel data.
     # Note: Histology data is ALF data (revision-dependent), always use BWM standard revision
-    atlas = atlas or AllenAtlas()
+    atlas = atlas or get_allen_atlas()
 
     BWM_REVISION = "2025-05-06"  # Must match IblAnatomicalLocalizationInterface.REVISION
     loader = SpikeSortingLoader(pid=pid, eid=eid, pname=probe_name, one=one, atlas=atlas, revision=BWM_REVISION)
@@ -1,11 +1,14 @@
 """Utilities for decompressing SpikeGLX ephys data."""
 
+import json
+import os
 import shutil
-import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import spikeglx
+import mtscomp
+import numpy as np
 from one.alf.spec import is_uuid_string
 
 
@@ -32,14 +35,154 @@ def remove_uuid_from_filepath(file_path: Path) -> Path:
         return file_path
 
 
+# mtscomp chunks (1 s of data each) decompressed per process-pool task
+DEFAULT_CHUNKS_PER_TASK = 16
+
+
+def _decompress_chunk_batch(
+    cbin_path: str, ch_path: str, output_path: str, progress_path: str, chunk_indices: list[int]
+) -> int:
+    """
+    Decompress a batch of mtscomp chunks into their offsets of the preallocated output file.
+
+    Runs in a worker process. Each chunk is marked in the progress bitmap only after its data has been
+    written, so an interrupted run never records a chunk that was not fully written.
+
+    Parameters
+    ----------
+    cbin_path : str
+        Path to the compressed .cbin file.
+    ch_path : str
+        Path to the mtscomp .ch header.
+    output_path : str
+        Path to the preallocated decompressed output.
+    progress_path : str
+        Path to the completed-chunk bitmap (one byte per chunk).
+    chunk_indices : list of int
+        Chunks to decompress.
+
+    Returns
+    -------
+    int
+        Number of chunks written.
+    """
+    reader = mtscomp.Reader(cache_size=1, quiet=True)
+    reader.open(cbin_path, ch_path)
+    bytes_per_sample = reader.n_channels * reader.dtype.itemsize
+    output_fd = os.open(output_path, os.O_WRONLY)
+    progress_fd = os.open(progress_path, os.O_WRONLY)
+    try:
+        for chunk_index in chunk_indices:
+            chunk_start = reader.chunk_offsets[chunk_index]
+            chunk_length = reader.chunk_offsets[chunk_index + 1] - chunk_start
+            chunk = reader.read_chunk(chunk_index, chunk_start, chunk_length)
+            os.pwrite(output_fd, chunk.tobytes(), reader.chunk_bounds[chunk_index] * bytes_per_sample)
+            os.pwrite(progress_fd, b"\x01", chunk_index)
+    finally:
+        os.close(output_fd)
+        os.close(progress_fd)
+        reader.close()
+    return len(chunk_indices)
+
+
+def _decompress_cbin_chunks(
+    file_cbin: Path,
+    file_ch: Path,
+    target_bin: Path,
+    executor: ProcessPoolExecutor,
+    chunks_per_task: int = DEFAULT_CHUNKS_PER_TASK,
+) -> int:
+    """
+    Decompress one .cbin with its independent mtscomp chunks spread over a process pool.
+
+    The output is preallocated at its final size in ``<target>.bin_temp`` and every chunk is written at its
+    computed offset. Completed chunks are recorded in ``<target>.bin_progress`` (one byte per chunk), so a run
+    interrupted (e.g. by a phase timeout) resumes with the missing chunks only. The temporary file is renamed
+    to ``target_bin`` once all chunks are written.
+
+    Parameters
+    ----------
+    file_cbin : Path
+        Path to the .cbin file.
+    file_ch : Path
+        Path to the mtscomp .ch header.
+    target_bin : Path
+        Path of the decompressed output.
+    executor : ProcessPoolExecutor
+        Pool the chunk batches are submitted to.
+    chunks_per_task : int, default: 16
+        Number of consecutive chunks decompressed per task.
+
+    Returns
+    -------
+    int
+        Number of chunks decompressed by this call (0 if nothing was left to do).
+    """
+    with open(file_ch) as file:
+        compression_header = json.load(file)
+    chunk_bounds = compression_header["chunk_bounds"]
+    num_chunks = len(chunk_bounds) - 1
+    num_bytes = chunk_bounds[-1] * compression_header["n_channels"] * np.dtype(compression_header["dtype"]).itemsize
+
+    temp_bin = target_bin.with_suffix(".bin_temp")
+    progress_file = target_bin.with_suffix(".bin_progress")
+
+    # Resume only when both the output and its bitmap are consistent with this .cbin; otherwise start over
+    can_resume = (
+        temp_bin.exists()
+        and progress_file.exists()
+        and temp_bin.stat().st_size == num_bytes
+        and progress_file.stat().st_size == num_chunks
+    )
+    if not can_resume:
+        with open(temp_bin, "wb") as file:
+            file.truncate(num_bytes)
+        with open(progress_file, "wb") as file:
+            file.write(bytes(num_chunks))
+
+    completed_chunks = np.frombuffer(progress_file.read_bytes(), dtype=np.uint8).astype(bool)
+    missing_chunks = np.flatnonzero(~completed_chunks).tolist()
+
+    futures = [
+        executor.submit(
+            _decompress_chunk_batch,
+            str(file_cbin),
+            str(file_ch),
+            str(temp_bin),
+            str(progress_file),
+            missing_chunks[start : start + chunks_per_task],
+        )
+        for start in range(0, len(missing_chunks), chunks_per_task)
+    ]
+    try:
+        for future in as_completed(futures):
+            future.result()
+    except BaseException:
+        # Interrupted (error or phase timeout): drop queued batches, keep the bitmap for the next run
+        for pending_future in futures:
+            pending_future.cancel()
+        raise
+
+    completed_chunks = np.frombuffer(progress_file.read_bytes(), dtype=np.uint8).astype(bool)
+    if not completed_chunks.all():
+        raise RuntimeError(
+            f"Decompression of {file_cbin} finished with {int((~completed_chunks).sum())} chunk(s) not written."
+        )
+    shutil.move(temp_bin, target_bin)
+    progress_file.unlink()
+    return len(missing_chunks)
+
+
 def _decompress_single_cbin(
     file_cbin: Path,
     source_folder: Path,
     target_folder: Path | None,
     remove_uuid: bool,
+    executor: ProcessPoolExecutor,
+    chunks_per_task: int = DEFAULT_CHUNKS_PER_TASK,
 ) -> str:
     """
-    Decompress a single .cbin file to .bin.
+    Decompress a single .cbin file to .bin, one process-pool task per batch of mtscomp chunks.
 
     Parameters
     ----------
@@ -51,6 +194,10 @@ def _decompress_single_cbin(
         Target folder for output, or None for in-place
     remove_uuid : bool
         Whether to remove UUID from output filenames
+    executor : ProcessPoolExecutor
+        Pool the chunk batches are submitted to
+    chunks_per_task : int, default: 16
+        Number of consecutive mtscomp chunks decompressed per task
 
     Returns
     -------
@@ -86,19 +233,17 @@ def _decompress_single_cbin(
             f"Required .ch file not found: {file_ch}\n" f"Expected to find channel file alongside {file_cbin}"
         )
 
-    # Suppress geometry warning for LF files
-    # LF meta files lack snsShankMap but use default NP geometry correctly
-    with warnings.catch_warnings():
-        warnings.filterwarnings(
-            "ignore",
-            message="Meta data doesn't have geometry.*returning defaults",
-            category=UserWarning,
-            module="spikeglx",
-        )
-        # Decompress and copy metadata
-        spikeglx.Reader(file_cbin, meta_file=file_meta, ch_file=file_ch).decompress_to_scratch(
-            scratch_dir=target_bin.parent
-        )
+    # Copy metadata next to the output and decompress the chunks in parallel (resumes an interrupted run)
+    target_meta = target_bin.parent / file_meta.name
+    if target_meta != file_meta:
+        shutil.copy(file_meta, target_meta)
+    _decompress_cbin_chunks(
+        file_cbin=file_cbin,
+        file_ch=file_ch,
+        target_bin=target_bin,
+        executor=executor,
+        chunks_per_task=chunks_per_task,
+    )
 
     # Remove UUID from output filenames if requested
     if remove_uuid:
@@ -118,17 +263,19 @@ def decompress_ephys_cbins(
     target_folder: Path | None = None,
     remove_uuid: bool = True,
     max_workers: int | None = None,
+    chunks_per_task: int = DEFAULT_CHUNKS_PER_TASK,
+    pattern: str = "*.cbin",
 ) -> None:
     """
     Decompress SpikeGLX .cbin files to .bin files.
 
     This function decompresses compressed SpikeGLX ephys data files (.cbin) to
     uncompressed binary files (.bin) for faster data access. It also copies
-    associated metadata (.meta) and channel (.ch) files.
+    associated metadata (.meta) files.
 
-    The function suppresses harmless geometry warnings that occur when LF (local
-    field potential) meta files lack snsShankMap fields. LF files use default
-    Neuropixel geometry which is correct for these recordings.
+    Each file is split into its independent mtscomp chunks, which are decompressed
+    by a process pool directly into a preallocated output at their computed offsets,
+    so a single large AP file uses every core.
 
     Parameters
     ----------
@@ -140,19 +287,21 @@ def decompress_ephys_cbins(
     remove_uuid : bool, default=True
         If True, removes UUID strings from output filenames for cleaner naming
     max_workers : int, optional
-        Maximum number of parallel decompression threads. Default is None,
-        which uses min(4, number of .cbin files) to balance parallelism with
-        I/O bandwidth. Set to 1 for sequential execution with cleaner logs.
+        Number of decompression processes. Default is None, which uses all CPUs.
+        Set to 1 for sequential execution.
+    chunks_per_task : int, default=16
+        Number of consecutive mtscomp chunks (1 s of data each) per process-pool task.
+    pattern : str, default="*.cbin"
+        Glob pattern of the files to decompress, e.g. "*.nidq*.cbin" for the NIDQ stream only.
 
     Notes
     -----
     - Only decompresses files that don't already exist at the target location
     - Preserves directory structure when using target_folder
-    - Suppresses spikeglx geometry warnings during decompression (these are
-      harmless and occur because LF meta files lack spatial geometry fields)
-    - Uses multithreading for parallel decompression of multiple files
-    - Progress bars from parallel files will interleave but STARTING/FINISHED
-      markers help identify which file completed
+    - Files are processed one after the other, each one with all the workers
+    - Completed chunks are recorded in a ``.bin_progress`` bitmap next to the
+      ``.bin_temp`` output; a run interrupted by a phase timeout resumes with the
+      missing chunks instead of restarting
     """
     # Clean up macOS hidden files from source folder before processing
     # This prevents spikeglx.Reader from encountering ._* AppleDouble files
@@ -163,14 +312,13 @@ def decompress_ephys_cbins(
             hidden_file.unlink()
 
     # Find all compressed binary files
-    cbin_files = sorted(source_folder.rglob("*.cbin"))
+    cbin_files = sorted(source_folder.rglob(pattern))
     if len(cbin_files) == 0:
         return  # No files to decompress
 
-    # Determine number of workers
-    # Default to min(4, n_files) to balance parallelism with I/O bandwidth
+    # Determine number of worker processes
     if max_workers is None:
-        max_workers = min(4, len(cbin_files))
+        max_workers = os.cpu_count() or 1
     max_workers = max(1, max_workers)
 
     # Helper to get short name for logging (e.g., "probe00a/...ap.cbin")
@@ -182,42 +330,23 @@ def decompress_ephys_cbins(
             return f"{parent}/{name}"
         return name
 
-    print(f"  Found {len(cbin_files)} .cbin files to decompress (using {max_workers} workers)")
+    print(f"  Found {len(cbin_files)} .cbin files to decompress (using {max_workers} processes)")
     for cbin_file in cbin_files:
         print(f"    - {short_name(cbin_file)}")
 
-    if max_workers == 1:
-        # Single-threaded execution
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
         for index, file_cbin in enumerate(cbin_files, 1):
             print(f"  [{index}/{len(cbin_files)}] Decompressing {short_name(file_cbin)}...")
-            result = _decompress_single_cbin(file_cbin, source_folder, target_folder, remove_uuid)
-            print(f"    {result}")
-    else:
-        # Multi-threaded execution
-        # Note: Progress bars from spikeglx/mtscomp will interleave but we print
-        # start/end markers to help identify which file each progress bar belongs to
-        completed = 0
-        print(f"  Starting parallel decompression of {len(cbin_files)} files...")
-        for cbin_file in cbin_files:
-            print(f"    STARTING: {short_name(cbin_file)}")
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(
-                    _decompress_single_cbin,
+            start_time = time.time()
+            try:
+                result = _decompress_single_cbin(
                     file_cbin,
                     source_folder,
                     target_folder,
                     remove_uuid,
-                ): file_cbin
-                for file_cbin in cbin_files
-            }
-
-            for future in as_completed(futures):
-                file_cbin = futures[future]
-                completed += 1
-                try:
-                    result = future.result()
-                    print(f"  [{completed}/{len(cbin_files)}] FINISHED: {short_name(file_cbin)}: {result}")
-                except Exception as e:
-                    raise RuntimeError(f"Failed to decompress {file_cbin}: {e}") from e
+                    executor=executor,
+                    chunks_per_task=chunks_per_task,
+                )
+            except Exception as e:
+                raise RuntimeError(f"Failed to decompress {file_cbin}: {e}") from e
+            print(f"    {result} ({time.time() - start_time:.1f}s)")
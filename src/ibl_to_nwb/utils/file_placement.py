@@ -0,0 +1,167 @@
+"""Place files (e.g. raw videos from the ONE cache) into the output folder without copying their data when possible."""
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Literal
+
+PlacementStrategy = Literal["hardlink", "reflink", "symlink", "move", "copy"]
+PLACEMENT_STRATEGIES = ("hardlink", "reflink", "symlink", "move", "copy")
+
+# ioctl cloning a whole file (copy-on-write) on Btrfs, XFS (reflink=1), OCFS2 and bcachefs; from linux/fs.h
+_FICLONE = 0x40049409
+
+# Errors meaning "this filesystem (pair) cannot do it", after which the file is copied instead
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS}
+
+
+def place_file(source: Path, destination: Path, strategy: PlacementStrategy = "hardlink") -> int:
+    """
+    Make `destination` hold the content of `source`, copying data only when the strategy cannot be used.
+
+    Strategies, from cheapest to most expensive:
+
+    - "hardlink": a second name for the same inode; O(1), the cache file stays in place.
+    - "reflink": a copy-on-write clone (FICLONE, then ``os.copy_file_range`` which may clone in the kernel).
+    - "symlink": a link to the absolute source path; only valid while the cache exists, so not for uploads.
+    - "move": renames the source (the cache file is gone afterwards, a re-run downloads it again).
+    - "copy": a full data copy.
+
+    "hardlink", "reflink" and "move" fall back to a copy when the source and destination are on different
+    filesystems, or the filesystem does not support the operation. An existing destination is replaced.
+
+    Parameters
+    ----------
+    source : Path
+        File to place.
+    destination : Path
+        Target path; its parent folder must exist.
+    strategy : {"hardlink", "reflink", "symlink", "move", "copy"}, default: "hardlink"
+        How to place the file.
+
+    Returns
+    -------
+    int
+        Number of bytes copied through user space or ``copy_file_range`` (0 for links, clones and renames).
+    """
+    if strategy not in PLACEMENT_STRATEGIES:
+        raise ValueError(f"Unknown placement strategy '{strategy}'; use one of {PLACEMENT_STRATEGIES}.")
+    source = Path(source)
+    destination = Path(destination)
+    if not source.is_file():
+        raise FileNotFoundError(f"Cannot place {source}: file not found.")
+
+    if destination.exists() or destination.is_symlink():
+        if strategy != "symlink" and destination.exists() and os.path.samefile(source, destination):
+            # Already placed by a previous run (hardlink or move onto itself)
+            return 0
+        destination.unlink()
+
+    if strategy == "symlink":
+        destination.symlink_to(source.resolve())
+        return 0
+
+    if strategy == "hardlink":
+        try:
+            os.link(source, destination)
+            return 0
+        except OSError as error:
+            if error.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+        return _copy(source, destination)
+
+    if strategy == "move":
+        try:
+            os.rename(source, destination)
+            return 0
+        except OSError as error:
+            if error.errno != errno.EXDEV:
+                raise
+        bytes_copied = _copy(source, destination)
+        source.unlink()
+        return bytes_copied
+
+    if strategy == "reflink":
+        return _reflink_or_copy(source, destination)
+
+    return _copy(source, destination)
+
+
+def clone_file(source: Path, destination: Path) -> bool:
+    """
+    Make `destination` a copy-on-write clone of `source` (FICLONE), never copying the data.
+
+    Unlike ``place_file(..., strategy="reflink")``, nothing is copied when the filesystem cannot clone: use it
+    when a full copy of `source` (e.g. a raw NWB file) would be too expensive to fall back on.
+
+    Parameters
+    ----------
+    source : Path
+        File to clone.
+    destination : Path
+        Target path; its parent folder must exist. An existing destination is replaced.
+
+    Returns
+    -------
+    bool
+        True if the file was cloned; False if the platform or filesystem cannot clone it, `destination` then
+        not existing.
+    """
+    source = Path(source)
+    destination = Path(destination)
+    if not source.is_file():
+        raise FileNotFoundError(f"Cannot clone {source}: file not found.")
+    if sys.platform != "linux":
+        return False
+
+    import fcntl  # Unix only
+
+    try:
+        with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+            try:
+                fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+                return True
+            except OSError as error:
+                if error.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
+    destination.unlink()
+    return False
+
+
+def _copy(source: Path, destination: Path) -> int:
+    shutil.copyfile(src=source, dst=destination)
+    return destination.stat().st_size
+
+
+def _reflink_or_copy(source: Path, destination: Path) -> int:
+    import fcntl  # Unix only
+
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+            return 0
+        except OSError as error:
+            if error.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+
+        # The kernel may still clone or copy server-side (NFS, CIFS) without going through user space
+        size = os.fstat(source_file.fileno()).st_size
+        bytes_copied = 0
+        try:
+            while bytes_copied < size:
+                copied = os.copy_file_range(source_file.fileno(), destination_file.fileno(), size - bytes_copied)
+                if copied == 0:
+                    break
+                bytes_copied += copied
+        except OSError as error:
+            if error.errno not in _UNSUPPORTED_ERRNOS or bytes_copied:
+                raise
+        if bytes_copied == size:
+            return bytes_copied
+
+    return _copy(source, destination)
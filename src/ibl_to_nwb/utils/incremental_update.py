@@ -0,0 +1,448 @@
+"""Incremental updates of written NWB files, interface by interface.
+
+Each conversion records in its NWB file (root attribute ``ibl_to_nwb_interface_provenance``, a JSON object) one
+entry per interface, keyed by a stable name such as ``IblPoseEstimationInterface[leftCamera]``:
+
+- ``fingerprint``: hash of the interface class, its parameters (camera, revision, tracker), its conversion options,
+  and the path (revision folder included) and size of every session dataset matching its data requirements;
+- ``object_ids``: the object ids of the containers its ``add_to_nwbfile`` created;
+- ``replaceable``: whether those containers can be removed on their own, i.e. they sit directly in the file or in
+  a container shared by several interfaces (processing module, pose skeletons). Interfaces that add rows or
+  columns to the containers of others (e.g. the anatomical localization adds electrode columns) are not.
+
+`plan_incremental_update` compares the record of an existing file to the fingerprints of the interfaces of the
+current conversion: interfaces without an entry are missing, those with another fingerprint are stale. The
+conversion then opens a copy of the file in append mode (`read_nwbfile_for_update`), after removing the containers
+of the stale interfaces from it, writes the missing and stale interfaces only, and replaces the file with the
+copy (`write_updated_nwbfile`). A failed update leaves the file as it was; `discard_nwbfile_update` closes and
+removes the copy. Session-level containers (subject, electrodes, probe trajectories) are never updated this way.
+
+The copy is a copy-on-write clone on filesystems supporting it (Btrfs, XFS), a full copy otherwise: an update
+needs the free space of a second file while it runs. Where a full copy is too expensive (raw files of tens of GB),
+`read_nwbfile_for_update(..., copy_if_no_clone=False)` updates the file in place instead of copying it. The file
+is then marked incomplete (`mark_nwbfile_incomplete`) for the duration of the update: a failed update leaves it
+failing `validate_nwbfile_integrity`, and the next conversion writes it again in full.
+
+HDF5 does not reclaim the space of removed containers; repack the file (``h5repack``) after many updates.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import h5py
+from neuroconv.tools.nwb_helpers import BackendConfiguration, configure_backend
+from pynwb import NWBHDF5IO, NWBFile
+
+from .dataset_index import SessionDatasetIndex
+from .file_placement import clone_file, place_file
+from .nwb_integrity import mark_nwbfile_incomplete, validate_nwbfile_integrity
+
+INTERFACE_PROVENANCE_ATTRIBUTE = "ibl_to_nwb_interface_provenance"
+PROVENANCE_FORMAT_VERSION = 1
+# Containers several interfaces add to: an interface owns the children it added, not the container
+SHARED_CONTAINER_TYPES = ("ProcessingModule", "Skeletons")
+# Interface attributes that change what add_to_nwbfile writes, beyond the data requirements arguments
+_FINGERPRINT_ATTRIBUTES = ("revision", "tracker")
+# Conversion options that do not change the written data
+_OUTPUT_NEUTRAL_OPTIONS = ("iterator_options",)
+
+
+def _get_requirements_arguments(data_interface) -> dict:
+    """Return the arguments of the interface's get_data_requirements (e.g. camera_name), read from the instance."""
+    get_data_requirements = getattr(type(data_interface), "get_data_requirements", None)
+    if get_data_requirements is None:
+        return {}
+    return {
+        name: getattr(data_interface, name)
+        for name, parameter in inspect.signature(get_data_requirements).parameters.items()
+        if parameter.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+    }
+
+
+def _strip_output_neutral_options(conversion_options: dict) -> dict:
+    return {
+        name: _strip_output_neutral_options(value) if isinstance(value, dict) else value
+        for name, value in conversion_options.items()
+        if name not in _OUTPUT_NEUTRAL_OPTIONS
+    }
+
+
+def get_interface_provenance(
+    data_interface, dataset_index: SessionDatasetIndex, conversion_options: dict | None = None
+) -> tuple[str, str]:
+    """
+    Return the provenance key and fingerprint of an interface of a conversion.
+
+    The fingerprint changes when a dataset the interface may read is added, removed, resized or published under
+    a new revision; this is conservative (a new revision of a file the interface does not load also changes it).
+
+    Parameters
+    ----------
+    data_interface : BaseDataInterface
+        The interface (or converter); its class and get_data_requirements() declare its inputs.
+    dataset_index : SessionDatasetIndex
+        The datasets of the session.
+    conversion_options : dict, optional
+        The options passed to its add_to_nwbfile().
+
+    Returns
+    -------
+    tuple of (str, str)
+        The key, e.g. "IblPoseEstimationInterface[leftCamera]", stable across conversions of the session, and the
+        fingerprint.
+    """
+    interface_class = type(data_interface)
+    arguments = _get_requirements_arguments(data_interface)
+    key = interface_class.__name__
+    if arguments:
+        key += f"[{','.join(str(value) for value in arguments.values())}]"
+
+    datasets = set()
+    if hasattr(interface_class, "get_data_requirements"):
+        requirements = interface_class.get_data_requirements(**arguments)
+        for option_files in requirements["exact_files_options"].values():
+            for required_file in option_files:
+                datasets.update(dataset_index.find(required_file))
+
+    inputs = {
+        "interface": f"{interface_class.__module__}.{interface_class.__qualname__}",
+        "arguments": arguments,
+        "attributes": {name: getattr(data_interface, name, None) for name in _FINGERPRINT_ATTRIBUTES},
+        "conversion_options": _strip_output_neutral_options(conversion_options or {}),
+        "datasets": {dataset: dataset_index.file_sizes.get(dataset) for dataset in sorted(datasets)},
+    }
+    fingerprint = hashlib.blake2b(json.dumps(inputs, sort_keys=True, default=str).encode(), digest_size=16)
+    return key, fingerprint.hexdigest()
+
+
+def get_container_ids(nwbfile: NWBFile) -> set[str]:
+    """Return the object ids of all containers of the NWBFile, to diff before and after an add_to_nwbfile()."""
+    return {container.object_id for container in nwbfile.all_children() if container.object_id is not None}
+
+
+def describe_added_containers(nwbfile: NWBFile, container_ids_before: set[str]) -> dict:
+    """
+    Describe the containers added to the NWBFile since `container_ids_before`, as a provenance record entry.
+
+    Parameters
+    ----------
+    nwbfile : NWBFile
+        The NWBFile, after the add_to_nwbfile() of one interface.
+    container_ids_before : set of str
+        `get_container_ids(nwbfile)` before that add_to_nwbfile().
+
+    Returns
+    -------
+    dict
+        "object_ids": the topmost added containers (shared containers excepted, see SHARED_CONTAINER_TYPES),
+        "replaceable": whether each of them sits in the file root or in a shared container.
+    """
+    added = {
+        container.object_id: container
+        for container in nwbfile.all_children()
+        if container.object_id is not None and container.object_id not in container_ids_before
+    }
+
+    def is_shared(container) -> bool:
+        return getattr(container, "neurodata_type", type(container).__name__) in SHARED_CONTAINER_TYPES
+
+    object_ids = []
+    replaceable = True
+    for object_id, container in added.items():
+        if is_shared(container):
+            continue
+        parent = container.parent
+        if parent is not None and parent.object_id in added and not is_shared(parent):
+            continue  # Removed with its parent
+        object_ids.append(object_id)
+        replaceable = replaceable and (isinstance(parent, NWBFile) or is_shared(parent))
+    return {"object_ids": sorted(object_ids), "replaceable": replaceable}
+
+
+def read_interface_provenance(nwbfile_path: Path) -> dict[str, dict] | None:
+    """Return the provenance record of an NWB file (key -> entry), or None if it was written without one."""
+    with h5py.File(nwbfile_path, "r") as nwbfile:
+        record = nwbfile.attrs.get(INTERFACE_PROVENANCE_ATTRIBUTE)
+    if record is None:
+        return None
+    record = json.loads(record.decode() if isinstance(record, bytes) else record)
+    if record.get("format_version") != PROVENANCE_FORMAT_VERSION:
+        raise ValueError(f"unsupported interface provenance format {record.get('format_version')}")
+    return record["interfaces"]
+
+
+def write_interface_provenance(nwbfile_path: Path, interface_records: dict[str, dict]) -> None:
+    """
+    Store the provenance record of the interfaces in the NWB file; call it before `finalize_nwbfile`.
+
+    Parameters
+    ----------
+    nwbfile_path : Path
+        The NWB file, closed.
+    interface_records : dict
+        Key -> {"fingerprint", "object_ids", "replaceable"} of every interface in the file.
+    """
+    record = {"format_version": PROVENANCE_FORMAT_VERSION, "interfaces": interface_records}
+    with h5py.File(nwbfile_path, "r+") as nwbfile:
+        nwbfile.attrs[INTERFACE_PROVENANCE_ATTRIBUTE] = json.dumps(record, sort_keys=True)
+
+
+@dataclass
+class IncrementalUpdatePlan:
+    """What an incremental update of an NWB file writes, from `plan_incremental_update`."""
+
+    nwbfile_path: Path
+    # Provenance record of the file
+    interface_records: dict[str, dict]
+    up_to_date: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    stale: list[str] = field(default_factory=list)
+    # Recorded but not part of the conversion any more (e.g. the data was withdrawn); left in the file
+    obsolete: list[str] = field(default_factory=list)
+    # Set by read_nwbfile_for_update when the file could not be cloned and is updated without a copy
+    in_place: bool = False
+
+    @property
+    def update_path(self) -> Path:
+        """File the update is written to: a copy replacing the file once complete, or the file itself in place."""
+        if self.in_place:
+            return self.nwbfile_path
+        return self.nwbfile_path.with_name(f"{self.nwbfile_path.name}.update")
+
+    @property
+    def interfaces_to_write(self) -> list[str]:
+        return self.missing + self.stale
+
+    @property
+    def object_ids_to_remove(self) -> list[str]:
+        return [object_id for key in self.stale for object_id in self.interface_records[key]["object_ids"]]
+
+
+def _get_object_id(h5_object) -> str | None:
+    object_id = h5_object.attrs.get("object_id")
+    return object_id.decode() if isinstance(object_id, bytes) else object_id
+
+
+def _iterate_links(group: h5py.Group):
+    """Yield (path, object or None, link) for every link under `group`, objects before their children."""
+    for name in group:
+        link = group.get(name, getlink=True)
+        path = f"{group.name.rstrip('/')}/{name}"
+        if isinstance(link, h5py.HardLink):
+            h5_object = group[name]
+            yield path, h5_object, link
+            if isinstance(h5_object, h5py.Group):
+                yield from _iterate_links(h5_object)
+        else:
+            yield path, None, link
+
+
+def _referenced_paths(nwbfile: h5py.File, h5_object) -> set[str]:
+    """Return the paths the object references in its attributes or (reference-typed) data."""
+    references = [value for value in h5_object.attrs.values() if isinstance(value, h5py.Reference)]
+    if isinstance(h5_object, h5py.Dataset) and h5_object.dtype.kind in "OV":
+        if h5_object.dtype.names:
+            fields = [name for name in h5_object.dtype.names if h5py.check_dtype(ref=h5_object.dtype[name])]
+            data = h5_object[()] if fields else None
+            for name in fields:
+                references.extend(data[name].ravel())
+        elif h5py.check_dtype(ref=h5_object.dtype) is h5py.Reference:
+            references.extend(h5_object[()].ravel())
+    return {nwbfile[reference].name for reference in references if isinstance(reference, h5py.Reference) and reference}
+
+
+def _locate_containers_to_remove(nwbfile: h5py.File, update_plan: IncrementalUpdatePlan) -> list[str]:
+    """Return the paths of the stale containers, checking that nothing kept in the file refers to them."""
+    object_ids_to_remove = set(update_plan.object_ids_to_remove)
+    kept_object_ids = {
+        object_id
+        for key, entry in update_plan.interface_records.items()
+        if key not in update_plan.stale
+        for object_id in entry["object_ids"]
+    }
+    links = list(_iterate_links(nwbfile))
+    paths = {_get_object_id(h5_object): path for path, h5_object, _ in links if h5_object is not None}
+
+    not_found = object_ids_to_remove - paths.keys()
+    if not_found:
+        raise ValueError(f"containers {sorted(not_found)} of the provenance record are not in the file")
+    removed_paths = sorted(paths[object_id] for object_id in object_ids_to_remove)
+
+    def is_removed(path: str) -> bool:
+        return any(path == removed_path or path.startswith(f"{removed_path}/") for removed_path in removed_paths)
+
+    for path, h5_object, link in links:
+        if not is_removed(path):
+            targets = {link.path} if isinstance(link, h5py.SoftLink) else set()
+            if h5_object is not None:
+                targets |= _referenced_paths(nwbfile, h5_object)
+            referenced = sorted(target for target in targets if is_removed(target))
+            if referenced:
+                raise ValueError(f"{path} refers to {referenced}, written by a stale interface")
+        elif h5_object is not None and _get_object_id(h5_object) in kept_object_ids:
+            raise ValueError(f"{path}, written by an up-to-date interface, is inside a stale container")
+    return removed_paths
+
+
+def plan_incremental_update(nwbfile_path: Path, interface_fingerprints: dict[str, str]) -> IncrementalUpdatePlan:
+    """
+    Compare an existing NWB file to the interfaces of a conversion and plan its incremental update.
+
+    Parameters
+    ----------
+    nwbfile_path : Path
+        The existing NWB file.
+    interface_fingerprints : dict
+        Key -> fingerprint of every interface of the conversion (see `get_interface_provenance`).
+
+    Returns
+    -------
+    IncrementalUpdatePlan
+        The interfaces to write; none when the file is up to date.
+
+    Raises
+    ------
+    ValueError
+        If the file cannot be updated incrementally: it fails `validate_nwbfile_integrity`, has no provenance
+        record, or the containers of a stale interface cannot be removed on their own. Convert the whole
+        session instead.
+    """
+    nwbfile_path = Path(nwbfile_path)
+    validate_nwbfile_integrity(nwbfile_path)
+    interface_records = read_interface_provenance(nwbfile_path)
+    if interface_records is None:
+        raise ValueError("no interface provenance record (written before incremental updates)")
+
+    update_plan = IncrementalUpdatePlan(nwbfile_path=nwbfile_path, interface_records=interface_records)
+    for key, fingerprint in interface_fingerprints.items():
+        if key not in interface_records:
+            update_plan.missing.append(key)
+        elif interface_records[key]["fingerprint"] != fingerprint:
+            update_plan.stale.append(key)
+        else:
+            update_plan.up_to_date.append(key)
+    update_plan.obsolete = sorted(interface_records.keys() - interface_fingerprints.keys())
+
+    not_replaceable = [key for key in update_plan.stale if not interface_records[key]["replaceable"]]
+    if not_replaceable:
+        raise ValueError(f"stale {not_replaceable} modified containers of other interfaces and cannot be replaced")
+    if update_plan.stale:
+        with h5py.File(nwbfile_path, "r") as nwbfile:
+            _locate_containers_to_remove(nwbfile, update_plan)
+    return update_plan
+
+
+def read_nwbfile_for_update(update_plan: IncrementalUpdatePlan, copy_if_no_clone: bool = True) -> NWBFile:
+    """
+    Copy the NWB file, remove the containers of the stale interfaces from the copy and open it in append mode.
+
+    The file itself is not modified: `write_updated_nwbfile` replaces it with the copy once the update is written.
+    The completion marker of the copy is removed first, so that the file fails `validate_nwbfile_integrity` and
+    is converted again in full if the process stops between that replacement and `finalize_nwbfile`.
+
+    When the filesystem cannot clone the file and `copy_if_no_clone` is False, the file itself is updated
+    (``update_plan.in_place`` is set): its completion marker is removed before any change, so that a failed
+    update leaves it invalid rather than half-updated.
+
+    Parameters
+    ----------
+    update_plan : IncrementalUpdatePlan
+        The plan of the update.
+    copy_if_no_clone : bool, default: True
+        Whether to fall back on a full copy of the file when it cannot be cloned, rather than updating it in place.
+
+    Returns
+    -------
+    NWBFile
+        The content of the copy, to add the missing and stale interfaces to, then pass to `write_updated_nwbfile`
+        (or to `discard_nwbfile_update` if the conversion fails).
+    """
+    update_plan.in_place = False
+    update_path = update_plan.update_path
+    if not clone_file(update_plan.nwbfile_path, update_path):
+        if copy_if_no_clone:
+            # copy_file_range (Linux) may still copy server-side on network filesystems
+            place_file(update_plan.nwbfile_path, update_path, strategy="reflink" if sys.platform == "linux" else "copy")
+        else:
+            update_plan.in_place = True
+            update_path = update_plan.update_path
+    io = None
+    try:
+        mark_nwbfile_incomplete(update_path)
+        if update_plan.stale:
+            with h5py.File(update_path, "r+") as nwbfile:
+                for path in _locate_containers_to_remove(nwbfile, update_plan):
+                    del nwbfile[path]
+
+        io = NWBHDF5IO(str(update_path), mode="a")
+        return io.read()
+    except BaseException:
+        if io is not None:
+            io.close()
+        if not update_plan.in_place:
+            update_path.unlink(missing_ok=True)
+        raise
+
+
+def write_updated_nwbfile(
+    nwbfile: NWBFile,
+    backend_configuration: BackendConfiguration,
+    update_plan: IncrementalUpdatePlan,
+    interface_records: dict[str, dict],
+) -> None:
+    """
+    Write the containers added to an NWBFile from `read_nwbfile_for_update`, and replace the file with the copy.
+
+    The copy is closed whether the write succeeds or not; on failure it is removed and the file is left as it was.
+    Updated in place, the file is left marked incomplete on failure. Call `finalize_nwbfile` on the file afterwards.
+
+    Parameters
+    ----------
+    nwbfile : NWBFile
+        The NWBFile open in append mode.
+    backend_configuration : BackendConfiguration
+        From `get_default_backend_configuration(nwbfile, backend="hdf5")`, which covers the added datasets only.
+    update_plan : IncrementalUpdatePlan
+        The plan of the update.
+    interface_records : dict
+        Provenance record of the updated file (see `write_interface_provenance`).
+    """
+    update_path = update_plan.update_path
+    try:
+        io = nwbfile.read_io
+        try:
+            configure_backend(nwbfile=nwbfile, backend_configuration=backend_configuration)
+            io.write(nwbfile)
+        finally:
+            io.close()
+        write_interface_provenance(update_path, interface_records=interface_records)
+    except BaseException:
+        if not update_plan.in_place:
+            update_path.unlink(missing_ok=True)
+        raise
+    if not update_plan.in_place:
+        os.replace(update_path, update_plan.nwbfile_path)
+
+
+def discard_nwbfile_update(update_plan: IncrementalUpdatePlan, nwbfile: NWBFile | None = None) -> None:
+    """
+    Abandon an update started with `read_nwbfile_for_update`: close and remove the copy, leaving the file as it was.
+
+    An update in place cannot be undone: the file is closed and stays marked incomplete, to be converted again.
+
+    Parameters
+    ----------
+    update_plan : IncrementalUpdatePlan
+        The plan of the update.
+    nwbfile : NWBFile, optional
+        The NWBFile returned by `read_nwbfile_for_update`, if any.
+    """
+    if nwbfile is not None and nwbfile.read_io is not None:
+        nwbfile.read_io.close()
+    if not update_plan.in_place:
+        update_plan.update_path.unlink(missing_ok=True)
@@ -0,0 +1,68 @@
+"""Utilities for time intervals (stimulus presentations, epochs, trials)."""
+
+import numpy as np
+
+
+def find_overlapping_intervals(
+    start_times: np.ndarray, stop_times: np.ndarray, min_overlap: float = 0.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find all pairs of intervals that overlap by more than `min_overlap` seconds.
+
+    Sort-and-sweep: intervals are sorted by start time once, and each interval is only compared with the
+    intervals starting before it ends (found with ``np.searchsorted``). The cost is O(n log n + k) for n
+    intervals and k candidate pairs, instead of O(n²) for the pairwise comparison.
+
+    Two intervals overlap when ``start_i < stop_j and start_j < stop_i``; their overlap duration is
+    ``min(stop_i, stop_j) - max(start_i, start_j)``. Intervals with NaN bounds never overlap.
+
+    Parameters
+    ----------
+    start_times : np.ndarray
+        Start time of each interval, in seconds (any order).
+    stop_times : np.ndarray
+        Stop time of each interval, in seconds.
+    min_overlap : float, default: 0.0
+        Only pairs overlapping by strictly more than this duration are returned.
+
+    Returns
+    -------
+    pairs : np.ndarray
+        Array of shape (k, 2) with the original indices (i, j), i < j, of each overlapping pair,
+        sorted lexicographically.
+    overlap_durations : np.ndarray
+        Overlap duration of each pair, in seconds.
+    """
+    start_times = np.asarray(start_times, dtype=np.float64)
+    stop_times = np.asarray(stop_times, dtype=np.float64)
+    if start_times.shape != stop_times.shape or start_times.ndim != 1:
+        raise ValueError(
+            f"start_times and stop_times must be 1D arrays of equal length, "
+            f"got shapes {start_times.shape} and {stop_times.shape}."
+        )
+
+    order = np.argsort(start_times, kind="stable")
+    sorted_starts = start_times[order]
+    sorted_stops = stop_times[order]
+
+    # Candidates of sorted interval p are the intervals after it that start before it stops
+    candidate_ends = np.searchsorted(sorted_starts, sorted_stops, side="left")
+    candidate_counts = np.maximum(candidate_ends - np.arange(len(order)) - 1, 0)
+    first_positions = np.repeat(np.arange(len(order)), candidate_counts)
+    offsets = np.arange(candidate_counts.sum()) - np.repeat(
+        np.cumsum(candidate_counts) - candidate_counts, candidate_counts
+    )
+    second_positions = first_positions + 1 + offsets
+
+    first_indices = order[first_positions]
+    second_indices = order[second_positions]
+    first_starts, first_stops = start_times[first_indices], stop_times[first_indices]
+    second_starts, second_stops = start_times[second_indices], stop_times[second_indices]
+
+    overlap_durations = np.minimum(first_stops, second_stops) - np.maximum(first_starts, second_starts)
+    is_overlapping = (first_starts < second_stops) & (second_starts < first_stops) & (overlap_durations > min_overlap)
+
+    pairs = np.sort(np.column_stack([first_indices, second_indices])[is_overlapping], axis=1)
+    overlap_durations = overlap_durations[is_overlapping]
+    pair_order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    return pairs[pair_order], overlap_durations[pair_order]
@@ -0,0 +1,202 @@
+"""Opt-in memory profiling of conversion steps: peak RSS, RSS change per step and top allocation sites."""
+
+import logging
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator
+
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 0.05
+DEFAULT_TOP_ALLOCATIONS = 10
+# Frames kept per traced allocation, so that allocations inside numpy/h5py are traced back to the caller
+DEFAULT_TRACEBACK_FRAMES = 8
+
+
+def read_rss_bytes() -> int | None:
+    """Return the resident set size of this process in bytes, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as file:
+            resident_pages = int(file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryProfiler:
+    """
+    Measure the memory used by named steps of a conversion (e.g. the add_to_nwbfile of each interface).
+
+    While a step runs, a background thread samples the resident memory (RSS) of the process, giving the
+    peak of the step and of all steps (the session peak used to size instances). Optionally, tracemalloc
+    traces the Python allocations of each step (numpy arrays included) and reports the source lines that
+    allocated the most memory still alive at its end. Tracing slows the step down noticeably, so it is only
+    active during measured steps.
+
+    Steps must run one after the other: the RSS of a process cannot be attributed to concurrent steps.
+
+    Examples
+    --------
+    >>> memory_profiler = MemoryProfiler(trace_allocations=True)
+    >>> with memory_profiler.measure("WheelPositionInterface"):
+    ...     interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata)
+    >>> memory_profiler.report()["peak_rss_bytes"]
+    """
+
+    def __init__(
+        self,
+        sample_interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS,
+        trace_allocations: bool = False,
+        top_allocations: int = DEFAULT_TOP_ALLOCATIONS,
+        traceback_frames: int = DEFAULT_TRACEBACK_FRAMES,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        sample_interval_seconds : float, default: 0.05
+            Interval between two RSS samples; shorter spikes may be missed.
+        trace_allocations : bool, default: False
+            Trace Python allocations with tracemalloc and report the top allocation sites of each step.
+        top_allocations : int, default: 10
+            Number of allocation sites reported per step.
+        traceback_frames : int, default: 8
+            Number of frames stored per traced allocation and reported with each site.
+        """
+        if sample_interval_seconds <= 0:
+            raise ValueError(f"sample_interval_seconds must be positive, got {sample_interval_seconds}.")
+        if read_rss_bytes() is None:
+            raise RuntimeError("Memory profiling reads the RSS from /proc/self/statm, which is not available here.")
+        self.sample_interval_seconds = sample_interval_seconds
+        self.trace_allocations = trace_allocations
+        self.top_allocations = top_allocations
+        self.traceback_frames = traceback_frames
+        self.steps = {}
+
+        self._lock = threading.Lock()
+        self._step_peak_rss_bytes = 0
+
+    def _observe(self) -> int:
+        rss_bytes = read_rss_bytes()
+        with self._lock:
+            self._step_peak_rss_bytes = max(self._step_peak_rss_bytes, rss_bytes)
+        return rss_bytes
+
+    def _sample(self, stop_event: threading.Event) -> None:
+        while not stop_event.wait(self.sample_interval_seconds):
+            self._observe()
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """
+        Measure the enclosed step and store its figures in `steps` under `name`.
+
+        Parameters
+        ----------
+        name : str
+            Name of the step, e.g. the interface name.
+        """
+        with self._lock:
+            self._step_peak_rss_bytes = 0
+        rss_before_bytes = self._observe()
+
+        started_tracing = False
+        snapshot_before = None
+        if self.trace_allocations:
+            if tracemalloc.is_tracing():
+                # Traced by someone else: only report what changed during the step
+                snapshot_before = tracemalloc.take_snapshot()
+            else:
+                tracemalloc.start(self.traceback_frames)
+                started_tracing = True
+            tracemalloc.reset_peak()
+
+        stop_event = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop_event,), name="ibl-memory-sampler", daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop_event.set()
+            sampler.join()
+            rss_after_bytes = self._observe()
+            step = {
+                "rss_before_bytes": rss_before_bytes,
+                "rss_after_bytes": rss_after_bytes,
+                "rss_delta_bytes": rss_after_bytes - rss_before_bytes,
+                "peak_rss_bytes": self._step_peak_rss_bytes,
+                "peak_rss_increase_bytes": self._step_peak_rss_bytes - rss_before_bytes,
+            }
+            if self.trace_allocations:
+                step["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                step["top_allocations"] = self._top_allocation_sites(snapshot_before)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.steps[name] = step
+
+    def _top_allocation_sites(self, snapshot_before: tracemalloc.Snapshot | None) -> list[dict]:
+        """
+        Return the call stacks holding the most memory allocated during the step, largest first.
+
+        "site" is the line that allocated, "traceback" the calls leading to it (most recent last).
+        """
+        # Leave out the bookkeeping of tracemalloc and of the sampler thread
+        exclude_profiling = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, threading.__file__),
+        )
+        snapshot = tracemalloc.take_snapshot().filter_traces(exclude_profiling)
+        if snapshot_before is None:
+            statistics = snapshot.statistics("traceback")
+            sites = [(statistic.traceback, statistic.size, statistic.count) for statistic in statistics]
+        else:
+            statistics = snapshot.compare_to(snapshot_before.filter_traces(exclude_profiling), "traceback")
+            sites = [(statistic.traceback, statistic.size_diff, statistic.count_diff) for statistic in statistics]
+        return [
+            {
+                "site": f"{traceback[-1].filename}:{traceback[-1].lineno}",
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in traceback],
+                "size_bytes": size_bytes,
+                "count": count,
+            }
+            for traceback, size_bytes, count in sites[: self.top_allocations]
+        ]
+
+    def report(self) -> dict:
+        """
+        Return the figures of the measured steps.
+
+        Returns
+        -------
+        dict
+            "peak_rss_bytes" (highest RSS over all steps), "peak_step" (the step reaching it) and "steps",
+            mapping each step to its RSS before and after, delta, peak and peak increase, plus its traced peak
+            and "top_allocations" (site, traceback, size_bytes, count) when allocations are traced.
+        """
+        peak_step = max(self.steps, key=lambda name: self.steps[name]["peak_rss_bytes"], default=None)
+        return {
+            "peak_rss_bytes": self.steps[peak_step]["peak_rss_bytes"] if peak_step is not None else None,
+            "peak_step": peak_step,
+            "sample_interval_seconds": self.sample_interval_seconds,
+            "steps": dict(self.steps),
+        }
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        """Log the peak RSS and the RSS delta and peak of each step."""
+        report = self.report()
+        if report["peak_step"] is None:
+            return
+        logger.info(f"Peak RSS: {report['peak_rss_bytes'] / 1024**3:.2f} GB (during {report['peak_step']})")
+        for name, step in report["steps"].items():
+            logger.info(
+                f"  [{name}] RSS delta {step['rss_delta_bytes'] / 1024**2:+.0f} MB, "
+                f"peak {step['peak_rss_bytes'] / 1024**3:.2f} GB (+{step['peak_rss_increase_bytes'] / 1024**2:.0f} MB)"
+            )
+            for allocation in step.get("top_allocations", [])[:3]:
+                logger.info(f"      {allocation['size_bytes'] / 1024**2:.1f} MB at {allocation['site']}")
+
+
+def measure_memory(memory_profiler: MemoryProfiler | None, name: str) -> ContextManager:
+    """Return `memory_profiler.measure(name)`, or a context doing nothing when profiling is disabled (None)."""
+    if memory_profiler is None:
+        return nullcontext()
+    return memory_profiler.measure(name)
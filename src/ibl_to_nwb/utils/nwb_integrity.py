@@ -0,0 +1,206 @@
+"""Fast integrity checks of written NWB files, to decide whether an existing file can be kept.
+
+After `configure_and_write_nwbfile`, `finalize_nwbfile` sets a completion marker (a unique token in a root
+attribute), the last change made to the file, then writes a sidecar manifest next to it
+(``<name>.nwb.manifest.json``) holding the file size and mtime, the token, and the shape, dtype and checksum of
+every dataset. A checksum covers the whole dataset when it is small, and its first and last blocks otherwise,
+which are the ones missing from a truncated or partial write.
+
+`validate_nwbfile_integrity` checks a file against its manifest with h5py only: it does not build the pynwb
+object graph, and reads a few blocks per dataset at most, so it takes milliseconds even on raw files of
+hundreds of GB.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+COMPLETION_MARKER_ATTRIBUTE = "ibl_to_nwb_write_complete"
+MANIFEST_FORMAT_VERSION = 1
+# Datasets up to this size are checksummed whole; larger ones by their first and last blocks of about this size
+CHECKSUM_SAMPLE_BYTES = 1024**2
+# Root groups and datasets every NWB file has
+REQUIRED_ROOT_GROUPS = ("acquisition", "analysis", "general", "processing", "stimulus")
+REQUIRED_ROOT_DATASETS = ("identifier", "session_start_time", "file_create_date")
+
+
+def get_manifest_path(nwbfile_path: Path) -> Path:
+    """Return the path of the sidecar manifest of an NWB file."""
+    nwbfile_path = Path(nwbfile_path)
+    return nwbfile_path.with_name(f"{nwbfile_path.name}.manifest.json")
+
+
+def _block_bytes(block: np.ndarray) -> bytes:
+    if block.dtype.hasobject:
+        # Strings and object references: hash their values, not the addresses of the Python objects
+        return repr(block.tolist()).encode()
+    return np.ascontiguousarray(block).tobytes()
+
+
+def _dataset_checksum(dataset: h5py.Dataset) -> str:
+    """Return the checksum of a dataset: of its data when small, of its first and last blocks otherwise."""
+    checksum = hashlib.blake2b(digest_size=16)
+    checksum.update(f"{dataset.shape}{dataset.dtype}".encode())
+    if dataset.shape is None:  # Null dataspace
+        return checksum.hexdigest()
+    if dataset.ndim == 0 or dataset.size * dataset.dtype.itemsize <= CHECKSUM_SAMPLE_BYTES:
+        checksum.update(_block_bytes(np.asarray(dataset[()])))
+        return checksum.hexdigest()
+
+    # Whole chunks along the first axis, so each block decompresses as few chunks as possible
+    row_bytes = max(1, (dataset.size // dataset.shape[0]) * dataset.dtype.itemsize)
+    rows = dataset.chunks[0] if dataset.chunks else max(1, CHECKSUM_SAMPLE_BYTES // row_bytes)
+    rows = min(rows, dataset.shape[0])
+    checksum.update(_block_bytes(dataset[:rows]))
+    checksum.update(_block_bytes(dataset[dataset.shape[0] - rows :]))
+    return checksum.hexdigest()
+
+
+def _describe_datasets(nwbfile: h5py.File) -> dict[str, dict]:
+    datasets = {}
+
+    def describe(name: str, h5_object) -> None:
+        if isinstance(h5_object, h5py.Dataset):
+            datasets[f"/{name}"] = {
+                "shape": list(h5_object.shape) if h5_object.shape is not None else None,
+                "dtype": str(h5_object.dtype),
+                "checksum": _dataset_checksum(h5_object),
+            }
+
+    nwbfile.visititems(describe)
+    return datasets
+
+
+def _check_nwb_structure(nwbfile: h5py.File) -> None:
+    if "nwb_version" not in nwbfile.attrs:
+        raise ValueError("not an NWB file (no nwb_version attribute)")
+    missing = [name for name in REQUIRED_ROOT_GROUPS + REQUIRED_ROOT_DATASETS if name not in nwbfile]
+    if missing:
+        raise ValueError(f"missing the required NWB groups/datasets {missing}")
+
+
+def finalize_nwbfile(nwbfile_path: Path) -> Path:
+    """
+    Mark a fully written NWB file as complete and write its manifest; call it right after the write.
+
+    Parameters
+    ----------
+    nwbfile_path : Path
+        The NWB file, closed.
+
+    Returns
+    -------
+    Path
+        The manifest file.
+    """
+    nwbfile_path = Path(nwbfile_path)
+    completion_marker = f"{datetime.now(timezone.utc).isoformat()} {uuid.uuid4().hex}"
+    with h5py.File(nwbfile_path, "r+") as nwbfile:
+        datasets = _describe_datasets(nwbfile)
+        # Last change to the file: a file without it was not completely written
+        nwbfile.attrs[COMPLETION_MARKER_ATTRIBUTE] = completion_marker
+
+    file_stat = nwbfile_path.stat()
+    manifest = {
+        "format_version": MANIFEST_FORMAT_VERSION,
+        "nwbfile": nwbfile_path.name,
+        "size_bytes": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "completion_marker": completion_marker,
+        "datasets": datasets,
+    }
+    manifest_path = get_manifest_path(nwbfile_path)
+    temporary_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    temporary_path.write_text(json.dumps(manifest, indent=1))
+    os.replace(temporary_path, manifest_path)
+    return manifest_path
+
+
+def validate_nwbfile_integrity(nwbfile_path: Path, verify_checksums: bool = False) -> None:
+    """
+    Check that an NWB file was completely written and is unchanged since, without reading it with pynwb.
+
+    With a manifest (see `finalize_nwbfile`), the file must have the recorded size, the completion marker of
+    the manifest, and every recorded dataset with its shape and dtype, which catches truncated and partial
+    writes. Checksums are verified when `verify_checksums` is True, or when the mtime differs from the recorded
+    one (e.g. the file was copied or modified in place).
+
+    Files written before manifests existed have neither marker nor manifest; they are accepted if they open,
+    have the required NWB groups and the first and last blocks of every dataset can be read.
+
+    Parameters
+    ----------
+    nwbfile_path : Path
+        The NWB file.
+    verify_checksums : bool, default: False
+        Always verify the checksums of the datasets (reads up to two blocks per dataset).
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist.
+    ValueError
+        If the file is incomplete, truncated, or differs from its manifest; the message gives the reason.
+    """
+    nwbfile_path = Path(nwbfile_path)
+    if not nwbfile_path.is_file():
+        raise FileNotFoundError(f"NWB file not found: {nwbfile_path}")
+
+    manifest_path = get_manifest_path(nwbfile_path)
+    if not manifest_path.exists():
+        try:
+            with h5py.File(nwbfile_path, "r") as nwbfile:
+                _check_nwb_structure(nwbfile)
+                _describe_datasets(nwbfile)
+        except (OSError, KeyError, RuntimeError) as exception:
+            raise ValueError(f"cannot be read ({exception})") from exception
+        return
+
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except json.JSONDecodeError as exception:
+        raise ValueError(f"unreadable manifest {manifest_path.name} ({exception})") from exception
+    if manifest.get("format_version") != MANIFEST_FORMAT_VERSION:
+        raise ValueError(f"unsupported manifest format {manifest.get('format_version')}")
+
+    file_stat = nwbfile_path.stat()
+    if file_stat.st_size != manifest["size_bytes"]:
+        raise ValueError(f"size is {file_stat.st_size} bytes, {manifest['size_bytes']} when written")
+    verify_checksums = verify_checksums or file_stat.st_mtime_ns != manifest["mtime_ns"]
+
+    try:
+        with h5py.File(nwbfile_path, "r") as nwbfile:
+            completion_marker = nwbfile.attrs.get(COMPLETION_MARKER_ATTRIBUTE)
+            if isinstance(completion_marker, bytes):
+                completion_marker = completion_marker.decode()
+            if completion_marker != manifest["completion_marker"]:
+                raise ValueError("write not completed (completion marker missing or from another write)")
+            _check_nwb_structure(nwbfile)
+
+            for location, expected in manifest["datasets"].items():
+                dataset = nwbfile.get(location)
+                if not isinstance(dataset, h5py.Dataset):
+                    raise ValueError(f"dataset {location} is missing")
+                shape = list(dataset.shape) if dataset.shape is not None else None
+                if shape != expected["shape"] or str(dataset.dtype) != expected["dtype"]:
+                    raise ValueError(
+                        f"dataset {location} is {shape} {dataset.dtype}, {expected['shape']} {expected['dtype']} "
+                        "when written"
+                    )
+                if verify_checksums and _dataset_checksum(dataset) != expected["checksum"]:
+                    raise ValueError(f"dataset {location} differs from when it was written (checksum mismatch)")
+    except (OSError, KeyError, RuntimeError) as exception:
+        raise ValueError(f"cannot be read ({exception})") from exception
+
+
+def mark_nwbfile_incomplete(nwbfile_path: Path) -> None:
+    """Remove the completion marker of an NWB file about to be modified in place; `finalize_nwbfile` sets it back."""
+    with h5py.File(nwbfile_path, "r+") as nwbfile:
+        if COMPLETION_MARKER_ATTRIBUTE in nwbfile.attrs:
+            del nwbfile.attrs[COMPLETION_MARKER_ATTRIBUTE]
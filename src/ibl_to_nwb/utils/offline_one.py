@@ -0,0 +1,232 @@
+"""A ONE client serving a conversion from local files and a snapshot of Alyx records, without network access.
+
+The conversion reads data with ``list_datasets``, ``list_revisions``, ``load_object`` and ``load_dataset``, and
+metadata with ``alyx.rest`` (sessions, labs, subjects, insertions, trajectories). `OfflineONE` answers the former
+from the session folders of a ONE cache directory and the latter from a JSON snapshot of the records, recorded
+once with `save_alyx_snapshot` while online. Sessions keep their Alyx eids, so production sessions can be
+replayed (profiled, benchmarked, debugged) on a machine without access to Alyx.
+"""
+
+import copy
+import hashlib
+import json
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+from one.alf.cache import DATASETS_COLUMNS, SESSIONS_COLUMNS, default_cache
+from one.alf.path import ALFPath
+from one.api import ONE, One
+
+ALYX_SNAPSHOT_ENDPOINTS = ("sessions", "labs", "subjects", "insertions", "trajectories")
+# Field identifying a record in "read" queries, when not "id"
+_LOOKUP_FIELDS = {"labs": "name", "subjects": "nickname"}
+
+
+def save_alyx_snapshot(one: ONE, eids: list[str], file_path: Path) -> Path:
+    """
+    Record the Alyx records the conversion of `eids` reads, for `OfflineONE`.
+
+    Parameters
+    ----------
+    one : ONE
+        An online ONE client.
+    eids : list of str
+        Sessions to record.
+    file_path : Path
+        JSON file to write; endpoint name -> list of records.
+
+    Returns
+    -------
+    Path
+        The written file.
+    """
+    records = {endpoint: {} for endpoint in ALYX_SNAPSHOT_ENDPOINTS}
+    for eid in eids:
+        session = one.alyx.rest("sessions", "read", id=eid)
+        records["sessions"][session["id"]] = session
+        for lab in one.alyx.rest("labs", "list", name=session["lab"]):
+            records["labs"][lab["name"]] = lab
+        for subject in one.alyx.rest("subjects", "list", nickname=session["subject"]):
+            records["subjects"][subject["nickname"]] = subject
+        for insertion in one.alyx.rest("insertions", "list", session=eid):
+            records["insertions"][insertion["id"]] = insertion
+            for trajectory in one.alyx.rest("trajectories", "list", probe_insertion=insertion["id"]):
+                records["trajectories"][trajectory["id"]] = trajectory
+
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {endpoint: list(endpoint_records.values()) for endpoint, endpoint_records in records.items()}
+    file_path.write_text(json.dumps(snapshot, indent=2, default=str))
+    return file_path
+
+
+def _filter_key(value):
+    """Return the value a list filter compares to: the id of nested records (e.g. the session of a trajectory)."""
+    if isinstance(value, dict):
+        return value.get("id")
+    return value
+
+
+class OfflineAlyx:
+    """
+    Answer ``rest(url, "read", id=...)`` and ``rest(url, "list", field=value, ...)`` from recorded records.
+
+    Records are indexed by id, and by the value of each field the first time a list query filters on it, so that
+    repeated queries (one per probe, per interface) are dictionary lookups. Returned records are copies.
+    """
+
+    def __init__(self, records: dict[str, list[dict]]) -> None:
+        self.records = records
+        self._records_by_id = {
+            endpoint: {record[_LOOKUP_FIELDS.get(endpoint, "id")]: record for record in endpoint_records}
+            for endpoint, endpoint_records in records.items()
+        }
+        self._field_indexes = {}
+
+    def _field_index(self, endpoint: str, field: str) -> dict:
+        if (endpoint, field) not in self._field_indexes:
+            field_index = defaultdict(list)
+            for record in self.records[endpoint]:
+                value = _filter_key(record.get(field))
+                try:
+                    field_index[value].append(record)
+                except TypeError:  # Unhashable values (lists) are not filterable
+                    continue
+            self._field_indexes[(endpoint, field)] = dict(field_index)
+        return self._field_indexes[(endpoint, field)]
+
+    def rest(self, url: str, action: str, id: str | None = None, **filters) -> dict | list[dict]:
+        """
+        Return the record `id` ("read") or the records whose fields equal `filters` ("list").
+
+        Parameters
+        ----------
+        url : str
+            Endpoint, e.g. "sessions".
+        action : {"read", "list"}
+        id : str, optional
+            Record id (the name of labs, the nickname of subjects); a filter for "list".
+        **filters
+            Field values of the listed records, e.g. probe_insertion=pid.
+        """
+        if url not in self.records:
+            raise ValueError(f"The Alyx snapshot has no '{url}' records (endpoints: {sorted(self.records)}).")
+        if action == "read":
+            if id not in self._records_by_id[url]:
+                raise ValueError(f"The Alyx snapshot has no '{url}' record {id}.")
+            return copy.deepcopy(self._records_by_id[url][id])
+        if action != "list":
+            raise ValueError(f"Unsupported Alyx action '{action}' offline; use 'read' or 'list'.")
+
+        if id is not None:
+            filters["id"] = id
+        if not filters:
+            return copy.deepcopy(self.records[url])
+        (first_field, first_value), *other_filters = filters.items()
+        matches = self._field_index(url, first_field).get(first_value, [])
+        return [
+            copy.deepcopy(record)
+            for record in matches
+            if all(_filter_key(record.get(field)) == value for field, value in other_filters)
+        ]
+
+
+class OfflineONE(One):
+    """
+    ONE client for the sessions of an Alyx snapshot whose files are in a local ONE cache directory.
+
+    The session and dataset tables are built in memory from the session folders
+    (``{cache_dir}/{lab}/Subjects/{subject}/{date}/{number}``), under the eids of the snapshot, and are never
+    written to disk; cache tables already in `cache_dir` are ignored. Only files present locally can be loaded.
+
+    Examples
+    --------
+    >>> save_alyx_snapshot(one=ONE(), eids=[eid], file_path=cache_dir / "alyx_snapshot.json")  # online, once
+    >>> one = OfflineONE(cache_dir=cache_dir, alyx_snapshot=cache_dir / "alyx_snapshot.json")
+    >>> convert_processed_session(eid=eid, one=one)
+    """
+
+    def __init__(self, cache_dir: Path, alyx_snapshot: Path | dict) -> None:
+        """
+        Parameters
+        ----------
+        cache_dir : Path
+            ONE cache directory holding the session folders.
+        alyx_snapshot : Path or dict
+            File written by `save_alyx_snapshot`, or its content (endpoint name -> list of records).
+        """
+        if not isinstance(alyx_snapshot, dict):
+            alyx_snapshot = json.loads(Path(alyx_snapshot).read_text())
+        missing_endpoints = set(ALYX_SNAPSHOT_ENDPOINTS) - set(alyx_snapshot)
+        if missing_endpoints:
+            raise ValueError(f"The Alyx snapshot is missing the {sorted(missing_endpoints)} records.")
+        # "remote" only skips loading the cache tables from disk; the tables are built below and mode is local
+        super().__init__(cache_dir=Path(cache_dir), mode="remote")
+        self.mode = "local"
+        self.alyx = OfflineAlyx(alyx_snapshot)
+        self._build_cache()
+
+    def _session_path(self, session: dict) -> ALFPath:
+        subject = session["subject"]
+        if isinstance(subject, dict):
+            subject = subject["nickname"]
+        date = str(session["start_time"])[:10]
+        return ALFPath(self.cache_dir) / session["lab"] / "Subjects" / subject / date / f"{int(session['number']):03d}"
+
+    def _build_cache(self) -> None:
+        """Index the session folders of the snapshot's sessions as the ONE sessions and datasets tables."""
+        session_rows, dataset_rows = [], []
+        for session in self.alyx.records["sessions"]:
+            session_path = self._session_path(session)
+            if not session_path.is_dir():
+                raise FileNotFoundError(f"Session folder of {session['id']} not found: {session_path}")
+            projects = session.get("projects") or []
+            # ONE indexes its tables by UUID objects
+            eid = uuid.UUID(session["id"])
+            session_rows.append(
+                {
+                    "id": eid,
+                    "lab": session["lab"],
+                    "subject": session_path.parts[-3],
+                    "date": pd.Timestamp(session_path.parts[-2]).date(),
+                    "number": int(session["number"]),
+                    "task_protocol": session.get("task_protocol") or "",
+                    "projects": ",".join(projects) if isinstance(projects, list) else projects,
+                }
+            )
+            for dataset_path in session_path.iter_datasets(recursive=True):
+                relative_path = dataset_path.relative_to_session().as_posix()
+                dataset_rows.append(
+                    {
+                        "eid": eid,
+                        # Stable across rebuilds, as dataset ids of Alyx
+                        "id": uuid.UUID(bytes=hashlib.md5(f"{eid}/{relative_path}".encode()).digest(), version=4),
+                        "rel_path": relative_path,
+                        "file_size": dataset_path.stat().st_size,
+                        # No hash: a file is trusted if its size matches
+                        "hash": None,
+                        "exists": True,
+                        "qc": "NOT_SET",
+                    }
+                )
+
+        cache = default_cache(origin=str(self.cache_dir))
+        cache["sessions"] = pd.DataFrame(session_rows, columns=list(SESSIONS_COLUMNS)).astype(SESSIONS_COLUMNS)
+        cache["sessions"] = cache["sessions"].set_index("id").sort_index()
+        cache["datasets"] = pd.DataFrame(dataset_rows, columns=list(DATASETS_COLUMNS)).astype(DATASETS_COLUMNS)
+        cache["datasets"] = cache["datasets"].set_index(["eid", "id"]).sort_index()
+        self._cache = cache
+
+    def load_cache(self, tables_dir: Path | None = None, **kwargs) -> None:
+        """Rebuild the tables from the session folders (e.g. after files were added)."""
+        self._build_cache()
+
+    def save_cache(self, save_dir: Path | None = None, clobber: bool = False) -> None:
+        """Do nothing: the tables are derived from the folders and must not replace the cache directory's."""
+
+    def pid2eid(self, pid: str, query_type: str | None = None) -> tuple[str, str]:
+        """Return the session eid and probe name of a probe insertion of the snapshot."""
+        insertion = self.alyx.rest("insertions", "read", id=str(pid))
+        return insertion["session"], insertion["name"]
@@ -0,0 +1,128 @@
+"""Stream ragged (per-spike) unit columns from cluster-sorted spike arrays.
+
+Per-spike unit properties such as spike amplitudes are ragged columns: a flat ``VectorData`` holding the
+values of all units back to back, and a ``VectorIndex`` with the end offset of each unit. Passing them as
+object arrays of per-unit arrays (the SpikeInterface property route) materializes every unit as a separate
+array, then hdmf concatenates them again into the flat column, so the spike data is held two or three times.
+
+The spike arrays of each probe are already sorted by cluster (see ``group_spikes_by_cluster``), i.e. they *are*
+the flat column data in unit order. ``add_ragged_column_from_sorted_arrays`` writes them as-is: the
+``VectorIndex`` is built from the cluster offsets and the ``VectorData`` is a ``ConcatenatedArraysIterator``
+that reads one buffer at a time from the per-probe arrays during the HDF5 write.
+"""
+
+import numpy as np
+from hdmf.common import DynamicTable
+from neuroconv.tools.hdmf import GenericDataChunkIterator
+
+
+class ConcatenatedArraysIterator(GenericDataChunkIterator):
+    """Iterate over the concatenation of several 1D arrays without concatenating them in memory."""
+
+    def __init__(self, arrays: list[np.ndarray], scale: float = 1.0, **kwargs):
+        """
+        Parameters
+        ----------
+        arrays : list of np.ndarray
+            1D arrays, written back to back in this order (e.g. the cluster-sorted spike arrays of each probe).
+        scale : float, default: 1.0
+            Factor applied to every buffer as it is read (e.g. 1e6 for Volts to microvolts).
+        **kwargs
+            Passed to GenericDataChunkIterator (e.g. buffer_gb, chunk_mb, display_progress).
+            Defaults to a 0.1 GB buffer so peak memory stays independent of the number of spikes.
+        """
+        self.arrays = [np.asarray(array) for array in arrays]
+        if any(array.ndim != 1 for array in self.arrays):
+            raise ValueError("ConcatenatedArraysIterator only supports 1D arrays.")
+        self.scale = scale
+        self._array_offsets = np.cumsum([0] + [len(array) for array in self.arrays])
+        self._dtype = np.result_type(*self.arrays) if self.arrays else np.dtype("float64")
+        if "buffer_gb" not in kwargs and "buffer_shape" not in kwargs:
+            kwargs["buffer_gb"] = 0.1
+        super().__init__(**kwargs)
+
+    def __len__(self) -> int:
+        # Needed by DynamicTable.add_column to check the column length against the index
+        return int(self._array_offsets[-1])
+
+    def _get_data(self, selection: tuple[slice]) -> np.ndarray:
+        start = selection[0].start or 0
+        stop = selection[0].stop if selection[0].stop is not None else len(self)
+
+        data = np.empty(stop - start, dtype=self._dtype)
+        first_array = np.searchsorted(self._array_offsets, start, side="right") - 1
+        last_array = np.searchsorted(self._array_offsets, stop, side="left")
+        for array_index in range(first_array, last_array):
+            array_start = self._array_offsets[array_index]
+            local_start = max(start - array_start, 0)
+            local_stop = min(stop - array_start, len(self.arrays[array_index]))
+            output_start = array_start + local_start - start
+            data[output_start : output_start + local_stop - local_start] = self.arrays[array_index][
+                local_start:local_stop
+            ]
+        if self.scale != 1.0:
+            data *= self.scale
+        return data
+
+    def _get_dtype(self) -> np.dtype:
+        return self._dtype
+
+    def _get_maxshape(self) -> tuple:
+        return (len(self),)
+
+
+def add_ragged_column_from_sorted_arrays(
+    table: DynamicTable,
+    name: str,
+    description: str,
+    sorted_arrays: list[np.ndarray],
+    offsets: list[np.ndarray],
+    scale: float = 1.0,
+) -> None:
+    """
+    Add a ragged column to a table from per-group arrays already sorted by row.
+
+    Parameters
+    ----------
+    table : DynamicTable
+        Table to add the column to (e.g. the units table), with one row per entry of the concatenated offsets.
+    name : str
+        Column name.
+    description : str
+        Column description.
+    sorted_arrays : list of np.ndarray
+        Per-group flat arrays (e.g. per-probe spike amplitudes sorted by cluster), in table row order.
+    offsets : list of np.ndarray
+        Per-group row boundaries into the matching array, of length ``rows_in_group + 1`` and starting at 0
+        (``spike_offsets`` as returned by ``group_spikes_by_cluster``).
+    scale : float, default: 1.0
+        Factor applied to the values while writing (e.g. 1e6 for Volts to microvolts).
+    """
+    if len(sorted_arrays) != len(offsets):
+        raise ValueError(f"Got {len(sorted_arrays)} arrays for {len(offsets)} offset arrays.")
+
+    row_ends = []
+    values_before_group = 0
+    for sorted_array, group_offsets in zip(sorted_arrays, offsets):
+        if group_offsets[-1] != len(sorted_array):
+            raise ValueError(
+                f"Offsets end at {group_offsets[-1]} but the sorted array of column '{name}' has "
+                f"{len(sorted_array)} values."
+            )
+        row_ends.append(np.asarray(group_offsets[1:], dtype=np.int64) + values_before_group)
+        values_before_group += len(sorted_array)
+    row_ends = np.concatenate(row_ends) if row_ends else np.zeros(0, dtype=np.int64)
+    if len(row_ends) != len(table):
+        raise ValueError(f"Column '{name}' has {len(row_ends)} rows but table '{table.name}' has {len(table)}.")
+
+    if values_before_group == 0:
+        # hdmf only builds an index for an empty column from (empty) per-row lists
+        table.add_column(name=name, description=description, data=[[] for _ in range(len(row_ends))], index=True)
+        return
+
+    table.add_column(
+        name=name,
+        description=description,
+        data=ConcatenatedArraysIterator(arrays=sorted_arrays, scale=scale),
+        index=row_ends,
+    )
@@ -0,0 +1,169 @@
+"""Session-scoped cache of the ONE objects and datasets loaded by several interfaces."""
+
+import threading
+from typing import Any, Callable
+
+from brainbox.io.one import SpikeSortingLoader
+from one.api import ONE
+
+
+def _shallow_copy(value: Any) -> Any:
+    """Copy the containers handed out by the cache so that consumers can reassign keys without affecting others."""
+    if isinstance(value, tuple):
+        return tuple(_shallow_copy(item) for item in value)
+    if isinstance(value, dict):
+        # type(value)(value) keeps AlfBunch/Bunch attribute access working, unlike copy.copy
+        return type(value)(value)
+    return value
+
+
+class SessionDataCache:
+    """
+    Cache of loaded ONE data for one session, shared by the interfaces of a conversion.
+
+    Entries are keyed by ``(eid, object or dataset, collection, revision)`` and reference counted: each
+    consumer calls `retain` for the keys it will read before the first one is loaded, and `release` once it
+    is done (after ``add_to_nwbfile``). A file is therefore parsed once per session, and its data is dropped
+    as soon as the last consumer releases it. Loads of keys nobody retained are passed through without being
+    stored, so reading through the cache never keeps data alive longer than reading from ONE directly.
+
+    Consumers receive shallow copies of the cached containers (dicts, Bunches and tuples of them): reassigning
+    a key (e.g. stubbing ``wheel["timestamps"]``) is private to the consumer, but the arrays are shared and
+    must not be modified in place.
+
+    Examples
+    --------
+    >>> data_cache = SessionDataCache(one=one, eid=eid)
+    >>> key = data_cache.object_key(obj="wheel", collection="alf", revision="2025-05-06")
+    >>> data_cache.retain(key)  # once per consumer
+    >>> wheel = data_cache.load_object(obj="wheel", collection="alf", revision="2025-05-06")
+    >>> data_cache.release(key)  # once per consumer, the entry is dropped by the last one
+    """
+
+    def __init__(self, one: ONE, eid: str) -> None:
+        """
+        Parameters
+        ----------
+        one : ONE
+            ONE API instance used to load the data.
+        eid : str
+            Session ID of the cached data.
+        """
+        self.one = one
+        self.eid = eid
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = {}
+        self._reference_counts = {}
+        self._lock = threading.Lock()
+        # One lock per key, so that concurrent consumers of the same key parse it once
+        self._key_locks = {}
+
+    def object_key(self, obj: str, collection: str | None = None, revision: str | None = None) -> tuple:
+        """Return the cache key of `one.load_object(eid, obj, collection=collection, revision=revision)`."""
+        return (self.eid, obj, collection, revision)
+
+    def dataset_key(self, dataset: str, collection: str | None = None, revision: str | None = None) -> tuple:
+        """Return the cache key of `one.load_dataset(eid, dataset, collection=collection, revision=revision)`."""
+        return (self.eid, dataset, collection, revision)
+
+    def spike_sorting_key(self, probe_name: str, revision: str | None = None) -> tuple:
+        """Return the cache key of `SpikeSortingLoader.load_spike_sorting(revision=revision)` for a probe."""
+        return (self.eid, "spike_sorting", f"alf/{probe_name}", revision)
+
+    def retain(self, key: tuple) -> None:
+        """Register one more consumer of `key`; its data is kept until the matching `release`."""
+        with self._lock:
+            self._reference_counts[key] = self._reference_counts.get(key, 0) + 1
+
+    def release(self, key: tuple) -> None:
+        """
+        Unregister one consumer of `key`, dropping the data when it was the last one.
+
+        Raises
+        ------
+        ValueError
+            If `key` has no registered consumer.
+        """
+        with self._lock:
+            reference_count = self._reference_counts.get(key, 0)
+            if reference_count == 0:
+                raise ValueError(f"Cannot release {key}: it has no registered consumer.")
+            if reference_count > 1:
+                self._reference_counts[key] = reference_count - 1
+                return
+            del self._reference_counts[key]
+            self._entries.pop(key, None)
+            self._key_locks.pop(key, None)
+
+    def get(self, key: tuple, loader: Callable[[], Any]) -> Any:
+        """
+        Return the data of `key`, calling `loader` if it is not cached yet.
+
+        Parameters
+        ----------
+        key : tuple
+            Cache key, built with `object_key`, `dataset_key` or `spike_sorting_key`.
+        loader : callable
+            Function without arguments loading the data.
+
+        Returns
+        -------
+        Any
+            A shallow copy of the cached data (see class docstring).
+        """
+        if key[0] != self.eid:
+            raise ValueError(f"Key {key} does not belong to session {self.eid}.")
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return _shallow_copy(self._entries[key])
+            value = loader()
+            with self._lock:
+                self.misses += 1
+                if self._reference_counts.get(key, 0) > 0:
+                    self._entries[key] = value
+                else:
+                    self._key_locks.pop(key, None)
+        return _shallow_copy(value)
+
+    def load_object(self, obj: str, collection: str | None = None, revision: str | None = None) -> Any:
+        """Cached `one.load_object` for this session."""
+        return self.get(
+            key=self.object_key(obj=obj, collection=collection, revision=revision),
+            loader=lambda: self.one.load_object(id=self.eid, obj=obj, collection=collection, revision=revision),
+        )
+
+    def load_dataset(self, dataset: str, collection: str | None = None, revision: str | None = None) -> Any:
+        """Cached `one.load_dataset` for this session."""
+        return self.get(
+            key=self.dataset_key(dataset=dataset, collection=collection, revision=revision),
+            loader=lambda: self.one.load_dataset(
+                id=self.eid, dataset=dataset, collection=collection, revision=revision
+            ),
+        )
+
+    def load_spike_sorting(self, spike_sorting_loader: SpikeSortingLoader, revision: str | None = None) -> tuple:
+        """Cached `spike_sorting_loader.load_spike_sorting(revision=revision)`, returning (spikes, clusters, channels)."""
+        return self.get(
+            key=self.spike_sorting_key(probe_name=spike_sorting_loader.pname, revision=revision),
+            loader=lambda: spike_sorting_loader.load_spike_sorting(revision=revision),
+        )
+
+    def clear(self) -> None:
+        """Drop all cached data and consumer registrations."""
+        with self._lock:
+            self._entries.clear()
+            self._reference_counts.clear()
+            self._key_locks.clear()
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
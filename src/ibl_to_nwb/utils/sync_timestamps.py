@@ -0,0 +1,136 @@
+"""Lazy probe-to-session timestamps for raw ephys streams.
+
+IBL aligns every probe clock to the session main clock with a piecewise-linear sync model
+(``raw_ephys_data/probeXX/_spikeglx_*.timestamps.npy``) exposed through
+``SpikeSortingLoader.samples2times()``. Evaluating that model on ``np.arange(num_samples)`` for a
+~1.5 h AP stream allocates more than 1 GB of float64 per probe. The helpers here keep only the sync
+model in memory and either generate timestamps one buffer at a time during the HDF5 write, or
+summarize the model as ``starting_time`` + ``rate`` when its deviation from a straight line is
+within a tolerance.
+"""
+
+import numpy as np
+from brainbox.io.one import SpikeSortingLoader
+from neuroconv.tools.hdmf import GenericDataChunkIterator
+
+
+class SyncModelTimestampsIterator(GenericDataChunkIterator):
+    """Generate aligned timestamps for a raw ephys stream chunk by chunk from the probe sync model."""
+
+    def __init__(
+        self,
+        spike_sorting_loader: SpikeSortingLoader,
+        num_samples: int,
+        sampling_frequency: float,
+        **kwargs,
+    ):
+        """
+        Parameters
+        ----------
+        spike_sorting_loader : SpikeSortingLoader
+            Loader of the probe whose sync model maps stream samples to session seconds.
+        num_samples : int
+            Number of samples in the stream (length of the timestamps dataset).
+        sampling_frequency : float
+            Sampling frequency of the stream in Hz (30 kHz for AP, 2.5 kHz for LF).
+        **kwargs
+            Passed to GenericDataChunkIterator (e.g. buffer_gb, chunk_mb, display_progress).
+            Defaults to a 0.1 GB buffer so peak memory stays independent of recording length.
+        """
+        self.spike_sorting_loader = spike_sorting_loader
+        self.num_samples = int(num_samples)
+        self.sampling_frequency = float(sampling_frequency)
+        if "buffer_gb" not in kwargs and "buffer_shape" not in kwargs:
+            kwargs["buffer_gb"] = 0.1
+        super().__init__(**kwargs)
+
+    def _get_data(self, selection: tuple[slice]) -> np.ndarray:
+        start = selection[0].start or 0
+        stop = selection[0].stop if selection[0].stop is not None else self.num_samples
+        sample_indices = np.arange(start, stop)
+        timestamps = self.spike_sorting_loader.samples2times(
+            sample_indices, direction="forward", fs=self.sampling_frequency
+        )
+        return np.asarray(timestamps, dtype=np.float64)
+
+    def _get_dtype(self) -> np.dtype:
+        return np.dtype("float64")
+
+    def _get_maxshape(self) -> tuple:
+        return (self.num_samples,)
+
+
+def get_sync_breakpoints(spike_sorting_loader: SpikeSortingLoader) -> np.ndarray:
+    """
+    Return the breakpoints of the probe sync model.
+
+    Parameters
+    ----------
+    spike_sorting_loader : SpikeSortingLoader
+        Loader of the probe.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_breakpoints, 2): probe AP sample index, session time in seconds.
+    """
+    spike_sorting_loader._get_probe_info()
+    return np.asarray(spike_sorting_loader._sync["timestamps"], dtype=np.float64)
+
+
+def fit_linear_sync_model(
+    spike_sorting_loader: SpikeSortingLoader,
+    num_samples: int,
+    sampling_frequency: float,
+    tolerance_seconds: float,
+) -> dict | None:
+    """
+    Summarize the probe sync model of a stream as a regular series if it is linear within a tolerance.
+
+    The sync model is piecewise linear, so its largest deviation from any straight line is reached at a
+    breakpoint or at one of the stream ends. Evaluating the model at those points is therefore enough
+    to bound the error over every sample of the stream.
+
+    Parameters
+    ----------
+    spike_sorting_loader : SpikeSortingLoader
+        Loader of the probe whose sync model maps stream samples to session seconds.
+    num_samples : int
+        Number of samples in the stream.
+    sampling_frequency : float
+        Sampling frequency of the stream in Hz.
+    tolerance_seconds : float
+        Maximum allowed absolute difference between the sync model and the regular series.
+
+    Returns
+    -------
+    dict or None
+        None if the drift exceeds the tolerance, otherwise:
+        - "starting_time": aligned time of the first sample in seconds
+        - "rate": effective sampling rate on the session clock in Hz
+        - "max_residual_seconds": largest deviation of the regular series from the sync model
+        - "breakpoints": the sync model breakpoints (see `get_sync_breakpoints`)
+    """
+    breakpoints = get_sync_breakpoints(spike_sorting_loader)
+
+    # Breakpoints are expressed in AP samples; rescale to this stream's samples (identity for AP)
+    ap_sampling_frequency = float(spike_sorting_loader._sync.get("fs", sampling_frequency))
+    breakpoint_samples = breakpoints[:, 0] * sampling_frequency / ap_sampling_frequency
+    breakpoint_samples = breakpoint_samples[(breakpoint_samples > 0) & (breakpoint_samples < num_samples - 1)]
+    sample_indices = np.unique(np.concatenate([[0, num_samples - 1], np.round(breakpoint_samples)]))
+
+    aligned_times = np.asarray(
+        spike_sorting_loader.samples2times(sample_indices, direction="forward", fs=sampling_frequency),
+        dtype=np.float64,
+    )
+    slope, intercept = np.polyfit(sample_indices, aligned_times, deg=1)
+    max_residual_seconds = float(np.max(np.abs(aligned_times - (slope * sample_indices + intercept))))
+    if max_residual_seconds > tolerance_seconds:
+        return None
+
+    return {
+        "starting_time": float(intercept),
+        "rate": float(1.0 / slope),
+        "max_residual_seconds": max_residual_seconds,
+        "breakpoints": breakpoints,
+    }
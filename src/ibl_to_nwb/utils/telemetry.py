@@ -0,0 +1,209 @@
+"""Timing spans of the conversion, emitted as JSON lines.
+
+A span measures one unit of work (a phase of `convert_session`, the download or the `add_to_nwbfile` of an
+interface, the write of the NWB file) and is written as one JSON object per line when it ends:
+
+    {"name": "add_to_nwbfile", "category": "interface", "interface": "IblSortingInterface",
+     "eid": "...", "span_id": "...", "parent_id": "...", "pid": 123, "thread": "MainThread",
+     "start": 1718000000.0, "wall_seconds": 12.3, "cpu_seconds": 11.9, "thread_cpu_seconds": 11.8,
+     "bytes_read": 1048576, "bytes_written": 0, "status": "ok", "items": 812}
+
+``cpu_seconds`` and the byte counters are process-wide (``time.process_time`` and the ``rchar``/``wchar``
+syscall counters of ``/proc/self/io``, which include network and page-cache I/O), so they also count the work
+of concurrent spans; ``thread_cpu_seconds`` only counts the thread running the span. The byte counters are
+None where ``/proc`` is not available.
+
+Spans are only written while a recorder is active (see `SpanRecorder` and `set_span_recorder`); otherwise
+`span` costs a couple of clock reads. The recorder is process-global, so spans of worker threads and of
+forked lanes go to the same file (each line is a single append).
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+_active_recorder = None
+_span_counter = itertools.count()
+_thread_state = threading.local()
+
+
+class SpanRecorder:
+    """Append spans as JSON lines to a file, adding the same context fields (e.g. the session eid) to each."""
+
+    def __init__(self, path: Path, **context: Any) -> None:
+        """
+        Parameters
+        ----------
+        path : Path
+            JSON lines file; created if needed, appended to otherwise.
+        **context
+            Fields added to every span (e.g. eid="...").
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.context = context
+        self._lock = threading.Lock()
+
+    def emit(self, record: dict) -> None:
+        """Append one span record."""
+        line = json.dumps({**self.context, **record}, default=str) + "\n"
+        with self._lock:
+            # Reopened per span so that forked processes never share a buffered file object
+            with open(self.path, "a") as file:
+                file.write(line)
+
+
+def set_span_recorder(recorder: SpanRecorder | None) -> SpanRecorder | None:
+    """Make `recorder` receive all spans (None disables them); returns the previously active recorder."""
+    global _active_recorder
+    previous_recorder = _active_recorder
+    _active_recorder = recorder
+    return previous_recorder
+
+
+def get_span_recorder() -> SpanRecorder | None:
+    """Return the active recorder, if any."""
+    return _active_recorder
+
+
+class Span:
+    """An open span; `record` adds counts or attributes (e.g. items=...) written when the span ends."""
+
+    def __init__(self, name: str, category: str, attributes: dict) -> None:
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = f"{os.getpid()}-{next(_span_counter)}"
+
+    def record(self, **values: Any) -> None:
+        """Set fields of the span record, e.g. ``span.record(items=len(units))``."""
+        self.attributes.update(values)
+
+
+def _read_io_counters() -> tuple[int | None, int | None]:
+    """Return the bytes read and written by this process through syscalls, or (None, None) without /proc."""
+    try:
+        with open("/proc/self/io") as file:
+            counters = dict(line.split(": ") for line in file.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+@contextmanager
+def span(name: str, category: str = "span", **attributes: Any) -> Iterator[Span]:
+    """
+    Measure the enclosed block as a span and emit it to the active recorder when it ends.
+
+    Parameters
+    ----------
+    name : str
+        Span name, e.g. the phase ("download") or the operation ("add_to_nwbfile").
+    category : str, default: "span"
+        Kind of span, e.g. "phase", "interface" or "write".
+    **attributes
+        Fields of the span record, e.g. interface="WheelPositionInterface".
+
+    Yields
+    ------
+    Span
+        The open span, to `record` item counts.
+
+    Examples
+    --------
+    >>> with span("add_to_nwbfile", category="interface", interface=interface_name) as current_span:
+    ...     interface.add_to_nwbfile(nwbfile=nwbfile, metadata=metadata)
+    ...     current_span.record(items=len(nwbfile.units))
+    """
+    current_span = Span(name=name, category=category, attributes=attributes)
+    if _active_recorder is None:
+        yield current_span
+        return
+
+    stack = getattr(_thread_state, "stack", None)
+    if stack is None:
+        stack = _thread_state.stack = []
+    parent_id = stack[-1] if stack else None
+    stack.append(current_span.span_id)
+
+    start = time.time()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    thread_cpu_start = time.thread_time()
+    read_start, written_start = _read_io_counters()
+    status, error = "ok", None
+    try:
+        yield current_span
+    except BaseException as exception:
+        status, error = "error", f"{type(exception).__name__}: {exception}"
+        raise
+    finally:
+        stack.pop()
+        read_end, written_end = _read_io_counters()
+        recorder = _active_recorder
+        if recorder is not None:
+            recorder.emit(
+                {
+                    "name": name,
+                    "category": category,
+                    "span_id": current_span.span_id,
+                    "parent_id": parent_id,
+                    "pid": os.getpid(),
+                    "thread": threading.current_thread().name,
+                    "start": start,
+                    "wall_seconds": time.perf_counter() - wall_start,
+                    "cpu_seconds": time.process_time() - cpu_start,
+                    "thread_cpu_seconds": time.thread_time() - thread_cpu_start,
+                    "bytes_read": None if read_start is None else read_end - read_start,
+                    "bytes_written": None if written_start is None else written_end - written_start,
+                    "status": status,
+                    "error": error,
+                    **current_span.attributes,
+                }
+            )
+
+
+def summarize_dataset_configurations(backend_configuration: Any, largest: int = 10) -> dict:
+    """
+    Summarize the datasets about to be written, for the attributes of a write span.
+
+    The HDF5 backend writes all datasets in a single ``io.write`` call, so the write span covers them
+    together; its record carries the per-dataset sizes instead, to relate the write time to what was written.
+
+    Parameters
+    ----------
+    backend_configuration : HDF5BackendConfiguration
+        neuroconv backend configuration of the NWBFile (``dataset_configurations`` by location).
+    largest : int, default: 10
+        Number of datasets listed individually, largest first.
+
+    Returns
+    -------
+    dict
+        "datasets" (count), "uncompressed_bytes" (total) and "largest_datasets" (location, shape,
+        uncompressed bytes and chunk shape of each).
+    """
+    datasets = []
+    for location, dataset_configuration in backend_configuration.dataset_configurations.items():
+        number_of_elements = 1
+        for axis_length in dataset_configuration.full_shape:
+            number_of_elements *= axis_length
+        datasets.append(
+            {
+                "location": location,
+                "shape": list(dataset_configuration.full_shape),
+                "uncompressed_bytes": number_of_elements * dataset_configuration.dtype.itemsize,
+                "chunk_shape": list(dataset_configuration.chunk_shape or []),
+            }
+        )
+    datasets.sort(key=lambda dataset: dataset["uncompressed_bytes"], reverse=True)
+    return {
+        "datasets": len(datasets),
+        "uncompressed_bytes": sum(dataset["uncompressed_bytes"] for dataset in datasets),
+        "largest_datasets": datasets[:largest],
+    }
@@ -0,0 +1,57 @@
+"""A ONE client proxy that can be shared by threads, for the concurrent prepare phase of the conversion."""
+
+import functools
+import threading
+from typing import Any
+
+# Attributes holding clients whose methods must be serialized too
+_NESTED_CLIENTS = ("alyx",)
+
+
+class ThreadSafeONE:
+    """
+    Proxy of a ONE client calling its methods (and those of its Alyx client) one at a time.
+
+    ONE is not thread-safe: loading and listing datasets update its cache tables (``_cache["datasets"]``), and
+    concurrent downloads of the same file write to the same cache path. Threads sharing a client through this
+    proxy wait for each other's calls to ONE. The lock is held for the whole call, including the download and
+    the parsing of the files by `load_object` / `load_dataset`, so only the work done outside ONE calls runs
+    concurrently. Attributes are read and written on the wrapped client.
+
+    Examples
+    --------
+    >>> one = ThreadSafeONE(ONE())
+    >>> interface = WheelPositionInterface(one=one, session=eid)  # prepared in a worker thread
+    """
+
+    def __init__(self, one: Any, lock: Any | None = None) -> None:
+        """
+        Parameters
+        ----------
+        one : ONE
+            The client to wrap.
+        lock : threading.RLock, optional
+            Lock serializing the calls; a new one by default. Nested clients share the lock of their parent.
+        """
+        object.__setattr__(self, "_one", one)
+        object.__setattr__(self, "_lock", lock or threading.RLock())
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._one, name)
+        if name in _NESTED_CLIENTS:
+            return ThreadSafeONE(attribute, lock=self._lock)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def serialized_call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+
+        return serialized_call
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._one, name, value)
+
+    def __repr__(self) -> str:
+        return f"ThreadSafeONE({self._one!r})"